@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from src.dimensionamiento.oe2.disenocargadoresev.session_index import load_sessions
+
 print("="*80)
 print("¿QUÉ SIGNIFICA REALMENTE 'VEHICLE_COUNT'?")
 print("="*80)
@@ -67,26 +69,24 @@ print(f"    Sockets × Horas = {38 * 8760} horas máximo posible")
 print(f"    Utilización: {(total_activations/(38*8760))*100:.1f}%")
 print()
 
-# El número de vehículos cargados es cuándo socket_active cambia de False a True
-print("[7] CONTANDO EVENTOS DE ARRIVAL (cambios de False→True):")
-unique_events = 0
-for i in range(38):
-    col = f'socket_{i:03d}_active'
-    if col in df.columns:
-        # Contar transiciones de 0→1 (arrival)
-        transitions = (df[col].astype(int).diff() > 0).sum()
-        unique_events += transitions
-        if i < 3 or i >= 36:
-            print(f"    socket_{i:03d}: ~{int(transitions)} arrivals/año")
-        elif i == 3:
-            print(f"    ...")
+# El número de vehículos cargados = sesiones: tramos activos de cada socket, separando
+# vehículos consecutivos (cambio de soc_arrival/soc_target) que False→True no detecta
+print("[7] CONTANDO SESIONES DE CARGA (índice de sesiones, cacheado junto al dataset):")
+sessions = load_sessions("data/oe2/chargers/chargers_ev_ano_2024_v3.csv")
+unique_events = len(sessions)
+for i in (0, 1, 2, 36, 37):
+    if i < sessions.n_sockets:
+        print(f"    socket_{i:03d}: ~{len(sessions.for_socket(i))} sesiones/año")
+    if i == 2:
+        print(f"    ...")
 
 print()
 print(f"[8] ESTIMACIÓN DE VEHÍCULOS CARGADOS POR EPISODIO (1 día):")
 vehicles_per_day = unique_events / 365
-print(f"    Total arrivals/año: {int(unique_events)}")
-print(f"    Promedio arrivals/día: {vehicles_per_day:.1f}")
-print(f"    ESTO COINCIDE CON LO QUE CARGAN LOS AGENTES (~28)")
+print(f"    Total sesiones/año: {int(unique_events)}")
+print(f"    Promedio sesiones/día: {vehicles_per_day:.1f}")
+print(f"    Por tipo: {sessions.count_by_type()}")
+print(f"    Sesiones 18-21h por tipo: {sessions.count_by_type(18, 21)}")
 print()
 
 print("="*80)
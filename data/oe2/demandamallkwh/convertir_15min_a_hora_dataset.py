@@ -41,6 +41,9 @@ from pathlib import Path
 
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from src.utils.energy_accounting import TariffSchedule, account_flows
+
 # ════════════════════════════════════════════════════════════════════════════════════════
 # CONFIGURACIÓN GLOBAL
 # ════════════════════════════════════════════════════════════════════════════════════════
@@ -64,19 +67,13 @@ TARIFA_HFP_SOLES_KWH = 0.30  # Hora Fuera Punta (resto)
 HP_START_HORA = 18
 HP_END_HORA = 23
 
-
-# ════════════════════════════════════════════════════════════════════════════════════════
-# FUNCIONES AUXILIARES
-# ════════════════════════════════════════════════════════════════════════════════════════
-
-def is_hora_punta(hour: int) -> int:
-    """Determina si una hora es Hora Punta (1) o Fuera de Punta (0)."""
-    return 1 if HP_START_HORA <= hour < HP_END_HORA else 0
-
-
-def get_tarifa(hour: int) -> float:
-    """Retorna la tarifa según OSINERGMIN BT5A."""
-    return TARIFA_HP_SOLES_KWH if is_hora_punta(hour) else TARIFA_HFP_SOLES_KWH
+TARIFA_BT5A = TariffSchedule(
+    hp_soles_kwh=TARIFA_HP_SOLES_KWH,
+    hfp_soles_kwh=TARIFA_HFP_SOLES_KWH,
+    hp_start_hour=HP_START_HORA,
+    hp_end_hour=HP_END_HORA,
+    co2_kg_kwh=CO2_FACTOR_KG_KWH,
+)
 
 
 # ════════════════════════════════════════════════════════════════════════════════════════
@@ -143,11 +140,16 @@ df_hourly['datetime'] = pd.to_datetime(
     format='%Y-%m-%d %H:%M'
 )
 
-# --- Crear observables
-df_hourly['mall_co2_indirect_kg'] = df_hourly['mall_demand_kwh'] * CO2_FACTOR_KG_KWH
-df_hourly['is_hora_punta'] = df_hourly['hora'].apply(is_hora_punta)
-df_hourly['tarifa_soles_kwh'] = df_hourly['hora'].apply(get_tarifa)
-df_hourly['mall_cost_soles'] = df_hourly['mall_demand_kwh'] * df_hourly['tarifa_soles_kwh']
+# --- Crear observables (tarifa BT5A y CO2 vectorizados)
+acc = account_flows(
+    {'mall_demand_kwh': df_hourly['mall_demand_kwh'].to_numpy()},
+    TARIFA_BT5A,
+    hour_of_day=df_hourly['hora'].to_numpy(),
+)
+df_hourly['mall_co2_indirect_kg'] = acc.co2('mall_demand_kwh')
+df_hourly['is_hora_punta'] = acc.is_hp.astype(int)
+df_hourly['tarifa_soles_kwh'] = acc.tariff_soles_kwh
+df_hourly['mall_cost_soles'] = acc.cost('mall_demand_kwh')
 
 logger.info(f"✅ Observables creados:")
 logger.info(f"   ├─ mall_demand_kwh: {df_hourly['mall_demand_kwh'].sum():,.0f} kWh")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+What-if de Peak Shaving BESS sobre el limite de 2,000 kW
+========================================================
+Responde, sin simular hora a hora, cuanta potencia/energia BESS se necesita
+para recortar todos los picos sobre un umbral, y cuanto recorta un BESS dado.
+
+Uso:
+    python scripts/bess_peak_shaving_whatif.py
+    python scripts/bess_peak_shaving_whatif.py --thresholds 1800,2000,2200 --power 400 --capacity 1700
+    python scripts/bess_peak_shaving_whatif.py --sizes 400x1700,900x5000 --out outputs/peak_whatif.csv
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.dimensionamiento.oe2.disenobess.bess_peak_shaving import PEAK_LIMIT_KW, PeakShavingEngine
+
+
+def _floats(text: str) -> list[float]:
+    return [float(v) for v in text.split(",") if v.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="What-if de peak shaving BESS (curvas de excedencia)")
+    parser.add_argument("--data", default="data/oe2/bess/bess_ano_2024.csv",
+                        help="Dataset BESS horario con mall_demand_kwh y ev_demand_kwh")
+    parser.add_argument("--subtract-pv", action="store_true",
+                        help="Usar carga neta de PV (Mall + EV - PV)")
+    parser.add_argument("--thresholds", default="1800,1900,2000,2100,2200,2400",
+                        help="Umbrales en kW separados por coma")
+    parser.add_argument("--power", type=float, default=400.0, help="Potencia BESS (kW)")
+    parser.add_argument("--capacity", type=float, default=1700.0, help="Capacidad BESS (kWh)")
+    parser.add_argument("--sizes", default="",
+                        help="Tamanos BESS adicionales 'PxE' separados por coma (p.ej. 400x1700,900x5000)")
+    parser.add_argument("--dod", type=float, default=0.80, help="Profundidad de descarga")
+    parser.add_argument("--eff-discharge", type=float, default=0.9747, help="Eficiencia de descarga")
+    parser.add_argument("--out", default="", help="CSV de salida opcional para la tabla por umbral")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    engine = PeakShavingEngine.from_bess_dataset(args.data, subtract_pv=args.subtract_pv)
+    t_build = time.perf_counter() - t0
+
+    print("=" * 70)
+    print("WHAT-IF PEAK SHAVING BESS")
+    print("=" * 70)
+    print(f"\n  Datos:            {args.data} ({len(engine.load_kw):,} h)")
+    print(f"  Pico maximo:      {engine.peak_kw:,.0f} kW")
+    print(f"  BESS referencia:  {args.power:,.0f} kW / {args.capacity:,.0f} kWh "
+          f"(DoD {args.dod:.0%}, eta {args.eff_discharge:.4f})")
+    print(f"  Precalculo:       {t_build * 1000:.1f} ms")
+
+    thresholds = np.array(_floats(args.thresholds))
+    t0 = time.perf_counter()
+    table = engine.sizing_table(thresholds, args.dod, args.eff_discharge, args.power, args.capacity)
+    t_query = time.perf_counter() - t0
+
+    print(f"\n{'Umbral':>8} {'Horas>':>7} {'Dias>':>6} {'Exceso':>12} {'P min':>9} {'E min':>10} {'Recortado':>12} {'Cobert.':>8}")
+    print("-" * 80)
+    for _, row in table.iterrows():
+        print(f"{row['threshold_kw']:>6,.0f}kW {int(row['hours_above']):>7} {int(row['days_above']):>6} "
+              f"{row['excess_energy_kwh']:>9,.0f}kWh {row['required_power_kw']:>7,.0f}kW "
+              f"{row['required_capacity_kwh']:>7,.0f}kWh {row['shaved_energy_kwh']:>9,.0f}kWh "
+              f"{row['coverage_percent']:>7.1f}%")
+    print(f"\n  Consulta: {t_query * 1000:.1f} ms para {len(thresholds)} umbrales")
+
+    sizes = [(args.power, args.capacity)]
+    for item in args.sizes.split(","):
+        if item.strip():
+            p, e = item.lower().split("x")
+            sizes.append((float(p), float(e)))
+    power = np.array([s[0] for s in sizes])
+    capacity = np.array([s[1] for s in sizes])
+    x_min = engine.min_threshold_kw(power, capacity, args.dod, args.eff_discharge)
+    shaved = engine.shaved_energy_kwh(PEAK_LIMIT_KW, power, capacity, args.dod, args.eff_discharge)
+    excess = float(engine.excess_energy_kwh(PEAK_LIMIT_KW))
+
+    print(f"\n  Por tamano BESS (limite {PEAK_LIMIT_KW:,.0f} kW):")
+    for (p, e), x, s in zip(sizes, x_min, shaved):
+        print(f"    {p:>6,.0f} kW / {e:>7,.0f} kWh -> umbral minimo sin excedencias {x:>7,.0f} kW | "
+              f"recorta {s:>10,.0f} kWh/ano ({100 * s / max(excess, 1):.1f}%)")
+
+    if args.out:
+        out_path = Path(args.out)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        table.to_csv(out_path, index=False)
+        print(f"\n[OK] Guardado: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
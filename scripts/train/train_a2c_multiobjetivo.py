@@ -4,6 +4,7 @@
 ENTRENAR A2C CON MULTIOBJETIVO REAL
 Entrenamiento INDIVIDUAL con datos OE2 reales (chargers, BESS, mall demand, solar)
 NO se usa ninguna formula de aproximacion - SOLO DATOS REALES
+Opcional: --demand-ensemble [DIR] muestrea una realizacion de demanda EV por episodio
 """
 from __future__ import annotations
 
@@ -16,6 +17,7 @@ if str(_PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(_PROJECT_ROOT))
 # =========================================================
 
+import argparse
 import json
 import logging
 import os
@@ -39,6 +41,9 @@ from src.dataset_builder_citylearn.rewards import (
     create_iquitos_reward_weights,
 )
 from src.agents.training_validation import validate_agent_config
+from src.dimensionamiento.oe2.disenocargadoresev.demand_ensemble import (
+    DEFAULT_ENSEMBLE_DIR, INDEX_NAME, DemandEnsemble,
+)
 
 # ===== CONSTANTES IQUITOS v5.3 (2026-02-14) CON COMUNICACION SISTEMA =====
 CO2_FACTOR_IQUITOS: float = 0.4521  # kg CO2/kWh (grid termico aislado)
@@ -2107,6 +2112,16 @@ def validate_a2c_sync() -> bool:
             all_ok = False
     print()
     return all_ok
+
+# El entrenamiento se ejecuta a nivel de modulo (bloque try de abajo): opciones CLI aqui
+_parser = argparse.ArgumentParser(description='Entrenamiento A2C multiobjetivo (datos reales OE2)')
+_parser.add_argument(
+    '--demand-ensemble', nargs='?', const=str(DEFAULT_ENSEMBLE_DIR), default=None,
+    metavar='DIR',
+    help='Muestrear una realizacion de demanda EV distinta por episodio (demand_ensemble.py). '
+         f'Sin ruta usa {DEFAULT_ENSEMBLE_DIR}; por defecto se usa la demanda fija del CSV.',
+)
+args = _parser.parse_args()
 try:
         print('[0] VALIDACION DE SINCRONIZACION A2C')
         print('-' * 80)
@@ -2436,6 +2451,22 @@ try:
         else:
             print(f"  [EV] ADVERTENCIA: {ev_chargers_path} no encontrado, usando solo demanda horaria")
 
+        # Ensamble multi-semilla de demanda EV (solo con --demand-ensemble)
+        demand_ensemble: DemandEnsemble | None = None
+        if args.demand_ensemble is not None:
+            ensemble_path = Path(args.demand_ensemble)
+            ensemble_index = ensemble_path if ensemble_path.suffix == '.json' else ensemble_path / INDEX_NAME
+            if not ensemble_index.exists():
+                raise FileNotFoundError(
+                    f"--demand-ensemble: no existe {ensemble_index}. "
+                    "Generarlo con demand_ensemble.py o quitar la opcion."
+                )
+            demand_ensemble = DemandEnsemble.open(ensemble_path)
+            print(f"  [EV] MODO DEMANDA ENSAMBLE: {len(demand_ensemble)} realizaciones (una por episodio, "
+                  f"CO2 directo derivado de cada realizacion) | Path: {ensemble_path}")
+        else:
+            print("  [EV] MODO DEMANDA FIJA: chargers CSV (usar --demand-ensemble para una realizacion por episodio)")
+
         # ====================================================================
         # CHARGER STATISTICS (5to dataset OE2) - potencia max/media por socket
         # ====================================================================
@@ -2563,7 +2594,8 @@ try:
                 ev_metrics: dict[str, np.ndarray] | None = None,
                 chargers_co2_data: dict[str, np.ndarray] | None = None,  # v7.0: CO2 directo EV
                 solar_co2_data: dict[str, np.ndarray] | None = None,     # v7.1: CO2 indirecto solar
-                max_steps: int = 8760
+                max_steps: int = 8760,
+                demand_ensemble: DemandEnsemble | None = None,           # Demanda EV por episodio
             ) -> None:
                 """Inicializa environment con TODOS los datos OE2 reales v7.1 (CO2 directo EV + indirecto BESS+Solar)."""
                 super().__init__()
@@ -2606,6 +2638,15 @@ try:
                 if len(self.solar_hourly) != self.HOURS_PER_YEAR:
                     raise ValueError(f"Solar: {len(self.solar_hourly)} != {self.HOURS_PER_YEAR}")
             
+                # ENSAMBLE DE DEMANDA EV (opcional): una realizacion por episodio, vista mmap sin leer CSV
+                self.demand_ensemble = demand_ensemble
+                self.demand_realization: int = -1
+                self._demand_rng = np.random.default_rng()
+                if demand_ensemble is not None and demand_ensemble.data.shape[1:] != self.chargers_hourly.shape:
+                    raise ValueError(
+                        f"Ensamble de demanda {demand_ensemble.data.shape[1:]} != chargers {self.chargers_hourly.shape}"
+                    )
+            
                 self.n_chargers = self.chargers_hourly.shape[1]
             
                 # Para tracking de totales (backwards compatibility)
@@ -2864,6 +2905,19 @@ try:
                 seed: int | None = None,
                 options: dict[str, Any] | None = None
             ) -> tuple[np.ndarray, dict[str, Any]]:
+                # Nueva realizacion de demanda EV por episodio (si hay ensamble)
+                if self.demand_ensemble is not None:
+                    if seed is not None:
+                        self._demand_rng = np.random.default_rng(seed)
+                    self.demand_realization, self.chargers_hourly = self.demand_ensemble.sample(self._demand_rng)
+                    # El CO2 directo sigue a la demanda muestreada (no a la fila fija del CSV)
+                    co2_motos, co2_taxis = self.demand_ensemble.direct_co2_kg(self.demand_realization)
+                    self.chargers_co2_data = {
+                        **self.chargers_co2_data,
+                        'co2_motos_kg': co2_motos,
+                        'co2_mototaxis_kg': co2_taxis,
+                        'co2_total_kg': co2_motos + co2_taxis,
+                    }
                 del seed, options
                 self.step_count = 0
                 self.episode_num += 1
@@ -3275,7 +3329,8 @@ try:
             ev_metrics=ev_data,                  # SOC, conteos, potencias EV
             chargers_co2_data=chargers_co2_data, # v7.0: CO2 directo EV (reemplaza gasolina)
             solar_co2_data=solar_co2_data,       # v7.1: CO2 indirecto solar (evita grid)
-            max_steps=HOURS_PER_YEAR
+            max_steps=HOURS_PER_YEAR,
+            demand_ensemble=demand_ensemble,     # Demanda EV distinta por episodio (opcional)
         )
         print('  OK Environment creado (v7.1 con TODOS los datos OE2)')
         print(f'    - Observation: {env.observation_space.shape} (156-dim)')
@@ -8,6 +8,9 @@ Entrenamiento de agente PPO con datos reales OE2 (Iquitos, Peru)
 - Datos: 38 sockets (19 chargers × 2), mall demand, BESS SOC, solar generation
 - Reward: Multiobjetivo (CO2 focus, solar self-consumption, EV satisfaction)
 - Optimizacion: GPU CUDA, batch normalization, gradient clipping
+- Opcional: --representative-year [NPZ] entrena con el ano comprimido en dias
+  representativos (K x 24 h/episodio); reward y KPIs se ponderan por hour_weight
+- Opcional: --demand-ensemble [DIR] muestrea una realizacion de demanda EV por episodio
 
 Referencias:
   [1] Schulman et al. (2017) "Proximal Policy Optimization Algorithms"
@@ -18,6 +21,7 @@ Referencias:
 """
 from __future__ import annotations
 
+import argparse
 import json
 import logging
 import os
@@ -52,6 +56,11 @@ from dataset_builder_citylearn.rewards import (
     create_iquitos_reward_weights,
 )
 from agents.training_validation import validate_agent_config
+from dimensionamiento.oe2.disenocargadoresev.demand_ensemble import DEFAULT_ENSEMBLE_DIR, INDEX_NAME, DemandEnsemble
+from dimensionamiento.oe2.balance_energetico.representative_year import (
+    DEFAULT_REPRESENTATIVE_YEAR_PATH,
+    RepresentativeYear,
+)
 
 # ============================================================================
 # CONFIGURACION BASICA - UTF-8 Encoding
@@ -496,7 +505,9 @@ class CityLearnEnvironment(Env):
         bess_soc: np.ndarray,
         charger_max_power_kw: Optional[np.ndarray] = None,
         charger_mean_power_kw: Optional[np.ndarray] = None,
-        max_steps: int = HOURS_PER_YEAR
+        max_steps: int = HOURS_PER_YEAR,
+        demand_ensemble: Optional[DemandEnsemble] = None,
+        representative_year: Optional[RepresentativeYear] = None,
     ):
         """
         Inicializa environment con datos OE2 reales.
@@ -511,6 +522,11 @@ class CityLearnEnvironment(Env):
             charger_max_power_kw: (38,) potencia maxima por socket desde chargers_real_statistics.csv
             charger_mean_power_kw: (38,) potencia media por socket desde chargers_real_statistics.csv
             max_steps: Duracion episodio en timesteps
+            demand_ensemble: Ensamble (K, 8760, 38) de demanda EV; si se indica, cada
+                reset muestrea una realizacion distinta en lugar de chargers_kw
+            representative_year: Ano comprimido (K dias representativos); si se indica,
+                cada episodio recorre solo sus K x 24 horas, el reward de cada hora se escala por
+                hour_weight / media(hour_weight) y el info incluye 'hour_weight'
         """
         super().__init__()
 
@@ -547,6 +563,17 @@ class CityLearnEnvironment(Env):
         if self.chargers_hourly.shape[0] != self.HOURS_PER_YEAR:
             raise ValueError(f"Chargers data must be {self.HOURS_PER_YEAR} hours, got {self.chargers_hourly.shape[0]}")
 
+        # ENSAMBLE DE DEMANDA EV (opcional): una realizacion por episodio, vista mmap sin leer CSV
+        self.demand_ensemble = demand_ensemble
+        self.demand_realization: int = -1
+        self._demand_rng = np.random.default_rng()
+        # CO2 directo (motos, mototaxis) de la realizacion activa; None = columnas del CSV
+        self.direct_co2_hourly: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        if demand_ensemble is not None and demand_ensemble.data.shape[1:] != self.chargers_hourly.shape:
+            raise ValueError(
+                f"Ensamble de demanda {demand_ensemble.data.shape[1:]} != chargers {self.chargers_hourly.shape}"
+            )
+
         # ====================================================================
         # CARGAR CO2 DATASETS UNA SOLA VEZ (evitar lectura en cada step)
         # ====================================================================
@@ -567,6 +594,18 @@ class CityLearnEnvironment(Env):
         self.bess_co2_df = pd.read_csv('data/processed/citylearn/iquitos_ev_mall/bess_ano_2024.csv')
 
         self.max_steps = self.HOURS_PER_YEAR  # [OK] FORZAR 8760 timesteps (episodios completos de 1 ano)
+
+        # ANO COMPRIMIDO (opcional): episodio = horas de los dias representativos, en orden
+        self.representative_year = representative_year
+        self.hour_schedule: Optional[np.ndarray] = None
+        self.hour_weights: Optional[np.ndarray] = None
+        self.reward_scale: Optional[np.ndarray] = None
+        if representative_year is not None:
+            self.hour_schedule = representative_year.hour_index
+            self.hour_weights = representative_year.hour_weights
+            # Reward por hora x dias que representa (media 1: misma escala que el ano completo)
+            self.reward_scale = (self.hour_weights / self.hour_weights.mean()).astype(np.float32)
+            self.max_steps = len(self.hour_schedule)
         self.n_chargers = self.chargers_hourly.shape[1]
 
         # Espacios (Gymnasium API)
@@ -622,6 +661,12 @@ class CityLearnEnvironment(Env):
         # Simplificacion: retornar dict vacio
         return {}
 
+    def _year_hour(self, step_idx: int) -> int:
+        """Hora del ano (0..8759) del paso del episodio (remapeada si hay ano comprimido)."""
+        if self.hour_schedule is not None:
+            return int(self.hour_schedule[step_idx % len(self.hour_schedule)])
+        return step_idx % self.HOURS_PER_YEAR
+
     def _make_observation(self, hour_idx: int) -> np.ndarray:
         """
         Crea observacion v5.3 (156-dim) con COMUNICACION COMPLETA del sistema.
@@ -637,7 +682,7 @@ class CityLearnEnvironment(Env):
         - Recibe senales de urgencia y oportunidad
         """
         obs = np.zeros(self.OBS_DIM, dtype=np.float32)
-        h = hour_idx % self.HOURS_PER_YEAR
+        h = self._year_hour(hour_idx)
         hour_24 = h % 24
         day_of_year = (h // 24) % 365
 
@@ -834,8 +879,14 @@ class CityLearnEnvironment(Env):
 
     def reset(self, *, seed: Optional[int] = None, options: Optional[Dict] = None) -> Tuple[np.ndarray, Dict]:
         """Reset para nuevo episodio."""
-        # seed y options son parte de la API Gymnasium pero no se usan aqui
-        del seed, options  # Marcar como usados para evitar warnings
+        # Nueva realizacion de demanda EV por episodio (si hay ensamble)
+        if self.demand_ensemble is not None:
+            if seed is not None:
+                self._demand_rng = np.random.default_rng(seed)
+            self.demand_realization, self.chargers_hourly = self.demand_ensemble.sample(self._demand_rng)
+            # El CO2 directo sigue a la demanda muestreada (no a la fila fija del CSV)
+            self.direct_co2_hourly = self.demand_ensemble.direct_co2_kg(self.demand_realization)
+        del seed, options  # options es parte de la API Gymnasium pero no se usa aqui
         self.step_count = 0
         self.episode_num += 1
         self.episode_reward = 0.0
@@ -887,7 +938,7 @@ class CityLearnEnvironment(Env):
           - Energy system dynamics from CityLearn v2
         """
         self.step_count += 1
-        h = (self.step_count - 1) % self.HOURS_PER_YEAR
+        h = self._year_hour(self.step_count - 1)
 
         # DATOS REALES (OE2 timeseries)
         solar_kw = float(self.solar_hourly[h])
@@ -951,10 +1002,14 @@ class CityLearnEnvironment(Env):
         # CO2 DIRECTO: Reducción por usar vehículos eléctricos en lugar de gasolina
         # - Motos: 0.87 kg CO2 evitado por kWh cargado (vs consumo gasolina)
         # - Mototaxis: 0.47 kg CO2 evitado por kWh cargado (vs consumo gasolina)
-        # FUENTE: chargers_ev_ano_2024_v3.csv (calculado en OE2)
-        h = (self.step_count - 1) % self.HOURS_PER_YEAR
-        co2_motos_direct = float(self.chargers_co2_df.iloc[h]['co2_reduccion_motos_kg']) if 'co2_reduccion_motos_kg' in self.chargers_co2_df.columns else 0.0
-        co2_taxis_direct = float(self.chargers_co2_df.iloc[h]['co2_reduccion_mototaxis_kg']) if 'co2_reduccion_mototaxis_kg' in self.chargers_co2_df.columns else 0.0
+        # FUENTE: chargers_ev_ano_2024_v3.csv (calculado en OE2), o la realizacion del ensamble
+        h = self._year_hour(self.step_count - 1)
+        if self.direct_co2_hourly is not None:
+            co2_motos_direct = float(self.direct_co2_hourly[0][h])
+            co2_taxis_direct = float(self.direct_co2_hourly[1][h])
+        else:
+            co2_motos_direct = float(self.chargers_co2_df.iloc[h]['co2_reduccion_motos_kg']) if 'co2_reduccion_motos_kg' in self.chargers_co2_df.columns else 0.0
+            co2_taxis_direct = float(self.chargers_co2_df.iloc[h]['co2_reduccion_mototaxis_kg']) if 'co2_reduccion_mototaxis_kg' in self.chargers_co2_df.columns else 0.0
         co2_avoided_direct_kg = co2_motos_direct + co2_taxis_direct
         
         # ====================================================================
@@ -996,7 +1051,7 @@ class CityLearnEnvironment(Env):
             ev_soc_avg = 0.95
         
         # [OK] SIMULAR CARGA DE VEHICULOS POR SOC (10%, 20%, 30%, 50%, 70%, 80%, 100%)
-        h = (self.step_count - 1) % self.HOURS_PER_YEAR
+        h = self._year_hour(self.step_count - 1)
         # scenario = self.scenarios_by_hour[h]  # DESHABILITADO v5.6
         
         # v5.6 CORREGIDO: USAR POTENCIA TOTAL DISPONIBLE DEL SISTEMA
@@ -1034,7 +1089,7 @@ class CityLearnEnvironment(Env):
         # CALCULAR CANTIDAD DE VEHICULOS CARGANDO (desde potencia disponible)
         # NOTA: Los detalles (motos_10, motos_100, etc.) se manejan en callback
         # ====================================================================
-        h = (self.step_count - 1) % self.HOURS_PER_YEAR
+        h = self._year_hour(self.step_count - 1)
         hour_24 = h % 24
         
         # Sockets que pueden cargarse (potencia disponible / potencia por socket)
@@ -1227,6 +1282,9 @@ class CityLearnEnvironment(Env):
             
             # Mantener en rango estable para PPO [-1, 1]
             reward_val = float(np.clip(reward_val, -1.0, 1.0))
+            # Ano comprimido: optimizar el objetivo anual, no la mezcla equiponderada de los K dias
+            if self.reward_scale is not None:
+                reward_val *= float(self.reward_scale[(self.step_count - 1) % len(self.reward_scale)])
             
         except (ValueError, KeyError, AttributeError, TypeError) as exc:
             logger.warning("Error en reward computation hora %d: %s", h, exc)
@@ -1265,6 +1323,8 @@ class CityLearnEnvironment(Env):
             'step': self.step_count,
             'hour': h % 24,
             'hour_of_year': h,
+            'hour_weight': float(self.hour_weights[(self.step_count - 1) % len(self.hour_weights)])
+            if self.hour_weights is not None else 1.0,
             # Energia - NOMBRES ESTANDAR COMPATIBLES CON SAC/A2C
             'solar_generation_kwh': solar_kw,  # CORREGIDO: usar nombre estándar
             'ev_charging_kwh': ev_charging_kwh,  # CORREGIDO: usar nombre estándar
@@ -1494,13 +1554,17 @@ class DetailedLoggingCallback(BaseCallback):
         if grid_val == 0:
             grid_val = float(info.get('grid_import_kwh', 0))
 
+        # Peso de la hora: 1.0 en el ano completo; en el ano comprimido (dias
+        # representativos) escala cada hora para que los totales sean anuales
+        w = float(info.get('hour_weight', 1.0))
+
         # Acumular metricas basicas - NOMBRES ESTANDAR COMPATIBLES
-        self.ep_co2_grid += info.get('co2_grid_kg', 0)
-        self.ep_co2_avoided_indirect += info.get('co2_avoided_indirect_kg', 0)
-        self.ep_co2_avoided_direct += info.get('co2_avoided_direct_kg', 0)
-        self.ep_solar += solar_val
-        self.ep_ev += ev_val
-        self.ep_grid += grid_val
+        self.ep_co2_grid += w * info.get('co2_grid_kg', 0)
+        self.ep_co2_avoided_indirect += w * info.get('co2_avoided_indirect_kg', 0)
+        self.ep_co2_avoided_direct += w * info.get('co2_avoided_direct_kg', 0)
+        self.ep_solar += w * solar_val
+        self.ep_ev += w * ev_val
+        self.ep_grid += w * grid_val
         self.ep_steps += 1
         
         # [OK] NUEVAS METRICAS: Estabilidad, costos, motos/mototaxis
@@ -1509,7 +1573,7 @@ class DetailedLoggingCallback(BaseCallback):
         grid_export = info.get('grid_export_kwh', 0.0)  # Nombre estándar
         peak_demand_limit = 450.0  # kW limite tipico
         stability = 1.0 - min(1.0, abs(grid_import - grid_export) / peak_demand_limit)
-        self.ep_stability_sum += stability
+        self.ep_stability_sum += w * stability
         
         # [OK] v7.0: TRACKING DE 6 COMPONENTES REWARD Y AHORROS
         self.ep_r_co2_sum += info.get('r_co2', 0.0)
@@ -1520,18 +1584,18 @@ class DetailedLoggingCallback(BaseCallback):
         self.ep_r_priority_sum += info.get('r_priority', 0.0)
         
         # [OK] v7.0: AHORROS DE COSTOS
-        self.ep_ahorro_solar_soles += info.get('ahorro_solar_soles', 0.0)
-        self.ep_ahorro_bess_soles += info.get('ahorro_bess_soles', 0.0)
-        self.ep_costo_grid_soles += info.get('costo_grid_soles', 0.0)
-        self.ep_ahorro_combustible_usd += info.get('ahorro_combustible_usd', 0.0)
-        self.ep_ahorro_total_soles += info.get('ahorro_total_soles', 0.0)
-        self.ep_ahorro_total_usd += info.get('ahorro_total_usd', 0.0)
-        self.ep_stability_count += 1
+        self.ep_ahorro_solar_soles += w * info.get('ahorro_solar_soles', 0.0)
+        self.ep_ahorro_bess_soles += w * info.get('ahorro_bess_soles', 0.0)
+        self.ep_costo_grid_soles += w * info.get('costo_grid_soles', 0.0)
+        self.ep_ahorro_combustible_usd += w * info.get('ahorro_combustible_usd', 0.0)
+        self.ep_ahorro_total_soles += w * info.get('ahorro_total_soles', 0.0)
+        self.ep_ahorro_total_usd += w * info.get('ahorro_total_usd', 0.0)
+        self.ep_stability_count += w
         
         # Costo: tarifa × (import - export)
         tariff_usd = 0.15  # USD/kWh tarifa Iquitos
         cost_step = (grid_import - grid_export * 0.5) * tariff_usd
-        self.ep_cost_usd += max(0.0, cost_step)
+        self.ep_cost_usd += w * max(0.0, cost_step)
         
         # Motos y mototaxis (maximo por episodio)
         motos = info.get('motos_charging', 0)
@@ -1544,25 +1608,25 @@ class DetailedLoggingCallback(BaseCallback):
         
         # BESS (descarga/carga) - DATOS REALES del dataset OE2
         # Usa flujos reales de bess_ano_2024.csv en lugar de calcular
-        hour_of_year = info.get('hour_of_year', self.ep_steps % 8760)
+        hour_of_year = info.get('hour_of_year', self.ep_steps % self.env_ref.HOURS_PER_YEAR)
         
         if self.bess_real_df is not None and hour_of_year < len(self.bess_real_df):
             # USAR DATOS REALES DEL DATASET
             bess_row = self.bess_real_df.iloc[hour_of_year]
             bess_charge_real = float(bess_row.get('bess_charge_kwh', 0.0))
             bess_discharge_real = float(bess_row.get('bess_discharge_kwh', 0.0))
-            self.ep_bess_charge += bess_charge_real
-            self.ep_bess_discharge += bess_discharge_real
+            self.ep_bess_charge += w * bess_charge_real
+            self.ep_bess_discharge += w * bess_discharge_real
             # Tambien trackear destino de descarga
-            self.ep_bess_to_mall = getattr(self, 'ep_bess_to_mall', 0.0) + float(bess_row.get('bess_to_mall_kwh', 0.0))
-            self.ep_bess_to_ev = getattr(self, 'ep_bess_to_ev', 0.0) + float(bess_row.get('bess_to_ev_kwh', 0.0))
+            self.ep_bess_to_mall = getattr(self, 'ep_bess_to_mall', 0.0) + w * float(bess_row.get('bess_to_mall_kwh', 0.0))
+            self.ep_bess_to_ev = getattr(self, 'ep_bess_to_ev', 0.0) + w * float(bess_row.get('bess_to_ev_kwh', 0.0))
         else:
             # FALLBACK: usar info del environment si no hay dataset
             bess_power = info.get('bess_power_kw', 0.0)
             if bess_power > 0:
-                self.ep_bess_discharge += bess_power
+                self.ep_bess_discharge += w * bess_power
             else:
-                self.ep_bess_charge += abs(bess_power)
+                self.ep_bess_charge += w * abs(bess_power)
         
         # Progreso de control de sockets (desde acciones)
         actions = self.locals.get('actions', None)
@@ -1674,7 +1738,7 @@ class DetailedLoggingCallback(BaseCallback):
     def _log_progress(self) -> None:
         """Mostrar progreso durante el episodio."""
         ep_num = self.current_episode
-        pct = (self.ep_steps / 8760) * 100
+        pct = (self.ep_steps / max(1, self.env_ref.max_steps)) * 100
         co2_net = max(0, self.ep_co2_grid - self.ep_co2_avoided_indirect - self.ep_co2_avoided_direct)
 
         print(f'    Steps: {self.num_timesteps:>7,} | Ep: {ep_num:>2} | '
@@ -1905,11 +1969,13 @@ class PPOMetricsCallback(BaseCallback):
         log_freq: int = 2048,  # Cada N steps (tipico = n_steps)
         eval_freq: int = 8760,  # Cada episodio para eval deterministic
         output_dir: Optional[Path] = None,  # Directorio para guardar graficas
-        verbose: int = 1
+        verbose: int = 1,
+        total_timesteps: int = 87_600,  # Entrenamiento planificado (progreso relativo)
     ):
         super().__init__(verbose)
         self.log_freq = log_freq
         self.eval_freq = eval_freq
+        self.total_timesteps = max(1, total_timesteps)
         self.output_dir = output_dir or Path('outputs/ppo_training')
         
         # Historial de metricas (con steps para eje X)
@@ -2171,7 +2237,7 @@ class PPOMetricsCallback(BaseCallback):
         # ====================================================================
         if self._initial_entropy is not None and self._initial_entropy > 0:
             entropy_ratio = entropy / self._initial_entropy
-            training_progress = self.num_timesteps / 87600  # Normalizado a 10 episodios
+            training_progress = self.num_timesteps / self.total_timesteps  # Fraccion del entrenamiento
             
             # Colapso temprano = entropy cae >50% cuando aun estamos en <30% del entrenamiento
             if entropy_ratio < self._entropy_collapse_threshold and training_progress < 0.3:
@@ -3052,7 +3118,7 @@ def validate_ppo_sync() -> bool:
     return all_ok
 
 
-def main():
+def main(argv: Optional[list[str]] = None):
     """
     Entrenamiento principal con error handling robusto.
 
@@ -3070,9 +3136,27 @@ def main():
       [3] CityLearn v2 Documentation
     """
 
+    parser = argparse.ArgumentParser(description='Entrenamiento PPO multiobjetivo (datos reales OE2)')
+    parser.add_argument(
+        '--representative-year', nargs='?', const=str(DEFAULT_REPRESENTATIVE_YEAR_PATH), default=None,
+        metavar='NPZ',
+        help='Entrenar con el ano comprimido en dias representativos (representative_year.py); '
+             'el reward de cada hora se pondera por los dias que representa. '
+             f'Sin ruta usa {DEFAULT_REPRESENTATIVE_YEAR_PATH}; por defecto se entrena con el ano completo.',
+    )
+    parser.add_argument(
+        '--demand-ensemble', nargs='?', const=str(DEFAULT_ENSEMBLE_DIR), default=None,
+        metavar='DIR',
+        help='Muestrear una realizacion de demanda EV distinta por episodio (demand_ensemble.py). '
+             f'Sin ruta usa {DEFAULT_ENSEMBLE_DIR}; por defecto se usa la demanda fija del CSV.',
+    )
+    args = parser.parse_args(argv)
+
     HOURS_PER_YEAR: int = 8760
     NUM_EPISODES: int = 10  # 10 episodios = 87,600 timesteps para entrenamiento robusto
-    TOTAL_TIMESTEPS: int = NUM_EPISODES * HOURS_PER_YEAR
+    # Se recalcula con env.max_steps al crear el environment (ano comprimido = K x 24 h)
+    STEPS_PER_EPISODE: int = HOURS_PER_YEAR
+    TOTAL_TIMESTEPS: int = NUM_EPISODES * STEPS_PER_EPISODE
 
     # ========================================================================
     # PRE-PASO: VALIDAR DATASETS OE2, SINCRONIZACION Y LIMPIAR CHECKPOINTS
@@ -3262,6 +3346,39 @@ def main():
                 "Ejecutar generacion OE2 primero."
             )
 
+        # Ensamble multi-semilla de demanda EV (solo con --demand-ensemble)
+        demand_ensemble: Optional[DemandEnsemble] = None
+        if args.demand_ensemble is not None:
+            ensemble_path = Path(args.demand_ensemble)
+            ensemble_index = ensemble_path if ensemble_path.suffix == '.json' else ensemble_path / INDEX_NAME
+            if not ensemble_index.exists():
+                raise FileNotFoundError(
+                    f"--demand-ensemble: no existe {ensemble_index}. "
+                    "Generarlo con demand_ensemble.py o quitar la opcion."
+                )
+            demand_ensemble = DemandEnsemble.open(ensemble_path)
+            logger.info("MODO DEMANDA ENSAMBLE: %d realizaciones (una por episodio, CO2 directo "
+                        "derivado de cada realizacion) | Path: %s", len(demand_ensemble), ensemble_path)
+        else:
+            logger.info("MODO DEMANDA FIJA: chargers CSV (usar --demand-ensemble para una realizacion por episodio)")
+
+        # Ano comprimido en dias representativos (solo con --representative-year)
+        representative_year: Optional[RepresentativeYear] = None
+        if args.representative_year is not None:
+            rep_year_path = Path(args.representative_year)
+            if not rep_year_path.exists():
+                raise FileNotFoundError(
+                    f"--representative-year: no existe {rep_year_path}. "
+                    "Generarlo con representative_year.py o quitar la opcion."
+                )
+            representative_year = RepresentativeYear.load(rep_year_path)
+            logger.info("MODO ANO COMPRIMIDO: %d dias representativos (%d h/episodio, reward y KPIs "
+                        "ponderados por hour_weight) | Path: %s",
+                        representative_year.k, representative_year.n_hours, rep_year_path)
+        else:
+            logger.info("MODO ANO COMPLETO: %d h/episodio (usar --representative-year para el ano comprimido)",
+                        HOURS_PER_YEAR)
+
         # ====================================================================
         # CHARGER STATISTICS (potencia maxima/media por socket) - 5to dataset OE2
         # ====================================================================
@@ -3366,7 +3483,9 @@ def main():
             bess_soc=bess_soc,
             charger_max_power_kw=charger_max_power,
             charger_mean_power_kw=charger_mean_power,
-            max_steps=HOURS_PER_YEAR
+            max_steps=HOURS_PER_YEAR,
+            demand_ensemble=demand_ensemble,
+            representative_year=representative_year,
         )
         
         # ====================================================================
@@ -3395,7 +3514,13 @@ def main():
         logger.info("Environment creado:")
         logger.info("  Observation: %s", str(env.observation_space.shape))
         logger.info("  Action: %s", str(env.action_space.shape))
-        logger.info("  Timesteps/episodio: %d (1 ano completo)", HOURS_PER_YEAR)
+        STEPS_PER_EPISODE = env_base.max_steps
+        TOTAL_TIMESTEPS = NUM_EPISODES * STEPS_PER_EPISODE
+        if representative_year is not None:
+            logger.info("  Timesteps/episodio: %d (ano comprimido: %d dias representativos)",
+                        STEPS_PER_EPISODE, representative_year.k)
+        else:
+            logger.info("  Timesteps/episodio: %d (1 ano completo)", STEPS_PER_EPISODE)
         print()
 
     except (ValueError, AttributeError, TypeError) as exc:
@@ -3423,7 +3548,7 @@ def main():
         #
         # Formula: lr(t) = lr_initial * (1 - t/total_timesteps)
         # ====================================================================
-        total_timesteps_planned = NUM_EPISODES * HOURS_PER_YEAR
+        total_timesteps_planned = TOTAL_TIMESTEPS
         initial_lr = ppo_config.learning_rate
         
         def linear_lr_schedule(progress_remaining: float) -> float:
@@ -3496,7 +3621,7 @@ def main():
         duration_est: float = TOTAL_TIMESTEPS / (speed_est * 60.0)
 
         print('  CONFIGURACION:')
-        print('    Episodios: {} x {} horas = {:,} timesteps'.format(NUM_EPISODES, HOURS_PER_YEAR, TOTAL_TIMESTEPS))
+        print('    Episodios: {} x {} horas = {:,} timesteps'.format(NUM_EPISODES, STEPS_PER_EPISODE, TOTAL_TIMESTEPS))
         print('    Datos: 100% REALES (OE2 Iquitos)')
         print('    Device: {}'.format(device.upper()))
         print('    Duracion est.: ~{:.1f} minutos'.format(duration_est))
@@ -3532,9 +3657,10 @@ def main():
         # Genera graficas de diagnostico al final del entrenamiento
         ppo_metrics_callback = PPOMetricsCallback(
             log_freq=ppo_config.n_steps,  # Loguear cada update (despues de rollout)
-            eval_freq=HOURS_PER_YEAR,  # Eval deterministic cada episodio
+            eval_freq=STEPS_PER_EPISODE,  # Eval deterministic cada episodio
             output_dir=output_dir,  # Directorio para guardar graficas
-            verbose=1
+            verbose=1,
+            total_timesteps=TOTAL_TIMESTEPS,
         )
         
         # Combinar callbacks
@@ -3611,27 +3737,28 @@ def main():
                 # Extraer metricas del info dict (VecEnv devuelve lista de info dicts)
                 step_info = info[0] if isinstance(info, (list, tuple)) else info
                 
-                # Acumular metricas del step
+                # Acumular metricas del step (escaladas por hour_weight en el ano comprimido)
                 if isinstance(step_info, dict):
+                    w = float(step_info.get('hour_weight', 1.0))
                     # CO2 evitado total (kg)
                     if 'co2_avoided_total_kg' in step_info:
-                        episode_co2_acc += float(step_info['co2_avoided_total_kg'])
+                        episode_co2_acc += w * float(step_info['co2_avoided_total_kg'])
                     elif 'co2_avoided' in step_info:
-                        episode_co2_acc += float(step_info['co2_avoided'])
+                        episode_co2_acc += w * float(step_info['co2_avoided'])
                     
                     # Solar generado (kWh) - NOMBRES ESTANDAR COMPATIBLES
                     if 'solar_kw' in step_info:
-                        episode_solar_acc += float(step_info['solar_kw'])
+                        episode_solar_acc += w * float(step_info['solar_kw'])
                     elif 'solar_generation_kwh' in step_info:
-                        episode_solar_acc += float(step_info['solar_generation_kwh'])
+                        episode_solar_acc += w * float(step_info['solar_generation_kwh'])
                     elif 'solar_kwh' in step_info:
-                        episode_solar_acc += float(step_info['solar_kwh'])
+                        episode_solar_acc += w * float(step_info['solar_kwh'])
                     
                     # Grid import (kWh) - NOMBRES ESTANDAR COMPATIBLES
                     if 'grid_import_kw' in step_info:
-                        episode_grid_acc += float(step_info['grid_import_kw'])
+                        episode_grid_acc += w * float(step_info['grid_import_kw'])
                     elif 'grid_import_kwh' in step_info:
-                        episode_grid_acc += float(step_info['grid_import_kwh'])
+                        episode_grid_acc += w * float(step_info['grid_import_kwh'])
                 
                 # done puede ser array en VecEnv
                 if hasattr(done, '__len__'):
@@ -4,9 +4,11 @@
 ENTRENAR SAC CON MULTIOBJETIVO REAL
 Entrenamiento INDIVIDUAL con datos OE2 reales (chargers, BESS, mall demand, solar)
 SAC (Soft Actor-Critic): Off-policy, mas eficiente en muestras, ideal para problemas asimetricos
+Opcional: --demand-ensemble [DIR] muestrea una realizacion de demanda EV por episodio
 """
 from __future__ import annotations
 
+import argparse
 import json
 import logging
 import math
@@ -48,6 +50,9 @@ from src.dataset_builder_citylearn.rewards import (
     MultiObjectiveReward,
     create_iquitos_reward_weights,
 )
+from src.dimensionamiento.oe2.disenocargadoresev.demand_ensemble import (
+    DEFAULT_ENSEMBLE_DIR, INDEX_NAME, DemandEnsemble,
+)
 
 # ===== VEHICLE CHARGING SCENARIOS - DEFINIDOS LOCALMENTE (ROBUSTO) =====
 # No dependemos de modulo externo - todo auto-contenido aqui
@@ -1233,9 +1238,18 @@ def clean_sac_checkpoints_safe() -> None:
     print()
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Entrenar SAC con multiobjetivo."""
-    
+
+    parser = argparse.ArgumentParser(description='Entrenamiento SAC multiobjetivo (datos reales OE2)')
+    parser.add_argument(
+        '--demand-ensemble', nargs='?', const=str(DEFAULT_ENSEMBLE_DIR), default=None,
+        metavar='DIR',
+        help='Muestrear una realizacion de demanda EV distinta por episodio (demand_ensemble.py). '
+             f'Sin ruta usa {DEFAULT_ENSEMBLE_DIR}; por defecto se usa la demanda fija del CSV.',
+    )
+    args = parser.parse_args(argv)
+
     # ===== LIMPIEZA DE CHECKPOINTS SAC (DESACTIVADA PARA CONTINUAR) =====
     # NOTA: Descomentar para entrenar desde cero:
     # clean_sac_checkpoints_safe()
@@ -1517,7 +1531,8 @@ def main():
                      solar_data=None, chargers_moto=None, chargers_mototaxi=None,
                      n_moto_sockets=0, n_mototaxi_sockets=0,
                      bess_ev_demand=None, bess_mall_demand=None, bess_pv_generation=None,
-                     observable_variables=None, chargers_data=None, mall_data=None):
+                     observable_variables=None, chargers_data=None, mall_data=None,
+                     demand_ensemble=None):
             super().__init__()
             self.solar = solar_kw
             self.solar_data = solar_data or {}  # Todas las columnas solares REALES (16 cols)
@@ -1557,6 +1572,13 @@ def main():
             # Vehicle simulator - usamos VehicleSOCTracker interno (no dependencia externa)
             self.vehicle_simulator = None  # Deprecado - ahora usamos self.soc_tracker
             
+            # Ensamble de demanda EV (opcional): una realizacion (8760, 38) por episodio, vista mmap
+            self.demand_ensemble = demand_ensemble
+            self.demand_realization = -1
+            self._demand_rng = np.random.default_rng()
+            if demand_ensemble is not None and demand_ensemble.data.shape[1:] != np.shape(self.chargers):
+                raise ValueError(f"Ensamble de demanda {demand_ensemble.data.shape[1:]} != chargers {np.shape(self.chargers)}")
+            
             # Dimensiones
             self.n_chargers = min(self.chargers.shape[1] if len(self.chargers.shape) > 1 else 38, 38)
             self.hours_per_year = len(self.solar)
@@ -1636,6 +1658,19 @@ def main():
             self.system_efficiency: float = 0.0
             
         def reset(self, seed=None):
+            # Nueva realizacion de demanda EV por episodio (si hay ensamble)
+            if self.demand_ensemble is not None:
+                if seed is not None:
+                    self._demand_rng = np.random.default_rng(seed)
+                self.demand_realization, self.chargers = self.demand_ensemble.sample(self._demand_rng)
+                # El CO2 directo sigue a la demanda muestreada (no a la fila fija del CSV)
+                co2_motos, co2_taxis = self.demand_ensemble.direct_co2_kg(self.demand_realization)
+                self.chargers_data = {
+                    **self.chargers_data,
+                    'co2_reduccion_motos_kg': co2_motos,
+                    'co2_reduccion_mototaxis_kg': co2_taxis,
+                    'reduccion_directa_co2_kg': co2_motos + co2_taxis,
+                }
             self.current_step = 0
             self.episode_num += 1
             self.episode_reward = 0.0
@@ -2640,6 +2675,22 @@ def main():
 
             return obs
     
+    # Ensamble multi-semilla de demanda EV (solo con --demand-ensemble)
+    demand_ensemble = None
+    if args.demand_ensemble is not None:
+        ensemble_path = Path(args.demand_ensemble)
+        ensemble_index = ensemble_path if ensemble_path.suffix == '.json' else ensemble_path / INDEX_NAME
+        if not ensemble_index.exists():
+            raise FileNotFoundError(
+                f"--demand-ensemble: no existe {ensemble_index}. "
+                "Generarlo con demand_ensemble.py o quitar la opcion."
+            )
+        demand_ensemble = DemandEnsemble.open(ensemble_path)
+        print(f"  [OK] MODO DEMANDA ENSAMBLE: {len(demand_ensemble)} realizaciones (una por episodio, "
+              f"CO2 directo derivado de cada realizacion) | Path: {ensemble_path}")
+    else:
+        print("  [OK] MODO DEMANDA FIJA: chargers CSV (usar --demand-ensemble para una realizacion por episodio)")
+    
     # Crear ambiente real CON TODOS LOS DATOS REALES
     env = RealOE2Environment(
         solar_kw=solar_hourly,
@@ -2670,7 +2721,8 @@ def main():
         bess_mall_demand=bess_mall_demand,  # [OK] Demanda Mall REAL por hora
         bess_pv_generation=bess_pv_generation,  # [OK] PV generation REAL por hora
         # ===== TODAS LAS 27 VARIABLES OBSERVABLES =====
-        observable_variables=observable_variables_df  # [OK] Todas las 27 columnas del dataset_builder
+        observable_variables=observable_variables_df,  # [OK] Todas las 27 columnas del dataset_builder
+        demand_ensemble=demand_ensemble,  # [OK] Demanda EV distinta por episodio (opcional)
     )
     print(f'  [OK] Ambiente REAL creado con datos OE2 100% REALES:')
     print(f'     - Observation space: {env.OBS_DIM} dims (v6.0: 156 base + 90 new features = bidirectional communication)')
@@ -68,11 +68,93 @@ class ChargerCommunication:
         self.time_remaining_hours = max(0.0, self.time_remaining_hours - time_step_hours)
 
 
+# Umbrales de urgencia (mismos que ChargerCommunication.is_urgent)
+URGENT_TIME_HOURS = 2.0
+URGENT_ENERGY_KWH = 5.0
+
+
+def _array_property(name: str) -> property:
+    """Atributo de ChargerSocketView que lee/escribe la posicion del socket en el arreglo del manager."""
+    def fget(self):
+        return float(getattr(self._manager, name)[self.socket_id])
+
+    def fset(self, value):
+        getattr(self._manager, name)[self.socket_id] = value
+    return property(fget, fset)
+
+
+class ChargerSocketView:
+    """
+    Vista de un socket del ChargerManager con la interfaz de ChargerCommunication
+    (los atributos leen/escriben directamente los arreglos del manager)
+    """
+    __slots__ = ('_manager', 'socket_id')
+
+    def __init__(self, manager: 'ChargerManager', socket_id: int):
+        self._manager = manager
+        self.socket_id = socket_id
+
+    current_soc = _array_property('current_soc')
+    soc_target = _array_property('soc_target')
+    energy_needed_kwh = _array_property('energy_needed_kwh')
+    time_remaining_hours = _array_property('time_remaining_hours')
+    power_demanded_kw = _array_property('power_demanded_kw')
+    energy_charged_so_far_kwh = _array_property('energy_charged_so_far_kwh')
+    hours_charging = _array_property('hours_charging')
+
+    @property
+    def vehicle_type(self) -> str:
+        return 'moto' if self._manager.is_moto[self.socket_id] else 'mototaxi'
+
+    @property
+    def priority_level(self) -> int:
+        return int(self._manager.priority_level[self.socket_id])
+
+    @priority_level.setter
+    def priority_level(self, value: int):
+        self._manager.priority_level[self.socket_id] = value
+
+    @property
+    def connect_time_hour(self) -> Optional[int]:
+        hour = int(self._manager.connect_time_hour[self.socket_id])
+        return hour if hour >= 0 else None
+
+    @connect_time_hour.setter
+    def connect_time_hour(self, value: Optional[int]):
+        self._manager.connect_time_hour[self.socket_id] = -1 if value is None else value
+
+    def energy_still_needs(self) -> float:
+        """Energia faltante para alcanzar target"""
+        return max(0.0, self.energy_needed_kwh - self.energy_charged_so_far_kwh)
+
+    def percent_complete(self) -> float:
+        """Porcentaje completado de la carga"""
+        if self.energy_needed_kwh <= 0:
+            return 1.0
+        return min(1.0, self.energy_charged_so_far_kwh / self.energy_needed_kwh)
+
+    def is_urgent(self) -> bool:
+        """Si carga es urgente (tiempo bajo, energia faltante alta)"""
+        return self.time_remaining_hours < URGENT_TIME_HOURS and self.energy_still_needs() > URGENT_ENERGY_KWH
+
+    def update_after_power_delivery(self, power_delivered_kw: float, time_step_hours: float = 1.0):
+        """Actualizar estado tras suministrar energia"""
+        energy_delivered = power_delivered_kw * time_step_hours
+        self.energy_charged_so_far_kwh += energy_delivered
+        self.hours_charging += time_step_hours
+        self.current_soc = min(1.0, self.current_soc + energy_delivered / 60.0)  # Asumiendo 60 kWh capacidad
+        self.time_remaining_hours = max(0.0, self.time_remaining_hours - time_step_hours)
+
+
 @dataclass
 class ChargerManager:
     """
     Gestor central de todos los cargadores (38 sockets)
     Mantiene estado y coordina con BESS/Solar
+
+    El estado de los sockets vive en arreglos NumPy (uno por campo de
+    ChargerCommunication, indice = socket_id); estadisticas, prioridades y
+    observaciones se calculan vectorizadas sobre buffers preasignados.
     """
     n_moto_sockets: int = 30        # Sockets 0-29 para motos
     n_mototaxi_sockets: int = 8     # Sockets 30-37 para mototaxis
@@ -84,77 +166,140 @@ class ChargerManager:
     moto_capacity_kwh: float = 48.0     # Capacidad bateria moto
     mototaxi_capacity_kwh: float = 60.0 # Capacidad bateria mototaxi
     
-    chargers: Dict[int, ChargerCommunication] = field(default_factory=dict)
-    
     def __post_init__(self):
-        # Crear diccionario de cargadores vacios
-        for i in range(self.n_moto_sockets):
-            self.chargers[i] = ChargerCommunication(
-                socket_id=i,
-                vehicle_type='moto'
-            )
-        for i in range(self.n_moto_sockets, self.n_moto_sockets + self.n_mototaxi_sockets):
-            self.chargers[i] = ChargerCommunication(
-                socket_id=i,
-                vehicle_type='mototaxi'
-            )
-    
-    def get_charger(self, socket_id: int) -> Optional[ChargerCommunication]:
+        n = self.n_sockets
+        # Estado por socket (mismos valores iniciales que ChargerCommunication)
+        self.socket_id = np.arange(n)
+        self.is_moto = self.socket_id < self.n_moto_sockets
+        self.current_soc = np.zeros(n)
+        self.soc_target = np.ones(n)
+        self.energy_needed_kwh = np.zeros(n)
+        self.time_remaining_hours = np.zeros(n)
+        self.power_demanded_kw = np.zeros(n)
+        self.energy_charged_so_far_kwh = np.zeros(n)
+        self.hours_charging = np.zeros(n)
+        self.priority_level = np.full(n, 5, dtype=np.int64)
+        self.connect_time_hour = np.full(n, -1, dtype=np.int64)  # -1 = sin conectar
+        
+        # Pesos por tipo (para estadisticas via producto punto) y buffers de trabajo
+        self._moto_w = self.is_moto.astype(np.float64)
+        self._taxi_w = 1.0 - self._moto_w
+        self._need = np.zeros(n)
+        self._charging = np.zeros(n)
+        self._urgent = np.zeros(n)
+        self._tmp = np.zeros(n)
+        self._mask = np.zeros(n, dtype=bool)
+        self._mask2 = np.zeros(n, dtype=bool)
+    
+    @property
+    def n_sockets(self) -> int:
+        return self.n_moto_sockets + self.n_mototaxi_sockets
+    
+    @property
+    def chargers(self) -> Dict[int, ChargerSocketView]:
+        """Vistas por socket {socket_id: ChargerSocketView}"""
+        return {i: ChargerSocketView(self, i) for i in range(self.n_sockets)}
+    
+    def get_charger(self, socket_id: int) -> Optional[ChargerSocketView]:
         """Obtener cargador por socket ID"""
-        return self.chargers.get(socket_id)
+        if 0 <= socket_id < self.n_sockets:
+            return ChargerSocketView(self, socket_id)
+        return None
+    
+    def _refresh(self) -> None:
+        """Recalcula en los buffers: energia faltante, mascara cargando, mascara urgente."""
+        np.subtract(self.energy_needed_kwh, self.energy_charged_so_far_kwh, out=self._need)
+        np.maximum(self._need, 0.0, out=self._need)
+        np.less(self.current_soc, self.soc_target, out=self._mask)
+        np.copyto(self._charging, self._mask)
+        np.less(self.time_remaining_hours, URGENT_TIME_HOURS, out=self._mask)
+        np.greater(self._need, URGENT_ENERGY_KWH, out=self._mask2)
+        np.logical_and(self._mask, self._mask2, out=self._mask)
+        np.copyto(self._urgent, self._mask)
+    
+    def _type_summary(self, weights: np.ndarray, count: int) -> Tuple[int, float, float, float, int]:
+        """(cargando, energia faltante, tiempo restante promedio, SOC promedio, urgentes) de un tipo."""
+        charging_now = int(np.dot(self._charging, weights))
+        np.multiply(self._charging, weights, out=self._tmp)
+        time_remaining = float(np.dot(self._tmp, self.time_remaining_hours))
+        return (
+            charging_now,
+            float(np.dot(self._need, weights)),
+            time_remaining / charging_now if charging_now else 0.0,
+            float(np.dot(self.current_soc, weights)) / count if count else 0.0,
+            int(np.dot(self._urgent, weights)),
+        )
     
-    def get_motos_stats(self) -> Dict[str, float]:
-        """Estadisticas de motos en carga"""
-        motos = [c for c in self.chargers.values() if c.vehicle_type == 'moto']
-        charging = [c for c in motos if c.current_soc < c.soc_target]
-        
-        total_energy_needed = sum(c.energy_still_needs() for c in motos)
-        total_time_remaining = sum(c.time_remaining_hours for c in charging) if charging else 0.0
-        avg_soc = np.mean([c.current_soc for c in motos]) if motos else 0.0
-        
+    def _stats_dict(self, weights: np.ndarray, count: int) -> Dict[str, float]:
+        self._refresh()
+        charging_now, energy_needed, avg_time, avg_soc, urgent = self._type_summary(weights, count)
         return {
-            'count': len(motos),
-            'charging_now': len(charging),
-            'energy_needed_kwh': total_energy_needed,
-            'avg_time_remaining_hours': total_time_remaining / len(charging) if charging else 0.0,
+            'count': count,
+            'charging_now': charging_now,
+            'energy_needed_kwh': energy_needed,
+            'avg_time_remaining_hours': avg_time,
             'avg_soc': avg_soc,
-            'urgent_count': sum(1 for c in motos if c.is_urgent())
+            'urgent_count': urgent,
         }
     
+    def get_motos_stats(self) -> Dict[str, float]:
+        """Estadisticas de motos en carga"""
+        return self._stats_dict(self._moto_w, self.n_moto_sockets)
+    
     def get_mototaxis_stats(self) -> Dict[str, float]:
         """Estadisticas de mototaxis"""
-        mototaxis = [c for c in self.chargers.values() if c.vehicle_type == 'mototaxi']
-        charging = [c for c in mototaxis if c.current_soc < c.soc_target]
-        
-        total_energy_needed = sum(c.energy_still_needs() for c in mototaxis)
-        total_time_remaining = sum(c.time_remaining_hours for c in charging) if charging else 0.0
-        avg_soc = np.mean([c.current_soc for c in mototaxis]) if mototaxis else 0.0
-        
-        return {
-            'count': len(mototaxis),
-            'charging_now': len(charging),
-            'energy_needed_kwh': total_energy_needed,
-            'avg_time_remaining_hours': total_time_remaining / len(charging) if charging else 0.0,
-            'avg_soc': avg_soc,
-            'urgent_count': sum(1 for c in mototaxis if c.is_urgent())
-        }
+        return self._stats_dict(self._taxi_w, self.n_mototaxi_sockets)
+    
+    def energy_still_needs(self) -> np.ndarray:
+        """Energia faltante por socket [kWh]"""
+        return np.maximum(0.0, self.energy_needed_kwh - self.energy_charged_so_far_kwh)
+    
+    def urgent_mask(self) -> np.ndarray:
+        """Sockets con carga urgente (tiempo bajo, energia faltante alta)"""
+        return (self.time_remaining_hours < URGENT_TIME_HOURS) & (self.energy_still_needs() > URGENT_ENERGY_KWH)
     
     def total_ev_power_demand_kw(self) -> float:
         """Suma total de potencia demandada por todos los EVs"""
-        return sum(c.power_demanded_kw for c in self.chargers.values())
+        return float(self.power_demanded_kw.sum())
     
     def total_ev_energy_demand_kwh(self) -> float:
         """Suma total de energia faltante"""
-        return sum(c.energy_still_needs() for c in self.chargers.values())
+        self._refresh()
+        return float(self._need.sum())
+    
+    def priority_order(self) -> np.ndarray:
+        """
+        Sockets ordenados de mayor a menor prioridad:
+        urgentes primero, luego priority_level y energia faltante (desc)
+        """
+        self._refresh()
+        # lexsort: la ultima clave es la principal (argsort estable por claves)
+        return np.lexsort((-self._need, -self.priority_level, -self._urgent))
+    
+    def allocate_by_priority(self, available_kw: float, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Repartir potencia disponible entre sockets en orden de prioridad
+        (cada socket recibe hasta power_demanded_kw)
+        
+        Retorna: potencia asignada por socket [kW]
+        """
+        order = self.priority_order()
+        demand = self.power_demanded_kw[order]
+        granted = np.clip(available_kw - (np.cumsum(demand) - demand), 0.0, demand)
+        if out is None:
+            out = np.empty(self.n_sockets)
+        out[order] = granted
+        return out
     
     def update_chargers(self, power_per_socket: np.ndarray, time_step: float = 1.0):
         """Actualizar estado de todos los cargadores tras suministro"""
-        for socket_id, charger in self.chargers.items():
-            if socket_id < len(power_per_socket):
-                charger.update_after_power_delivery(
-                    power_per_socket[socket_id],
-                    time_step
-                )
+        idx = slice(0, min(self.n_sockets, len(power_per_socket)))
+        energy_delivered = np.asarray(power_per_socket, dtype=np.float64)[idx] * time_step
+        self.energy_charged_so_far_kwh[idx] += energy_delivered
+        self.hours_charging[idx] += time_step
+        # Asumiendo 60 kWh capacidad (igual que ChargerCommunication)
+        self.current_soc[idx] = np.minimum(1.0, self.current_soc[idx] + energy_delivered / 60.0)
+        self.time_remaining_hours[idx] = np.maximum(0.0, self.time_remaining_hours[idx] - time_step)
 
 
 # ===== BESS COMMUNICATION CONTROLLER =====
@@ -285,6 +430,9 @@ class BESSCommunicationController:
 
 
 # ===== Sistema de Priorizacion de Energias =====
+N_COMMUNICATION_FEATURES = 12
+
+
 @dataclass
 class EnergyPrioritizer:
     """
@@ -301,7 +449,8 @@ class EnergyPrioritizer:
                        solar_available_kw: float,
                        grid_available_kw: float,
                        mall_demand_kw: float,
-                       time_step: float = 1.0) -> Dict[str, float]:
+                       time_step: float = 1.0,
+                       out: Optional[Dict[str, float]] = None) -> Dict[str, float]:
         """
         Distribuir energia entre componentes segun prioridades
         
@@ -317,6 +466,7 @@ class EnergyPrioritizer:
             'bess_charge': float,
             'bess_discharge': float
         }
+        Si se pasa ``out`` se actualiza y retorna ese mismo dict (sin asignar uno nuevo por hora).
         """
         
         # Paso 1: Obtener demandas
@@ -348,63 +498,57 @@ class EnergyPrioritizer:
         # Paso 5: Calcular descargas actuales BESS
         bess_discharge_total = to_evs_bess + to_mall_bess
         
-        return {
-            'to_evs_from_solar': to_evs_solar,
-            'to_evs_from_bess': to_evs_bess,
-            'to_evs_from_grid': to_evs_grid,
-            'to_mall_from_solar': to_mall_solar,
-            'to_mall_from_bess': to_mall_bess,
-            'to_mall_from_grid': to_mall_grid,
-            'to_bess_from_solar': bess_charge_solar,
-            'bess_of_discharge': bess_discharge_total,
-            'bess_charge': bess_charge_solar,
-        }
-    
-    def get_communication_observation(self) -> np.ndarray:
+        if out is None:
+            out = {}
+        out['to_evs_from_solar'] = to_evs_solar
+        out['to_evs_from_bess'] = to_evs_bess
+        out['to_evs_from_grid'] = to_evs_grid
+        out['to_mall_from_solar'] = to_mall_solar
+        out['to_mall_from_bess'] = to_mall_bess
+        out['to_mall_from_grid'] = to_mall_grid
+        out['to_bess_from_solar'] = bess_charge_solar
+        out['bess_of_discharge'] = bess_discharge_total
+        out['bess_charge'] = bess_charge_solar
+        return out
+    
+    def get_communication_observation(self, out: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Retorna vector de observacion de comunicacion inter-sistemas (12 features)
         Para incluir en observation space del agente
+        
+        Si se pasa ``out`` (float32, 12 elementos) se escribe en ese buffer.
         """
-        motos_stats = self.charger_manager.get_motos_stats()
-        mototaxis_stats = self.charger_manager.get_mototaxis_stats()
+        if out is None:
+            out = np.empty(N_COMMUNICATION_FEATURES, dtype=np.float32)
+        cm = self.charger_manager
+        cm._refresh()
+        m_charging, m_energy, m_time, m_soc, m_urgent = cm._type_summary(cm._moto_w, cm.n_moto_sockets)
+        t_charging, t_energy, t_time, t_soc, t_urgent = cm._type_summary(cm._taxi_w, cm.n_mototaxi_sockets)
         bess_soc = self.bess_controller.get_bess_soc_fraction()
         
-        obs = np.array([
-            # [0] BESS puede suministrar a EVs (1 si SOC >20%)
-            1.0 if bess_soc > 0.20 else 0.0,
-            
-            # [1] EVs tienen urgencia de carga
-            1.0 if motos_stats['urgent_count'] + mototaxis_stats['urgent_count'] > 0 else 0.0,
-            
-            # [2] SOC promedio motos [0, 1]
-            motos_stats['avg_soc'],
-            
-            # [3] SOC promedio mototaxis [0, 1]
-            mototaxis_stats['avg_soc'],
-            
-            # [4] Energia total faltante EVs / capacidad total
-            min(1.0, (motos_stats['energy_needed_kwh'] + mototaxis_stats['energy_needed_kwh']) / 3000.0),
-            
-            # [5] Tiempo promedio restante motos / 8 horas max
-            min(1.0, motos_stats['avg_time_remaining_hours'] / 8.0),
-            
-            # [6] Tiempo promedio restante mototaxis / 8 horas max
-            min(1.0, mototaxis_stats['avg_time_remaining_hours'] / 8.0),
-            
-            # [7] BESS SOC [0, 1]
-            bess_soc,
-            
-            # [8] Motos cargando ahora
-            min(1.0, motos_stats['charging_now'] / 30.0),
-            
-            # [9] Mototaxis cargando ahora
-            min(1.0, mototaxis_stats['charging_now'] / 8.0),
-            
-            # [10] Demanda total EVs / capacidad max (342 kW BESS)
-            min(1.0, self.charger_manager.total_ev_power_demand_kw() / 342.0),
-            
-            # [11] Saturacion sistema (si motos+mototaxis >20)
-            1.0 if (motos_stats['charging_now'] + mototaxis_stats['charging_now']) > 20 else 0.0,
-        ], dtype=np.float32)
+        # [0] BESS puede suministrar a EVs (1 si SOC >20%)
+        out[0] = 1.0 if bess_soc > 0.20 else 0.0
+        # [1] EVs tienen urgencia de carga
+        out[1] = 1.0 if m_urgent + t_urgent > 0 else 0.0
+        # [2] SOC promedio motos [0, 1]
+        out[2] = m_soc
+        # [3] SOC promedio mototaxis [0, 1]
+        out[3] = t_soc
+        # [4] Energia total faltante EVs / capacidad total
+        out[4] = min(1.0, (m_energy + t_energy) / 3000.0)
+        # [5] Tiempo promedio restante motos / 8 horas max
+        out[5] = min(1.0, m_time / 8.0)
+        # [6] Tiempo promedio restante mototaxis / 8 horas max
+        out[6] = min(1.0, t_time / 8.0)
+        # [7] BESS SOC [0, 1]
+        out[7] = bess_soc
+        # [8] Motos cargando ahora
+        out[8] = min(1.0, m_charging / 30.0)
+        # [9] Mototaxis cargando ahora
+        out[9] = min(1.0, t_charging / 8.0)
+        # [10] Demanda total EVs / capacidad max (342 kW BESS)
+        out[10] = min(1.0, cm.total_ev_power_demand_kw() / 342.0)
+        # [11] Saturacion sistema (si motos+mototaxis >20)
+        out[11] = 1.0 if (m_charging + t_charging) > 20 else 0.0
         
-        return obs
+        return out
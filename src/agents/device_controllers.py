@@ -3,6 +3,7 @@
 """
 DEVICE CONTROLLERS - Logica separada por cada aparato del sistema
 Cada aparato tiene su propio tracker/contador independiente
+BatchSystemOrchestrator: misma logica fusionada y vectorizada para N ambientes en paralelo
 """
 from __future__ import annotations
 
@@ -208,7 +209,15 @@ class ChargerController:
         self.n_total_sockets = n_motos + n_mototaxis
         self.metrics = ChargerMetrics()
         self.step_count = 0
-        self.vehicle_socs: Dict[int, float] = {}  # socket_id -> current_soc %
+        # SOC [%] por socket (NaN = socket aun sin vehiculo)
+        self.socket_soc = np.full(self.n_total_sockets, np.nan)
+        self.is_moto = np.arange(self.n_total_sockets) < n_motos
+    
+    @property
+    def vehicle_socs(self) -> Dict[int, float]:
+        """socket_id -> current_soc % (solo sockets que ya recibieron vehiculo)"""
+        seen = np.flatnonzero(~np.isnan(self.socket_soc))
+        return dict(zip(seen.tolist(), self.socket_soc[seen].tolist()))
     
     def step(self, timestep: int, actions: np.ndarray, available_power_kw: float, 
              demand_profile: float) -> Dict[str, float]:
@@ -226,6 +235,7 @@ class ChargerController:
         self.step_count += 1
         self.metrics.timesteps_counted += 1
         
+        actions = np.asarray(actions, dtype=np.float64)[:self.n_total_sockets]
         total_requested = float(np.sum(actions))
         total_available = min(total_requested, available_power_kw)
         
@@ -235,34 +245,25 @@ class ChargerController:
         else:
             scaling_factor = 0.0
         
-        energy_delivered = 0.0
-        motos_charging = 0
-        taxis_charging = 0
-        
-        for socket_id, power_action in enumerate(actions):
-            if power_action > 0.1:
-                actual_power = power_action * scaling_factor
-                energy = actual_power * 1.0  # 1 hora
-                energy_delivered += energy
-                
-                # Actualizar SOC del vehiculo
-                if socket_id not in self.vehicle_socs:
-                    self.vehicle_socs[socket_id] = np.random.uniform(0, 5)  # Llegan vacios
-                
-                self.vehicle_socs[socket_id] = min(100.0, self.vehicle_socs[socket_id] + energy / 50.0)
-                
-                # Contar por tipo
-                if socket_id < self.n_motos:
-                    motos_charging += 1
-                else:
-                    taxis_charging += 1
-                
-                # Si alcanzo 100%, contar
-                if self.vehicle_socs[socket_id] >= 100.0:
-                    if socket_id < self.n_motos:
-                        self.metrics.motos_charged_100 += 1
-                    else:
-                        self.metrics.mototaxis_charged_100 += 1
+        active = actions > 0.1
+        energy = actions[active] * scaling_factor  # 1 hora
+        energy_delivered = float(energy.sum())
+        
+        # Actualizar SOC de los vehiculos (llegan vacios si el socket no tenia vehiculo)
+        soc = self.socket_soc[:len(actions)]
+        new_vehicle = active & np.isnan(soc)
+        if new_vehicle.any():
+            soc[new_vehicle] = np.random.uniform(0, 5, int(new_vehicle.sum()))
+        soc[active] = np.minimum(100.0, soc[active] + energy / 50.0)
+        
+        # Contar por tipo (y los que alcanzaron 100%)
+        is_moto = self.is_moto[:len(actions)]
+        motos_charging = int(np.count_nonzero(active & is_moto))
+        taxis_charging = int(np.count_nonzero(active)) - motos_charging
+        full = active & (soc >= 100.0)
+        motos_full = int(np.count_nonzero(full & is_moto))
+        self.metrics.motos_charged_100 += motos_full
+        self.metrics.mototaxis_charged_100 += int(np.count_nonzero(full)) - motos_full
         
         # Tracking
         self.metrics.total_energy_delivered_kwh += energy_delivered
@@ -277,15 +278,11 @@ class ChargerController:
             if self.metrics.total_energy_requested_kwh > 0:
                 self.metrics.charger_efficiency = self.metrics.total_energy_delivered_kwh / self.metrics.total_energy_requested_kwh
         
-        if self.vehicle_socs:
-            # vehicle_socs es un Dict[int, float], no una lista
-            # Acceder solo a las claves que existen
-            motos_socs = [self.vehicle_socs[i] for i in range(self.n_motos) if i in self.vehicle_socs]
-            taxis_socs = [self.vehicle_socs[i] for i in range(self.n_motos, self.n_total_sockets) if i in self.vehicle_socs]
-            if motos_socs:
-                self.metrics.motos_avg_soc = float(np.mean(motos_socs))
-            if taxis_socs:
-                self.metrics.mototaxis_avg_soc = float(np.mean(taxis_socs))
+        seen = ~np.isnan(self.socket_soc)
+        if seen[self.is_moto].any():
+            self.metrics.motos_avg_soc = float(self.socket_soc[seen & self.is_moto].mean())
+        if seen[~self.is_moto].any():
+            self.metrics.mototaxis_avg_soc = float(self.socket_soc[seen & ~self.is_moto].mean())
         
         return {
             'charger_energy_delivered_kwh': energy_delivered,
@@ -300,7 +297,7 @@ class ChargerController:
     def reset(self):
         self.metrics.reset()
         self.step_count = 0
-        self.vehicle_socs = {}
+        self.socket_soc[:] = np.nan
     
     def get_metrics(self) -> Dict[str, float]:
         return {
@@ -344,6 +341,7 @@ class BESSController:
         """
         self.step_count += 1
         self.metrics.timesteps_counted += 1
+        to_ev = to_mall = 0.0
         
         # Normalizar accion a potencia
         bess_power_kw = (action - 0.5) * 2.0 * self.max_power_kw  # -342 a +342
@@ -409,6 +407,8 @@ class BESSController:
             'bess_soc_percent': self.current_soc_percent,
             'bess_to_ev_kwh': self.metrics.total_to_ev_kwh,
             'bess_to_mall_kwh': self.metrics.total_to_mall_kwh,
+            'bess_step_to_ev_kwh': to_ev,
+            'bess_step_to_mall_kwh': to_mall,
             'bess_timestamp': timestep
         }
     
@@ -559,7 +559,7 @@ class SystemOrchestrator:
         mall_result = self.mall_controller.step(
             timestep,
             solar_available_kw=max(0, solar_for_mall),
-            bess_available_kw=bess_result['bess_to_mall_kwh'],
+            bess_available_kw=bess_result['bess_step_to_mall_kwh'],
             grid_import_kw=0.0  # TODO: calcular del balance
         )
         
@@ -601,3 +601,233 @@ class SystemOrchestrator:
             f"  MALL:     {metrics['mall'].get('mall_total_demand_kwh', 0):.1f} kWh\n"
         )
         return summary
+
+
+# Metricas acumuladas por ambiente en BatchSystemOrchestrator (un arreglo (n_envs,) por clave)
+BATCH_METRIC_KEYS = (
+    'solar_total_kwh', 'solar_to_ev_kwh', 'solar_to_mall_kwh', 'solar_to_bess_kwh', 'solar_peak_kw',
+    'charger_total_kwh', 'charger_requested_kwh', 'charger_motos_100', 'charger_taxis_100',
+    'charger_peak_power', 'bess_total_charge_kwh', 'bess_total_discharge_kwh', 'bess_to_ev_kwh',
+    'bess_to_mall_kwh', 'bess_charging_cycles', 'bess_discharging_cycles', 'bess_peak_charge_kw',
+    'bess_peak_discharge_kw', 'bess_soc_sum', 'bess_min_soc', 'bess_max_soc', 'bess_times_at_100',
+    'bess_times_at_0', 'mall_total_demand_kwh', 'mall_from_solar_kwh', 'mall_from_bess_kwh',
+    'mall_from_grid_kwh', 'mall_peak_kw',
+)
+
+
+class BatchSystemOrchestrator:
+    """
+    Orquestador fusionado para N ambientes en paralelo (misma logica que SystemOrchestrator)
+
+    Todo el estado vive en arreglos: SOC por socket (n_envs, n_sockets), SOC BESS
+    (n_envs,) y acumuladores de metricas (n_envs,). Un paso calcula los flujos de
+    los cuatro controladores con NumPy sobre todos los ambientes a la vez.
+
+    Args:
+        solar_data, mall_data: (T,) compartido o (n_envs, T) por ambiente
+        n_envs: Numero de ambientes paralelos
+        random_seed: Semilla del SOC inicial de vehiculos nuevos
+    """
+    
+    def __init__(self, solar_data: np.ndarray, mall_data: np.ndarray, n_envs: int = 1,
+                 n_motos: int = 30, n_mototaxis: int = 8, capacity_kwh: float = 1700.0,
+                 max_power_kw: float = 342.0, initial_soc_percent: float = 50.0,
+                 initial_vehicle_soc: Tuple[float, float] = (0.0, 5.0),
+                 random_seed: Optional[int] = None):
+        self.n_envs = n_envs
+        self.n_motos = n_motos
+        self.n_sockets = n_motos + n_mototaxis
+        self.capacity_kwh = capacity_kwh
+        self.max_power_kw = max_power_kw
+        self.initial_soc_percent = initial_soc_percent
+        self.initial_vehicle_soc = initial_vehicle_soc
+        self.rng = np.random.default_rng(random_seed)
+        self.solar_data = np.atleast_2d(np.asarray(solar_data, dtype=np.float64))
+        self.mall_data = np.atleast_2d(np.asarray(mall_data, dtype=np.float64))
+        self.is_moto = np.arange(self.n_sockets) < n_motos
+        self._env = np.arange(n_envs)
+        self.reset()
+    
+    def reset(self):
+        n = self.n_envs
+        self.global_timestep = 0
+        self.step_count = 0
+        self.socket_soc = np.full((n, self.n_sockets), np.nan)  # NaN = socket sin vehiculo
+        self.bess_soc_percent = np.full(n, float(self.initial_soc_percent))
+        self._last_action = np.full(n, 0.5)
+        self.metrics = {key: np.zeros(n) for key in BATCH_METRIC_KEYS}
+        self.metrics['bess_min_soc'][:] = 100.0
+        self.motos_avg_soc = np.zeros(n)
+        self.mototaxis_avg_soc = np.zeros(n)
+    
+    def _series_at(self, data: np.ndarray, timesteps: np.ndarray) -> np.ndarray:
+        """Valor horario por ambiente (0 fuera de rango)."""
+        valid = timesteps < data.shape[1]
+        rows = self._env if data.shape[0] == self.n_envs else np.zeros(self.n_envs, dtype=np.int64)
+        out = np.zeros(self.n_envs)
+        out[valid] = data[rows[valid], timesteps[valid]]
+        return out
+    
+    def step(self, timesteps, actions: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Procesar un timestep en todos los ambientes
+        
+        Args:
+            timesteps: Hora [0-8759] (escalar o arreglo (n_envs,))
+            actions: (n_envs, 1 + n_sockets) = [bess_action, charger_actions]
+        
+        Returns:
+            Dict de arreglos (n_envs,) con los flujos del paso
+        """
+        m = self.metrics
+        t = np.broadcast_to(np.asarray(timesteps, dtype=np.int64), (self.n_envs,))
+        actions = np.asarray(actions, dtype=np.float64).reshape(self.n_envs, -1)
+        a0 = actions[:, 0]
+        self.step_count += 1
+        self.global_timestep = int(t.max())
+        
+        # 1. SOLAR: reparto EV / (mall + BESS) segun la accion
+        gen = self._series_at(self.solar_data, t)
+        solar_to_ev = gen * (1.0 - a0)
+        solar_to_other = gen * a0
+        m['solar_total_kwh'] += gen
+        m['solar_to_ev_kwh'] += solar_to_ev
+        m['solar_to_mall_kwh'] += 0.5 * solar_to_other
+        m['solar_to_bess_kwh'] += 0.5 * solar_to_other
+        np.maximum(m['solar_peak_kw'], gen, out=m['solar_peak_kw'])
+        
+        # 2. CHARGERS: escalar acciones a la potencia disponible (solar + BESS)
+        acts = actions[:, 1:1 + self.n_sockets]
+        available = gen + self.bess_soc_percent / 100.0 * self.max_power_kw
+        requested = acts.sum(axis=1)
+        scale = np.divide(np.minimum(requested, available), requested,
+                          out=np.zeros(self.n_envs), where=requested > 0)
+        active = acts > 0.1
+        energy = np.where(active, acts * scale[:, None], 0.0)
+        delivered = energy.sum(axis=1)
+        
+        soc = self.socket_soc[:, :acts.shape[1]]
+        new_vehicle = active & np.isnan(soc)
+        n_new = int(new_vehicle.sum())
+        if n_new:
+            soc[new_vehicle] = self.rng.uniform(*self.initial_vehicle_soc, n_new)
+        soc[active] = np.minimum(100.0, soc[active] + energy[active] / 50.0)
+        
+        is_moto = self.is_moto[:acts.shape[1]]
+        motos_charging = (active & is_moto).sum(axis=1)
+        taxis_charging = active.sum(axis=1) - motos_charging
+        full = active & (soc >= 100.0)
+        m['charger_motos_100'] += (full & is_moto).sum(axis=1)
+        m['charger_taxis_100'] += (full & ~is_moto).sum(axis=1)
+        m['charger_total_kwh'] += delivered
+        m['charger_requested_kwh'] += requested
+        np.maximum(m['charger_peak_power'], delivered, out=m['charger_peak_power'])
+        seen = ~np.isnan(self.socket_soc)
+        for avg, mask in ((self.motos_avg_soc, self.is_moto), (self.mototaxis_avg_soc, ~self.is_moto)):
+            n_seen = (seen & mask).sum(axis=1)
+            total = np.where(seen & mask, self.socket_soc, 0.0).sum(axis=1)
+            np.divide(total, n_seen, out=avg, where=n_seen > 0)
+        
+        # 3. BESS: accion 0=carga max, 0.5=neutro, 1=descarga max
+        bess_power = (a0 - 0.5) * 2.0 * self.max_power_kw
+        bess_soc = self.bess_soc_percent
+        discharging = bess_power > 0
+        discharge = np.where(discharging, np.minimum(np.abs(bess_power), bess_soc / 100.0 * self.capacity_kwh), 0.0)
+        charge = np.where(
+            discharging, 0.0,
+            np.minimum(np.minimum(np.abs(bess_power), (100.0 - bess_soc) / 100.0 * self.capacity_kwh), gen),
+        )
+        mall_demand = self._series_at(self.mall_data, t)
+        bess_to_ev = np.minimum(discharge, requested)
+        bess_to_mall = np.minimum(discharge - bess_to_ev, mall_demand)
+        changed = a0 != self._last_action
+        m['bess_discharging_cycles'] += discharging & changed & (a0 > 0.5)
+        m['bess_charging_cycles'] += ~discharging & changed & (a0 < 0.5)
+        m['bess_total_discharge_kwh'] += discharge
+        m['bess_total_charge_kwh'] += charge
+        m['bess_to_ev_kwh'] += bess_to_ev
+        m['bess_to_mall_kwh'] += bess_to_mall
+        np.maximum(m['bess_peak_discharge_kw'], discharge, out=m['bess_peak_discharge_kw'])
+        np.maximum(m['bess_peak_charge_kw'], charge, out=m['bess_peak_charge_kw'])
+        bess_soc += (charge - discharge) / self.capacity_kwh * 100.0
+        np.clip(bess_soc, 0.0, 100.0, out=bess_soc)
+        m['bess_times_at_100'] += bess_soc >= 99.0
+        m['bess_times_at_0'] += bess_soc <= 1.0
+        np.minimum(m['bess_min_soc'], bess_soc, out=m['bess_min_soc'])
+        np.maximum(m['bess_max_soc'], bess_soc, out=m['bess_max_soc'])
+        m['bess_soc_sum'] += bess_soc
+        self._last_action[:] = a0
+        
+        # 4. MALL: solar sobrante tras EVs + BESS del paso
+        mall_from_solar = np.maximum(0.0, gen - delivered)
+        m['mall_total_demand_kwh'] += mall_demand
+        m['mall_from_solar_kwh'] += mall_from_solar
+        m['mall_from_bess_kwh'] += bess_to_mall
+        np.maximum(m['mall_peak_kw'], mall_demand, out=m['mall_peak_kw'])
+        
+        return {
+            'solar_generation_kw': gen,
+            'solar_to_ev_kw': solar_to_ev,
+            'solar_to_other_kw': solar_to_other,
+            'charger_energy_delivered_kwh': delivered,
+            'charger_energy_requested_kwh': requested,
+            'charger_motos_charging': motos_charging,
+            'charger_taxis_charging': taxis_charging,
+            'bess_soc_percent': bess_soc.copy(),
+            'bess_charge_kwh': charge,
+            'bess_discharge_kwh': discharge,
+            'bess_to_ev_kwh': bess_to_ev,
+            'bess_to_mall_kwh': bess_to_mall,
+            'mall_demand_kwh': mall_demand,
+            'mall_from_solar_kwh': mall_from_solar,
+            'mall_from_bess_kwh': bess_to_mall,
+        }
+    
+    def get_all_metrics(self, env: int = 0) -> Dict[str, Dict]:
+        """Metricas del ambiente ``env`` con las mismas claves que SystemOrchestrator.get_all_metrics"""
+        m = {key: float(v[env]) for key, v in self.metrics.items()}
+        steps = self.step_count
+        supply = m['mall_from_solar_kwh'] + m['mall_from_bess_kwh'] + m['mall_from_grid_kwh']
+        return {
+            'solar': {
+                'solar_timesteps': steps,
+                'solar_total_kwh': m['solar_total_kwh'],
+                'solar_to_ev_kwh': m['solar_to_ev_kwh'],
+                'solar_peak_kw': m['solar_peak_kw'],
+                'solar_avg_kw': m['solar_total_kwh'] / steps if steps else 0.0,
+            },
+            'charger': {
+                'charger_timesteps': steps,
+                'charger_total_kwh': m['charger_total_kwh'],
+                'charger_motos_100': int(m['charger_motos_100']),
+                'charger_taxis_100': int(m['charger_taxis_100']),
+                'charger_avg_power': m['charger_total_kwh'] / steps if steps else 0.0,
+                'charger_peak_power': m['charger_peak_power'],
+                'charger_efficiency': (m['charger_total_kwh'] / m['charger_requested_kwh']
+                                       if m['charger_requested_kwh'] > 0 else 0.0),
+                'charger_motos_avg_soc': float(self.motos_avg_soc[env]),
+                'charger_taxis_avg_soc': float(self.mototaxis_avg_soc[env]),
+            },
+            'bess': {
+                'bess_timesteps': steps,
+                'bess_total_charge_kwh': m['bess_total_charge_kwh'],
+                'bess_total_discharge_kwh': m['bess_total_discharge_kwh'],
+                'bess_to_ev_kwh': m['bess_to_ev_kwh'],
+                'bess_to_mall_kwh': m['bess_to_mall_kwh'],
+                'bess_cycles': int(m['bess_charging_cycles'] + m['bess_discharging_cycles']),
+                'bess_avg_soc': m['bess_soc_sum'] / steps if steps else 0.0,
+                'bess_min_soc': m['bess_min_soc'],
+                'bess_max_soc': m['bess_max_soc'],
+            },
+            'mall': {
+                'mall_timesteps': steps,
+                'mall_total_demand_kwh': m['mall_total_demand_kwh'],
+                'mall_from_solar_kwh': m['mall_from_solar_kwh'],
+                'mall_from_bess_kwh': m['mall_from_bess_kwh'],
+                'mall_from_grid_kwh': m['mall_from_grid_kwh'],
+                'mall_avg_demand': m['mall_total_demand_kwh'] / steps if steps else 0.0,
+                'mall_solar_penetration': m['mall_from_solar_kwh'] / supply if supply > 0 else 0.0,
+                'mall_bess_penetration': m['mall_from_bess_kwh'] / supply if supply > 0 else 0.0,
+            },
+            'global_timestep': self.global_timestep,
+        }
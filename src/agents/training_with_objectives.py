@@ -9,7 +9,7 @@ from __future__ import annotations
 import numpy as np
 from dataclasses import dataclass
 from typing import Dict, Tuple
-from src.agents.vehicle_cycle_simulator import VehicleCycleSimulator, VehicleTrip
+from src.agents.vehicle_cycle_simulator import MOTO, VehicleCycleSimulator, VehicleTrip
 from src.agents.device_communication import (
     ChargerManager,
     BESSCommunicationController,
@@ -115,6 +115,8 @@ class RealWorldSimulationEnvironment:
             charger_manager=self.charger_manager,
             bess_controller=self.bess_controller
         )
+        # Dict de despacho reutilizado en cada hora
+        self._dispatch: Dict[str, float] = {}
         
         # Objetivos
         self.objectives = TrainingObjectives()
@@ -174,7 +176,7 @@ class RealWorldSimulationEnvironment:
         # Obtener vehiculos en ciclo
         cycle_stats = self.cycle_simulator.update_hourly(
             self.current_hour,
-            {i: charger_power_kw[i] for i in range(38)}
+            charger_power_kw
         )
         
         # Procesar ENERGIAS con priorizacion
@@ -182,16 +184,12 @@ class RealWorldSimulationEnvironment:
             solar_available_kw=solar_kw,
             grid_available_kw=500.0,
             mall_demand_kw=mall_kw,
-            time_step=1.0
+            time_step=1.0,
+            out=self._dispatch
         )
         
         # Procesar urgencias
-        motos_stats = self.charger_manager.get_motos_stats()
-        mototaxis_stats = self.charger_manager.get_mototaxis_stats()
-        
-        urgent_motos = motos_stats.get('urgent_count', 0)
-        urgent_mototaxis = mototaxis_stats.get('urgent_count', 0)
-        total_urgent = urgent_motos + urgent_mototaxis
+        total_urgent = int(np.count_nonzero(self.charger_manager.urgent_mask()))
         
         # Calcular reward de objetivos
         objective_reward = self._compute_objective_reward(
@@ -274,23 +272,18 @@ class RealWorldSimulationEnvironment:
         
         final_stats = self.cycle_simulator.get_statistics()
         
-        motos = [t for t in self.cycle_simulator.completed_trips if t.vehicle_type == 'moto']
-        mototaxis = [t for t in self.cycle_simulator.completed_trips if t.vehicle_type == 'mototaxi']
+        completed = self.cycle_simulator.completed_arrays()
+        is_moto = completed['vehicle_type'] == MOTO
         
         # Calcular metricas
-        if motos:
-            self.episode_metrics['motos_avg_arrival_soc'] = np.mean([t.arrival_soc for t in motos])
-            self.episode_metrics['motos_avg_departure_soc'] = np.mean([t.departure_soc for t in motos])
-            self.episode_metrics['motos_charged_100_percent'] = (
-                self.episode_metrics['motos_charged_100_count'] / len(motos) * 100.0
-            )
-        
-        if mototaxis:
-            self.episode_metrics['mototaxis_avg_arrival_soc'] = np.mean([t.arrival_soc for t in mototaxis])
-            self.episode_metrics['mototaxis_avg_departure_soc'] = np.mean([t.departure_soc for t in mototaxis])
-            self.episode_metrics['mototaxis_charged_100_percent'] = (
-                self.episode_metrics['mototaxis_charged_100_count'] / len(mototaxis) * 100.0
-            )
+        for mask, key in ((is_moto, 'motos'), (~is_moto, 'mototaxis')):
+            n = int(np.count_nonzero(mask))
+            if n:
+                self.episode_metrics[f'{key}_avg_arrival_soc'] = float(completed['arrival_soc'][mask].mean())
+                self.episode_metrics[f'{key}_avg_departure_soc'] = float(completed['departure_soc'][mask].mean())
+                self.episode_metrics[f'{key}_charged_100_percent'] = (
+                    self.episode_metrics[f'{key}_charged_100_count'] / n * 100.0
+                )
         
         # Calcular score de objetivos
         objective_score = self.objectives.compute_objective_score(self.episode_metrics)
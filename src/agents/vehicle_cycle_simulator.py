@@ -7,7 +7,7 @@ Motos y mototaxis hacen multiples ciclos: llegan -> cargan -> se van -> vuelven
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Mapping, Optional, Tuple, Union
 from enum import Enum
 import numpy as np
 
@@ -116,9 +116,76 @@ class VehicleTrip:
         return (soc_decrease / 100.0) * capacity
 
 
+# Tipos de vehiculo (codigo en el cronograma columnar)
+VEHICLE_TYPES = ('moto', 'mototaxi')
+MOTO, MOTOTAXI = 0, 1
+
+# Parametros de bateria por tipo (mismos valores que VehicleTrip.charge / discharge_in_trip)
+CAPACITY_KWH = np.array([48.0, 60.0])
+MAX_SOC = np.array([80.0, 100.0])
+TRIP_CONSUMPTION_PCT_H = np.array([15.0, 12.0])
+
+# Estados en arreglo (orden de VehicleState)
+_STATES = list(VehicleState)
+_STATE_CODE = {state: k for k, state in enumerate(_STATES)}
+ST_WAITING = _STATE_CODE[VehicleState.WAITING]
+ST_CHARGING = _STATE_CODE[VehicleState.CHARGING]
+ST_CHARGED = _STATE_CODE[VehicleState.CHARGED]
+ST_IN_USE = _STATE_CODE[VehicleState.IN_USE]
+
+# Filas del bloque de viajes activos (una columna por viaje)
+# (horas de inicio/fin de carga sin definir = +inf, para actualizarlas con np.minimum)
+(_R_SOC, _R_ENERGY, _R_TARGET, _R_PCT_PER_KWH, _R_KWH_PER_PCT, _R_MAX_SOC, _R_MIN_DEPART,
+ _R_DEADLINE, _R_IS_MOTO, _R_DISCHARGE, _R_CHARGE_START, _R_CHARGE_END, _R_INDEX) = range(13)
+_N_ROWS = 13
+
+
+def _hours_or_unset(hours: np.ndarray) -> np.ndarray:
+    """Horas del bloque activo -> enteros (-1 = no ocurrio)."""
+    return np.where(np.isfinite(hours), hours, -1).astype(np.int32)
+
+
+@dataclass
+class TripSchedule:
+    """Cronograma anual columnar, ordenado por hora de llegada.
+
+    ``hour_ptr[h]:hour_ptr[h + 1]`` es el rango de viajes que llegan en la hora h
+    (dentro de una hora se conserva el orden de las plantillas).
+    """
+    vehicle_id: np.ndarray        # int32
+    vehicle_type: np.ndarray      # uint8 (MOTO / MOTOTAXI)
+    arrival_hour: np.ndarray      # int32
+    arrival_soc: np.ndarray       # float64 [%]
+    target_soc: np.ndarray        # float64 [%]
+    duration_hours: np.ndarray    # float64
+    hour_ptr: np.ndarray          # int64 (n_horas + 1,)
+
+    def __len__(self) -> int:
+        return len(self.arrival_hour)
+
+    @property
+    def n_hours(self) -> int:
+        return len(self.hour_ptr) - 1
+
+    def hour_range(self, hour: int) -> Tuple[int, int]:
+        """Rango [lo, hi) de viajes que llegan en ``hour``."""
+        if hour < 0 or hour >= self.n_hours:
+            return 0, 0
+        return int(self.hour_ptr[hour]), int(self.hour_ptr[hour + 1])
+
+    def hours_with_arrivals(self) -> int:
+        return int(np.count_nonzero(np.diff(self.hour_ptr)))
+
+
 @dataclass
 class VehicleCycleSimulator:
-    """Simula ciclos completos de vehiculos a lo largo del ano"""
+    """Simula ciclos completos de vehiculos a lo largo del ano.
+
+    El cronograma y el estado de cada viaje viven en arreglos NumPy (un indice
+    por viaje); update_hourly opera sobre el vector de viajes activos. La API
+    de objetos (VehicleTrip en get_arriving_vehicles, active_trips,
+    completed_trips) se materializa bajo demanda.
+    """
     
     n_motos: int = 30
     n_mototaxis: int = 8
@@ -139,180 +206,284 @@ class VehicleCycleSimulator:
     mototaxi_arrival_soc_min: float = 5.0
     mototaxi_arrival_soc_max: float = 10.0
     
-    # Mapa de viajes por hora: { hour: [VehicleTrip, ...] }
-    scheduled_trips: Dict[int, List[VehicleTrip]] = field(default_factory=dict)
-    active_trips: Dict[int, VehicleTrip] = field(default_factory=dict)  # {vehicle_id: trip}
+    n_days: int = 365
+    random_seed: Optional[int] = None
     
-    completed_trips: List[VehicleTrip] = field(default_factory=list)
+    schedule: Optional[TripSchedule] = field(default=None, init=False, repr=False)
     
-    def generate_yearly_schedule(self):
+    def generate_yearly_schedule(self) -> TripSchedule:
         """
         Genera cronograma de viajes para todo el ano
-        Cada dia se repite el patron de llegadas
+        Cada dia se repite el patron de llegadas (plantillas con SOC objetivo y
+        duracion fijos; hora +-1 y SOC de llegada nuevos cada dia)
         """
-        trips_per_day = []
+        rng = np.random.default_rng(self.random_seed)
+        
+        # Plantillas: motos (multiples viajes por dia) y mototaxis (menos viajes pero mas largos)
+        per_moto = max(1, self.n_motos // len(self.moto_arrival_hours))
+        per_taxi = max(1, self.n_mototaxis // len(self.mototaxi_arrival_hours))
+        t_hour = np.concatenate([
+            np.repeat(np.asarray(self.moto_arrival_hours, dtype=np.int32), per_moto),
+            np.repeat(np.asarray(self.mototaxi_arrival_hours, dtype=np.int32), per_taxi),
+        ])
+        n_moto_t = len(self.moto_arrival_hours) * per_moto
+        n_templates = len(t_hour)
+        t_type = np.where(np.arange(n_templates) < n_moto_t, MOTO, MOTOTAXI).astype(np.uint8)
+        is_moto = t_type == MOTO
+        t_target = np.where(is_moto, rng.uniform(70.0, 85.0, n_templates), rng.uniform(85.0, 100.0, n_templates))
+        t_duration = np.where(
+            is_moto,
+            rng.uniform(self.moto_trip_duration_min, self.moto_trip_duration_max, n_templates),
+            rng.uniform(self.mototaxi_trip_duration_min, self.mototaxi_trip_duration_max, n_templates),
+        )
         
-        # Motos: multiples viajes por dia
-        vehicle_counter = 0
-        for arrival_hour in self.moto_arrival_hours:
-            for _ in range(max(1, self.n_motos // len(self.moto_arrival_hours))):
-                trip = VehicleTrip(
-                    vehicle_id=vehicle_counter,
-                    vehicle_type='moto',
-                    arrival_hour=arrival_hour,
-                    arrival_soc=np.random.uniform(self.moto_arrival_soc_min, self.moto_arrival_soc_max),
-                    target_soc=np.random.uniform(70.0, 85.0),
-                    expected_trip_duration_hours=np.random.uniform(self.moto_trip_duration_min, self.moto_trip_duration_max)
-                )
-                trips_per_day.append(trip)
-                vehicle_counter += 1
+        # Replicar para n_days dias (orden dia -> plantilla) con variabilidad (+-1 h)
+        n = self.n_days * n_templates
+        tmpl = np.tile(np.arange(n_templates), self.n_days)
+        day = np.repeat(np.arange(self.n_days, dtype=np.int32), n_templates)
+        hour = day * 24 + t_hour[tmpl] + rng.integers(-1, 2, size=n).astype(np.int32)
+        soc_min = np.where(is_moto, self.moto_arrival_soc_min, self.mototaxi_arrival_soc_min)[tmpl]
+        soc_max = np.where(is_moto, self.moto_arrival_soc_max, self.mototaxi_arrival_soc_max)[tmpl]
+        arrival_soc = rng.uniform(soc_min, soc_max)
         
-        # Mototaxis: menos viajes pero mas largos
-        for arrival_hour in self.mototaxi_arrival_hours:
-            for _ in range(max(1, self.n_mototaxis // len(self.mototaxi_arrival_hours))):
-                trip = VehicleTrip(
-                    vehicle_id=vehicle_counter,
-                    vehicle_type='mototaxi',
-                    arrival_hour=arrival_hour,
-                    arrival_soc=np.random.uniform(self.mototaxi_arrival_soc_min, self.mototaxi_arrival_soc_max),
-                    target_soc=np.random.uniform(85.0, 100.0),
-                    expected_trip_duration_hours=np.random.uniform(self.mototaxi_trip_duration_min, self.mototaxi_trip_duration_max)
-                )
-                trips_per_day.append(trip)
-                vehicle_counter += 1
+        order = np.argsort(hour, kind='stable')
+        hour = hour[order]
+        n_hours = max(self.n_days * 24, int(hour[-1]) + 1 if n else 0)
+        hour_ptr = np.searchsorted(hour, np.arange(n_hours + 1), side='left')
+        self.schedule = TripSchedule(
+            vehicle_id=tmpl[order].astype(np.int32),
+            vehicle_type=t_type[tmpl][order],
+            arrival_hour=hour,
+            arrival_soc=arrival_soc[order],
+            target_soc=t_target[tmpl][order],
+            duration_hours=t_duration[tmpl][order],
+            hour_ptr=hour_ptr.astype(np.int64),
+        )
+        self._reset_state()
+        return self.schedule
+    
+    def _reset_state(self) -> None:
+        """Estado por viaje (arreglos) + bloque compacto de viajes activos en orden de llegada."""
+        sch = self.schedule
+        n = len(sch)
+        self.current_soc = sch.arrival_soc.copy()
+        self.energy_charged_kwh = np.zeros(n)
+        self.state = np.full(n, ST_WAITING, dtype=np.uint8)
+        self.charge_start_hour = np.full(n, -1, dtype=np.int32)
+        self.charge_end_hour = np.full(n, -1, dtype=np.int32)
+        self.departure_hour = np.full(n, -1, dtype=np.int32)
+        self.departure_soc = np.zeros(n)
+        self._arrived = np.zeros(n, dtype=bool)
+        self._completed: List[np.ndarray] = []
         
-        # Replicar para 365 dias del ano
-        for day in range(365):
-            day_start_hour = day * 24
-            
-            for trip_template in trips_per_day:
-                # Crear copia del viaje para este dia
-                hour_key = day_start_hour + trip_template.arrival_hour
-                
-                # Agregar variabilidad (+-30 min)
-                hour_key += np.random.randint(-1, 2)
-                
-                new_trip = VehicleTrip(
-                    vehicle_id=trip_template.vehicle_id,
-                    vehicle_type=trip_template.vehicle_type,
-                    arrival_hour=hour_key,
-                    arrival_soc=np.random.uniform(
-                        trip_template.vehicle_type == 'moto' and self.moto_arrival_soc_min or self.mototaxi_arrival_soc_min,
-                        trip_template.vehicle_type == 'moto' and self.moto_arrival_soc_max or self.mototaxi_arrival_soc_max
-                    ),
-                    target_soc=trip_template.target_soc,
-                    expected_trip_duration_hours=trip_template.expected_trip_duration_hours
-                )
-                
-                if hour_key not in self.scheduled_trips:
-                    self.scheduled_trips[hour_key] = []
-                self.scheduled_trips[hour_key].append(new_trip)
+        # Filas precalculadas por viaje; al llegar se copia su columna al bloque activo
+        vtype = sch.vehicle_type
+        rows = np.empty((_N_ROWS, n))
+        rows[_R_SOC] = sch.arrival_soc
+        rows[_R_ENERGY] = 0.0
+        rows[_R_TARGET] = sch.target_soc
+        rows[_R_PCT_PER_KWH] = 100.0 / CAPACITY_KWH[vtype]
+        rows[_R_KWH_PER_PCT] = CAPACITY_KWH[vtype] / 100.0
+        rows[_R_MAX_SOC] = MAX_SOC[vtype]
+        rows[_R_MIN_DEPART] = sch.arrival_hour + 1.0  # tiempo minimo estacionado: 1 h
+        rows[_R_DEADLINE] = sch.arrival_hour + (sch.duration_hours + 2.0)  # 2h tolerancia
+        rows[_R_IS_MOTO] = vtype == MOTO
+        rows[_R_DISCHARGE] = TRIP_CONSUMPTION_PCT_H[vtype] * sch.duration_hours
+        rows[_R_CHARGE_START] = np.inf
+        rows[_R_CHARGE_END] = np.inf
+        rows[_R_INDEX] = np.arange(n)
+        self._rows = rows
+        self._block = rows[:, :0].copy()
+    
+    def _sync_active(self) -> None:
+        """Vuelca el bloque activo a los arreglos por viaje (para las vistas VehicleTrip)."""
+        if self.schedule is None or not self._block.shape[1]:
+            return
+        A = self._block
+        i = A[_R_INDEX].astype(np.int64)
+        self.current_soc[i] = A[_R_SOC]
+        self.energy_charged_kwh[i] = A[_R_ENERGY]
+        self.charge_start_hour[i] = _hours_or_unset(A[_R_CHARGE_START])
+        self.charge_end_hour[i] = _hours_or_unset(A[_R_CHARGE_END])
+        self.state[i] = np.where(A[_R_SOC] >= A[_R_TARGET], ST_CHARGED, ST_CHARGING)
+    
+    def reset(self) -> None:
+        """Reinicia el estado de todos los viajes sin regenerar el cronograma."""
+        if self.schedule is not None:
+            self._reset_state()
+    
+    # ------------------------------------------------------------------
+    # Vistas de compatibilidad (objetos VehicleTrip)
+    # ------------------------------------------------------------------
+    def _trip(self, i: int) -> VehicleTrip:
+        sch = self.schedule
+        trip = VehicleTrip(
+            vehicle_id=int(sch.vehicle_id[i]),
+            vehicle_type=VEHICLE_TYPES[sch.vehicle_type[i]],
+            arrival_hour=int(sch.arrival_hour[i]),
+            arrival_soc=float(sch.arrival_soc[i]),
+            target_soc=float(sch.target_soc[i]),
+            expected_trip_duration_hours=float(sch.duration_hours[i]),
+        )
+        trip.current_soc = float(self.current_soc[i])
+        trip.energy_charged_kwh = float(self.energy_charged_kwh[i])
+        trip.state = _STATES[self.state[i]]
+        trip.charge_start_hour = int(self.charge_start_hour[i]) if self.charge_start_hour[i] >= 0 else None
+        trip.charge_end_hour = int(self.charge_end_hour[i]) if self.charge_end_hour[i] >= 0 else None
+        trip.departure_hour = int(self.departure_hour[i]) if self.departure_hour[i] >= 0 else None
+        trip.departure_soc = float(self.departure_soc[i])
+        return trip
+    
+    @property
+    def scheduled_trips(self) -> Dict[int, List[VehicleTrip]]:
+        """Cronograma como {hora: [VehicleTrip, ...]} (materializa objetos; usar schedule)."""
+        if self.schedule is None:
+            return {}
+        self._sync_active()
+        out: Dict[int, List[VehicleTrip]] = {}
+        for h in np.flatnonzero(np.diff(self.schedule.hour_ptr)).tolist():
+            lo, hi = self.schedule.hour_range(h)
+            out[h] = [self._trip(i) for i in range(lo, hi)]
+        return out
+    
+    @property
+    def active_trips(self) -> Dict[str, VehicleTrip]:
+        """Viajes activos {trip_id: VehicleTrip} en orden de llegada."""
+        if self.schedule is None:
+            return {}
+        self._sync_active()
+        trips = [self._trip(i) for i in self._block[_R_INDEX].astype(np.int64).tolist()]
+        return {t.get_trip_id(): t for t in trips}
+    
+    @property
+    def completed_indices(self) -> np.ndarray:
+        """Indices (en schedule) de los viajes completados, en orden de partida."""
+        if self.schedule is None or not self._completed:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(self._completed)
+    
+    @property
+    def completed_trips(self) -> List[VehicleTrip]:
+        """Viajes completados como VehicleTrip (materializa objetos; usar completed_indices)."""
+        return [self._trip(i) for i in self.completed_indices.tolist()]
     
     def get_arriving_vehicles(self, current_hour: int) -> List[VehicleTrip]:
         """Obtener vehiculos que llegan en esta hora"""
-        return self.scheduled_trips.get(current_hour, [])
+        if self.schedule is None:
+            return []
+        self._sync_active()
+        lo, hi = self.schedule.hour_range(current_hour)
+        return [self._trip(i) for i in range(lo, hi)]
     
-    def update_hourly(self, current_hour: int, chargers_available: Dict[int, float]) -> Dict:
+    # ------------------------------------------------------------------
+    # Paso horario vectorizado
+    # ------------------------------------------------------------------
+    def update_hourly(self, current_hour: int, chargers_available: Union[Mapping[int, float], np.ndarray]) -> Dict:
         """
         Actualizar estado de todos los viajes activos en esta hora
         
         Args:
             current_hour: Hora actual [0, 8759]
-            chargers_available: {charger_index: power_kw} potencia asignada a cada charger
+            chargers_available: potencia asignada a cada charger, como arreglo
+                (indice = charger) o {charger_index: power_kw}
         
         Returns:
             Dict con estadisticas de viajes
         """
+        if self.schedule is None:
+            self.generate_yearly_schedule()
         
-        stats = {
-            'trips_active': 0,
-            'trips_charging': 0,
-            'trips_charged': 0,
-            'motos_cargadas_100': 0,
-            'mototaxis_cargadas_100': 0,
-            'total_energy_charged_kwh': 0.0,
-            'departing_soon': 0,
-            'departed': 0,
-            'new_arrivals': 0
-        }
-        
-        # 1. Procesar nuevas llegadas
-        arriving = self.get_arriving_vehicles(current_hour)
-        for trip in arriving:
-            # Usar trip_id unico en lugar de id() de Python
-            trip_key = trip.get_trip_id()
-            self.active_trips[trip_key] = trip
-            stats['new_arrivals'] += 1
+        # 1. Procesar nuevas llegadas (se agregan al final: orden de llegada)
+        A = self._block
+        ptr = self.schedule.hour_ptr
+        lo = hi = n_new = 0
+        if 0 <= current_hour < len(ptr) - 1:
+            lo, hi = int(ptr[current_hour]), int(ptr[current_hour + 1])
+        if hi > lo:
+            new = np.flatnonzero(~self._arrived[lo:hi]) + lo
+            n_new = len(new)
+            if n_new:
+                self._arrived[new] = True
+                A = np.concatenate([A, self._rows[:, new]], axis=1)
+        n_active = A.shape[1]
         
-        # 2. Actualizar viajes activos
-        vehicles_to_remove = []
-        charger_index = 0  # Asignar chargers secuencialmente
+        # 2. Potencia por viaje activo: charger k -> k-esimo viaje activo
+        if isinstance(chargers_available, np.ndarray):
+            power = chargers_available[:n_active].astype(np.float64, copy=False)
+        elif isinstance(chargers_available, Mapping):
+            power = np.fromiter((chargers_available.get(k, 0.0) for k in range(n_active)),
+                                dtype=np.float64, count=n_active)
+        else:
+            power = np.asarray(chargers_available, dtype=np.float64)[:n_active]
+        if len(power) < n_active:
+            power = np.concatenate([power, np.zeros(n_active - len(power))])
         
-        for trip_key, trip in list(self.active_trips.items()):
-            stats['trips_active'] += 1
-            
-            # Obtener potencia asignada (usa indice de charger, no vehicle_id)
-            power_kw = chargers_available.get(charger_index, 0.0)
-            charger_index += 1
-            
-            # Cargar
-            energy = trip.charge(power_kw, time_hours=1.0)
-            stats['total_energy_charged_kwh'] += energy
-            
-            if trip.state == VehicleState.CHARGING:
-                stats['trips_charging'] += 1
-            elif trip.state == VehicleState.CHARGED:
-                stats['trips_charged'] += 1
-            
-            # Verificar si alcanzo 100%
-            if trip.current_soc >= 99.0:
-                if trip.vehicle_type == 'moto':
-                    stats['motos_cargadas_100'] += 1
-                else:
-                    stats['mototaxis_cargadas_100'] += 1
-            
-            # Verificar si debe partir (tiempo maximo en estacionamiento)
-            hours_parked = current_hour - trip.arrival_hour
-            
-            if trip.current_soc >= trip.target_soc and hours_parked >= 1.0:
-                # Puede partir si alcanzo target y paso tiempo minimo
-                trip.departure_hour = current_hour
-                trip.departure_soc = trip.current_soc
-                trip.state = VehicleState.IN_USE
-                
-                # Simular descarga durante viaje
-                trip.discharge_in_trip(trip.expected_trip_duration_hours)
-                
-                self.completed_trips.append(trip)
-                vehicles_to_remove.append(trip_key)
-                stats['departed'] += 1
-            
-            elif trip.is_overdue(current_hour):
-                # Forzar partida si esta retrasado
-                trip.departure_hour = current_hour
-                trip.departure_soc = trip.current_soc
-                trip.state = VehicleState.IN_USE
-                trip.discharge_in_trip(trip.expected_trip_duration_hours)
-                
-                self.completed_trips.append(trip)
-                vehicles_to_remove.append(trip_key)
-                stats['departed'] += 1
-            
-            elif hours_parked < 0.5:
-                stats['departing_soon'] += 1
+        # Cargar (misma aritmetica que VehicleTrip.charge con time_hours=1)
+        soc = A[_R_SOC]
+        new_soc = np.minimum(A[_R_MAX_SOC], soc + power * A[_R_PCT_PER_KWH])
+        energy = (new_soc - soc) * A[_R_KWH_PER_PCT]
+        A[_R_SOC] = new_soc
+        A[_R_ENERGY] += energy
+        charged = new_soc >= A[_R_TARGET]
+        # Hora real de inicio de carga (primera con energia) y de llegada al objetivo
+        np.minimum(A[_R_CHARGE_START], current_hour, out=A[_R_CHARGE_START], where=energy > 0)
+        np.minimum(A[_R_CHARGE_END], current_hour, out=A[_R_CHARGE_END], where=charged)
         
-            # Remover viajes completados
-        for trip_key in vehicles_to_remove:
-            if trip_key in self.active_trips:
-                del self.active_trips[trip_key]
+        # 3. Partidas: alcanzo target y paso tiempo minimo, o esta retrasado
+        #    (los recien llegados nunca parten: son los que "parten pronto")
+        just_arrived = current_hour < A[_R_MIN_DEPART]
+        is_moto = A[_R_IS_MOTO]
+        depart = (charged & ~just_arrived) | (current_hour > A[_R_DEADLINE])
+        n_departed = int(np.count_nonzero(depart))
+        if n_departed:
+            G = A[:, depart]
+            gone = G[_R_INDEX].astype(np.int64)
+            self.departure_hour[gone] = current_hour
+            self.departure_soc[gone] = G[_R_SOC]
+            self.energy_charged_kwh[gone] = G[_R_ENERGY]
+            self.charge_start_hour[gone] = _hours_or_unset(G[_R_CHARGE_START])
+            self.charge_end_hour[gone] = _hours_or_unset(G[_R_CHARGE_END])
+            self.state[gone] = ST_IN_USE
+            # Simular descarga durante viaje
+            self.current_soc[gone] = np.maximum(0.0, G[_R_SOC] - G[_R_DISCHARGE])
+            self._completed.append(gone)
+            A = A[:, ~depart]
+        self._block = A
         
-        return stats
+        full = new_soc >= 99.0
+        n_full = int(np.count_nonzero(full))
+        motos_full = int(np.count_nonzero(full & (is_moto > 0))) if n_full else 0
+        n_charged = int(np.count_nonzero(charged))
+        return {
+            'trips_active': n_active,
+            'trips_charging': n_active - n_charged,
+            'trips_charged': n_charged,
+            'motos_cargadas_100': motos_full,
+            'mototaxis_cargadas_100': n_full - motos_full,
+            'total_energy_charged_kwh': float(energy.sum()),
+            'departing_soon': int(np.count_nonzero(just_arrived)),
+            'departed': n_departed,
+            'new_arrivals': n_new,
+        }
+    
+    def completed_arrays(self) -> Dict[str, np.ndarray]:
+        """Columnas de los viajes completados (tipo, SOC llegada/partida, energia, horas)."""
+        i = self.completed_indices
+        sch = self.schedule
+        return {
+            'vehicle_type': sch.vehicle_type[i] if sch is not None else np.zeros(0, dtype=np.uint8),
+            'arrival_soc': sch.arrival_soc[i] if sch is not None else np.zeros(0),
+            'departure_soc': self.departure_soc[i] if sch is not None else np.zeros(0),
+            'energy_charged_kwh': self.energy_charged_kwh[i] if sch is not None else np.zeros(0),
+            'charge_start_hour': self.charge_start_hour[i] if sch is not None else np.zeros(0, dtype=np.int32),
+            'charge_end_hour': self.charge_end_hour[i] if sch is not None else np.zeros(0, dtype=np.int32),
+        }
     
     def get_statistics(self) -> Dict:
         """Obtener estadisticas finales del ano"""
         
         stats = {
-            'total_trips': len(self.completed_trips),
+            'total_trips': 0,
             'trips_by_type': {'moto': 0, 'mototaxi': 0},
             'charging_statistics': {
                 'motos_charged_100': 0,
@@ -327,31 +498,27 @@ class VehicleCycleSimulator:
                 'mototaxis_avg_departure_soc': 0.0,
             }
         }
+        c = self.completed_arrays()
+        n_total = len(c['vehicle_type'])
+        stats['total_trips'] = n_total
+        stats['charging_statistics']['total_energy_charged_kwh'] = float(c['energy_charged_kwh'].sum())
         
-        motos = [t for t in self.completed_trips if t.vehicle_type == 'moto']
-        mototaxis = [t for t in self.completed_trips if t.vehicle_type == 'mototaxi']
-        
-        stats['trips_by_type']['moto'] = len(motos)
-        stats['trips_by_type']['mototaxi'] = len(mototaxis)
-        
-        # Charging stats
-        stats['charging_statistics']['motos_charged_100'] = sum(1 for t in motos if t.departure_soc >= 99.0)
-        stats['charging_statistics']['mototaxis_charged_100'] = sum(1 for t in mototaxis if t.departure_soc >= 99.0)
-        stats['charging_statistics']['total_energy_charged_kwh'] = sum(t.energy_charged_kwh for t in self.completed_trips)
-        
-        if motos:
-            stats['charging_statistics']['motos_charged_100_pct'] = stats['charging_statistics']['motos_charged_100'] / len(motos) * 100.0
-            stats['trip_statistics']['motos_avg_arrival_soc'] = np.mean([t.arrival_soc for t in motos])
-            stats['trip_statistics']['motos_avg_departure_soc'] = np.mean([t.departure_soc for t in motos])
-        
-        if mototaxis:
-            stats['charging_statistics']['mototaxis_charged_100_pct'] = stats['charging_statistics']['mototaxis_charged_100'] / len(mototaxis) * 100.0
-            stats['trip_statistics']['mototaxis_avg_arrival_soc'] = np.mean([t.arrival_soc for t in mototaxis])
-            stats['trip_statistics']['mototaxis_avg_departure_soc'] = np.mean([t.departure_soc for t in mototaxis])
+        for code, name, key in ((MOTO, 'moto', 'motos'), (MOTOTAXI, 'mototaxi', 'mototaxis')):
+            mask = c['vehicle_type'] == code
+            n = int(np.count_nonzero(mask))
+            stats['trips_by_type'][name] = n
+            n_100 = int(np.count_nonzero(c['departure_soc'][mask] >= 99.0))
+            stats['charging_statistics'][f'{key}_charged_100'] = n_100
+            if n:
+                stats['charging_statistics'][f'{key}_charged_100_pct'] = n_100 / n * 100.0
+                stats['trip_statistics'][f'{key}_avg_arrival_soc'] = float(c['arrival_soc'][mask].mean())
+                stats['trip_statistics'][f'{key}_avg_departure_soc'] = float(c['departure_soc'][mask].mean())
         
-        total_trip_hours = sum(t.charge_end_hour - t.charge_start_hour if t.charge_end_hour else 0 for t in self.completed_trips)
-        if self.completed_trips:
-            stats['charging_statistics']['avg_charge_time_hours'] = total_trip_hours / len(self.completed_trips)
+        # Horas entre la primera hora de carga y la hora en que alcanzo el objetivo
+        ended = (c['charge_end_hour'] >= 0) & (c['charge_start_hour'] >= 0)
+        total_charge_hours = float((c['charge_end_hour'][ended] - c['charge_start_hour'][ended]).sum())
+        if n_total:
+            stats['charging_statistics']['avg_charge_time_hours'] = total_charge_hours / n_total
         
         return stats
 
@@ -365,15 +532,15 @@ if __name__ == '__main__':
     simulator = VehicleCycleSimulator(n_motos=30, n_mototaxis=8)
     simulator.generate_yearly_schedule()
     
-    print(f"\nCronograma generado: {len(simulator.scheduled_trips)} horas con llegadas")
-    print(f"Total de viajes programados: {sum(len(v) for v in simulator.scheduled_trips.values())}")
+    print(f"\nCronograma generado: {simulator.schedule.hours_with_arrivals()} horas con llegadas")
+    print(f"Total de viajes programados: {len(simulator.schedule)}")
     
     # Simular 3 dias
     print("\nSimulando primeros 3 dias (72 horas)...")
     
     for hour in range(72):
         # Simular asignacion de potencia (random por ahora)
-        chargers = {i: np.random.uniform(0, 7.4) for i in range(38)}
+        chargers = np.random.uniform(0, 7.4, 38)
         
         stats = simulator.update_hourly(hour, chargers)
         
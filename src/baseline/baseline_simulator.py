@@ -217,6 +217,65 @@ class BaselineSimulator:
                     1.0
                 )
 
+        # DataFrame de detalles horarios
+        details_df = pd.DataFrame({
+            'solar_generation_kw': solar_generation,
+            'charger_demand_kw': charger_demand,
+            'mall_demand_kw': mall_demand,
+            'solar_to_chargers_kw': solar_to_chargers,
+            'solar_to_mall_kw': solar_to_mall,
+            'solar_to_bess_kw': solar_to_bess,
+            'solar_curtailed_kw': solar_curtailed,
+            'bess_discharge_to_chargers_kw': bess_discharge_to_chargers,
+            'bess_discharge_to_mall_kw': bess_discharge_to_mall,
+            'grid_import_chargers_kw': grid_import_chargers,
+            'grid_import_mall_kw': grid_import_mall,
+            'bess_soc': bess_soc,
+            'grid_import_total_kw': grid_import_chargers + grid_import_mall,
+        })
+        results = self.summarize(details_df)
+
+        # Log resultados
+        logger.info(f"\n=== BASELINE RESULTS ===")
+        logger.info(f"Solar generation: {results.solar_generation_kwh:,.0f} kWh/ano")
+        logger.info(f"Charger demand: {results.charger_demand_kwh:,.0f} kWh/ano")
+        logger.info(f"Mall demand: {results.mall_demand_kwh:,.0f} kWh/ano")
+        logger.info(f"\nGrid import (chargers): {results.grid_import_chargers_kwh:,.0f} kWh/ano")
+        logger.info(f"Grid import (mall): {results.grid_import_mall_kwh:,.0f} kWh/ano")
+        logger.info(f"Grid import total: {results.grid_import_chargers_kwh + results.grid_import_mall_kwh:,.0f} kWh/ano")
+        logger.info(f"\nCO₂ emissions: {results.co2_total_t:,.1f} t/ano")
+        logger.info(f"  - From chargers: {results.co2_from_chargers_kg/1000:,.1f} t/ano")
+        logger.info(f"  - From mall: {results.co2_from_mall_kg/1000:,.1f} t/ano")
+        logger.info(f"\nCosts: ${results.cost_total_usd:,.0f}/ano")
+        logger.info(f"  - Chargers: ${results.cost_chargers_usd:,.0f}/ano")
+        logger.info(f"  - Mall: ${results.cost_mall_usd:,.0f}/ano")
+        logger.info(f"\nKPIs:")
+        logger.info(f"  - Solar utilization: {results.solar_utilization_pct:.1f}%")
+        logger.info(f"  - Self-consumption: {results.self_consumption_pct:.1f}%")
+        logger.info(f"  - Peak demand: {results.peak_demand_kw:.0f} kW")
+        logger.info(f"  - Avg demand: {results.avg_demand_kw:.0f} kW")
+
+        return results, details_df
+
+    def summarize(self, details_df: pd.DataFrame) -> BaselineResults:
+        """
+        KPIs anuales a partir del detalle horario de ``simulate``.
+
+        Permite recalcular los KPIs sobre un detalle reconstruido (p.ej. el
+        ano expandido desde dias representativos).
+        """
+        solar_generation = details_df['solar_generation_kw'].to_numpy()
+        charger_demand = details_df['charger_demand_kw'].to_numpy()
+        mall_demand = details_df['mall_demand_kw'].to_numpy()
+        solar_to_chargers = details_df['solar_to_chargers_kw'].to_numpy()
+        solar_to_mall = details_df['solar_to_mall_kw'].to_numpy()
+        solar_to_bess = details_df['solar_to_bess_kw'].to_numpy()
+        solar_curtailed = details_df['solar_curtailed_kw'].to_numpy()
+        bess_discharge_to_chargers = details_df['bess_discharge_to_chargers_kw'].to_numpy()
+        bess_discharge_to_mall = details_df['bess_discharge_to_mall_kw'].to_numpy()
+        grid_import_chargers = details_df['grid_import_chargers_kw'].to_numpy()
+        grid_import_mall = details_df['grid_import_mall_kw'].to_numpy()
+
         # Calculos anuales
         total_solar = solar_generation.sum()
         total_charger_dem = charger_demand.sum()
@@ -242,7 +301,7 @@ class BaselineSimulator:
         peak_demand = np.max(charger_demand + mall_demand)
         avg_demand = total_dem / len(charger_demand)
 
-        results = BaselineResults(
+        return BaselineResults(
             solar_generation_kwh=total_solar,
             charger_demand_kwh=total_charger_dem,
             mall_demand_kwh=total_mall_dem,
@@ -269,45 +328,6 @@ class BaselineSimulator:
             avg_demand_kw=avg_demand,
         )
 
-        # DataFrame de detalles horarios
-        details_df = pd.DataFrame({
-            'solar_generation_kw': solar_generation,
-            'charger_demand_kw': charger_demand,
-            'mall_demand_kw': mall_demand,
-            'solar_to_chargers_kw': solar_to_chargers,
-            'solar_to_mall_kw': solar_to_mall,
-            'solar_to_bess_kw': solar_to_bess,
-            'solar_curtailed_kw': solar_curtailed,
-            'bess_discharge_to_chargers_kw': bess_discharge_to_chargers,
-            'bess_discharge_to_mall_kw': bess_discharge_to_mall,
-            'grid_import_chargers_kw': grid_import_chargers,
-            'grid_import_mall_kw': grid_import_mall,
-            'bess_soc': bess_soc,
-            'grid_import_total_kw': grid_import_chargers + grid_import_mall,
-        })
-
-        # Log resultados
-        logger.info(f"\n=== BASELINE RESULTS ===")
-        logger.info(f"Solar generation: {results.solar_generation_kwh:,.0f} kWh/ano")
-        logger.info(f"Charger demand: {results.charger_demand_kwh:,.0f} kWh/ano")
-        logger.info(f"Mall demand: {results.mall_demand_kwh:,.0f} kWh/ano")
-        logger.info(f"\nGrid import (chargers): {results.grid_import_chargers_kwh:,.0f} kWh/ano")
-        logger.info(f"Grid import (mall): {results.grid_import_mall_kwh:,.0f} kWh/ano")
-        logger.info(f"Grid import total: {results.grid_import_chargers_kwh + results.grid_import_mall_kwh:,.0f} kWh/ano")
-        logger.info(f"\nCO₂ emissions: {results.co2_total_t:,.1f} t/ano")
-        logger.info(f"  - From chargers: {results.co2_from_chargers_kg/1000:,.1f} t/ano")
-        logger.info(f"  - From mall: {results.co2_from_mall_kg/1000:,.1f} t/ano")
-        logger.info(f"\nCosts: ${results.cost_total_usd:,.0f}/ano")
-        logger.info(f"  - Chargers: ${results.cost_chargers_usd:,.0f}/ano")
-        logger.info(f"  - Mall: ${results.cost_mall_usd:,.0f}/ano")
-        logger.info(f"\nKPIs:")
-        logger.info(f"  - Solar utilization: {results.solar_utilization_pct:.1f}%")
-        logger.info(f"  - Self-consumption: {results.self_consumption_pct:.1f}%")
-        logger.info(f"  - Peak demand: {results.peak_demand_kw:.0f} kW")
-        logger.info(f"  - Avg demand: {results.avg_demand_kw:.0f} kW")
-
-        return results, details_df
-
     def save_results(
         self,
         results: BaselineResults,
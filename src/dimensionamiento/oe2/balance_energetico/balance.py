@@ -37,11 +37,22 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 import math
 import json
+import sys
 
 import numpy as np
 import pandas as pd
 from matplotlib import pyplot as plt
 
+try:
+    from src.utils.plot_cache import (
+        PlotTask, PlotSelection, add_plot_arguments, plot_spec_from_args, render_plot_tasks,
+    )
+except ImportError:  # Ejecucion directa: python src/dimensionamiento/oe2/balance_energetico/balance.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+    from src.utils.plot_cache import (  # type: ignore[no-redef]
+        PlotTask, PlotSelection, add_plot_arguments, plot_spec_from_args, render_plot_tasks,
+    )
+
 
 @dataclass(frozen=True)
 class BalanceEnergeticoConfig:
@@ -610,12 +621,27 @@ class BalanceEnergeticoSystem:
         
         print("\n" + "="*70 + "\n")
     
-    def plot_energy_balance(self, out_dir: Optional[Path] = None) -> None:
+    def plot_energy_balance(
+        self,
+        out_dir: Optional[Path] = None,
+        plots: PlotSelection = True,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, str]:
         """
         Genera graficas del balance energetico integral.
         
+        Las graficas cuyo balance y configuracion no cambiaron desde la ultima
+        ejecucion se omiten (cache por huella en out_dir); el resto se dibuja
+        en paralelo.
+        
         Args:
             out_dir: Directorio para guardar las graficas (default: reports/)
+            plots: Seleccion: True/"all", False/"none" o "only:soc,co2"
+                (nombres en BALANCE_PLOTS o nombre del PNG)
+            max_workers: Procesos para dibujar (1 = proceso actual)
+        
+        Returns:
+            Estado por archivo ("cached", "rendered", "skipped", "error: ...")
         """
         if self.df_balance is None:
             raise ValueError("Primero debe calcular el balance energetico")
@@ -629,31 +655,14 @@ class BalanceEnergeticoSystem:
         
         print(f"\nGenerando graficas de balance energetico en {out_dir}...")
         
-        # ===== Grafica 0: INTEGRAL - Todas las curvas superpuestas =====
-        self._plot_integral_curves(df, out_dir)
-        
-        # ===== Grafica 1: Flujos Energeticos Horarios (5 dias representativos) =====
-        self._plot_5day_balance(df, out_dir)
-        
-        # ===== Grafica 2: Balance Energetico Diario (365 dias) =====
-        self._plot_daily_balance(df, out_dir)
-        
-        # ===== Grafica 3: Distribucion de Fuentes (anual) =====
-        self._plot_sources_distribution(df, out_dir)
-        
-        # ===== Grafica 4: Cascada Energetica (Sankey simplificado) =====
-        self._plot_energy_cascade(df, out_dir)
-        
-        # ===== Grafica 5: Estado de Carga BESS (365 dias) =====
-        self._plot_bess_soc(df, out_dir)
-        
-        # ===== Grafica 6: Emisiones de CO2 (analisis diario) =====
-        self._plot_co2_emissions(df, out_dir)
-        
-        # ===== Grafica 7: Utilizacion PV (analisis mensual) =====
-        self._plot_pv_utilization(df, out_dir)
+        tasks = [
+            PlotTask(name, filename, _render_balance_plot, (getattr(BalanceEnergeticoSystem, method), df, self.config))
+            for name, filename, method in BALANCE_PLOTS
+        ]
+        status = render_plot_tasks(tasks, out_dir, plots=plots, max_workers=max_workers)
         
         print(f"  [OK] Graficas guardadas en {out_dir}")
+        return status
     
     def _plot_integral_curves(self, df: pd.DataFrame, out_dir: Path) -> None:
         """Grafica INTEGRAL con TODAS las curvas superpuestas del sistema."""
@@ -1106,10 +1115,33 @@ class BalanceEnergeticoSystem:
         print(f"  [OK] CSV exportado: {output_file}")
 
 
+# (nombre corto, archivo PNG, metodo de dibujo) - orden de plot_energy_balance
+BALANCE_PLOTS: List[Tuple[str, str, str]] = [
+    ("integral", "00_INTEGRAL_todas_curvas.png", "_plot_integral_curves"),    # Todas las curvas superpuestas
+    ("5dias", "01_balance_5dias.png", "_plot_5day_balance"),                  # Flujos horarios 5 dias
+    ("diario", "02_balance_diario.png", "_plot_daily_balance"),               # Balance diario 365 dias
+    ("fuentes", "03_distribucion_fuentes.png", "_plot_sources_distribution"), # Distribucion anual
+    ("cascada", "04_cascada_energetica.png", "_plot_energy_cascade"),         # Sankey simplificado
+    ("soc", "05_bess_soc.png", "_plot_bess_soc"),                             # Estado de carga BESS
+    ("co2", "06_emisiones_co2.png", "_plot_co2_emissions"),                   # Emisiones diarias
+    ("pv", "07_utilizacion_pv.png", "_plot_pv_utilization"),                  # Utilizacion PV mensual
+]
+
+
+def _render_balance_plot(
+    out_dir: Path,
+    plot_method: Any,
+    df: pd.DataFrame,
+    config: BalanceEnergeticoConfig,
+) -> None:
+    """Dibuja una grafica de balance (ejecutable en un proceso del pool)."""
+    plot_method(BalanceEnergeticoSystem(config), df, out_dir)
+
+
 def main(
     output_dir: Optional[Path] = None,
     year: int = 2024,
-    generate_plots: bool = True
+    generate_plots: PlotSelection = True
 ) -> BalanceEnergeticoSystem:
     """
     Ejecuta el analisis completo de balance energetico v5.2.
@@ -1122,7 +1154,8 @@ def main(
     Args:
         output_dir: Ruta para guardar las graficas
         year: Ano de analisis
-        generate_plots: Si generar las graficas
+        generate_plots: Si generar las graficas (True/False) o seleccion
+            "only:nombre1,nombre2" (ver BALANCE_PLOTS)
     
     Returns:
         Objeto BalanceEnergeticoSystem con analisis completo
@@ -1150,18 +1183,22 @@ def main(
     system.print_summary()
     
     # Generar graficas
-    if generate_plots:
+    if generate_plots is not False and generate_plots != "none":
         plot_dir = output_dir or Path("reports/balance_energetico")
-        system.plot_energy_balance(plot_dir)
+        system.plot_energy_balance(plot_dir, plots=generate_plots)
         system.export_balance_csv(plot_dir)
     
     return system
 
 
 if __name__ == "__main__":
-    # Uso basico
+    # Uso basico: python balance.py [--no-plots | --plots=only:soc,co2]
+    import argparse
+    parser = argparse.ArgumentParser(description="Balance energetico OE2 - Iquitos")
+    add_plot_arguments(parser)
+    cli_args = parser.parse_args()
     try:
-        system = main()
+        system = main(generate_plots=plot_spec_from_args(cli_args))
         print("\n[OK] Analisis de balance energetico completado exitosamente")
     except Exception as e:
         print(f"\n[X] Error en analisis: {e}")
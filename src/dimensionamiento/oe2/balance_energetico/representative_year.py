@@ -0,0 +1,479 @@
+"""Ano comprimido en K dias representativos (k-medoides sobre perfiles diarios).
+
+``calculate_representative_days`` y analisis_dias_representativos.py eligen
+unos pocos dias con nombre (despejado, nublado, ...) solo para reportes. Este
+modulo agrupa los 365 dias por su perfil diario conjunto PV + Mall + EV
+(24 h x variable, cada variable normalizada por su maximo anual) con
+k-medoides y guarda:
+
+- ``days``: dia del ano de cada medoide (orden cronologico)
+- ``weights``: cuantos dias del ano representa cada medoide (suma 365)
+- ``day_map``: representante de cada dia del ano
+
+Con eso cualquier simulador horario corre sobre K x 24 horas en lugar de
+8,760 y sus flujos se expanden al ano completo (cada dia toma el perfil de
+su medoide), de modo que los KPIs anuales existentes se calculan tal cual
+sobre el ano reconstruido. Incluye adaptadores para bess_dispatch.simulate y
+BaselineSimulator con error de aproximacion opcional frente a las 8,760 h;
+el entorno PPO acepta el ano comprimido como secuencia de horas por episodio.
+
+Uso:
+    python -m src.dimensionamiento.oe2.balance_energetico.representative_year --k 16
+
+    from src.dimensionamiento.oe2.balance_energetico.representative_year import (
+        RepresentativeYear, select_representative_days, simulate_bess_compressed,
+    )
+    year = select_representative_days({"pv": pv, "mall": mall, "ev": ev}, k=16)
+    out = simulate_bess_compressed(year, "solar_priority", pv, ev, mall, reference=True)
+    out["metrics"]["self_sufficiency"], out["errors"]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+HOURS_PER_DAY = 24
+REPRESENTATIVE_YEAR_FORMAT_VERSION = 1
+DEFAULT_REPRESENTATIVE_YEAR_PATH = Path("data/oe2/balance_energetico/representative_year.npz")
+DEFAULT_SOURCE_CSV = Path("data/oe2/bess/bess_ano_2024.csv")
+SOURCE_COLUMNS = {"pv": "pv_generation_kwh", "mall": "mall_demand_kwh", "ev": "ev_demand_kwh"}
+
+
+# ===========================================================================
+# K-MEDOIDES
+# ===========================================================================
+
+def daily_profile_features(
+    series: Mapping[str, Any],
+    feature_weights: Optional[Mapping[str, float]] = None,
+) -> np.ndarray:
+    """Matriz (dias, 24 x variables) de perfiles diarios normalizados.
+
+    Cada serie horaria se normaliza por su maximo anual para que PV, Mall y
+    EV pesen igual; las series 2-D (horas x tomas) se suman por hora.
+    """
+    blocks = []
+    n_hours: Optional[int] = None
+    for name, values in series.items():
+        x = np.asarray(values, dtype=np.float64)
+        if x.ndim > 1:
+            x = x.reshape(len(x), -1).sum(axis=1)
+        if n_hours is None:
+            n_hours = len(x)
+        elif len(x) != n_hours:
+            raise ValueError(f"Longitudes distintas: {name}={len(x)} != {n_hours}")
+        if len(x) % HOURS_PER_DAY:
+            raise ValueError(f"{name}: {len(x)} horas no es multiplo de {HOURS_PER_DAY}")
+        scale = float(np.max(np.abs(x))) or 1.0
+        weight = float((feature_weights or {}).get(name, 1.0))
+        blocks.append(x.reshape(-1, HOURS_PER_DAY) * (weight / scale))
+    if not blocks:
+        raise ValueError("Se requiere al menos una serie")
+    return np.hstack(blocks)
+
+
+def _kmedoids_pp_init(dist: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """Inicializacion k-medoids++ (probabilidad proporcional a D^2)."""
+    n = len(dist)
+    medoids = [int(rng.integers(n))]
+    nearest = dist[medoids[0]].copy()
+    for _ in range(1, k):
+        prob = nearest ** 2
+        total = prob.sum()
+        if total > 0:
+            choice = int(rng.choice(n, p=prob / total))
+        else:  # Dias restantes identicos a los medoides: elegir uno no usado
+            choice = int(rng.choice(np.setdiff1d(np.arange(n), medoids)))
+        medoids.append(choice)
+        nearest = np.minimum(nearest, dist[choice])
+    return np.asarray(medoids)
+
+
+def k_medoids(
+    features: np.ndarray,
+    k: int,
+    n_init: int = 8,
+    max_iter: int = 100,
+    seed: int = 0,
+) -> tuple[np.ndarray, np.ndarray, float]:
+    """k-medoides (asignacion/actualizacion alternadas) con distancia euclidiana.
+
+    Returns:
+        (indices de medoides, etiqueta 0..k-1 de cada fila, costo = suma de distancias)
+    """
+    x = np.asarray(features, dtype=np.float64)
+    n = len(x)
+    if not 1 <= k <= n:
+        raise ValueError(f"k debe estar entre 1 y {n}, se recibio {k}")
+    sq = np.einsum("ij,ij->i", x, x)
+    dist = np.sqrt(np.maximum(sq[:, None] + sq[None, :] - 2.0 * (x @ x.T), 0.0))
+    np.fill_diagonal(dist, 0.0)
+
+    rng = np.random.default_rng(seed)
+    best: Optional[tuple[float, np.ndarray, np.ndarray]] = None
+    rows = np.arange(n)
+    for _ in range(max(1, n_init)):
+        medoids = _kmedoids_pp_init(dist, k, rng)
+        for _ in range(max_iter):
+            labels = np.argmin(dist[:, medoids], axis=1)
+            updated = medoids.copy()
+            for j in range(k):
+                members = np.flatnonzero(labels == j)
+                if members.size:
+                    updated[j] = members[np.argmin(dist[np.ix_(members, members)].sum(axis=1))]
+            if np.array_equal(updated, medoids):
+                break
+            medoids = updated
+        labels = np.argmin(dist[:, medoids], axis=1)
+        cost = float(dist[rows, medoids[labels]].sum())
+        if best is None or cost < best[0]:
+            best = (cost, medoids, labels)
+    cost, medoids, labels = best  # type: ignore[misc]
+    return medoids, labels, cost
+
+
+# ===========================================================================
+# ANO REPRESENTATIVO
+# ===========================================================================
+
+@dataclass(frozen=True)
+class RepresentativeYear:
+    """K dias representativos con pesos y mapeo de cada dia del ano."""
+
+    days: np.ndarray       # (K,) dia del ano (0-based) de cada medoide, orden cronologico
+    weights: np.ndarray    # (K,) dias representados (suma = n_days)
+    day_map: np.ndarray    # (n_days,) posicion 0..K-1 del representante de cada dia
+    variables: tuple[str, ...] = ()
+    cost: float = 0.0
+    start: str = "2024-01-01"
+
+    @property
+    def k(self) -> int:
+        return len(self.days)
+
+    @property
+    def n_days(self) -> int:
+        return len(self.day_map)
+
+    @property
+    def n_hours(self) -> int:
+        """Horas del ano comprimido (K x 24)."""
+        return self.k * HOURS_PER_DAY
+
+    @property
+    def hour_index(self) -> np.ndarray:
+        """Hora del ano original de cada hora del ano comprimido."""
+        return (self.days[:, None] * HOURS_PER_DAY + np.arange(HOURS_PER_DAY)).ravel()
+
+    @property
+    def hour_weights(self) -> np.ndarray:
+        """Peso de cada hora del ano comprimido (dias que representa)."""
+        return np.repeat(self.weights.astype(np.float64), HOURS_PER_DAY)
+
+    def compress(self, values: Any) -> np.ndarray:
+        """Horas de los dias representativos (eje 0) de una serie del ano completo."""
+        x = np.asarray(values)
+        if len(x) != self.n_days * HOURS_PER_DAY:
+            raise ValueError(f"Serie de {len(x)} horas, se esperaban {self.n_days * HOURS_PER_DAY}")
+        return x[self.hour_index]
+
+    def expand(self, compressed: Any) -> np.ndarray:
+        """Reconstruye el ano completo: cada dia toma el perfil de su medoide."""
+        x = np.asarray(compressed)
+        if len(x) != self.n_hours:
+            raise ValueError(f"Serie comprimida de {len(x)} horas, se esperaban {self.n_hours}")
+        days = x.reshape(self.k, HOURS_PER_DAY, *x.shape[1:])
+        return days[self.day_map].reshape(self.n_days * HOURS_PER_DAY, *x.shape[1:])
+
+    def annual_total(self, compressed: Any) -> Any:
+        """Total anual ponderado (eje 0) de una serie comprimida."""
+        x = np.asarray(compressed, dtype=np.float64)
+        w = self.hour_weights.reshape(-1, *([1] * (x.ndim - 1)))
+        return (x * w).sum(axis=0)
+
+    def approximation_error(self, series: Mapping[str, Any]) -> pd.DataFrame:
+        """Error de reconstruccion de cada serie frente a sus 8,760 h.
+
+        Columnas: energia anual real/aproximada y error %, pico real/aproximado,
+        maximo error mensual % y NRMSE horario (RMSE / media).
+        """
+        months = pd.date_range(self.start, periods=self.n_days, freq="D").month.to_numpy()
+        rows = {}
+        for name, values in series.items():
+            x = np.asarray(values, dtype=np.float64)
+            if x.ndim > 1:
+                x = x.reshape(len(x), -1).sum(axis=1)
+            approx = self.expand(self.compress(x))
+            annual, annual_approx = float(x.sum()), float(approx.sum())
+            daily = x.reshape(-1, HOURS_PER_DAY).sum(axis=1)
+            daily_approx = approx.reshape(-1, HOURS_PER_DAY).sum(axis=1)
+            monthly = np.bincount(months, weights=daily, minlength=13)[1:]
+            monthly_approx = np.bincount(months, weights=daily_approx, minlength=13)[1:]
+            valid = np.abs(monthly) > 0
+            mean = float(np.mean(np.abs(x))) or 1.0
+            rows[name] = {
+                "annual_full": annual,
+                "annual_compressed": annual_approx,
+                "annual_error_pct": _rel_error_pct(annual_approx, annual),
+                "peak_full": float(x.max()),
+                "peak_compressed": float(approx.max()),
+                "monthly_max_error_pct": float(
+                    np.max(np.abs(monthly_approx[valid] / monthly[valid] - 1.0)) * 100 if valid.any() else 0.0
+                ),
+                "hourly_nrmse": float(np.sqrt(np.mean((approx - x) ** 2)) / mean),
+            }
+        return pd.DataFrame.from_dict(rows, orient="index")
+
+    def to_frame(self, series: Optional[Mapping[str, Any]] = None) -> pd.DataFrame:
+        """Ano comprimido hora a hora: fecha original, dia, peso y series comprimidas."""
+        index = pd.date_range(self.start, periods=self.n_days * HOURS_PER_DAY, freq="h")[self.hour_index]
+        df = pd.DataFrame(
+            {
+                "day_of_year": np.repeat(self.days, HOURS_PER_DAY),
+                "hour": np.tile(np.arange(HOURS_PER_DAY), self.k),
+                "weight": np.repeat(self.weights, HOURS_PER_DAY),
+            },
+            index=pd.DatetimeIndex(index, name="datetime"),
+        )
+        for name, values in (series or {}).items():
+            compressed = self.compress(values)
+            if compressed.ndim > 1:
+                compressed = compressed.reshape(len(compressed), -1).sum(axis=1)
+            df[name] = compressed
+        return df
+
+    def save(self, path: str | Path = DEFAULT_REPRESENTATIVE_YEAR_PATH) -> Path:
+        """Guarda dias, pesos y mapeo en ``.npz`` (metadatos en JSON)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"variables": list(self.variables), "cost": self.cost, "start": self.start}
+        np.savez(
+            path,
+            format_version=np.int64(REPRESENTATIVE_YEAR_FORMAT_VERSION),
+            days=self.days,
+            weights=self.weights,
+            day_map=self.day_map,
+            meta=np.array(json.dumps(meta)),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path = DEFAULT_REPRESENTATIVE_YEAR_PATH) -> "RepresentativeYear":
+        with np.load(path) as npz:
+            if int(npz["format_version"]) > REPRESENTATIVE_YEAR_FORMAT_VERSION:
+                raise ValueError(f"Ano representativo v{int(npz['format_version'])} no soportado: {path}")
+            meta = json.loads(str(npz["meta"]))
+            return cls(
+                days=npz["days"].astype(np.int64),
+                weights=npz["weights"].astype(np.int64),
+                day_map=npz["day_map"].astype(np.int64),
+                variables=tuple(meta.get("variables", ())),
+                cost=float(meta.get("cost", 0.0)),
+                start=str(meta.get("start", "2024-01-01")),
+            )
+
+
+def select_representative_days(
+    series: Mapping[str, Any],
+    k: int = 16,
+    feature_weights: Optional[Mapping[str, float]] = None,
+    n_init: int = 8,
+    seed: int = 0,
+    start: str = "2024-01-01",
+) -> RepresentativeYear:
+    """Selecciona K dias representativos por k-medoides sobre perfiles diarios.
+
+    Args:
+        series: Series horarias del ano ({'pv': ..., 'mall': ..., 'ev': ...})
+        k: Numero de dias representativos (tipicamente 12-24)
+        feature_weights: Peso relativo de cada variable en la distancia
+        n_init: Reinicios k-medoids++ (se conserva el de menor costo)
+        seed: Semilla de la inicializacion
+        start: Fecha del primer dia (para fechas y meses del reporte)
+    """
+    features = daily_profile_features(series, feature_weights)
+    medoids, labels, cost = k_medoids(features, k, n_init=n_init, seed=seed)
+    order = np.argsort(medoids)
+    position = np.empty(k, dtype=np.int64)
+    position[order] = np.arange(k)
+    day_map = position[labels]
+    return RepresentativeYear(
+        days=medoids[order].astype(np.int64),
+        weights=np.bincount(day_map, minlength=k).astype(np.int64),
+        day_map=day_map.astype(np.int64),
+        variables=tuple(series),
+        cost=cost,
+        start=start,
+    )
+
+
+# ===========================================================================
+# ADAPTADORES DE SIMULADORES
+# ===========================================================================
+
+def _rel_error_pct(approx: float, full: float) -> float:
+    if full == 0:
+        return 0.0 if approx == 0 else float("inf")
+    return (approx - full) / abs(full) * 100
+
+
+def compare_kpis(compressed: Mapping[str, Any], full: Mapping[str, Any]) -> pd.DataFrame:
+    """Error de los KPIs numericos del ano comprimido frente al ano completo."""
+    rows = {}
+    for key, value in full.items():
+        approx = compressed.get(key)
+        if isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, float, np.number)):
+            continue
+        if not isinstance(approx, (int, float, np.number)):
+            continue
+        rows[key] = {
+            "full": float(value),
+            "compressed": float(approx),
+            "abs_error": float(approx) - float(value),
+            "rel_error_pct": _rel_error_pct(float(approx), float(value)),
+        }
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def simulate_bess_compressed(
+    year: RepresentativeYear,
+    strategy: str,
+    pv_kwh: Any,
+    ev_kwh: Any,
+    mall_kwh: Any,
+    params: Any = None,
+    reference: bool = False,
+    **overrides: Any,
+) -> dict[str, Any]:
+    """Despacho BESS sobre el ano comprimido con KPIs anuales reconstruidos.
+
+    Corre ``bess_dispatch.simulate`` sobre las K x 24 horas, expande los
+    flujos al ano completo y calcula las metricas con las funciones de la
+    estrategia. Con ``reference=True`` corre tambien las 8,760 h y reporta el
+    error por metrica y la aceleracion.
+    """
+    try:
+        from ..disenobess.bess_dispatch import DispatchResult, simulate
+    except ImportError:  # Ejecucion directa: python .../balance_energetico/representative_year.py
+        sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+        from src.dimensionamiento.oe2.disenobess.bess_dispatch import (  # type: ignore[no-redef]
+            DispatchResult, simulate,
+        )
+
+    t0 = time.perf_counter()
+    compressed = simulate(
+        strategy, year.compress(pv_kwh), year.compress(ev_kwh), year.compress(mall_kwh), params, **overrides
+    )
+    expanded = DispatchResult(
+        strategy=compressed.strategy,
+        params=compressed.params,
+        arrays={name: year.expand(values) for name, values in compressed.arrays.items()},
+    )
+    out: dict[str, Any] = {
+        "result": expanded,
+        "metrics": expanded.metrics,
+        "n_hours_simulated": compressed.n_hours,
+        "elapsed_s": time.perf_counter() - t0,
+    }
+    if reference:
+        t1 = time.perf_counter()
+        full = simulate(strategy, pv_kwh, ev_kwh, mall_kwh, params, **overrides)
+        full_metrics = full.metrics
+        out["reference_metrics"] = full_metrics
+        out["reference_elapsed_s"] = time.perf_counter() - t1
+        out["errors"] = compare_kpis(out["metrics"], full_metrics)
+        out["speedup"] = out["reference_elapsed_s"] / max(out["elapsed_s"], 1e-12)
+    return out
+
+
+def simulate_baseline_compressed(
+    year: RepresentativeYear,
+    simulator: Any,
+    solar_generation: Any,
+    charger_demand: Any,
+    mall_demand: Any,
+    reference: bool = False,
+) -> dict[str, Any]:
+    """``BaselineSimulator.simulate`` sobre el ano comprimido.
+
+    El detalle horario se expande al ano completo y los KPIs anuales se
+    recalculan con ``simulator.summarize``. Con ``reference=True`` agrega las
+    metricas de las 8,760 h y el error por KPI.
+    """
+    t0 = time.perf_counter()
+    _, details = simulator.simulate(
+        year.compress(np.asarray(solar_generation, dtype=np.float64)),
+        year.compress(np.asarray(charger_demand, dtype=np.float64)),
+        year.compress(np.asarray(mall_demand, dtype=np.float64)),
+    )
+    expanded = pd.DataFrame({col: year.expand(details[col].to_numpy()) for col in details.columns})
+    results = simulator.summarize(expanded)
+    out: dict[str, Any] = {
+        "results": results,
+        "details": expanded,
+        "metrics": results.to_dict(),
+        "n_hours_simulated": len(details),
+        "elapsed_s": time.perf_counter() - t0,
+    }
+    if reference:
+        t1 = time.perf_counter()
+        full_results, _ = simulator.simulate(
+            np.asarray(solar_generation, dtype=np.float64),
+            np.asarray(charger_demand, dtype=np.float64),
+            np.asarray(mall_demand, dtype=np.float64),
+        )
+        out["reference_metrics"] = full_results.to_dict()
+        out["reference_elapsed_s"] = time.perf_counter() - t1
+        out["errors"] = compare_kpis(out["metrics"], out["reference_metrics"])
+        out["speedup"] = out["reference_elapsed_s"] / max(out["elapsed_s"], 1e-12)
+    return out
+
+
+# ===========================================================================
+# CLI
+# ===========================================================================
+
+def load_source_series(path: str | Path = DEFAULT_SOURCE_CSV) -> dict[str, np.ndarray]:
+    """Series PV / Mall / EV horarias (kWh) desde el CSV anual de BESS."""
+    df = pd.read_csv(path, usecols=list(SOURCE_COLUMNS.values()))
+    return {name: df[col].to_numpy(dtype=np.float64) for name, col in SOURCE_COLUMNS.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ano comprimido en dias representativos (k-medoides)")
+    parser.add_argument("--k", type=int, default=16, help="Numero de dias representativos")
+    parser.add_argument("--input", default=str(DEFAULT_SOURCE_CSV), help="CSV horario con PV/EV/Mall (kWh)")
+    parser.add_argument("--out", default=str(DEFAULT_REPRESENTATIVE_YEAR_PATH), help="Archivo .npz de salida")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de inicializacion")
+    parser.add_argument("--n-init", type=int, default=8, help="Reinicios k-medoids++")
+    parser.add_argument("--check-bess", action="store_true",
+                        help="Comparar el despacho BESS comprimido contra las 8,760 h")
+    args = parser.parse_args()
+
+    series = load_source_series(args.input)
+    year = select_representative_days(series, k=args.k, n_init=args.n_init, seed=args.seed)
+    out = year.save(args.out)
+    csv_path = out.with_suffix(".csv")
+    year.to_frame(series).to_csv(csv_path)
+    print(f"[OK] Ano representativo: {year.k} dias ({year.n_hours} h) -> {out}")
+    print(f"[OK] Ano comprimido: {csv_path}")
+    print(year.approximation_error(series).round(3).to_string())
+    if args.check_bess:
+        check = simulate_bess_compressed(year, "solar_priority", series["pv"], series["ev"], series["mall"],
+                                         reference=True)
+        print(f"[OK] BESS comprimido: {check['elapsed_s']:.2f} s vs {check['reference_elapsed_s']:.2f} s "
+              f"({check['speedup']:.1f}x)")
+        print(check["errors"].round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
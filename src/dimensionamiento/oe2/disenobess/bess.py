@@ -46,6 +46,31 @@ import numpy as np
 import pandas as pd  # type: ignore[import]
 from matplotlib import pyplot as plt  # type: ignore[import]
 
+try:
+    from .bess_degradation import DegradationModel, degradation_from_soc
+except ImportError:  # Ejecucion directa: python src/dimensionamiento/oe2/disenobess/bess.py
+    from bess_degradation import DegradationModel, degradation_from_soc  # type: ignore[no-redef]
+
+try:
+    from src.utils.plot_cache import (
+        PlotTask, PlotSelection, add_plot_arguments, plot_spec_from_args, render_plot_tasks,
+    )
+    from src.dimensionamiento.oe2.disenocargadoresev.socket_dataset import SocketDataset, compact_is_current
+except ImportError:  # Ejecucion directa: raiz del proyecto fuera de sys.path
+    sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+    from src.utils.plot_cache import (  # type: ignore[no-redef]
+        PlotTask, PlotSelection, add_plot_arguments, plot_spec_from_args, render_plot_tasks,
+    )
+    from src.dimensionamiento.oe2.disenocargadoresev.socket_dataset import (  # type: ignore[no-redef]
+        SocketDataset, compact_is_current,
+    )
+from src.utils.energy_accounting import TariffSchedule
+
+try:
+    from .bess_dispatch import DispatchParams, simulate as simulate_dispatch
+except ImportError:  # Ejecucion directa: python src/dimensionamiento/oe2/disenobess/bess.py
+    from bess_dispatch import DispatchParams, simulate as simulate_dispatch  # type: ignore[no-redef]
+
 
 @dataclass(frozen=True)
 class BessSizingOutput:
@@ -129,6 +154,15 @@ HORA_FIN_HP = 23  # Exclusivo (hasta las 22:59)
 # Fuente: MINEM/OSINERGMIN - Sistema aislado Loreto (termico diesel/residual)
 FACTOR_CO2_KG_KWH = 0.4521  # kg CO2 / kWh
 
+# Horario tarifario para la contabilidad vectorizada (src/utils/energy_accounting.py)
+OSINERGMIN_TARIFF = TariffSchedule(
+    hp_soles_kwh=TARIFA_ENERGIA_HP_SOLES,
+    hfp_soles_kwh=TARIFA_ENERGIA_HFP_SOLES,
+    hp_start_hour=HORA_INICIO_HP,
+    hp_end_hour=HORA_FIN_HP,
+    co2_kg_kwh=FACTOR_CO2_KG_KWH,
+)
+
 # BESS v5.3 - Configuracion optimizada con arbitraje HP/HFP
 # Capacidad aumentada para maximizar arbitraje tarifario
 BESS_CAPACITY_KWH_V53 = 1700.0   # kWh - Aumentado para arbitraje HP/HFP
@@ -278,9 +312,30 @@ def load_pv_generation(pv_timeseries_path: Path) -> pd.DataFrame:
 
     return df_hourly[['pv_kwh']].reset_index(drop=True)
 
+def _finalize_socket_ev_demand(df: pd.DataFrame) -> pd.DataFrame:
+    """Filtra el horario operativo 9h-22h y ajusta a 8,760 filas (formato v5.2 por toma)."""
+    # FILTRAR HORARIO OPERATIVO: Solo 9h-22h (estacionamiento del mall)
+    hour = np.arange(len(df)) % 24
+    df.loc[(hour < 9) | (hour > 22), 'ev_kwh'] = 0.0
+    
+    total_kwh = df['ev_kwh'].sum()
+    print(f"      [OK] Total EV (9h-22h): {total_kwh:,.0f} kWh/ano")
+    # Asegurar 8,760 filas
+    if len(df) != 8760:
+        if len(df) < 8760:
+            # Repetir ciclicamente para completar el ano
+            repeat_count = (8760 // len(df)) + 1
+            df = pd.concat([df] * repeat_count, ignore_index=True)
+        df = df.iloc[:8760].reset_index(drop=True)
+    return df
+
 def load_ev_demand(ev_profile_path: Path, year: int = 2024) -> pd.DataFrame:
     """Carga el perfil de demanda EV (formato horario 8,760 horas).
 
+    Si junto al CSV existe el formato compacto (mismo nombre .npz/.json,
+    ver socket_dataset.py) y no es anterior al CSV, se usa ese y no se lee el
+    CSV; si el CSV se regenero despues, se lee el CSV.
+
     El archivo CSV puede tener:
     - Formato v5.2: 38 columnas socket_XXX_charging_power_kw (estocastico)
       -> Suma todas las potencias de sockets (19 cargadores × 2 tomas = 38 sockets)
@@ -292,6 +347,17 @@ def load_ev_demand(ev_profile_path: Path, year: int = 2024) -> pd.DataFrame:
     Returns:
         DataFrame con columna 'ev_kwh' (energia en kWh por hora)
     """
+    ev_profile_path = Path(ev_profile_path)
+    compact_path = ev_profile_path.with_suffix('.npz')
+    if compact_is_current(ev_profile_path):
+        # Formato compacto v5.2 (socket_dataset.py): matriz (8760, 38) sin leer el CSV
+        ds = SocketDataset.load(compact_path)
+        print(f"      [OK] Formato compacto con {ds.n_sockets} sockets: {compact_path.name}")
+        df = pd.DataFrame({'ev_kwh': ds.ev_demand_kwh()})
+        return _finalize_socket_ev_demand(df)
+    if compact_path.exists():
+        print(f"      [!] Formato compacto anterior al CSV, se ignora: {compact_path.name}")
+
     df = pd.read_csv(ev_profile_path)  # type: ignore[attr-defined]
 
     # Verificar si es formato v5.2 (columnas socket_XXX_charging_power_kw)
@@ -300,24 +366,7 @@ def load_ev_demand(ev_profile_path: Path, year: int = 2024) -> pd.DataFrame:
         # Formato v5.2: sumar todas las potencias de sockets (38 sockets)
         print(f"      [OK] Detectado formato v5.2 con {len(socket_cols)} sockets")
         df['ev_kwh'] = df[socket_cols].sum(axis=1)
-        
-        # FILTRAR HORARIO OPERATIVO: Solo 9h-22h (estacionamiento del mall)
-        for h in range(len(df)):
-            hour = h % 24
-            if hour < 9 or hour > 22:
-                df.loc[h, 'ev_kwh'] = 0.0
-        
-        total_kwh = df['ev_kwh'].sum()
-        print(f"      [OK] Total EV (9h-22h): {total_kwh:,.0f} kWh/ano")
-        df = df[['ev_kwh']].copy()
-        # Asegurar 8,760 filas
-        if len(df) != 8760:
-            if len(df) < 8760:
-                # Repetir ciclicamente para completar el ano
-                repeat_count = (8760 // len(df)) + 1
-                df = pd.concat([df] * repeat_count, ignore_index=True)
-            df = df.iloc[:8760].reset_index(drop=True)
-        return df
+        return _finalize_socket_ev_demand(df[['ev_kwh']].copy())
 
     # Verificar si es formato v3.0 legacy (columnas socket_XXX_power_kw)
     socket_cols = [col for col in df.columns if 'socket_' in col and '_power_kw' in col]
@@ -1032,477 +1081,13 @@ def simulate_bess_solar_priority(
     Returns:
         Tuple: (DataFrame con simulacion, dict con metricas)
     """
-    n_hours = len(pv_kwh)
-    # Eficiencia correcta: sqrt(round_trip_efficiency) para CARGA y DESCARGA
-    # Ejemplo: round_trip = 0.95 = 95% -> charging_eff = sqrt(0.95) = 0.9747
-    eff_charge = math.sqrt(efficiency)  # Eficiencia de CARGA
-    eff_discharge = math.sqrt(efficiency)  # Eficiencia de DESCARGA
-    
-    # Arrays de resultados
-    soc = np.zeros(n_hours)
-    bess_charge = np.zeros(n_hours)
-    bess_discharge = np.zeros(n_hours)
-    pv_to_ev = np.zeros(n_hours)
-    pv_to_bess = np.zeros(n_hours)
-    pv_to_mall = np.zeros(n_hours)
-    bess_to_ev = np.zeros(n_hours)
-    bess_to_mall = np.zeros(n_hours)
-    grid_to_ev = np.zeros(n_hours)
-    grid_to_mall = np.zeros(n_hours)
-    grid_to_bess = np.zeros(n_hours)
-    pv_curtailed = np.zeros(n_hours)
-    bess_mode = np.array(['idle'] * n_hours, dtype=object)
-    tariff_soles_kwh = np.zeros(n_hours)
-    cost_grid_import_soles = np.zeros(n_hours)
-    
-    # ===========================================================================
-    # NUEVAS METRICAS v5.4: Ahorros economicos e impacto CO₂ (por hora)
-    # ===========================================================================
-    peak_reduction_savings_soles = np.zeros(n_hours)  # Ahorro por corte de picos (S/)
-    co2_avoided_indirect_kg = np.zeros(n_hours)       # CO2 evitado por BESS discharge (kg)
-    
-    # Estado inicial
-    current_soc = 0.50  # SOC inicial: 50% (neutral)
-    
-    # ===========================================================================
-    # BUCLE PRINCIPAL: Simular cada hora del ano
-    # ===========================================================================
-    
-    for h in range(n_hours):
-        hour_of_day = h % 24
-        pv_h = pv_kwh[h]
-        ev_h = ev_kwh[h]
-        mall_h = mall_kwh[h]
-        
-        # =====================================================================
-        # FUERA DE OPERACION (23h-5h): Sin actividad BESS, solo grid/PV
-        # =====================================================================
-        if hour_of_day >= closing_hour or hour_of_day < 6:
-            # PV solo hacia mall (EV cerrado)
-            pv_to_ev[h] = 0.0
-            pv_to_mall[h] = min(pv_h, mall_h)
-            pv_curtailed[h] = max(pv_h - pv_to_mall[h], 0)
-            
-            # Grid cubre todo EV + mall deficit
-            grid_to_ev[h] = ev_h
-            grid_to_mall[h] = max(mall_h - pv_to_mall[h], 0)
-            
-            # BESS inactivo
-            bess_charge[h] = 0.0
-            bess_discharge[h] = 0.0
-            bess_mode[h] = 'idle'
-            
-            # Tarifa: HFP por defecto (fuera de punta)
-            tariff_soles_kwh[h] = TARIFA_ENERGIA_HFP_SOLES
-            cost_grid_import_soles[h] = (grid_to_ev[h] + grid_to_mall[h]) * tariff_soles_kwh[h]
-            
-            soc[h] = current_soc
-            continue
-        
-        # =====================================================================
-        # OPERACION DIURNA-NOCTURNA (6h-22h)
-        # =====================================================================
-        
-        # INICIALIZAR VARIABLES
-        pv_remaining = pv_h
-        ev_deficit = ev_h
-        mall_deficit = mall_h
-        bess_charge[h] = 0.0
-        bess_discharge[h] = 0.0
-        pv_to_ev[h] = 0.0
-        pv_to_mall[h] = 0.0
-        pv_to_bess[h] = 0.0
-        
-        # =====================================================================
-        # NUEVAS PRIORIDADES - SOLAR PRIORITY v5.4 CORREGIDO
-        # =====================================================================
-        # PRIORIDAD 1: BESS CARGA (apenas existe generacion PV)
-        #              - Carga a maxima potencia mientras PV > 0 Y SOC < 100%
-        #              - Se mantiene al 100% hasta hora de descarga
-        # PRIORIDAD 2: EV (desde PV restante o BESS)
-        # PRIORIDAD 3: MALL (desde PV restante o BESS)
-        # PRIORIDAD 4: GRID cubre deficits
-        
-        # =====================================================================
-        # PASO 1: BESS CARGA A MAXIMA POTENCIA (si hay PV y SOC < 100%)
-        # =====================================================================
-        
-        if pv_remaining > 0.01 and current_soc < soc_max:
-            # ---------------------------------------------------------------
-            # MODO CARGA: BESS carga a maxima potencia cuando hay generacion PV
-            # 
-            # LOGICA CORREGIDA v5.4 FINAL:
-            # - Carga apenas existe generacion solar (pv_h > 0)
-            # - Carga a potencia maxima del BESS hasta alcanzar SOC 100%
-            # - UNA VEZ AL 100%: NO intenta cargar, PV pasa directo a EV/MALL
-            # - Descarga SOLO cuando hay deficit (EV o MALL con picos > 2000kW)
-            # ---------------------------------------------------------------
-            # Capacidad disponible para almacenar
-            soc_headroom_kwh = (soc_max - current_soc) * capacity_kwh
-            
-            # Poder de carga MAXIMO:
-            # 1. Limitar por potencia nominal del BESS
-            # 2. Limitar por PV disponible
-            # 3. Limitar por headroom del BESS
-            power_charge_kw = min(power_kw, pv_remaining)
-            
-            # Formula CORRECTA de CARGA (energia almacenada):
-            # energy_to_store = power_charge_kw × eff_charge
-            energy_to_store_kwh = power_charge_kw * eff_charge
-            energy_to_store_kwh = min(energy_to_store_kwh, soc_headroom_kwh)
-            
-            if energy_to_store_kwh > 0.01:
-                # Registrar carga
-                bess_charge[h] = power_charge_kw
-                pv_to_bess[h] = power_charge_kw
-                
-                # Actualizar SOC
-                current_soc += energy_to_store_kwh / capacity_kwh
-                current_soc = min(current_soc, soc_max)  # Asegurar SOC ≤ 100%
-                
-                bess_mode[h] = 'charge'
-                
-                # Reducir PV disponible (fue consumido por BESS)
-                pv_remaining -= power_charge_kw
-                pv_remaining = max(pv_remaining, 0.0)
-            else:
-                # Si no se puede cargar (SOC lleno), pasar PV al siguiente paso
-                bess_mode[h] = 'idle'
-        elif current_soc >= soc_max and pv_remaining > 0.01:
-            # ---------------------------------------------------------------
-            # BESS YA ESTA AL 100%: No cargar, PV se usa directamente
-            # El PV se descuenta del generado y se pasa a EV/MALL
-            # ---------------------------------------------------------------
-            bess_mode[h] = 'full'  # Indica que BESS esta lleno
-            # No hacer nada, dejar que pv_remaining pase al siguiente paso
-
-        
-        # =====================================================================
-        # PASO 2: PV RESTANTE -> EV (despues de cargar BESS)
-        # =====================================================================
-        pv_direct_to_ev = min(pv_remaining, ev_h)
-        pv_to_ev[h] = pv_direct_to_ev
-        pv_remaining -= pv_direct_to_ev
-        ev_deficit = ev_h - pv_direct_to_ev
-        
-        # =====================================================================
-        # PASO 3: PV RESTANTE -> MALL (despues de EV)
-        # =====================================================================
-        pv_direct_to_mall = min(pv_remaining, mall_h)
-        pv_to_mall[h] = pv_direct_to_mall
-        pv_remaining -= pv_direct_to_mall
-        mall_deficit = mall_h - pv_direct_to_mall
-        
-        # Curtailment: PV que no puede usarse (muy poco o BESS lleno, EV cerrado, Mall satisfecho)
-        pv_curtailed[h] = max(pv_remaining, 0.0)
-        
-        # =====================================================================
-        # PASO 4: BESS DESCARGA (si hay deficit EV O deficit MALL & picos > 2000kW)
-        # =====================================================================
-        
-        # CONDICION DE DESCARGA MEJORADA:
-        # 1. PRIORIDAD MAXIMA: Hay deficit EV -> Descargar 100% para cubrir EV
-        # 2. LIMITAR PICOS: Hay deficit MALL Y pv_h < mall_h Y pico > 2000kW -> Descargar
-        # 3 Solo descargar si SOC > min Y BESS no esta cargando
-        
-        deficit_solar_mall = (pv_h < mall_h)  # Hay mas demanda mall que generacion PV
-        pico_excede_limite = ((ev_h + mall_h) > 2000.0)  # Pico > 2000 kW
-        soc_permite_descarga = (current_soc > soc_min)
-        puede_descargar = soc_permite_descarga and bess_mode[h] != 'charge'
-        
-        # CONDICIONES PARA ACTIVAR DESCARGA:
-        activar_descarga_ev = (ev_deficit > 0.01 and puede_descargar)  # EV tiene deficit
-        activar_descarga_picos = (deficit_solar_mall and pico_excede_limite and puede_descargar)  # Deficit MALL + picos
-        
-        if (activar_descarga_ev or activar_descarga_picos):
-            # ---------------------------------------------------------------
-            # MODO DESCARGA: Cubrir deficits con energia BESS
-            # PRIORIDAD DESCARGA:
-            # 1º BESS -> EV (cobertura 100% - maxima prioridad)
-            # 2º BESS -> MALL (limitar picos > 2000kW, si hay energia residual)
-            # ---------------------------------------------------------------
-            
-            soc_available_kwh = (current_soc - soc_min) * capacity_kwh
-            remaining_discharge_power = power_kw  # Potencia disponible para descargar
-            
-            # ===============================================================
-            # PRIORIDAD 1: CUBRIR 100% DEFICIT EV (maximo)
-            # ===============================================================
-            if ev_deficit > 0.01 and soc_available_kwh > 0.01:
-                # EV debe recibir 100% de cobertura desde BESS
-                power_to_ev = min(remaining_discharge_power, ev_deficit, 
-                                   soc_available_kwh / eff_discharge)
-                
-                # Energia que sale del BESS (formula correcta)
-                energy_from_bess_ev = power_to_ev / eff_discharge
-                energy_from_bess_ev = min(energy_from_bess_ev, soc_available_kwh)
-                
-                if energy_from_bess_ev > 0.01:
-                    # Energia entregada a EV
-                    energy_to_ev = energy_from_bess_ev * eff_discharge
-                    
-                    bess_discharge[h] += power_to_ev
-                    bess_to_ev[h] = energy_to_ev
-                    
-                    # Actualizar SOC
-                    current_soc -= energy_from_bess_ev / capacity_kwh
-                    current_soc = max(current_soc, soc_min)
-                    
-                    # Reducir deficit
-                    ev_deficit -= energy_to_ev
-                    remaining_discharge_power -= power_to_ev
-                    soc_available_kwh = (current_soc - soc_min) * capacity_kwh
-                    
-                    bess_mode[h] = 'discharge'
-            
-            # ===============================================================
-            # PRIORIDAD 2: DESCARGAR ENERGIA RESIDUAL A MALL
-            # ===============================================================
-            # ESTRATEGIA v5.5 SIMPLIFICADA:
-            # - Despues de cubrir EV completamente (100%), descargar energia residual al MALL
-            # - Objetivo: SOC baje naturalmente hasta 20% a las 22h (por balance energetico)
-            # - Sin forzar ningun calculo de maximo; solo usar lo que sobra
-            # ---------------------------------------------------------------
-            
-            # Descargar a MALL solo con la energia RESIDUAL (remanente despues de EV)
-            if remaining_discharge_power > 0.10 and mall_deficit > 0.01 and soc_available_kwh > 0.01:
-                
-                # Solo descargar el poder residual que existe (sin calculos complejos)
-                power_to_mall = remaining_discharge_power
-                
-                # Energia que sale del BESS (con eficiencia)
-                energy_from_bess_mall = power_to_mall / eff_discharge
-                energy_from_bess_mall = min(energy_from_bess_mall, soc_available_kwh)
-                
-                if energy_from_bess_mall > 0.01:
-                    # Energia entregada al MALL
-                    energy_to_mall = energy_from_bess_mall * eff_discharge
-                    
-                    bess_discharge[h] += power_to_mall
-                    bess_to_mall[h] = energy_to_mall
-                    
-                    # Actualizar SOC
-                    current_soc -= energy_from_bess_mall / capacity_kwh
-                    current_soc = max(current_soc, soc_min)
-                    
-                    # Reducir deficit del MALL
-                    mall_deficit -= energy_to_mall
-                    remaining_discharge_power -= power_to_mall
-                    
-                    bess_mode[h] = 'discharge'
-
-        
-        elif bess_mode[h] == 'charge':
-            # Mantenerse cargando si hay PV y SOC < 100% (modo carga mantiene estado)
-            pass
-        else:
-            # MODO IDLE: Sin accion
-            if bess_mode[h] != 'charge':
-                bess_mode[h] = 'idle'
-        
-
-
-
-        # =====================================================================
-        # PASO FINAL: Grid cubre deficits restantes
-        # =====================================================================
-        grid_to_ev[h] = max(ev_deficit, 0)
-        grid_to_mall[h] = max(mall_deficit, 0)
-        grid_to_bess[h] = 0.0  # Solar-priority NO carga desde grid
-        
-        # Tarifa (para logging, aunque no afecta decision)
-        is_hp = 18 <= hour_of_day < 23
-        tariff_soles_kwh[h] = TARIFA_ENERGIA_HP_SOLES if is_hp else TARIFA_ENERGIA_HFP_SOLES
-        cost_grid_import_soles[h] = (grid_to_ev[h] + grid_to_mall[h]) * tariff_soles_kwh[h]
-        
-        # =====================================================================
-        # METRICAS v5.4: Ahorros y CO₂ evitado
-        # =====================================================================
-        
-        if (bess_to_ev[h] + bess_to_mall[h]) > 0.01:
-            # CO2 evitado por BESS discharge (reemplaza generacion termica)
-            co2_avoided_indirect_kg[h] = (bess_to_ev[h] + bess_to_mall[h]) * FACTOR_CO2_KG_KWH
-        else:
-            co2_avoided_indirect_kg[h] = 0.0
-        
-        if bess_to_mall[h] > 0.01:
-            peak_reduction_savings_soles[h] = bess_to_mall[h] * tariff_soles_kwh[h]
-        else:
-            peak_reduction_savings_soles[h] = 0.0
-        
-        # Guardar SOC
-        soc[h] = current_soc
-    
-    # ===========================================================================
-    # VALIDACION DEFENSIVA: CERO EN MADRUGADA (00:00-05:59)
-    # ===========================================================================
-    # Regla: BESS NO se carga ni descarga en madrugada
-    # - EV esta cerrado (cierra 22h)
-    # - No hay generacion solar (noche)
-    # - Fuerza cero incluso si hay bug en logica anterior
-    # ===========================================================================
-    for h in range(n_hours):
-        hour_of_day = h % 24
-        if hour_of_day < 6:  # 00:00-05:59 es madrugada
-            # Forzar inactividad total
-            bess_charge[h] = 0.0
-            bess_discharge[h] = 0.0
-            pv_to_bess[h] = 0.0
-            bess_to_ev[h] = 0.0
-            bess_to_mall[h] = 0.0
-            grid_to_bess[h] = 0.0
-            bess_mode[h] = 'midnight_off'  # Indicador de fuera de operacion
-    
-    # ===========================================================================
-    # CREAR DATAFRAME DE RESULTADOS
-    # ===========================================================================
-    
-    # Indice: datetime para todo el ano
-    datetime_index = pd.date_range(start=f'{year}-01-01', periods=n_hours, freq='h', tz=None)
-    
-    # ===========================================================================
-    # NORMALIZAR METRICAS PARA CITYLEARN (escalas apropiadas para observaciones RL)
-    # ===========================================================================
-    # Ahorros por picos normalizados a [0, 1]: dividir por maximo anual
-    peak_reduction_savings_normalized = peak_reduction_savings_soles.copy()
-    max_savings_hour = np.max(peak_reduction_savings_soles) if np.max(peak_reduction_savings_soles) > 0 else 1.0
-    peak_reduction_savings_normalized = peak_reduction_savings_soles / max_savings_hour
-    
-    # CO2 indirecto normalizado a [0, 1]: dividir por maximo anual
-    co2_avoided_indirect_normalized = co2_avoided_indirect_kg.copy()
-    max_co2_hour = np.max(co2_avoided_indirect_kg) if np.max(co2_avoided_indirect_kg) > 0 else 1.0
-    co2_avoided_indirect_normalized = co2_avoided_indirect_kg / max_co2_hour
-    
-    df = pd.DataFrame({
-        'datetime': datetime_index,
-        'pv_generation_kwh': pv_kwh,
-        'ev_demand_kwh': ev_kwh,
-        'mall_demand_kwh': mall_kwh,
-        'pv_to_ev_kwh': pv_to_ev,
-        'pv_to_bess_kwh': pv_to_bess,
-        'pv_to_mall_kwh': pv_to_mall,
-        'pv_curtailed_kwh': pv_curtailed,
-        'bess_charge_kwh': bess_charge,
-        'bess_discharge_kwh': bess_discharge,
-        'bess_to_ev_kwh': bess_to_ev,
-        'bess_to_mall_kwh': bess_to_mall,
-        'grid_to_ev_kwh': grid_to_ev,
-        'grid_to_mall_kwh': grid_to_mall,
-        'grid_to_bess_kwh': grid_to_bess,
-        'grid_import_total_kwh': grid_to_ev + grid_to_mall,
-        'bess_soc_percent': soc * 100,
-        'bess_mode': bess_mode,
-        'tariff_osinergmin_soles_kwh': tariff_soles_kwh,
-        'cost_grid_import_soles': cost_grid_import_soles,
-        # ===================================================================
-        # NUEVAS COLUMNAS v5.4: Ahorros e impacto CO₂
-        # ===================================================================
-        'peak_reduction_savings_soles': peak_reduction_savings_soles,  # Valor actual (S/)
-        'peak_reduction_savings_normalized': peak_reduction_savings_normalized,  # [0,1] para RL
-        'co2_avoided_indirect_kg': co2_avoided_indirect_kg,  # Valor actual (kg)
-        'co2_avoided_indirect_normalized': co2_avoided_indirect_normalized,  # [0,1] para RL
-    })
-    
-    df.set_index('datetime', inplace=True)
-    
-    # ===========================================================================
-    # CALCULAR METRICAS
-    # ===========================================================================
-    
-    total_pv = float(pv_kwh.sum())
-    total_ev = float(ev_kwh.sum())
-    total_mall = float(mall_kwh.sum())
-    total_load = total_ev + total_mall
-    
-    ev_from_pv = float(pv_to_ev.sum())
-    ev_from_bess = float(bess_to_ev.sum())
-    ev_from_grid = float(grid_to_ev.sum())
-    
-    # Autosuficiencia EV (lo importante para BESS)
-    ev_self_sufficiency = (ev_from_pv + ev_from_bess) / max(total_ev, 1e-9)
-    
-    # Autosuficiencia total
-    total_grid = float(grid_to_ev.sum() + grid_to_mall.sum())
-    total_self_sufficiency = 1.0 - (total_grid / max(total_load, 1e-9))
-    
-    # ===========================================================================
-    # VALIDACION: COBERTURA EV 100% (FASE 3)
-    # ===========================================================================
-    # Verificar que EV siempre recibe su demanda (no depende de Grid)
-    
-    ev_coverage_pct = ((ev_from_pv + ev_from_bess) / max(total_ev, 1e-9)) * 100.0
-    
-    # Alerta si no hay cobertura completa
-    if ev_coverage_pct < 99.5:  # Permitir 0.5% de tolerancia por redondeos
-        print(f"  [ADVERTENCIA] Cobertura EV insuficiente: {ev_coverage_pct:.1f}% (requiere 100%)")
-        print(f"    Total EV: {total_ev:,.0f} kWh")
-        print(f"    Cubierto por PV: {ev_from_pv:,.0f} kWh")
-        print(f"    Cubierto por BESS: {ev_from_bess:,.0f} kWh")
-        print(f"    Deficit desde Grid: {ev_from_grid:,.0f} kWh")
-    
-    # Calculo de ahorro (comparativa con baseline sin BESS)
-    # Baseline: toda demanda desde grid
-    cost_baseline = total_load * TARIFA_ENERGIA_HFP_SOLES  # Precio HFP promedio
-    cost_with_bess = cost_grid_import_soles.sum()
-    savings_bess = cost_baseline - cost_with_bess
-    
-    # Reduccion CO₂ - DETALLADO CON BESS v5.4
-    # =========================================================================
-    # CO2 EVITADO = (PV directo + BESS discharge) × factor CO2 generacion termica
-    # 
-    # La red publica Iquitos es generada por:
-    # - Generacion termica: diesel B5 @ 0.4521 kg CO₂/kWh (OSINERGMIN)
-    # 
-    # BESS discharge EVITA que esa demanda venga de la red termica
-    # =========================================================================
-    co2_emissions_kg = total_grid * FACTOR_CO2_KG_KWH
-    
-    # CO2 evitado por PV directo (cubre EV + Mall)
-    co2_avoided_by_pv_kg = (ev_from_pv + float(pv_to_mall.sum())) * FACTOR_CO2_KG_KWH
-    
-    # CO2 evitado por BESS discharge (en lugar de red termica)
-    # BESS atiende: EV + MALL (prioridades 1 y 2)
-    co2_avoided_by_bess_kg = (ev_from_bess + float(bess_to_mall.sum())) * FACTOR_CO2_KG_KWH
-    
-    # Total CO2 evitado = PV + BESS discharge
-    co2_avoided_kg = co2_avoided_by_pv_kg + co2_avoided_by_bess_kg
-    
-    co2_reduction_percent = (co2_avoided_kg / max(co2_emissions_kg + co2_avoided_kg, 1e-9)) * 100
-    
-    metrics = {
-        'total_pv_kwh': total_pv,
-        'total_ev_kwh': total_ev,
-        'total_mall_kwh': total_mall,
-        'total_load_kwh': total_load,
-        'ev_from_pv_kwh': ev_from_pv,
-        'ev_from_bess_kwh': ev_from_bess,
-        'ev_from_grid_kwh': ev_from_grid,
-        'mall_from_pv_kwh': float(pv_to_mall.sum()),
-        'mall_from_bess_kwh': float(bess_to_mall.sum()),
-        'mall_from_grid_kwh': float(grid_to_mall.sum()),
-        'total_bess_charge_kwh': float(bess_charge.sum()),
-        'total_bess_discharge_kwh': float(bess_discharge.sum()),
-        'total_grid_import_kwh': total_grid,
-        'total_grid_export_kwh': float(pv_curtailed.sum()),
-        'self_sufficiency': total_self_sufficiency,
-        'ev_self_sufficiency': ev_self_sufficiency,
-        'cycles_per_day': float(bess_charge.sum()) / capacity_kwh / 365 if capacity_kwh > 0 else 0.0,
-        'soc_min_percent': float(soc.min() * 100),
-        'soc_max_percent': float(soc.max() * 100),
-        'soc_avg_percent': float(soc.mean() * 100),
-        'cost_baseline_soles_year': cost_baseline,
-        'cost_grid_import_soles_year': cost_with_bess,
-        'savings_bess_soles_year': savings_bess,
-        'savings_total_soles_year': savings_bess,  # Sin arbitraje HP/HFP
-        'roi_percent': (savings_bess / cost_baseline * 100) if cost_baseline > 0 else 0.0,
-        'co2_emissions_kg_year': co2_emissions_kg,
-        'co2_avoided_by_pv_kg_year': co2_avoided_by_pv_kg,  # NEW: CO2 evitado por PV
-        'co2_avoided_by_bess_kg_year': co2_avoided_by_bess_kg,  # NEW: CO2 evitado por BESS
-        'co2_avoided_kg_year': co2_avoided_kg,  # TOTAL CO2 evitado (PV + BESS)
-        'co2_reduction_percent': co2_reduction_percent,
-    }
-    
-    return df, metrics
+    params = DispatchParams(
+        capacity_kwh=capacity_kwh, power_kw=power_kw, efficiency=efficiency,
+        soc_min=soc_min, soc_max=soc_max, closing_hour=closing_hour,
+        year=year, tariff=OSINERGMIN_TARIFF,
+    )
+    result = simulate_dispatch('solar_priority', pv_kwh, ev_kwh, mall_kwh, params)
+    return result.to_dataframe(), result.metrics
 
 
 def simulate_bess_arbitrage_hp_hfp(
@@ -1547,327 +1132,13 @@ def simulate_bess_arbitrage_hp_hfp(
     Returns:
         Tuple: (DataFrame con simulacion, dict con metricas incluyendo costos)
     """
-    n_hours = len(pv_kwh)
-    eff_charge = math.sqrt(efficiency)
-    eff_discharge = math.sqrt(efficiency)
-    
-    # Arrays de resultados
-    soc = np.zeros(n_hours)
-    bess_charge = np.zeros(n_hours)
-    bess_discharge = np.zeros(n_hours)
-    pv_to_ev = np.zeros(n_hours)
-    pv_to_bess = np.zeros(n_hours)
-    pv_to_mall = np.zeros(n_hours)
-    bess_to_ev = np.zeros(n_hours)
-    bess_to_mall = np.zeros(n_hours)
-    grid_to_ev = np.zeros(n_hours)
-    grid_to_mall = np.zeros(n_hours)
-    grid_to_bess = np.zeros(n_hours)
-    pv_curtailed = np.zeros(n_hours)
-    
-    # Arrays de tarifas y costos
-    tariff_soles_kwh = np.zeros(n_hours)
-    is_peak_hour = np.zeros(n_hours, dtype=int)
-    cost_grid_import_soles = np.zeros(n_hours)
-    savings_bess_soles = np.zeros(n_hours)
-    
-    # Estado inicial: SOC al 50% (inicio neutro para arbitraje)
-    current_soc = 0.50
-    
-    for h in range(n_hours):
-        hour_of_day = h % 24
-        pv_h = pv_kwh[h]
-        ev_h = ev_kwh[h]
-        mall_h = mall_kwh[h]
-        
-        # ====================================
-        # IDENTIFICAR PERIODO TARIFARIO
-        # ====================================
-        is_hp = HORA_INICIO_HP <= hour_of_day < HORA_FIN_HP
-        is_peak_hour[h] = 1 if is_hp else 0
-        tariff_soles_kwh[h] = TARIFA_ENERGIA_HP_SOLES if is_hp else TARIFA_ENERGIA_HFP_SOLES
-        
-        # ====================================
-        # FUERA DE HORARIO OPERATIVO (23h-5h)
-        # BESS solo mantiene SOC, sin carga/descarga activa
-        # ====================================
-        if hour_of_day >= 23 or hour_of_day < 6:
-            pv_to_ev[h] = 0
-            pv_to_mall[h] = min(pv_h, mall_h)
-            grid_to_ev[h] = ev_h if ev_h > 0 else 0
-            grid_to_mall[h] = max(mall_h - pv_to_mall[h], 0)
-            pv_curtailed[h] = max(pv_h - pv_to_mall[h], 0)
-            soc[h] = current_soc
-            # Calcular costo
-            total_grid_h = grid_to_ev[h] + grid_to_mall[h]
-            cost_grid_import_soles[h] = total_grid_h * tariff_soles_kwh[h]
-            continue
-        
-        # ====================================
-        # PRIORIDAD 1: PV -> EV directo
-        # ====================================
-        pv_direct_to_ev = min(pv_h, ev_h)
-        pv_to_ev[h] = pv_direct_to_ev
-        pv_remaining = pv_h - pv_direct_to_ev
-        ev_deficit = ev_h - pv_direct_to_ev
-        
-        # ====================================
-        # PERIODO HFP (FUERA DE PUNTA): CARGA BESS
-        # Estrategia: Maximizar almacenamiento para HP
-        # ====================================
-        if not is_hp:
-            # Prioridad 2 HFP: PV excedente -> BESS
-            if pv_remaining > 0 and current_soc < soc_max:
-                soc_headroom = (soc_max - current_soc) * capacity_kwh
-                max_charge = min(power_kw, pv_remaining, soc_headroom / eff_charge)
-                
-                if max_charge > 0:
-                    bess_charge[h] = max_charge
-                    pv_to_bess[h] = max_charge
-                    current_soc += (max_charge * eff_charge) / capacity_kwh
-                    current_soc = min(current_soc, soc_max)
-                    pv_remaining -= max_charge
-            
-            # Prioridad 3 HFP: Grid -> BESS (carga oportunista)
-            # Solo si SOC < 80% y es manana (6h-12h) para prepararse para HP
-            if 6 <= hour_of_day <= 12 and current_soc < 0.80:
-                soc_headroom = (0.80 - current_soc) * capacity_kwh
-                max_grid_charge = min(power_kw * 0.5, soc_headroom / eff_charge)  # 50% potencia
-                
-                if max_grid_charge > 0:
-                    bess_charge[h] += max_grid_charge
-                    grid_to_bess[h] = max_grid_charge
-                    current_soc += (max_grid_charge * eff_charge) / capacity_kwh
-                    current_soc = min(current_soc, 0.80)
-            
-            # Prioridad 4 HFP: PV -> Mall
-            pv_direct_to_mall = min(pv_remaining, mall_h)
-            pv_to_mall[h] = pv_direct_to_mall
-            pv_remaining -= pv_direct_to_mall
-            mall_deficit = mall_h - pv_direct_to_mall
-            
-            # Curtailment
-            pv_curtailed[h] = pv_remaining
-            
-            # Grid cubre deficits (tarifa HFP barata)
-            grid_to_ev[h] = max(ev_deficit, 0)
-            grid_to_mall[h] = max(mall_deficit, 0)
-        
-        # ====================================
-        # PERIODO HP (HORA PUNTA): DESCARGA BESS
-        # Estrategia: Minimizar compra de grid a tarifa cara
-        # ====================================
-        else:  # is_hp == True
-            # Prioridad 2 HP: BESS -> EV (reemplaza grid caro)
-            if ev_deficit > 0 and current_soc > soc_min:
-                soc_available = (current_soc - soc_min) * capacity_kwh
-                max_discharge = min(power_kw, ev_deficit / eff_discharge, soc_available)
-                
-                if max_discharge > 0:
-                    actual_discharge = max_discharge * eff_discharge
-                    bess_discharge[h] = max_discharge
-                    bess_to_ev[h] = actual_discharge
-                    current_soc -= max_discharge / capacity_kwh
-                    current_soc = max(current_soc, soc_min)
-                    ev_deficit -= actual_discharge
-                    
-                    # AHORRO: energia que NO compramos a tarifa HP
-                    # sino que usamos desde BESS (cargado a tarifa HFP)
-                    savings_bess_soles[h] += actual_discharge * (TARIFA_ENERGIA_HP_SOLES - TARIFA_ENERGIA_HFP_SOLES)
-            
-            # Prioridad 3 HP: PV -> Mall
-            pv_direct_to_mall = min(pv_remaining, mall_h)
-            pv_to_mall[h] = pv_direct_to_mall
-            pv_remaining -= pv_direct_to_mall
-            mall_deficit = mall_h - pv_direct_to_mall
-            
-            # Prioridad 4 HP: BESS -> Mall (reducir demanda HP si queda capacidad)
-            if mall_deficit > 0 and current_soc > soc_min and hour_of_day <= closing_hour:
-                soc_available = (current_soc - soc_min) * capacity_kwh
-                max_discharge = min(power_kw - bess_discharge[h], mall_deficit / eff_discharge, soc_available)
-                
-                if max_discharge > 0:
-                    actual_discharge = max_discharge * eff_discharge
-                    bess_discharge[h] += max_discharge
-                    bess_to_mall[h] = actual_discharge
-                    current_soc -= max_discharge / capacity_kwh
-                    current_soc = max(current_soc, soc_min)
-                    mall_deficit -= actual_discharge
-                    
-                    # Ahorro adicional por reducir demanda Mall en HP
-                    savings_bess_soles[h] += actual_discharge * (TARIFA_ENERGIA_HP_SOLES - TARIFA_ENERGIA_HFP_SOLES)
-            
-            # Curtailment
-            pv_curtailed[h] = pv_remaining
-            
-            # Grid cubre deficits restantes (tarifa HP cara - minimizado)
-            grid_to_ev[h] = max(ev_deficit, 0)
-            grid_to_mall[h] = max(mall_deficit, 0)
-        
-        # Guardar SOC
-        soc[h] = current_soc
-        
-        # Calcular costo de grid import
-        total_grid_h = grid_to_ev[h] + grid_to_mall[h] + grid_to_bess[h]
-        cost_grid_import_soles[h] = total_grid_h * tariff_soles_kwh[h]
-    
-    # =====================================================
-    # COLUMNA COMBINADA: bess_action_kwh y bess_mode
-    # =====================================================
-    bess_action_kwh = np.zeros(n_hours)
-    bess_mode = np.empty(n_hours, dtype=object)
-    
-    for h in range(n_hours):
-        if bess_charge[h] > 0:
-            bess_action_kwh[h] = bess_charge[h]
-            bess_mode[h] = 'charge'
-        elif bess_discharge[h] > 0:
-            bess_action_kwh[h] = bess_discharge[h]
-            bess_mode[h] = 'discharge'
-        else:
-            bess_action_kwh[h] = 0.0
-            bess_mode[h] = 'idle'
-    
-    # ===========================================================================
-    # VALIDACION DEFENSIVA: CERO EN MADRUGADA (00:00-05:59)
-    # ===========================================================================
-    # Regla: BESS NO se carga ni descarga en madrugada
-    # - EV esta cerrado (cierra 22h)
-    # - No hay generacion solar (noche)
-    # - Aplicar incluso en arbitraje HP/HFP (HFP cubre 0-5h pero sin EV activo)
-    # - Fuerza cero incluso si hay bug en logica anterior
-    # ===========================================================================
-    for h in range(n_hours):
-        hour_of_day = h % 24
-        if hour_of_day < 6:  # 00:00-05:59 es madrugada
-            # Forzar inactividad total en madrugada
-            bess_charge[h] = 0.0
-            bess_discharge[h] = 0.0
-            pv_to_bess[h] = 0.0
-            bess_to_ev[h] = 0.0
-            bess_to_mall[h] = 0.0
-            grid_to_bess[h] = 0.0
-            bess_action_kwh[h] = 0.0
-            bess_mode[h] = 'midnight_off'  # Indicador de fuera de operacion
-    
-    # =====================================================
-    # CREAR DATETIME INDEX
-    # =====================================================
-    datetime_index = pd.date_range(
-        start=f'{year}-01-01 00:00:00',
-        periods=n_hours,
-        freq='h'
-    )
-    
-    # DataFrame de resultados CON TODAS LAS COLUMNAS PARA CITYLEARN
-    df = pd.DataFrame({
-        # Columnas de energia existentes
-        'pv_kwh': pv_kwh,
-        'ev_kwh': ev_kwh,
-        'mall_kwh': mall_kwh,
-        'load_kwh': ev_kwh + mall_kwh,
-        'pv_to_ev_kwh': pv_to_ev,
-        'pv_to_bess_kwh': pv_to_bess,
-        'pv_to_mall_kwh': pv_to_mall,
-        'pv_curtailed_kwh': pv_curtailed,
-        'bess_charge_kwh': bess_charge,
-        'bess_discharge_kwh': bess_discharge,
-        'bess_action_kwh': bess_action_kwh,
-        'bess_mode': bess_mode,
-        'bess_to_ev_kwh': bess_to_ev,
-        'bess_to_mall_kwh': bess_to_mall,
-        'grid_to_bess_kwh': grid_to_bess,
-        'grid_import_ev_kwh': grid_to_ev,
-        'grid_import_mall_kwh': grid_to_mall,
-        'grid_import_kwh': grid_to_ev + grid_to_mall + grid_to_bess,
-        'grid_export_kwh': pv_curtailed,  # Sin conexion a red
-        'soc_percent': soc * 100,
-        'soc_kwh': soc * capacity_kwh,
-        
-        # NUEVAS COLUMNAS: Tarifas y Costos OSINERGMIN
-        'is_peak_hour': is_peak_hour,
-        'tariff_soles_kwh': tariff_soles_kwh,
-        'cost_grid_import_soles': cost_grid_import_soles,
-        'savings_bess_soles': savings_bess_soles,
-        'co2_grid_kg': (grid_to_ev + grid_to_mall + grid_to_bess) * FACTOR_CO2_KG_KWH,
-        'co2_avoided_kg': (bess_to_ev + bess_to_mall) * FACTOR_CO2_KG_KWH,
-    }, index=datetime_index)
-    df.index.name = 'datetime'
-    
-    # =====================================================
-    # METRICAS
-    # =====================================================
-    total_pv = float(pv_kwh.sum())
-    total_ev = float(ev_kwh.sum())
-    total_mall = float(mall_kwh.sum())
-    total_load = total_ev + total_mall
-    
-    ev_from_pv = float(pv_to_ev.sum())
-    ev_from_bess = float(bess_to_ev.sum())
-    ev_from_grid = float(grid_to_ev.sum())
-    
-    mall_from_pv = float(pv_to_mall.sum())
-    mall_from_bess = float(bess_to_mall.sum())
-    mall_from_grid = float(grid_to_mall.sum())
-    
-    # Autosuficiencia
-    total_grid = float(grid_to_ev.sum() + grid_to_mall.sum() + grid_to_bess.sum())
-    total_self_sufficiency = 1.0 - (total_grid / max(total_load, 1e-9))
-    ev_self_sufficiency = (ev_from_pv + ev_from_bess) / max(total_ev, 1e-9)
-    
-    # Costos y ahorros
-    total_cost_grid_soles = float(cost_grid_import_soles.sum())
-    total_savings_bess_soles = float(savings_bess_soles.sum())
-    
-    # Costo sin BESS (baseline) - todo a tarifa variable
-    cost_baseline_soles = sum(
-        (ev_kwh[h] + mall_kwh[h]) * tariff_soles_kwh[h] 
-        for h in range(n_hours)
+    params = DispatchParams(
+        capacity_kwh=capacity_kwh, power_kw=power_kw, efficiency=efficiency,
+        soc_min=soc_min, soc_max=soc_max, closing_hour=closing_hour,
+        year=year, tariff=OSINERGMIN_TARIFF,
     )
-    
-    # CO2
-    total_co2_kg = float((grid_to_ev + grid_to_mall + grid_to_bess).sum() * FACTOR_CO2_KG_KWH)
-    co2_avoided_kg = float((bess_to_ev + bess_to_mall).sum() * FACTOR_CO2_KG_KWH)
-    
-    metrics = {
-        # Energia
-        'total_pv_kwh': total_pv,
-        'total_ev_kwh': total_ev,
-        'total_mall_kwh': total_mall,
-        'total_load_kwh': total_load,
-        'ev_from_pv_kwh': ev_from_pv,
-        'ev_from_bess_kwh': ev_from_bess,
-        'ev_from_grid_kwh': ev_from_grid,
-        'mall_from_pv_kwh': mall_from_pv,
-        'mall_from_bess_kwh': mall_from_bess,
-        'mall_from_grid_kwh': mall_from_grid,
-        'total_bess_charge_kwh': float(bess_charge.sum()),
-        'total_bess_discharge_kwh': float(bess_discharge.sum()),
-        'total_grid_import_kwh': total_grid,
-        'total_grid_export_kwh': float(pv_curtailed.sum()),
-        
-        # Eficiencia
-        'ev_self_sufficiency': ev_self_sufficiency,
-        'self_sufficiency': total_self_sufficiency,
-        'cycles_per_day': float(bess_charge.sum()) / capacity_kwh / 365 if capacity_kwh > 0 else 0.0,
-        'soc_min_percent': float(soc.min() * 100),
-        'soc_max_percent': float(soc.max() * 100),
-        'soc_avg_percent': float(soc.mean() * 100),
-        
-        # NUEVAS METRICAS: Costos OSINERGMIN
-        'cost_grid_import_soles_year': total_cost_grid_soles,
-        'cost_baseline_soles_year': cost_baseline_soles,
-        'savings_bess_soles_year': total_savings_bess_soles,
-        'savings_total_soles_year': cost_baseline_soles - total_cost_grid_soles,
-        'roi_percent': (total_savings_bess_soles / cost_baseline_soles * 100) if cost_baseline_soles > 0 else 0.0,
-        
-        # CO2
-        'co2_emissions_kg_year': total_co2_kg,
-        'co2_avoided_kg_year': co2_avoided_kg,
-        'co2_reduction_percent': (co2_avoided_kg / (total_co2_kg + co2_avoided_kg) * 100) if (total_co2_kg + co2_avoided_kg) > 0 else 0.0,
-    }
-    
-    return df, metrics
+    result = simulate_dispatch('arbitrage_hp_hfp', pv_kwh, ev_kwh, mall_kwh, params)
+    return result.to_dataframe(), result.metrics
 
 
 def calculate_bess_discharge_allocation(
@@ -1941,6 +1212,7 @@ def analyze_bess_characteristics(
     capacity_kwh: float,
     power_kw: float,
     efficiency: float = 0.95,
+    degradation_model: Optional[DegradationModel] = None,
 ) -> dict[str, Any]:
     """
     Analiza caracteristicas detalladas de carga/descarga del BESS.
@@ -1948,6 +1220,7 @@ def analyze_bess_characteristics(
     Calcula:
     - Velocidad de carga vs descarga (potencia promedio, horas activas, energia total)
     - Ciclos anuales de operacion
+    - Ciclos equivalentes y perdida de capacidad por conteo rainflow del SOC
     - Balance energetico completo
     - Energia BESS que atiende al MALL (calculo exacto)
     - Analisis horario: cuando BESS atiende al MALL
@@ -1958,6 +1231,7 @@ def analyze_bess_characteristics(
         capacity_kwh: Capacidad nominal del BESS
         power_kw: Potencia nominal del BESS
         efficiency: Eficiencia round-trip
+        degradation_model: Modelo DoD/vida para el conteo rainflow (default: DegradationModel())
     
     Returns:
         Dict con analisis completo
@@ -1995,6 +1269,16 @@ def analyze_bess_characteristics(
     lifetime_cycles_typical = 3000.0
     lifetime_wear_percent_per_year = (cycles_per_year / lifetime_cycles_typical) * 100.0
     
+    # Rainflow sobre el SOC: ciclos parciales pesan segun su profundidad (DoD)
+    soc_col = 'bess_soc_percent' if 'bess_soc_percent' in df_sim.columns else 'soc_percent'
+    if soc_col in df_sim.columns:
+        degradation = degradation_from_soc(
+            np.asarray(df_sim[soc_col].values, dtype=float) / 100.0,
+            model=degradation_model,
+        )
+    else:
+        degradation = {}
+    
     # =====================================================================
     # 4. BALANCE ENERGETICO
     # =====================================================================
@@ -2079,6 +1363,10 @@ def analyze_bess_characteristics(
         'cycles_per_year': float(cycles_per_year),
         'cycles_per_day': float(cycles_per_day),
         'lifetime_wear_percent_per_year': float(lifetime_wear_percent_per_year),
+        'equivalent_full_cycles_year': float(degradation.get('equivalent_full_cycles_year', 0.0)),
+        'rainflow_full_cycles_year': float(degradation.get('rainflow_full_cycles_year', 0.0)),
+        'capacity_fade_percent_year': float(degradation.get('capacity_fade_percent_year', 0.0)),
+        'cycle_life_years': float(degradation.get('cycle_life_years', 0.0)),
         'color_headroom_carga_descarga': float(diferencia_carga_descarga),
         'eficiencia_realizada_roundtrip': float(eficiencia_realizada),
         'bess_to_mall_kwh': float(bess_to_mall_total),
@@ -2156,6 +1444,10 @@ def generate_bess_analysis_report(
     report.append(f"  Ciclos por dia (promedio):   {characteristics['cycles_per_day']:>12.2f} ciclos/dia")
     report.append(f"  Desgaste esperado (Li-ion):  {characteristics['lifetime_wear_percent_per_year']:>12.1f}% de vida/ano")
     report.append(f"                               (asumiendo 3,000 ciclos de vida tipica)")
+    if 'equivalent_full_cycles_year' in characteristics:
+        report.append(f"  Ciclos equivalentes (EFC):   {characteristics['equivalent_full_cycles_year']:>12.1f} ciclos/ano (rainflow)")
+        report.append(f"  Perdida de capacidad:        {characteristics['capacity_fade_percent_year']:>12.2f}% /ano (DoD-ponderada)")
+        report.append(f"  Vida util estimada:          {characteristics['cycle_life_years']:>12.1f} anos (hasta 80% capacidad)")
     
     # Balance energetico
     report.append(f"\n[5] BALANCE ENERGETICO (ANO 2024)")
@@ -2248,7 +1540,8 @@ def save_bess_analysis_summary(
     return txt_path
 
 
-def generate_bess_plots(
+def _plot_bess_sistema_completo(
+    plots_dir: Path,
     df_sim: pd.DataFrame,
     capacity_kwh: float,
     power_kw: float,
@@ -2257,35 +1550,9 @@ def generate_bess_plots(
     mall_kwh_day: float,
     ev_kwh_day: float,
     pv_kwh_day: float,
-    out_dir: Path,
-    reports_dir: Optional[Path] = None,
-    df_ev_15min: Optional[pd.DataFrame] = None,  # Perfil de 15 min original
+    df_ev_15min: Optional[pd.DataFrame] = None,
 ) -> None:
-    """
-    Genera las 4 graficas del sistema FV + BESS.
-
-    Args:
-        df_sim: DataFrame con simulacion
-        capacity_kwh: Capacidad BESS
-        power_kw: Potencia BESS
-        dod: Profundidad de descarga
-        c_rate: Tasa C
-        mall_kwh_day: Demanda diaria mall
-        ev_kwh_day: Demanda diaria EV
-        pv_kwh_day: Generacion diaria PV
-        out_dir: Directorio de datos interim
-        reports_dir: Directorio de reportes (opcional)
-        df_ev_15min: Perfil de 15 min original (96 intervalos) para visualizacion
-    """
-    plots_dir = out_dir / "plots"
-    if reports_dir is not None:
-        plots_dir = reports_dir / "oe2" / "bess"
-    plots_dir.mkdir(parents=True, exist_ok=True)
-
-    def save_plot(filename: str):
-        """Guarda plot en un solo directorio."""
-        plt.savefig(plots_dir / filename, dpi=150, bbox_inches='tight')  # type: ignore[attr-defined]
-
+    """Figura principal de 4 paneles: dia promedio del sistema FV + BESS."""
     # Obtener datos de un dia representativo (promedio)
     # Excluir columnas no numericas (como bess_mode) antes de calcular mean
     df_sim_copy = df_sim.copy()
@@ -2523,98 +1790,153 @@ def generate_bess_plots(
     # Titulo principal
     plt.suptitle('Sistema FV + BESS - Mall Iquitos, Loreto, Peru', fontsize=14, fontweight='bold', y=1.01)  # type: ignore[attr-defined]
     plt.tight_layout()  # type: ignore[attr-defined]
-    save_plot('bess_sistema_completo.png')
+    plt.savefig(plots_dir / 'bess_sistema_completo.png', dpi=150, bbox_inches='tight')  # type: ignore[attr-defined]
     plt.close()  # type: ignore[attr-defined]
     print("  OK Grafica: Sistema FV + BESS Completo")
 
-    # ===========================================================
-    # Grafica adicional: Analisis mensual
-    # ===========================================================
-    if len(df_sim) >= 720:  # Al menos un mes de datos
-        _, axes = plt.subplots(2, 2, figsize=(14, 10))  # type: ignore[attr-defined]
 
-        # Agregar por mes - extraer mes del indice datetime
-        df_sim_copy = df_sim.copy()
-        if isinstance(df_sim_copy.index, pd.DatetimeIndex):
-            df_sim_copy['month'] = df_sim_copy.index.month
-        else:
-            df_sim_copy['month'] = (np.arange(len(df_sim_copy)) // 720) % 12 + 1
-        # Excluir columnas no numericas (datetime, bess_mode) y 'month' para el groupby
-        numeric_cols_monthly = [c for c in df_sim_copy.select_dtypes(include=['number']).columns.tolist() 
-                               if c != 'month']
-        monthly = df_sim_copy[numeric_cols_monthly + ['month']].groupby('month').sum()  # type: ignore[attr-defined]
-
-        # Panel 1: Energia mensual
-        ax1 = axes[0, 0]
-        months = monthly.index.values  # type: ignore[attr-defined]
-        # Usar 'pv_generation_kwh' que es lo que el DataFrame contiene
-        pv_col = 'pv_generation_kwh' if 'pv_generation_kwh' in monthly.columns else 'pv_kwh'
-        ax1.bar(months - 0.2, monthly[pv_col] / 1000, width=0.4, color='yellow', label='Generacion PV')
-        # Usar columna correcta de demanda total
-        load_col = 'load_kwh' if 'load_kwh' in monthly.columns else None
-        if load_col:
-            ax1.bar(months + 0.2, monthly[load_col] / 1000, width=0.4, color='salmon', label='Demanda Total')
-        else:
-            # Calcular suma de EV + Mall
-            total_load = (monthly.get('ev_demand_kwh', 0) + monthly.get('mall_demand_kwh', 0)) if isinstance(monthly.get('ev_demand_kwh', 0), (int, float)) else (monthly['ev_kwh'] + monthly['mall_kwh'])
-            ax1.bar(months + 0.2, total_load / 1000, width=0.4, color='salmon', label='Demanda Total')
-        ax1.set_xlabel('Mes', fontsize=10)
-        ax1.set_ylabel('Energia (MWh)', fontsize=10)
-        ax1.set_title('Energia Mensual', fontsize=11, fontweight='bold')
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-
-        # Panel 2: Flujos de red mensual
-        ax2 = axes[0, 1]
-        # Usar nombres correctos de columnas
-        grid_import_col = 'grid_import_total_kwh' if 'grid_import_total_kwh' in monthly.columns else 'grid_import_kwh'
-        grid_export_col = 'pv_curtailed_kwh' if 'pv_curtailed_kwh' in monthly.columns else 'grid_export_kwh'
-        ax2.bar(months - 0.2, monthly.get(grid_import_col, 0) / 1000, width=0.4, color='red', label='Import Red')
-        ax2.bar(months + 0.2, monthly.get(grid_export_col, 0) / 1000, width=0.4, color='blue', label='Export Red')
-        ax2.set_xlabel('Mes', fontsize=10)
-        ax2.set_ylabel('Energia (MWh)', fontsize=10)
-        ax2.set_title('Intercambio con Red Mensual', fontsize=11, fontweight='bold')
-        ax2.legend()
-        ax2.grid(True, alpha=0.3)
-
-        # Panel 3: Ciclos BESS
-        ax3 = axes[1, 0]
-        monthly_cycles = (monthly['bess_charge_kwh'] / capacity_kwh) / 30  # Ciclos/dia promedio
-        ax3.bar(months, monthly_cycles, color='green', alpha=0.7)
-        ax3.axhline(y=1.0, color='red', linestyle='--', label='1 ciclo/dia')
-        ax3.set_xlabel('Mes', fontsize=10)
-        ax3.set_ylabel('Ciclos/dia', fontsize=10)
-        ax3.set_title('Ciclos BESS por Mes', fontsize=11, fontweight='bold')
-        ax3.legend()
-        ax3.grid(True, alpha=0.3)
-
-        # Panel 4: Autosuficiencia mensual
-        ax4 = axes[1, 1]
-        # Usar columnas correctas
-        grid_col = 'grid_import_total_kwh' if 'grid_import_total_kwh' in monthly.columns else 'grid_import_kwh'
-        load_col_total = 'load_kwh' if 'load_kwh' in monthly.columns else None
-        if load_col_total:
-            self_suff_monthly = 1.0 - (monthly[grid_col] / monthly[load_col_total].replace(0, 1))  # type: ignore[attr-defined]
-        else:
-            # Calcular carga total como suma de EV + Mall
-            total_load_self = (monthly.get('ev_demand_kwh', monthly['ev_kwh']) + monthly.get('mall_demand_kwh', monthly['mall_kwh']))
-            self_suff_monthly = 1.0 - (monthly[grid_col] / total_load_self.replace(0, 1))  # type: ignore[attr-defined]
-        ax4.bar(months, self_suff_monthly * 100, color='teal', alpha=0.7)
-        ax4.axhline(y=50, color='red', linestyle='--', label='50%')
-        ax4.set_xlabel('Mes', fontsize=10)
-        ax4.set_ylabel('Autosuficiencia (%)', fontsize=10)
-        ax4.set_title('Autosuficiencia Mensual', fontsize=11, fontweight='bold')
-        ax4.set_ylim(0, 100)
-        ax4.legend()
-        ax4.grid(True, alpha=0.3)
-
-        plt.suptitle('Analisis Mensual del Sistema', fontsize=13, fontweight='bold')  # type: ignore[attr-defined]
-        plt.tight_layout()  # type: ignore[attr-defined]
-        save_plot('bess_analisis_mensual.png')
-        plt.close()  # type: ignore[attr-defined]
-        print("  OK Grafica: Analisis Mensual")
+def _plot_bess_analisis_mensual(plots_dir: Path, df_sim: pd.DataFrame, capacity_kwh: float) -> None:
+    """Figura de analisis mensual (energia, red, ciclos BESS, autosuficiencia)."""
+    _, axes = plt.subplots(2, 2, figsize=(14, 10))  # type: ignore[attr-defined]
+
+    # Agregar por mes - extraer mes del indice datetime
+    df_sim_copy = df_sim.copy()
+    if isinstance(df_sim_copy.index, pd.DatetimeIndex):
+        df_sim_copy['month'] = df_sim_copy.index.month
+    else:
+        df_sim_copy['month'] = (np.arange(len(df_sim_copy)) // 720) % 12 + 1
+    # Excluir columnas no numericas (datetime, bess_mode) y 'month' para el groupby
+    numeric_cols_monthly = [c for c in df_sim_copy.select_dtypes(include=['number']).columns.tolist() 
+                           if c != 'month']
+    monthly = df_sim_copy[numeric_cols_monthly + ['month']].groupby('month').sum()  # type: ignore[attr-defined]
+
+    # Panel 1: Energia mensual
+    ax1 = axes[0, 0]
+    months = monthly.index.values  # type: ignore[attr-defined]
+    # Usar 'pv_generation_kwh' que es lo que el DataFrame contiene
+    pv_col = 'pv_generation_kwh' if 'pv_generation_kwh' in monthly.columns else 'pv_kwh'
+    ax1.bar(months - 0.2, monthly[pv_col] / 1000, width=0.4, color='yellow', label='Generacion PV')
+    # Usar columna correcta de demanda total
+    load_col = 'load_kwh' if 'load_kwh' in monthly.columns else None
+    if load_col:
+        ax1.bar(months + 0.2, monthly[load_col] / 1000, width=0.4, color='salmon', label='Demanda Total')
+    else:
+        # Calcular suma de EV + Mall
+        total_load = (monthly.get('ev_demand_kwh', 0) + monthly.get('mall_demand_kwh', 0)) if isinstance(monthly.get('ev_demand_kwh', 0), (int, float)) else (monthly['ev_kwh'] + monthly['mall_kwh'])
+        ax1.bar(months + 0.2, total_load / 1000, width=0.4, color='salmon', label='Demanda Total')
+    ax1.set_xlabel('Mes', fontsize=10)
+    ax1.set_ylabel('Energia (MWh)', fontsize=10)
+    ax1.set_title('Energia Mensual', fontsize=11, fontweight='bold')
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+
+    # Panel 2: Flujos de red mensual
+    ax2 = axes[0, 1]
+    # Usar nombres correctos de columnas
+    grid_import_col = 'grid_import_total_kwh' if 'grid_import_total_kwh' in monthly.columns else 'grid_import_kwh'
+    grid_export_col = 'pv_curtailed_kwh' if 'pv_curtailed_kwh' in monthly.columns else 'grid_export_kwh'
+    ax2.bar(months - 0.2, monthly.get(grid_import_col, 0) / 1000, width=0.4, color='red', label='Import Red')
+    ax2.bar(months + 0.2, monthly.get(grid_export_col, 0) / 1000, width=0.4, color='blue', label='Export Red')
+    ax2.set_xlabel('Mes', fontsize=10)
+    ax2.set_ylabel('Energia (MWh)', fontsize=10)
+    ax2.set_title('Intercambio con Red Mensual', fontsize=11, fontweight='bold')
+    ax2.legend()
+    ax2.grid(True, alpha=0.3)
+
+    # Panel 3: Ciclos BESS
+    ax3 = axes[1, 0]
+    monthly_cycles = (monthly['bess_charge_kwh'] / capacity_kwh) / 30  # Ciclos/dia promedio
+    ax3.bar(months, monthly_cycles, color='green', alpha=0.7)
+    ax3.axhline(y=1.0, color='red', linestyle='--', label='1 ciclo/dia')
+    ax3.set_xlabel('Mes', fontsize=10)
+    ax3.set_ylabel('Ciclos/dia', fontsize=10)
+    ax3.set_title('Ciclos BESS por Mes', fontsize=11, fontweight='bold')
+    ax3.legend()
+    ax3.grid(True, alpha=0.3)
+
+    # Panel 4: Autosuficiencia mensual
+    ax4 = axes[1, 1]
+    # Usar columnas correctas
+    grid_col = 'grid_import_total_kwh' if 'grid_import_total_kwh' in monthly.columns else 'grid_import_kwh'
+    load_col_total = 'load_kwh' if 'load_kwh' in monthly.columns else None
+    if load_col_total:
+        self_suff_monthly = 1.0 - (monthly[grid_col] / monthly[load_col_total].replace(0, 1))  # type: ignore[attr-defined]
+    else:
+        # Calcular carga total como suma de EV + Mall
+        total_load_self = (monthly.get('ev_demand_kwh', monthly['ev_kwh']) + monthly.get('mall_demand_kwh', monthly['mall_kwh']))
+        self_suff_monthly = 1.0 - (monthly[grid_col] / total_load_self.replace(0, 1))  # type: ignore[attr-defined]
+    ax4.bar(months, self_suff_monthly * 100, color='teal', alpha=0.7)
+    ax4.axhline(y=50, color='red', linestyle='--', label='50%')
+    ax4.set_xlabel('Mes', fontsize=10)
+    ax4.set_ylabel('Autosuficiencia (%)', fontsize=10)
+    ax4.set_title('Autosuficiencia Mensual', fontsize=11, fontweight='bold')
+    ax4.set_ylim(0, 100)
+    ax4.legend()
+    ax4.grid(True, alpha=0.3)
+
+    plt.suptitle('Analisis Mensual del Sistema', fontsize=13, fontweight='bold')  # type: ignore[attr-defined]
+    plt.tight_layout()  # type: ignore[attr-defined]
+    plt.savefig(plots_dir / 'bess_analisis_mensual.png', dpi=150, bbox_inches='tight')  # type: ignore[attr-defined]
+    plt.close()  # type: ignore[attr-defined]
+    print("  OK Grafica: Analisis Mensual")
+
+
+def generate_bess_plots(
+    df_sim: pd.DataFrame,
+    capacity_kwh: float,
+    power_kw: float,
+    dod: float,
+    c_rate: float,
+    mall_kwh_day: float,
+    ev_kwh_day: float,
+    pv_kwh_day: float,
+    out_dir: Path,
+    reports_dir: Optional[Path] = None,
+    df_ev_15min: Optional[pd.DataFrame] = None,  # Perfil de 15 min original
+    plots: PlotSelection = True,
+    max_workers: Optional[int] = None,
+) -> Dict[str, str]:
+    """
+    Genera las graficas del sistema FV + BESS.
+
+    Cada figura se identifica por la huella de sus datos y parametros: si el
+    PNG existente corresponde a la misma huella no se vuelve a dibujar. Las
+    figuras pendientes se dibujan en paralelo (backend Agg).
+
+    Args:
+        df_sim: DataFrame con simulacion
+        capacity_kwh: Capacidad BESS
+        power_kw: Potencia BESS
+        dod: Profundidad de descarga
+        c_rate: Tasa C
+        mall_kwh_day: Demanda diaria mall
+        ev_kwh_day: Demanda diaria EV
+        pv_kwh_day: Generacion diaria PV
+        out_dir: Directorio de datos interim
+        reports_dir: Directorio de reportes (opcional)
+        df_ev_15min: Perfil de 15 min original (96 intervalos) para visualizacion
+        plots: Seleccion: True/"all", False/"none" o "only:sistema,mensual"
+        max_workers: Procesos para dibujar (1 = proceso actual)
+
+    Returns:
+        Estado por archivo ("cached", "rendered", "skipped", "error: ...")
+    """
+    plots_dir = out_dir / "plots"
+    if reports_dir is not None:
+        plots_dir = reports_dir / "oe2" / "bess"
+    plots_dir.mkdir(parents=True, exist_ok=True)
+
+    tasks = [
+        PlotTask('sistema', 'bess_sistema_completo.png', _plot_bess_sistema_completo,
+                 (df_sim, capacity_kwh, power_kw, dod, c_rate, mall_kwh_day, ev_kwh_day, pv_kwh_day, df_ev_15min)),
+    ]
+    if len(df_sim) >= 720:  # Al menos un mes de datos
+        tasks.append(PlotTask('mensual', 'bess_analisis_mensual.png', _plot_bess_analisis_mensual,
+                              (df_sim, capacity_kwh)))
+    status = render_plot_tasks(tasks, plots_dir, plots=plots, max_workers=max_workers)
 
     print(f"  OK Plots guardados en: {plots_dir}")
+    return status
 
 
 def prepare_citylearn_data(
@@ -2710,7 +2032,7 @@ def run_bess_sizing(
     pv_night_threshold_kwh: float = 0.1,
     surplus_target_kwh_day: float = 0.0,
     year: int = 2024,
-    generate_plots: bool = True,
+    generate_plots: PlotSelection = True,
     reports_dir: Optional[Path] = None,
     fixed_capacity_kwh: float = 0.0,
     fixed_power_kw: float = 0.0,
@@ -2744,7 +2066,8 @@ def run_bess_sizing(
         discharge_only_no_solar: Restringir descarga a horas sin solar
         pv_night_threshold_kwh: Umbral kWh/h para considerar noche
         year: Ano de simulacion
-        generate_plots: Si generar graficas
+        generate_plots: Si generar graficas (True/False) o seleccion
+            "only:sistema,mensual"
         reports_dir: Directorio de reportes para guardar plots
 
     Returns:
@@ -3307,12 +2630,15 @@ def run_bess_sizing(
         
         # Agregar al diccionario de salida
         result_dict['bess_characteristics'] = bess_characteristics
+        result_dict['equivalent_full_cycles_year'] = bess_characteristics['equivalent_full_cycles_year']
+        result_dict['capacity_fade_percent_year'] = bess_characteristics['capacity_fade_percent_year']
+        result_dict['cycle_life_years'] = bess_characteristics['cycle_life_years']
         
     except Exception as e:
         print(f"  Advertencia: No se pudo realizar analisis detallado: {str(e)}")
         print(f"  Continuando...")
 
-    if generate_plots:
+    if generate_plots is not False and generate_plots != "none":
         print("")
         print("Generando graficas...")
         try:
@@ -3328,6 +2654,7 @@ def run_bess_sizing(
                 out_dir=out_dir,
                 reports_dir=reports_dir,
                 df_ev_15min=None,  # Perfil de 15 min no disponible aqui
+                plots=generate_plots,
             )
         except Exception as e:
             print(f"  Advertencia: No se pudieron generar graficas: {str(e)}")
@@ -3361,8 +2688,14 @@ if __name__ == "__main__":
         9. ARCHIVOS GENERADOS
     """
     import sys
+    import argparse
     from datetime import datetime
 
+    # python bess.py [--no-plots | --plots=only:sistema,mensual]
+    parser = argparse.ArgumentParser(description="Dimensionamiento BESS v5.4 - Iquitos")
+    add_plot_arguments(parser)
+    plots_spec = plot_spec_from_args(parser.parse_args())
+
     # ===================================================================
     # ENCABEZADO PRINCIPAL
     # ===================================================================
@@ -3475,7 +2808,7 @@ if __name__ == "__main__":
         pv_night_threshold_kwh=0.1,
         surplus_target_kwh_day=0.0,
         year=2024,
-        generate_plots=True,
+        generate_plots=plots_spec,
         reports_dir=reports_dir,
         fixed_capacity_kwh=0.0,
         fixed_power_kw=0.0,
@@ -3642,7 +2975,7 @@ if __name__ == "__main__":
         pv_night_threshold_kwh=0.1,
         surplus_target_kwh_day=0.0,
         year=2024,
-        generate_plots=True,
+        generate_plots=plots_spec,
         reports_dir=reports_dir,
         fixed_capacity_kwh=0.0,
         fixed_power_kw=0.0,
@@ -0,0 +1,322 @@
+"""
+DEGRADACION BESS - Conteo rainflow y modelo DoD / vida en ciclos.
+
+PROPOSITO: Estimar el desgaste de la bateria a partir de la serie de SOC
+           (no solo del throughput), de modo que los barridos de
+           dimensionamiento puedan comparar capacidad vs vida util.
+
+Incluye:
+- Conteo rainflow en una pasada O(n) (metodo de 4 puntos, residuo = medios ciclos)
+- RainflowCounter: version streaming (push por hora) para usar dentro de un
+  kernel de despacho sin guardar la serie completa
+- DegradationModel: curva de Wohler N(DoD) = N_ref * (DoD / DoD_ref)^-k
+- degradation_batch(): post-proceso vectorizado sobre una matriz de SOC
+  (n_series, n_horas), p.ej. muchos anos simulados o los puntos de un barrido
+
+Convenciones:
+- SOC en fraccion de capacidad nominal [0, 1] (dividir soc_percent / 100)
+- Un ciclo completo de profundidad d cuenta como d ciclos equivalentes (EFC);
+  un medio ciclo cuenta como d / 2
+- Desgaste por ciclo = (d / DoD_ref)^k / N_ref (regla de Miner)
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Cambios de SOC menores a esta tolerancia se consideran meseta (ruido numerico)
+SOC_TOLERANCE = 1e-9
+
+
+@dataclass(frozen=True)
+class DegradationModel:
+    """
+    Modelo de degradacion por profundidad de ciclo (DoD) para Li-ion.
+
+    Valores por defecto alineados con analyze_bess_characteristics():
+    3,000 ciclos de vida tipica al DoD de diseno (80%).
+    """
+    cycle_life_ref: float = 3000.0       # Ciclos hasta fin de vida al DoD de referencia
+    dod_ref: float = 0.80                # DoD de referencia de la hoja de datos
+    wohler_exponent: float = 1.5         # k: sensibilidad de la vida al DoD
+    eol_capacity_fraction: float = 0.80  # Fin de vida: 80% de capacidad remanente
+    calendar_fade_per_year: float = 0.0  # Perdida calendario (fraccion/ano), opcional
+
+    def cycle_life(self, depth: np.ndarray | float) -> np.ndarray:
+        """Ciclos hasta fin de vida para una profundidad de ciclo dada (fraccion)."""
+        depth_arr = np.asarray(depth, dtype=float)
+        with np.errstate(divide='ignore'):
+            life = self.cycle_life_ref * np.power(depth_arr / self.dod_ref, -self.wohler_exponent)
+        return np.where(depth_arr > 0, life, np.inf)
+
+    def damage_per_unit(self) -> float:
+        """Factor de Miner: desgaste = factor * sum(count * depth^k)."""
+        return 1.0 / (self.cycle_life_ref * self.dod_ref ** self.wohler_exponent)
+
+    def damage(self, depths: np.ndarray, counts: np.ndarray) -> float:
+        """Desgaste acumulado (fraccion de vida consumida) de un histograma de ciclos."""
+        depths = np.asarray(depths, dtype=float)
+        counts = np.asarray(counts, dtype=float)
+        weighted = float(np.sum(counts * np.power(np.maximum(depths, 0.0), self.wohler_exponent)))
+        return weighted * self.damage_per_unit()
+
+
+def _turning_points(soc: np.ndarray) -> np.ndarray:
+    """
+    Extrae los puntos de inversion de la serie (extremos locales + extremos de la serie).
+
+    Las mesetas (SOC constante, p.ej. madrugada) se colapsan antes de buscar
+    cambios de direccion, por lo que no generan ciclos espurios.
+    """
+    x = np.asarray(soc, dtype=float)
+    if x.size < 2:
+        return x.copy()
+    steps = np.diff(x)
+    moving = np.flatnonzero(np.abs(steps) > SOC_TOLERANCE)
+    if moving.size == 0:
+        return x[:1].copy()
+    direction = np.sign(steps[moving])
+    # Una inversion entre el tramo k y k+1 ocurre en el inicio del tramo k+1
+    reversals = moving[np.flatnonzero(direction[1:] != direction[:-1]) + 1]
+    idx = np.concatenate(([0], reversals, [x.size - 1]))
+    return x[idx]
+
+
+def rainflow_count(soc: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Conteo rainflow de una serie de SOC.
+
+    Args:
+        soc: Serie de SOC en fraccion [0, 1] (8,760 valores para un ano)
+
+    Returns:
+        Tuple: (profundidades, conteos) con conteo 1.0 para ciclos completos
+        y 0.5 para medios ciclos del residuo
+    """
+    depths: List[float] = []
+    counts: List[float] = []
+    stack: List[float] = []
+    for point in _turning_points(soc):
+        stack.append(float(point))
+        while len(stack) >= 4:
+            inner = abs(stack[-2] - stack[-3])
+            if inner <= abs(stack[-3] - stack[-4]) and inner <= abs(stack[-1] - stack[-2]):
+                depths.append(inner)
+                counts.append(1.0)
+                del stack[-3:-1]
+            else:
+                break
+    for a, b in zip(stack[:-1], stack[1:]):
+        depths.append(abs(b - a))
+        counts.append(0.5)
+    return np.asarray(depths, dtype=float), np.asarray(counts, dtype=float)
+
+
+class RainflowCounter:
+    """
+    Contador rainflow streaming para usar hora a hora dentro de un kernel de despacho.
+
+    Mantiene solo la pila de puntos de inversion abiertos (acotada por el
+    numero de niveles de SOC distintos), por lo que cada push es O(1)
+    amortizado y no requiere guardar la serie completa.
+
+    Uso:
+        counter = RainflowCounter(DegradationModel())
+        for h in range(n_hours):
+            ...
+            counter.push(current_soc)
+        resumen = counter.summary()
+    """
+
+    def __init__(self, model: Optional[DegradationModel] = None) -> None:
+        self.model = model or DegradationModel()
+        self._k = self.model.wohler_exponent
+        # Puntos de inversion fijos + ultimo extremo provisional al final
+        self._stack: List[float] = []
+        self._direction = 0.0
+        self.full_cycles = 0
+        self.efc_closed = 0.0
+        self.weighted_closed = 0.0  # sum(depth^k) de ciclos completos cerrados
+
+    def push(self, soc: float) -> None:
+        """Agrega un valor de SOC (fraccion) a la serie."""
+        stack = self._stack
+        if not stack:
+            stack.append(soc)
+            return
+        step = soc - stack[-1]
+        if abs(step) <= SOC_TOLERANCE:
+            return
+        direction = 1.0 if step > 0 else -1.0
+        if self._direction == 0.0:
+            # Primer movimiento: el punto inicial queda fijo
+            stack.append(soc)
+        elif direction == self._direction:
+            # Misma direccion: el extremo provisional avanza
+            stack[-1] = soc
+        else:
+            # Inversion: el extremo provisional queda fijo y se abre uno nuevo
+            stack.append(soc)
+            self._close_cycles()
+        self._direction = direction
+
+    def _close_cycles(self) -> None:
+        # Regla de 4 puntos sobre los puntos fijos (todos menos el provisional)
+        stack = self._stack
+        while len(stack) >= 5:
+            inner = abs(stack[-3] - stack[-4])
+            if inner <= abs(stack[-4] - stack[-5]) and inner <= abs(stack[-2] - stack[-3]):
+                self.full_cycles += 1
+                self.efc_closed += inner
+                self.weighted_closed += inner ** self._k
+                del stack[-4:-2]
+            else:
+                break
+
+    def summary(self, years: float = 1.0) -> Dict[str, float]:
+        """
+        Metricas de degradacion, cerrando la serie en el ultimo valor recibido.
+
+        El extremo provisional puede cerrar ciclos al finalizar; lo que queda
+        en la pila se cuenta como medios ciclos (residuo).
+
+        Args:
+            years: Duracion de la serie en anos (para normalizar por ano)
+        """
+        depths, counts = rainflow_count(np.asarray(self._stack, dtype=float))
+        efc = self.efc_closed + float(np.sum(depths * counts))
+        weighted = self.weighted_closed + float(np.sum(counts * np.power(depths, self._k)))
+        full_cycles = self.full_cycles + float(np.sum(counts == 1.0))
+        return _summarize(efc, weighted * self.model.damage_per_unit(), full_cycles, years, self.model)
+
+
+def _summarize(
+    efc: float,
+    damage: float,
+    full_cycles: float,
+    years: float,
+    model: DegradationModel,
+) -> Dict[str, float]:
+    years = max(years, 1e-9)
+    fade_window = 1.0 - model.eol_capacity_fraction
+    fade_per_year = damage / years * fade_window + model.calendar_fade_per_year
+    return {
+        'equivalent_full_cycles_year': efc / years,
+        'rainflow_full_cycles_year': full_cycles / years,
+        'rainflow_damage_year': damage / years,
+        'capacity_fade_percent_year': fade_per_year * 100.0,
+        'cycle_life_years': fade_window / fade_per_year if fade_per_year > 0 else float('inf'),
+    }
+
+
+def degradation_from_soc(
+    soc: np.ndarray,
+    model: Optional[DegradationModel] = None,
+    hours_per_year: int = 8760,
+) -> Dict[str, float]:
+    """
+    Metricas de degradacion de una serie de SOC (fraccion).
+
+    Returns:
+        Dict con equivalent_full_cycles_year, rainflow_full_cycles_year,
+        rainflow_damage_year, capacity_fade_percent_year, cycle_life_years
+    """
+    model = model or DegradationModel()
+    soc = np.asarray(soc, dtype=float)
+    depths, counts = rainflow_count(soc)
+    efc = float(np.sum(depths * counts))
+    damage = model.damage(depths, counts)
+    years = len(soc) / hours_per_year
+    return _summarize(efc, damage, float(np.sum(counts == 1.0)), years, model)
+
+
+def degradation_batch(
+    soc_matrix: np.ndarray,
+    model: Optional[DegradationModel] = None,
+    hours_per_year: int = 8760,
+) -> Dict[str, np.ndarray]:
+    """
+    Post-proceso rainflow vectorizado sobre muchas series de SOC a la vez.
+
+    Cada fila es una serie independiente (un ano simulado o un punto de un
+    barrido de dimensionamiento). Los puntos de inversion se extraen por fila
+    y luego la pila rainflow avanza en paralelo para todas las filas con
+    operaciones NumPy; el costo es O(n_filas × puntos de inversion), con
+    ~3 puntos de inversion por dia en la operacion tipica.
+
+    Args:
+        soc_matrix: Array (n_series, n_horas) de SOC en fraccion [0, 1]
+        model: Modelo de degradacion (default: DegradationModel())
+        hours_per_year: Horas por ano para normalizar
+
+    Returns:
+        Dict de arrays (n_series,) con las mismas claves que degradation_from_soc()
+    """
+    model = model or DegradationModel()
+    k = model.wohler_exponent
+    soc_matrix = np.atleast_2d(np.asarray(soc_matrix, dtype=float))
+    n_series, n_hours = soc_matrix.shape
+
+    tps = [_turning_points(row) for row in soc_matrix]
+    lengths = np.array([len(tp) for tp in tps], dtype=np.int64)
+    width = int(lengths.max()) if n_series > 0 else 0
+    points = np.zeros((n_series, width))
+    for i, tp in enumerate(tps):
+        points[i, :len(tp)] = tp
+
+    stack = np.zeros((n_series, width))
+    top = np.zeros(n_series, dtype=np.int64)  # numero de elementos en la pila
+    efc = np.zeros(n_series)
+    weighted = np.zeros(n_series)
+    full_cycles = np.zeros(n_series)
+
+    for j in range(width):
+        rows = np.flatnonzero(j < lengths)
+        stack[rows, top[rows]] = points[rows, j]
+        top[rows] += 1
+        while rows.size:
+            rows = rows[top[rows] >= 4]
+            if rows.size == 0:
+                break
+            t = top[rows]
+            a = stack[rows, t - 4]
+            b = stack[rows, t - 3]
+            c = stack[rows, t - 2]
+            d = stack[rows, t - 1]
+            inner = np.abs(c - b)
+            hit = (inner <= np.abs(b - a)) & (inner <= np.abs(d - c))
+            rows = rows[hit]
+            if rows.size == 0:
+                break
+            inner = inner[hit]
+            efc[rows] += inner
+            weighted[rows] += np.power(inner, k)
+            full_cycles[rows] += 1.0
+            # Quitar b y c: d pasa a la posicion de b
+            stack[rows, top[rows] - 3] = d[hit]
+            top[rows] -= 2
+
+    # Residuo: medios ciclos entre puntos consecutivos que quedan en la pila
+    cols = np.arange(width)
+    if width > 1:
+        residue = np.abs(np.diff(stack, axis=1))
+        valid = cols[None, :-1] < (top[:, None] - 1)
+        residue = np.where(valid, residue, 0.0)
+        efc += 0.5 * residue.sum(axis=1)
+        weighted += 0.5 * np.power(residue, k).sum(axis=1)
+
+    damage = weighted * model.damage_per_unit()
+    years = max(n_hours / hours_per_year, 1e-9)
+    fade_window = 1.0 - model.eol_capacity_fraction
+    fade_per_year = damage / years * fade_window + model.calendar_fade_per_year
+    with np.errstate(divide='ignore'):
+        life_years = np.where(fade_per_year > 0, fade_window / fade_per_year, np.inf)
+    return {
+        'equivalent_full_cycles_year': efc / years,
+        'rainflow_full_cycles_year': full_cycles / years,
+        'rainflow_damage_year': damage / years,
+        'capacity_fade_percent_year': fade_per_year * 100.0,
+        'cycle_life_years': life_years,
+    }
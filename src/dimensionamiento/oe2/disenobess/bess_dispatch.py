@@ -0,0 +1,993 @@
+"""
+API de despacho BESS como libreria (sin E/S de archivos).
+
+``simulate(strategy, pv, ev, mall, params)`` ejecuta una estrategia de
+despacho sobre arreglos planos (kWh por hora) y devuelve un
+``DispatchResult`` con los flujos como ``np.ndarray``. El DataFrame, el CSV,
+las graficas y las metricas se construyen solo cuando se piden (las metricas
+y el DataFrame quedan cacheados en el resultado), lo que permite barrer miles
+de configuraciones desde un optimizador o un agente RL sin pasar por pandas.
+
+Estrategias:
+    'solar_priority'    Carga con PV excedente, descarga en deficit (v5.4)
+    'arbitrage_hp_hfp'  Carga en HFP, descarga en HP (tarifa OSINERGMIN)
+
+Uso:
+    from src.dimensionamiento.oe2.disenobess.bess_dispatch import simulate
+    res = simulate('solar_priority', pv, ev, mall, capacity_kwh=2000.0)
+    res.metrics['self_sufficiency']
+    res['bess_soc_percent']          # np.ndarray, sin DataFrame
+    res.to_csv('data/oe2/bess/bess_ano_2024.csv')
+"""
+from __future__ import annotations
+
+import dataclasses
+import math
+import sys
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd  # type: ignore[import]
+
+try:
+    from src.utils.energy_accounting import DEFAULT_TARIFF, TariffSchedule, account_flows, hp_mask
+except ImportError:  # Ejecucion directa: raiz del proyecto fuera de sys.path
+    sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+    from src.utils.energy_accounting import (  # type: ignore[no-redef]
+        DEFAULT_TARIFF, TariffSchedule, account_flows, hp_mask,
+    )
+
+Arrays = Dict[str, np.ndarray]
+
+
+@dataclass(frozen=True)
+class DispatchParams:
+    """Parametros de despacho BESS (defaults v5.3: 1,700 kWh / 400 kW)."""
+
+    capacity_kwh: float = 1700.0
+    power_kw: float = 400.0
+    efficiency: float = 0.95       # Round-trip
+    soc_min: float = 0.20
+    soc_max: float = 1.00
+    closing_hour: int = 22         # Cierre EV
+    initial_soc: float = 0.50
+    year: int = 2024
+    tariff: TariffSchedule = DEFAULT_TARIFF
+
+
+# ===========================================================================
+# SOLAR-PRIORITY
+# ===========================================================================
+
+def _dispatch_solar_priority(
+    pv_kwh: np.ndarray, ev_kwh: np.ndarray, mall_kwh: np.ndarray, params: DispatchParams
+) -> Arrays:
+    """Despacho horario solar-priority; devuelve las columnas como arreglos."""
+    capacity_kwh = params.capacity_kwh
+    power_kw = params.power_kw
+    efficiency = params.efficiency
+    soc_min = params.soc_min
+    soc_max = params.soc_max
+    closing_hour = params.closing_hour
+
+    n_hours = len(pv_kwh)
+    # Eficiencia correcta: sqrt(round_trip_efficiency) para CARGA y DESCARGA
+    # Ejemplo: round_trip = 0.95 = 95% -> charging_eff = sqrt(0.95) = 0.9747
+    eff_charge = math.sqrt(efficiency)  # Eficiencia de CARGA
+    eff_discharge = math.sqrt(efficiency)  # Eficiencia de DESCARGA
+    
+    # Arrays de resultados
+    soc = np.zeros(n_hours)
+    bess_charge = np.zeros(n_hours)
+    bess_discharge = np.zeros(n_hours)
+    pv_to_ev = np.zeros(n_hours)
+    pv_to_bess = np.zeros(n_hours)
+    pv_to_mall = np.zeros(n_hours)
+    bess_to_ev = np.zeros(n_hours)
+    bess_to_mall = np.zeros(n_hours)
+    grid_to_ev = np.zeros(n_hours)
+    grid_to_mall = np.zeros(n_hours)
+    grid_to_bess = np.zeros(n_hours)
+    pv_curtailed = np.zeros(n_hours)
+    bess_mode = np.array(['idle'] * n_hours, dtype=object)
+    
+    # Estado inicial
+    current_soc = params.initial_soc  # SOC inicial: 50% (neutral)
+    
+    # ===========================================================================
+    # BUCLE PRINCIPAL: Simular cada hora del ano
+    # ===========================================================================
+    
+    for h in range(n_hours):
+        hour_of_day = h % 24
+        pv_h = pv_kwh[h]
+        ev_h = ev_kwh[h]
+        mall_h = mall_kwh[h]
+        
+        # =====================================================================
+        # FUERA DE OPERACION (23h-5h): Sin actividad BESS, solo grid/PV
+        # =====================================================================
+        if hour_of_day >= closing_hour or hour_of_day < 6:
+            # PV solo hacia mall (EV cerrado)
+            pv_to_ev[h] = 0.0
+            pv_to_mall[h] = min(pv_h, mall_h)
+            pv_curtailed[h] = max(pv_h - pv_to_mall[h], 0)
+            
+            # Grid cubre todo EV + mall deficit
+            grid_to_ev[h] = ev_h
+            grid_to_mall[h] = max(mall_h - pv_to_mall[h], 0)
+            
+            # BESS inactivo
+            bess_charge[h] = 0.0
+            bess_discharge[h] = 0.0
+            bess_mode[h] = 'idle'
+            
+            soc[h] = current_soc
+            continue
+        
+        # =====================================================================
+        # OPERACION DIURNA-NOCTURNA (6h-22h)
+        # =====================================================================
+        
+        # INICIALIZAR VARIABLES
+        pv_remaining = pv_h
+        ev_deficit = ev_h
+        mall_deficit = mall_h
+        bess_charge[h] = 0.0
+        bess_discharge[h] = 0.0
+        pv_to_ev[h] = 0.0
+        pv_to_mall[h] = 0.0
+        pv_to_bess[h] = 0.0
+        
+        # =====================================================================
+        # NUEVAS PRIORIDADES - SOLAR PRIORITY v5.4 CORREGIDO
+        # =====================================================================
+        # PRIORIDAD 1: BESS CARGA (apenas existe generacion PV)
+        #              - Carga a maxima potencia mientras PV > 0 Y SOC < 100%
+        #              - Se mantiene al 100% hasta hora de descarga
+        # PRIORIDAD 2: EV (desde PV restante o BESS)
+        # PRIORIDAD 3: MALL (desde PV restante o BESS)
+        # PRIORIDAD 4: GRID cubre deficits
+        
+        # =====================================================================
+        # PASO 1: BESS CARGA A MAXIMA POTENCIA (si hay PV y SOC < 100%)
+        # =====================================================================
+        
+        if pv_remaining > 0.01 and current_soc < soc_max:
+            # ---------------------------------------------------------------
+            # MODO CARGA: BESS carga a maxima potencia cuando hay generacion PV
+            # 
+            # LOGICA CORREGIDA v5.4 FINAL:
+            # - Carga apenas existe generacion solar (pv_h > 0)
+            # - Carga a potencia maxima del BESS hasta alcanzar SOC 100%
+            # - UNA VEZ AL 100%: NO intenta cargar, PV pasa directo a EV/MALL
+            # - Descarga SOLO cuando hay deficit (EV o MALL con picos > 2000kW)
+            # ---------------------------------------------------------------
+            # Capacidad disponible para almacenar
+            soc_headroom_kwh = (soc_max - current_soc) * capacity_kwh
+            
+            # Poder de carga MAXIMO:
+            # 1. Limitar por potencia nominal del BESS
+            # 2. Limitar por PV disponible
+            # 3. Limitar por headroom del BESS
+            power_charge_kw = min(power_kw, pv_remaining)
+            
+            # Formula CORRECTA de CARGA (energia almacenada):
+            # energy_to_store = power_charge_kw × eff_charge
+            energy_to_store_kwh = power_charge_kw * eff_charge
+            energy_to_store_kwh = min(energy_to_store_kwh, soc_headroom_kwh)
+            
+            if energy_to_store_kwh > 0.01:
+                # Registrar carga
+                bess_charge[h] = power_charge_kw
+                pv_to_bess[h] = power_charge_kw
+                
+                # Actualizar SOC
+                current_soc += energy_to_store_kwh / capacity_kwh
+                current_soc = min(current_soc, soc_max)  # Asegurar SOC ≤ 100%
+                
+                bess_mode[h] = 'charge'
+                
+                # Reducir PV disponible (fue consumido por BESS)
+                pv_remaining -= power_charge_kw
+                pv_remaining = max(pv_remaining, 0.0)
+            else:
+                # Si no se puede cargar (SOC lleno), pasar PV al siguiente paso
+                bess_mode[h] = 'idle'
+        elif current_soc >= soc_max and pv_remaining > 0.01:
+            # ---------------------------------------------------------------
+            # BESS YA ESTA AL 100%: No cargar, PV se usa directamente
+            # El PV se descuenta del generado y se pasa a EV/MALL
+            # ---------------------------------------------------------------
+            bess_mode[h] = 'full'  # Indica que BESS esta lleno
+            # No hacer nada, dejar que pv_remaining pase al siguiente paso
+
+        
+        # =====================================================================
+        # PASO 2: PV RESTANTE -> EV (despues de cargar BESS)
+        # =====================================================================
+        pv_direct_to_ev = min(pv_remaining, ev_h)
+        pv_to_ev[h] = pv_direct_to_ev
+        pv_remaining -= pv_direct_to_ev
+        ev_deficit = ev_h - pv_direct_to_ev
+        
+        # =====================================================================
+        # PASO 3: PV RESTANTE -> MALL (despues de EV)
+        # =====================================================================
+        pv_direct_to_mall = min(pv_remaining, mall_h)
+        pv_to_mall[h] = pv_direct_to_mall
+        pv_remaining -= pv_direct_to_mall
+        mall_deficit = mall_h - pv_direct_to_mall
+        
+        # Curtailment: PV que no puede usarse (muy poco o BESS lleno, EV cerrado, Mall satisfecho)
+        pv_curtailed[h] = max(pv_remaining, 0.0)
+        
+        # =====================================================================
+        # PASO 4: BESS DESCARGA (si hay deficit EV O deficit MALL & picos > 2000kW)
+        # =====================================================================
+        
+        # CONDICION DE DESCARGA MEJORADA:
+        # 1. PRIORIDAD MAXIMA: Hay deficit EV -> Descargar 100% para cubrir EV
+        # 2. LIMITAR PICOS: Hay deficit MALL Y pv_h < mall_h Y pico > 2000kW -> Descargar
+        # 3 Solo descargar si SOC > min Y BESS no esta cargando
+        
+        deficit_solar_mall = (pv_h < mall_h)  # Hay mas demanda mall que generacion PV
+        pico_excede_limite = ((ev_h + mall_h) > 2000.0)  # Pico > 2000 kW
+        soc_permite_descarga = (current_soc > soc_min)
+        puede_descargar = soc_permite_descarga and bess_mode[h] != 'charge'
+        
+        # CONDICIONES PARA ACTIVAR DESCARGA:
+        activar_descarga_ev = (ev_deficit > 0.01 and puede_descargar)  # EV tiene deficit
+        activar_descarga_picos = (deficit_solar_mall and pico_excede_limite and puede_descargar)  # Deficit MALL + picos
+        
+        if (activar_descarga_ev or activar_descarga_picos):
+            # ---------------------------------------------------------------
+            # MODO DESCARGA: Cubrir deficits con energia BESS
+            # PRIORIDAD DESCARGA:
+            # 1º BESS -> EV (cobertura 100% - maxima prioridad)
+            # 2º BESS -> MALL (limitar picos > 2000kW, si hay energia residual)
+            # ---------------------------------------------------------------
+            
+            soc_available_kwh = (current_soc - soc_min) * capacity_kwh
+            remaining_discharge_power = power_kw  # Potencia disponible para descargar
+            
+            # ===============================================================
+            # PRIORIDAD 1: CUBRIR 100% DEFICIT EV (maximo)
+            # ===============================================================
+            if ev_deficit > 0.01 and soc_available_kwh > 0.01:
+                # EV debe recibir 100% de cobertura desde BESS
+                power_to_ev = min(remaining_discharge_power, ev_deficit, 
+                                   soc_available_kwh / eff_discharge)
+                
+                # Energia que sale del BESS (formula correcta)
+                energy_from_bess_ev = power_to_ev / eff_discharge
+                energy_from_bess_ev = min(energy_from_bess_ev, soc_available_kwh)
+                
+                if energy_from_bess_ev > 0.01:
+                    # Energia entregada a EV
+                    energy_to_ev = energy_from_bess_ev * eff_discharge
+                    
+                    bess_discharge[h] += power_to_ev
+                    bess_to_ev[h] = energy_to_ev
+                    
+                    # Actualizar SOC
+                    current_soc -= energy_from_bess_ev / capacity_kwh
+                    current_soc = max(current_soc, soc_min)
+                    
+                    # Reducir deficit
+                    ev_deficit -= energy_to_ev
+                    remaining_discharge_power -= power_to_ev
+                    soc_available_kwh = (current_soc - soc_min) * capacity_kwh
+                    
+                    bess_mode[h] = 'discharge'
+            
+            # ===============================================================
+            # PRIORIDAD 2: DESCARGAR ENERGIA RESIDUAL A MALL
+            # ===============================================================
+            # ESTRATEGIA v5.5 SIMPLIFICADA:
+            # - Despues de cubrir EV completamente (100%), descargar energia residual al MALL
+            # - Objetivo: SOC baje naturalmente hasta 20% a las 22h (por balance energetico)
+            # - Sin forzar ningun calculo de maximo; solo usar lo que sobra
+            # ---------------------------------------------------------------
+            
+            # Descargar a MALL solo con la energia RESIDUAL (remanente despues de EV)
+            if remaining_discharge_power > 0.10 and mall_deficit > 0.01 and soc_available_kwh > 0.01:
+                
+                # Solo descargar el poder residual que existe (sin calculos complejos)
+                power_to_mall = remaining_discharge_power
+                
+                # Energia que sale del BESS (con eficiencia)
+                energy_from_bess_mall = power_to_mall / eff_discharge
+                energy_from_bess_mall = min(energy_from_bess_mall, soc_available_kwh)
+                
+                if energy_from_bess_mall > 0.01:
+                    # Energia entregada al MALL
+                    energy_to_mall = energy_from_bess_mall * eff_discharge
+                    
+                    bess_discharge[h] += power_to_mall
+                    bess_to_mall[h] = energy_to_mall
+                    
+                    # Actualizar SOC
+                    current_soc -= energy_from_bess_mall / capacity_kwh
+                    current_soc = max(current_soc, soc_min)
+                    
+                    # Reducir deficit del MALL
+                    mall_deficit -= energy_to_mall
+                    remaining_discharge_power -= power_to_mall
+                    
+                    bess_mode[h] = 'discharge'
+
+        
+        elif bess_mode[h] == 'charge':
+            # Mantenerse cargando si hay PV y SOC < 100% (modo carga mantiene estado)
+            pass
+        else:
+            # MODO IDLE: Sin accion
+            if bess_mode[h] != 'charge':
+                bess_mode[h] = 'idle'
+        
+
+
+
+        # =====================================================================
+        # PASO FINAL: Grid cubre deficits restantes
+        # =====================================================================
+        grid_to_ev[h] = max(ev_deficit, 0)
+        grid_to_mall[h] = max(mall_deficit, 0)
+        grid_to_bess[h] = 0.0  # Solar-priority NO carga desde grid
+        
+        # Guardar SOC
+        soc[h] = current_soc
+    
+    # ===========================================================================
+    # VALIDACION DEFENSIVA: CERO EN MADRUGADA (00:00-05:59)
+    # ===========================================================================
+    # Regla: BESS NO se carga ni descarga en madrugada
+    # - EV esta cerrado (cierra 22h)
+    # - No hay generacion solar (noche)
+    # - Fuerza cero incluso si hay bug en logica anterior
+    # ===========================================================================
+    for h in range(n_hours):
+        hour_of_day = h % 24
+        if hour_of_day < 6:  # 00:00-05:59 es madrugada
+            # Forzar inactividad total
+            bess_charge[h] = 0.0
+            bess_discharge[h] = 0.0
+            pv_to_bess[h] = 0.0
+            bess_to_ev[h] = 0.0
+            bess_to_mall[h] = 0.0
+            grid_to_bess[h] = 0.0
+            bess_mode[h] = 'midnight_off'  # Indicador de fuera de operacion
+    
+    grid_acc = account_flows(
+        {'grid_to_ev': grid_to_ev, 'grid_to_mall': grid_to_mall}, params.tariff
+    )
+    tariff_soles_kwh = grid_acc.tariff_soles_kwh
+    cost_grid_import_soles = grid_acc.cost()
+    
+    # METRICAS v5.4: CO2 evitado por BESS discharge (reemplaza generacion termica)
+    # y ahorro por corte de picos (BESS -> mall); flujos < 0.01 kWh no cuentan
+    bess_acc = account_flows(
+        {'bess_served': bess_to_ev + bess_to_mall, 'bess_to_mall': bess_to_mall},
+        params.tariff,
+        min_flow_kwh=0.01,
+    )
+    co2_avoided_indirect_kg = bess_acc.co2('bess_served')
+    peak_reduction_savings_soles = bess_acc.cost('bess_to_mall')
+    
+    # ===========================================================================
+    # Ahorros por picos normalizados a [0, 1]: dividir por maximo anual
+    peak_reduction_savings_normalized = peak_reduction_savings_soles.copy()
+    max_savings_hour = np.max(peak_reduction_savings_soles) if np.max(peak_reduction_savings_soles) > 0 else 1.0
+    peak_reduction_savings_normalized = peak_reduction_savings_soles / max_savings_hour
+    
+    # CO2 indirecto normalizado a [0, 1]: dividir por maximo anual
+    co2_avoided_indirect_normalized = co2_avoided_indirect_kg.copy()
+    max_co2_hour = np.max(co2_avoided_indirect_kg) if np.max(co2_avoided_indirect_kg) > 0 else 1.0
+    co2_avoided_indirect_normalized = co2_avoided_indirect_kg / max_co2_hour
+
+    return {
+        'pv_generation_kwh': pv_kwh,
+        'ev_demand_kwh': ev_kwh,
+        'mall_demand_kwh': mall_kwh,
+        'pv_to_ev_kwh': pv_to_ev,
+        'pv_to_bess_kwh': pv_to_bess,
+        'pv_to_mall_kwh': pv_to_mall,
+        'pv_curtailed_kwh': pv_curtailed,
+        'bess_charge_kwh': bess_charge,
+        'bess_discharge_kwh': bess_discharge,
+        'bess_to_ev_kwh': bess_to_ev,
+        'bess_to_mall_kwh': bess_to_mall,
+        'grid_to_ev_kwh': grid_to_ev,
+        'grid_to_mall_kwh': grid_to_mall,
+        'grid_to_bess_kwh': grid_to_bess,
+        'grid_import_total_kwh': grid_to_ev + grid_to_mall,
+        'bess_soc_percent': soc * 100,
+        'bess_mode': bess_mode,
+        'tariff_osinergmin_soles_kwh': tariff_soles_kwh,
+        'cost_grid_import_soles': cost_grid_import_soles,
+        # ===================================================================
+        # NUEVAS COLUMNAS v5.4: Ahorros e impacto CO₂
+        # ===================================================================
+        'peak_reduction_savings_soles': peak_reduction_savings_soles,  # Valor actual (S/)
+        'peak_reduction_savings_normalized': peak_reduction_savings_normalized,  # [0,1] para RL
+        'co2_avoided_indirect_kg': co2_avoided_indirect_kg,  # Valor actual (kg)
+        'co2_avoided_indirect_normalized': co2_avoided_indirect_normalized,  # [0,1] para RL
+    }
+
+
+def _solar_priority_metrics(a: Arrays, params: DispatchParams) -> Dict[str, float]:
+    """Metricas anuales de solar-priority a partir de las columnas del despacho."""
+    pv_kwh = a['pv_generation_kwh']
+    ev_kwh = a['ev_demand_kwh']
+    mall_kwh = a['mall_demand_kwh']
+    pv_to_ev = a['pv_to_ev_kwh']
+    pv_to_mall = a['pv_to_mall_kwh']
+    pv_curtailed = a['pv_curtailed_kwh']
+    bess_charge = a['bess_charge_kwh']
+    bess_discharge = a['bess_discharge_kwh']
+    bess_to_ev = a['bess_to_ev_kwh']
+    bess_to_mall = a['bess_to_mall_kwh']
+    grid_to_ev = a['grid_to_ev_kwh']
+    grid_to_mall = a['grid_to_mall_kwh']
+    soc = a['bess_soc_percent'] / 100
+    cost_grid_import_soles = a['cost_grid_import_soles']
+    capacity_kwh = params.capacity_kwh
+
+    total_pv = float(pv_kwh.sum())
+    total_ev = float(ev_kwh.sum())
+    total_mall = float(mall_kwh.sum())
+    total_load = total_ev + total_mall
+    
+    ev_from_pv = float(pv_to_ev.sum())
+    ev_from_bess = float(bess_to_ev.sum())
+    ev_from_grid = float(grid_to_ev.sum())
+    
+    # Autosuficiencia EV (lo importante para BESS)
+    ev_self_sufficiency = (ev_from_pv + ev_from_bess) / max(total_ev, 1e-9)
+    
+    # Autosuficiencia total
+    total_grid = float(grid_to_ev.sum() + grid_to_mall.sum())
+    total_self_sufficiency = 1.0 - (total_grid / max(total_load, 1e-9))
+    
+    # ===========================================================================
+    # VALIDACION: COBERTURA EV 100% (FASE 3)
+    # ===========================================================================
+    # Verificar que EV siempre recibe su demanda (no depende de Grid)
+    
+    ev_coverage_pct = ((ev_from_pv + ev_from_bess) / max(total_ev, 1e-9)) * 100.0
+    
+    # Alerta si no hay cobertura completa
+    if ev_coverage_pct < 99.5:  # Permitir 0.5% de tolerancia por redondeos
+        print(f"  [ADVERTENCIA] Cobertura EV insuficiente: {ev_coverage_pct:.1f}% (requiere 100%)")
+        print(f"    Total EV: {total_ev:,.0f} kWh")
+        print(f"    Cubierto por PV: {ev_from_pv:,.0f} kWh")
+        print(f"    Cubierto por BESS: {ev_from_bess:,.0f} kWh")
+        print(f"    Deficit desde Grid: {ev_from_grid:,.0f} kWh")
+    
+    # Calculo de ahorro (comparativa con baseline sin BESS)
+    # Baseline: toda demanda desde grid
+    cost_baseline = total_load * params.tariff.hfp_soles_kwh  # Precio HFP promedio
+    cost_with_bess = cost_grid_import_soles.sum()
+    savings_bess = cost_baseline - cost_with_bess
+    
+    # Reduccion CO₂ - DETALLADO CON BESS v5.4
+    # =========================================================================
+    # CO2 EVITADO = (PV directo + BESS discharge) × factor CO2 generacion termica
+    # 
+    # La red publica Iquitos es generada por:
+    # - Generacion termica: diesel B5 @ 0.4521 kg CO₂/kWh (OSINERGMIN)
+    # 
+    # BESS discharge EVITA que esa demanda venga de la red termica
+    # =========================================================================
+    co2_emissions_kg = total_grid * params.tariff.co2_kg_kwh
+    
+    # CO2 evitado por PV directo (cubre EV + Mall)
+    co2_avoided_by_pv_kg = (ev_from_pv + float(pv_to_mall.sum())) * params.tariff.co2_kg_kwh
+    
+    # CO2 evitado por BESS discharge (en lugar de red termica)
+    # BESS atiende: EV + MALL (prioridades 1 y 2)
+    co2_avoided_by_bess_kg = (ev_from_bess + float(bess_to_mall.sum())) * params.tariff.co2_kg_kwh
+    
+    # Total CO2 evitado = PV + BESS discharge
+    co2_avoided_kg = co2_avoided_by_pv_kg + co2_avoided_by_bess_kg
+    
+    co2_reduction_percent = (co2_avoided_kg / max(co2_emissions_kg + co2_avoided_kg, 1e-9)) * 100
+    
+    metrics = {
+        'total_pv_kwh': total_pv,
+        'total_ev_kwh': total_ev,
+        'total_mall_kwh': total_mall,
+        'total_load_kwh': total_load,
+        'ev_from_pv_kwh': ev_from_pv,
+        'ev_from_bess_kwh': ev_from_bess,
+        'ev_from_grid_kwh': ev_from_grid,
+        'mall_from_pv_kwh': float(pv_to_mall.sum()),
+        'mall_from_bess_kwh': float(bess_to_mall.sum()),
+        'mall_from_grid_kwh': float(grid_to_mall.sum()),
+        'total_bess_charge_kwh': float(bess_charge.sum()),
+        'total_bess_discharge_kwh': float(bess_discharge.sum()),
+        'total_grid_import_kwh': total_grid,
+        'total_grid_export_kwh': float(pv_curtailed.sum()),
+        'self_sufficiency': total_self_sufficiency,
+        'ev_self_sufficiency': ev_self_sufficiency,
+        'cycles_per_day': float(bess_charge.sum()) / capacity_kwh / 365 if capacity_kwh > 0 else 0.0,
+        'soc_min_percent': float(soc.min() * 100),
+        'soc_max_percent': float(soc.max() * 100),
+        'soc_avg_percent': float(soc.mean() * 100),
+        'cost_baseline_soles_year': cost_baseline,
+        'cost_grid_import_soles_year': cost_with_bess,
+        'savings_bess_soles_year': savings_bess,
+        'savings_total_soles_year': savings_bess,  # Sin arbitraje HP/HFP
+        'roi_percent': (savings_bess / cost_baseline * 100) if cost_baseline > 0 else 0.0,
+        'co2_emissions_kg_year': co2_emissions_kg,
+        'co2_avoided_by_pv_kg_year': co2_avoided_by_pv_kg,  # NEW: CO2 evitado por PV
+        'co2_avoided_by_bess_kg_year': co2_avoided_by_bess_kg,  # NEW: CO2 evitado por BESS
+        'co2_avoided_kg_year': co2_avoided_kg,  # TOTAL CO2 evitado (PV + BESS)
+        'co2_reduction_percent': co2_reduction_percent,
+    }
+
+    return metrics
+
+
+# ===========================================================================
+# ARBITRAJE HP/HFP
+# ===========================================================================
+
+def _dispatch_arbitrage_hp_hfp(
+    pv_kwh: np.ndarray, ev_kwh: np.ndarray, mall_kwh: np.ndarray, params: DispatchParams
+) -> Arrays:
+    """Despacho horario de arbitraje HP/HFP; devuelve las columnas como arreglos."""
+    capacity_kwh = params.capacity_kwh
+    power_kw = params.power_kw
+    efficiency = params.efficiency
+    soc_min = params.soc_min
+    soc_max = params.soc_max
+    closing_hour = params.closing_hour
+
+    n_hours = len(pv_kwh)
+    eff_charge = math.sqrt(efficiency)
+    eff_discharge = math.sqrt(efficiency)
+    
+    # Arrays de resultados
+    soc = np.zeros(n_hours)
+    bess_charge = np.zeros(n_hours)
+    bess_discharge = np.zeros(n_hours)
+    pv_to_ev = np.zeros(n_hours)
+    pv_to_bess = np.zeros(n_hours)
+    pv_to_mall = np.zeros(n_hours)
+    bess_to_ev = np.zeros(n_hours)
+    bess_to_mall = np.zeros(n_hours)
+    grid_to_ev = np.zeros(n_hours)
+    grid_to_mall = np.zeros(n_hours)
+    grid_to_bess = np.zeros(n_hours)
+    pv_curtailed = np.zeros(n_hours)
+    
+    # Periodo tarifario por hora (mascara HP cacheada)
+    hp_hours = hp_mask(n_hours, params.tariff)
+    
+    # Estado inicial: SOC al 50% (inicio neutro para arbitraje)
+    current_soc = params.initial_soc
+    
+    for h in range(n_hours):
+        hour_of_day = h % 24
+        pv_h = pv_kwh[h]
+        ev_h = ev_kwh[h]
+        mall_h = mall_kwh[h]
+        
+        # ====================================
+        # IDENTIFICAR PERIODO TARIFARIO
+        # ====================================
+        is_hp = bool(hp_hours[h])
+        
+        # ====================================
+        # FUERA DE HORARIO OPERATIVO (23h-5h)
+        # BESS solo mantiene SOC, sin carga/descarga activa
+        # ====================================
+        if hour_of_day >= 23 or hour_of_day < 6:
+            pv_to_ev[h] = 0
+            pv_to_mall[h] = min(pv_h, mall_h)
+            grid_to_ev[h] = ev_h if ev_h > 0 else 0
+            grid_to_mall[h] = max(mall_h - pv_to_mall[h], 0)
+            pv_curtailed[h] = max(pv_h - pv_to_mall[h], 0)
+            soc[h] = current_soc
+            continue
+        
+        # ====================================
+        # PRIORIDAD 1: PV -> EV directo
+        # ====================================
+        pv_direct_to_ev = min(pv_h, ev_h)
+        pv_to_ev[h] = pv_direct_to_ev
+        pv_remaining = pv_h - pv_direct_to_ev
+        ev_deficit = ev_h - pv_direct_to_ev
+        
+        # ====================================
+        # PERIODO HFP (FUERA DE PUNTA): CARGA BESS
+        # Estrategia: Maximizar almacenamiento para HP
+        # ====================================
+        if not is_hp:
+            # Prioridad 2 HFP: PV excedente -> BESS
+            if pv_remaining > 0 and current_soc < soc_max:
+                soc_headroom = (soc_max - current_soc) * capacity_kwh
+                max_charge = min(power_kw, pv_remaining, soc_headroom / eff_charge)
+                
+                if max_charge > 0:
+                    bess_charge[h] = max_charge
+                    pv_to_bess[h] = max_charge
+                    current_soc += (max_charge * eff_charge) / capacity_kwh
+                    current_soc = min(current_soc, soc_max)
+                    pv_remaining -= max_charge
+            
+            # Prioridad 3 HFP: Grid -> BESS (carga oportunista)
+            # Solo si SOC < 80% y es manana (6h-12h) para prepararse para HP
+            if 6 <= hour_of_day <= 12 and current_soc < 0.80:
+                soc_headroom = (0.80 - current_soc) * capacity_kwh
+                max_grid_charge = min(power_kw * 0.5, soc_headroom / eff_charge)  # 50% potencia
+                
+                if max_grid_charge > 0:
+                    bess_charge[h] += max_grid_charge
+                    grid_to_bess[h] = max_grid_charge
+                    current_soc += (max_grid_charge * eff_charge) / capacity_kwh
+                    current_soc = min(current_soc, 0.80)
+            
+            # Prioridad 4 HFP: PV -> Mall
+            pv_direct_to_mall = min(pv_remaining, mall_h)
+            pv_to_mall[h] = pv_direct_to_mall
+            pv_remaining -= pv_direct_to_mall
+            mall_deficit = mall_h - pv_direct_to_mall
+            
+            # Curtailment
+            pv_curtailed[h] = pv_remaining
+            
+            # Grid cubre deficits (tarifa HFP barata)
+            grid_to_ev[h] = max(ev_deficit, 0)
+            grid_to_mall[h] = max(mall_deficit, 0)
+        
+        # ====================================
+        # PERIODO HP (HORA PUNTA): DESCARGA BESS
+        # Estrategia: Minimizar compra de grid a tarifa cara
+        # ====================================
+        else:  # is_hp == True
+            # Prioridad 2 HP: BESS -> EV (reemplaza grid caro)
+            if ev_deficit > 0 and current_soc > soc_min:
+                soc_available = (current_soc - soc_min) * capacity_kwh
+                max_discharge = min(power_kw, ev_deficit / eff_discharge, soc_available)
+                
+                if max_discharge > 0:
+                    actual_discharge = max_discharge * eff_discharge
+                    bess_discharge[h] = max_discharge
+                    bess_to_ev[h] = actual_discharge
+                    current_soc -= max_discharge / capacity_kwh
+                    current_soc = max(current_soc, soc_min)
+                    ev_deficit -= actual_discharge
+            
+            # Prioridad 3 HP: PV -> Mall
+            pv_direct_to_mall = min(pv_remaining, mall_h)
+            pv_to_mall[h] = pv_direct_to_mall
+            pv_remaining -= pv_direct_to_mall
+            mall_deficit = mall_h - pv_direct_to_mall
+            
+            # Prioridad 4 HP: BESS -> Mall (reducir demanda HP si queda capacidad)
+            if mall_deficit > 0 and current_soc > soc_min and hour_of_day <= closing_hour:
+                soc_available = (current_soc - soc_min) * capacity_kwh
+                max_discharge = min(power_kw - bess_discharge[h], mall_deficit / eff_discharge, soc_available)
+                
+                if max_discharge > 0:
+                    actual_discharge = max_discharge * eff_discharge
+                    bess_discharge[h] += max_discharge
+                    bess_to_mall[h] = actual_discharge
+                    current_soc -= max_discharge / capacity_kwh
+                    current_soc = max(current_soc, soc_min)
+                    mall_deficit -= actual_discharge
+            
+            # Curtailment
+            pv_curtailed[h] = pv_remaining
+            
+            # Grid cubre deficits restantes (tarifa HP cara - minimizado)
+            grid_to_ev[h] = max(ev_deficit, 0)
+            grid_to_mall[h] = max(mall_deficit, 0)
+        
+        # Guardar SOC
+        soc[h] = current_soc
+    
+    # =====================================================
+    # COLUMNA COMBINADA: bess_action_kwh y bess_mode
+    # =====================================================
+    bess_action_kwh = np.zeros(n_hours)
+    bess_mode = np.empty(n_hours, dtype=object)
+    
+    for h in range(n_hours):
+        if bess_charge[h] > 0:
+            bess_action_kwh[h] = bess_charge[h]
+            bess_mode[h] = 'charge'
+        elif bess_discharge[h] > 0:
+            bess_action_kwh[h] = bess_discharge[h]
+            bess_mode[h] = 'discharge'
+        else:
+            bess_action_kwh[h] = 0.0
+            bess_mode[h] = 'idle'
+    
+    # ===========================================================================
+    # VALIDACION DEFENSIVA: CERO EN MADRUGADA (00:00-05:59)
+    # ===========================================================================
+    # Regla: BESS NO se carga ni descarga en madrugada
+    # - EV esta cerrado (cierra 22h)
+    # - No hay generacion solar (noche)
+    # - Aplicar incluso en arbitraje HP/HFP (HFP cubre 0-5h pero sin EV activo)
+    # - Fuerza cero incluso si hay bug en logica anterior
+    # ===========================================================================
+    for h in range(n_hours):
+        hour_of_day = h % 24
+        if hour_of_day < 6:  # 00:00-05:59 es madrugada
+            # Forzar inactividad total en madrugada
+            bess_charge[h] = 0.0
+            bess_discharge[h] = 0.0
+            pv_to_bess[h] = 0.0
+            bess_to_ev[h] = 0.0
+            bess_to_mall[h] = 0.0
+            grid_to_bess[h] = 0.0
+            bess_action_kwh[h] = 0.0
+            bess_mode[h] = 'midnight_off'  # Indicador de fuera de operacion
+    
+    # =====================================================
+    # TARIFAS, COSTOS Y CO2 (una sola llamada vectorizada)
+    # =====================================================
+    grid_flows = ('grid_to_ev', 'grid_to_mall', 'grid_to_bess')
+    bess_flows = ('bess_to_ev', 'bess_to_mall')
+    acc = account_flows({
+        'grid_to_ev': grid_to_ev,
+        'grid_to_mall': grid_to_mall,
+        'grid_to_bess': grid_to_bess,
+        'bess_to_ev': bess_to_ev,
+        'bess_to_mall': bess_to_mall,
+        'load': ev_kwh + mall_kwh,  # Baseline sin BESS
+    }, params.tariff)
+    is_peak_hour = acc.is_hp.astype(int)
+    tariff_soles_kwh = acc.tariff_soles_kwh
+    cost_grid_import_soles = acc.cost(*grid_flows)
+    # AHORRO: energia BESS (cargada en HFP) que NO se compra a tarifa HP
+    savings_bess_soles = np.where(
+        acc.is_hp, acc.energy(*bess_flows) * (params.tariff.hp_soles_kwh - params.tariff.hfp_soles_kwh), 0.0
+    )
+
+    return {
+        # Columnas de energia existentes
+        'pv_kwh': pv_kwh,
+        'ev_kwh': ev_kwh,
+        'mall_kwh': mall_kwh,
+        'load_kwh': ev_kwh + mall_kwh,
+        'pv_to_ev_kwh': pv_to_ev,
+        'pv_to_bess_kwh': pv_to_bess,
+        'pv_to_mall_kwh': pv_to_mall,
+        'pv_curtailed_kwh': pv_curtailed,
+        'bess_charge_kwh': bess_charge,
+        'bess_discharge_kwh': bess_discharge,
+        'bess_action_kwh': bess_action_kwh,
+        'bess_mode': bess_mode,
+        'bess_to_ev_kwh': bess_to_ev,
+        'bess_to_mall_kwh': bess_to_mall,
+        'grid_to_bess_kwh': grid_to_bess,
+        'grid_import_ev_kwh': grid_to_ev,
+        'grid_import_mall_kwh': grid_to_mall,
+        'grid_import_kwh': grid_to_ev + grid_to_mall + grid_to_bess,
+        'grid_export_kwh': pv_curtailed,  # Sin conexion a red
+        'soc_percent': soc * 100,
+        'soc_kwh': soc * capacity_kwh,
+        
+        # NUEVAS COLUMNAS: Tarifas y Costos OSINERGMIN
+        'is_peak_hour': is_peak_hour,
+        'tariff_soles_kwh': tariff_soles_kwh,
+        'cost_grid_import_soles': cost_grid_import_soles,
+        'savings_bess_soles': savings_bess_soles,
+        'co2_grid_kg': acc.co2(*grid_flows),
+        'co2_avoided_kg': acc.co2(*bess_flows),
+    }
+
+
+def _arbitrage_metrics(a: Arrays, params: DispatchParams) -> Dict[str, float]:
+    """Metricas anuales de arbitraje HP/HFP a partir de las columnas del despacho."""
+    pv_kwh = a['pv_kwh']
+    ev_kwh = a['ev_kwh']
+    mall_kwh = a['mall_kwh']
+    pv_to_ev = a['pv_to_ev_kwh']
+    pv_to_mall = a['pv_to_mall_kwh']
+    pv_curtailed = a['pv_curtailed_kwh']
+    bess_charge = a['bess_charge_kwh']
+    bess_discharge = a['bess_discharge_kwh']
+    bess_to_ev = a['bess_to_ev_kwh']
+    bess_to_mall = a['bess_to_mall_kwh']
+    grid_to_ev = a['grid_import_ev_kwh']
+    grid_to_mall = a['grid_import_mall_kwh']
+    grid_to_bess = a['grid_to_bess_kwh']
+    soc = a['soc_percent'] / 100
+    tariff_soles_kwh = a['tariff_soles_kwh']
+    cost_grid_import_soles = a['cost_grid_import_soles']
+    savings_bess_soles = a['savings_bess_soles']
+    capacity_kwh = params.capacity_kwh
+
+    total_pv = float(pv_kwh.sum())
+    total_ev = float(ev_kwh.sum())
+    total_mall = float(mall_kwh.sum())
+    total_load = total_ev + total_mall
+    
+    ev_from_pv = float(pv_to_ev.sum())
+    ev_from_bess = float(bess_to_ev.sum())
+    ev_from_grid = float(grid_to_ev.sum())
+    
+    mall_from_pv = float(pv_to_mall.sum())
+    mall_from_bess = float(bess_to_mall.sum())
+    mall_from_grid = float(grid_to_mall.sum())
+    
+    # Autosuficiencia
+    total_grid = float(grid_to_ev.sum() + grid_to_mall.sum() + grid_to_bess.sum())
+    total_self_sufficiency = 1.0 - (total_grid / max(total_load, 1e-9))
+    ev_self_sufficiency = (ev_from_pv + ev_from_bess) / max(total_ev, 1e-9)
+    
+    # Costos y ahorros
+    total_cost_grid_soles = float(cost_grid_import_soles.sum())
+    total_savings_bess_soles = float(savings_bess_soles.sum())
+    
+    # Costo sin BESS (baseline) - todo a tarifa variable
+    cost_baseline_soles = float(((ev_kwh + mall_kwh) * tariff_soles_kwh).sum())
+    
+    # CO2
+    total_co2_kg = float(a['co2_grid_kg'].sum())
+    co2_avoided_kg = float(a['co2_avoided_kg'].sum())
+    
+    metrics = {
+        # Energia
+        'total_pv_kwh': total_pv,
+        'total_ev_kwh': total_ev,
+        'total_mall_kwh': total_mall,
+        'total_load_kwh': total_load,
+        'ev_from_pv_kwh': ev_from_pv,
+        'ev_from_bess_kwh': ev_from_bess,
+        'ev_from_grid_kwh': ev_from_grid,
+        'mall_from_pv_kwh': mall_from_pv,
+        'mall_from_bess_kwh': mall_from_bess,
+        'mall_from_grid_kwh': mall_from_grid,
+        'total_bess_charge_kwh': float(bess_charge.sum()),
+        'total_bess_discharge_kwh': float(bess_discharge.sum()),
+        'total_grid_import_kwh': total_grid,
+        'total_grid_export_kwh': float(pv_curtailed.sum()),
+        
+        # Eficiencia
+        'ev_self_sufficiency': ev_self_sufficiency,
+        'self_sufficiency': total_self_sufficiency,
+        'cycles_per_day': float(bess_charge.sum()) / capacity_kwh / 365 if capacity_kwh > 0 else 0.0,
+        'soc_min_percent': float(soc.min() * 100),
+        'soc_max_percent': float(soc.max() * 100),
+        'soc_avg_percent': float(soc.mean() * 100),
+        
+        # NUEVAS METRICAS: Costos OSINERGMIN
+        'cost_grid_import_soles_year': total_cost_grid_soles,
+        'cost_baseline_soles_year': cost_baseline_soles,
+        'savings_bess_soles_year': total_savings_bess_soles,
+        'savings_total_soles_year': cost_baseline_soles - total_cost_grid_soles,
+        'roi_percent': (total_savings_bess_soles / cost_baseline_soles * 100) if cost_baseline_soles > 0 else 0.0,
+        
+        # CO2
+        'co2_emissions_kg_year': total_co2_kg,
+        'co2_avoided_kg_year': co2_avoided_kg,
+        'co2_reduction_percent': (co2_avoided_kg / (total_co2_kg + co2_avoided_kg) * 100) if (total_co2_kg + co2_avoided_kg) > 0 else 0.0,
+    }
+
+    return metrics
+
+
+# ===========================================================================
+# API PUBLICA
+# ===========================================================================
+
+DispatchFn = Callable[[np.ndarray, np.ndarray, np.ndarray, DispatchParams], Arrays]
+MetricsFn = Callable[[Arrays, DispatchParams], Dict[str, float]]
+
+STRATEGIES: Dict[str, Tuple[DispatchFn, MetricsFn]] = {
+    'solar_priority': (_dispatch_solar_priority, _solar_priority_metrics),
+    'arbitrage_hp_hfp': (_dispatch_arbitrage_hp_hfp, _arbitrage_metrics),
+}
+
+
+@dataclass
+class DispatchResult:
+    """
+    Resultado de un despacho: columnas horarias como arreglos NumPy.
+
+    ``metrics`` y ``to_dataframe()`` se calculan al primer acceso y se
+    cachean; ``to_csv`` y ``plot`` son la unica E/S y son opcionales.
+    """
+
+    strategy: str
+    params: DispatchParams
+    arrays: Arrays = field(repr=False)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.arrays[column]
+
+    @property
+    def n_hours(self) -> int:
+        return len(next(iter(self.arrays.values())))
+
+    @cached_property
+    def metrics(self) -> Dict[str, float]:
+        """Metricas anuales (energia, autosuficiencia, costos, CO2)."""
+        return STRATEGIES[self.strategy][1](self.arrays, self.params)
+
+    @cached_property
+    def _dataframe(self) -> pd.DataFrame:
+        index = pd.date_range(
+            start=f'{self.params.year}-01-01', periods=self.n_hours, freq='h', name='datetime'
+        )
+        return pd.DataFrame(self.arrays, index=index)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """DataFrame horario con indice ``datetime`` (mismas columnas que bess.py)."""
+        return self._dataframe
+
+    def to_csv(self, path: Union[str, Path]) -> Path:
+        """Guarda el DataFrame horario en CSV."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.to_dataframe().to_csv(path)
+        return path
+
+    def plot(
+        self,
+        out_dir: Union[str, Path],
+        mall_kwh_day: float = 0.0,
+        ev_kwh_day: float = 0.0,
+        pv_kwh_day: float = 0.0,
+        plots: Any = True,
+    ) -> Dict[str, str]:
+        """Genera las graficas BESS (importa matplotlib solo al llamarse)."""
+        try:
+            from .bess import generate_bess_plots
+        except ImportError:  # Ejecucion directa
+            from bess import generate_bess_plots  # type: ignore[no-redef]
+        dod = self.params.soc_max - self.params.soc_min
+        return generate_bess_plots(
+            self.to_dataframe(), self.params.capacity_kwh, self.params.power_kw, dod,
+            self.params.power_kw / max(self.params.capacity_kwh, 1e-9),
+            mall_kwh_day, ev_kwh_day, pv_kwh_day, Path(out_dir), plots=plots,
+        )
+
+
+def simulate(
+    strategy: str,
+    pv_kwh: Any,
+    ev_kwh: Any,
+    mall_kwh: Any,
+    params: Optional[DispatchParams] = None,
+    **overrides: Any,
+) -> DispatchResult:
+    """
+    Ejecuta una estrategia de despacho BESS en memoria.
+
+    Args:
+        strategy: 'solar_priority' o 'arbitrage_hp_hfp'
+        pv_kwh: Generacion PV horaria (kWh)
+        ev_kwh: Demanda EV horaria (kWh)
+        mall_kwh: Demanda Mall horaria (kWh)
+        params: Parametros de despacho (default DispatchParams())
+        **overrides: Campos de DispatchParams a reemplazar (p.ej. capacity_kwh=2000)
+
+    Returns:
+        DispatchResult con columnas como arreglos y metricas/DataFrame perezosos
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Estrategia desconocida: {strategy!r} (opciones: {', '.join(STRATEGIES)})")
+    params = params or DispatchParams()
+    if overrides:
+        params = dataclasses.replace(params, **overrides)
+
+    pv = np.asarray(pv_kwh, dtype=np.float64).ravel()
+    ev = np.asarray(ev_kwh, dtype=np.float64).ravel()
+    mall = np.asarray(mall_kwh, dtype=np.float64).ravel()
+    if not (len(pv) == len(ev) == len(mall)):
+        raise ValueError(f"Longitudes distintas: pv={len(pv)}, ev={len(ev)}, mall={len(mall)}")
+
+    arrays = STRATEGIES[strategy][0](pv, ev, mall, params)
+    return DispatchResult(strategy=strategy, params=params, arrays=arrays)
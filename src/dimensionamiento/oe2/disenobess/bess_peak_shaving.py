@@ -0,0 +1,232 @@
+"""
+Motor analitico "what-if" de peak shaving sobre el limite de 2,000 kW.
+
+A partir de la serie horaria de carga neta (Mall + EV, 8,760 h) se precalculan
+una sola vez:
+- La curva de excedencia anual (cargas ordenadas + sumas acumuladas).
+- Las curvas de excedencia por dia (cargas de cada dia ordenadas).
+
+Con ellas, para cualquier umbral X (o arreglo de umbrales) y tamano de BESS
+se responde sin simular hora a hora:
+- Potencia minima para recortar todos los picos sobre X:  P(X) = max(L) - X
+- Energia minima (recarga diaria):  E(X) = max_d sum_h max(L_dh - X, 0)
+- Energia recortada por un BESS (P, E) con recarga diaria:
+      sum_d min(Exc_d(X) - Exc_d(X + P), E_util)
+  donde Exc_d(y) es la energia del dia d por encima de y.
+
+Todas las consultas son vectorizadas (searchsorted sobre las curvas
+ordenadas) y responden cientos de combinaciones en milisegundos.
+
+Uso:
+    from src.dimensionamiento.oe2.disenobess.bess_peak_shaving import PeakShavingEngine
+    engine = PeakShavingEngine.from_bess_dataset("data/oe2/bess/bess_ano_2024.csv")
+    engine.required_power_kw(2000.0)
+    engine.sizing_table([1800, 2000, 2200])
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+PEAK_LIMIT_KW = 2000.0  # Limite de demanda (BalanceEnergeticoConfig.demand_peak_limit_kw)
+
+ArrayLike = Union[float, np.ndarray, list]
+
+
+class PeakShavingEngine:
+    """Curvas de excedencia precalculadas para consultas rapidas de peak shaving."""
+
+    def __init__(self, net_load_kw: np.ndarray, hours_per_day: int = 24):
+        """
+        Args:
+            net_load_kw: Carga neta horaria (kW = kWh/h), longitud multiplo de hours_per_day
+            hours_per_day: Pasos por dia (24 para serie horaria)
+        """
+        load = np.asarray(net_load_kw, dtype=np.float64).ravel()
+        if len(load) == 0 or len(load) % hours_per_day != 0:
+            raise ValueError(
+                f"La serie debe tener un numero entero de dias ({hours_per_day} pasos/dia), "
+                f"recibido: {len(load)}"
+            )
+        self.load_kw = load
+        self.hours_per_day = hours_per_day
+        self.n_days = len(load) // hours_per_day
+        self.peak_kw = float(load.max())
+
+        # Curva anual: cargas ascendentes y suma acumulada desde el final (cola superior)
+        self._sorted = np.sort(load)
+        self._tail_sum = np.concatenate([np.cumsum(self._sorted[::-1])[::-1], [0.0]])
+
+        # Curvas diarias: cada dia ordenado y desplazado por un offset para poder
+        # consultar los 365 dias con un solo searchsorted sobre el arreglo plano
+        days = np.sort(load.reshape(self.n_days, hours_per_day), axis=1)
+        span = float(days.max() - days.min()) + 1.0
+        self._day_offset = np.arange(self.n_days, dtype=np.float64) * 2.0 * span
+        self._day_base = float(days.min())
+        self._span = span
+        self._flat_days = (days + self._day_offset[:, None]).ravel()
+        self._day_tail_sum = np.concatenate(
+            [np.cumsum(days[:, ::-1], axis=1)[:, ::-1], np.zeros((self.n_days, 1))], axis=1
+        )
+
+    @classmethod
+    def from_bess_dataset(
+        cls,
+        path: Union[str, Path] = "data/oe2/bess/bess_ano_2024.csv",
+        subtract_pv: bool = False,
+    ) -> "PeakShavingEngine":
+        """
+        Construye el motor desde el dataset BESS horario (bess_ano_2024.csv).
+
+        Args:
+            path: CSV con columnas mall_demand_kwh, ev_demand_kwh, pv_generation_kwh
+            subtract_pv: Si restar la generacion PV (carga neta vista por la red)
+        """
+        df = pd.read_csv(path)
+        load = df['mall_demand_kwh'].to_numpy(dtype=float)
+        if 'ev_demand_kwh' in df.columns:
+            load = load + df['ev_demand_kwh'].to_numpy(dtype=float)
+        if subtract_pv and 'pv_generation_kwh' in df.columns:
+            load = np.maximum(load - df['pv_generation_kwh'].to_numpy(dtype=float), 0.0)
+        return cls(load)
+
+    # ------------------------------------------------------------------
+    # Curvas de excedencia
+    # ------------------------------------------------------------------
+    def hours_above(self, threshold_kw: ArrayLike) -> np.ndarray:
+        """Horas/ano con carga > umbral."""
+        x = np.asarray(threshold_kw, dtype=np.float64)
+        return len(self._sorted) - np.searchsorted(self._sorted, x, side='right')
+
+    def excess_energy_kwh(self, threshold_kw: ArrayLike) -> np.ndarray:
+        """Energia anual por encima del umbral: sum_h max(L_h - X, 0)."""
+        x = np.asarray(threshold_kw, dtype=np.float64)
+        idx = np.searchsorted(self._sorted, x, side='right')
+        k = len(self._sorted) - idx
+        return self._tail_sum[idx] - k * x
+
+    def daily_excess_kwh(self, threshold_kw: ArrayLike) -> np.ndarray:
+        """Energia por encima del umbral por dia, forma threshold.shape + (n_days,)."""
+        x = np.asarray(threshold_kw, dtype=np.float64)
+        # Recortar al rango de los datos mantiene cada consulta dentro de su dia
+        xc = np.clip(x, self._day_base - 0.5, self._day_base + self._span - 0.5)
+        query = xc[..., None] + self._day_offset
+        pos = np.searchsorted(self._flat_days, query, side='right')
+        idx = pos - np.arange(self.n_days) * self.hours_per_day
+        k = self.hours_per_day - idx
+        tail = self._day_tail_sum[np.arange(self.n_days), idx]
+        return np.maximum(tail - k * x[..., None], 0.0)
+
+    # ------------------------------------------------------------------
+    # Dimensionamiento minimo
+    # ------------------------------------------------------------------
+    def required_power_kw(self, threshold_kw: ArrayLike) -> np.ndarray:
+        """Potencia BESS minima para recortar todos los picos sobre el umbral."""
+        x = np.asarray(threshold_kw, dtype=np.float64)
+        return np.maximum(self.peak_kw - x, 0.0)
+
+    def required_energy_kwh(
+        self,
+        threshold_kw: ArrayLike,
+        dod: float = 1.0,
+        eff_discharge: float = 1.0,
+    ) -> np.ndarray:
+        """
+        Capacidad BESS nominal minima (recarga completa diaria) para recortar
+        todos los picos sobre el umbral: max_d Exc_d(X) / (DoD * eta_descarga).
+        """
+        return self.daily_excess_kwh(threshold_kw).max(axis=-1) / (dod * eff_discharge)
+
+    def shaved_energy_kwh(
+        self,
+        threshold_kw: ArrayLike,
+        power_kw: ArrayLike,
+        capacity_kwh: ArrayLike,
+        dod: float = 1.0,
+        eff_discharge: float = 1.0,
+    ) -> np.ndarray:
+        """
+        Energia anual recortada por un BESS (P, E) con recarga diaria.
+
+        Los argumentos se combinan por broadcasting de NumPy, p.ej. umbrales
+        (T,1,1), potencias (1,P,1), capacidades (1,1,E) -> resultado (T,P,E).
+        """
+        x, p = np.broadcast_arrays(
+            np.asarray(threshold_kw, dtype=np.float64), np.asarray(power_kw, dtype=np.float64)
+        )
+        usable = np.asarray(capacity_kwh, dtype=np.float64) * dod * eff_discharge
+        # Energia recortable por dia limitada por potencia: Exc_d(X) - Exc_d(X + P),
+        # ordenada por dia para evaluar sum_d min(c_d, E) con sumas acumuladas
+        clipped = np.sort(self.daily_excess_kwh(x) - self.daily_excess_kwh(x + p), axis=-1)
+        prefix = np.concatenate([np.zeros(clipped.shape[:-1] + (1,)), np.cumsum(clipped, axis=-1)], axis=-1)
+        out_shape = np.broadcast_shapes(x.shape, usable.shape)
+        n_below = (clipped < usable[..., None]).sum(axis=-1)
+        n_below = np.broadcast_to(n_below, out_shape)
+        below_sum = np.take_along_axis(
+            np.broadcast_to(prefix, out_shape + (self.n_days + 1,)), n_below[..., None], axis=-1
+        )[..., 0]
+        return below_sum + np.broadcast_to(usable, out_shape) * (self.n_days - n_below)
+
+    def min_threshold_kw(
+        self,
+        power_kw: ArrayLike,
+        capacity_kwh: ArrayLike,
+        dod: float = 1.0,
+        eff_discharge: float = 1.0,
+        tol_kw: float = 0.5,
+    ) -> np.ndarray:
+        """
+        Umbral mas bajo que un BESS (P, E) mantiene sin excedencias.
+
+        Potencia y energia requeridas decrecen con el umbral, por lo que se
+        resuelve con biseccion vectorizada sobre todos los tamanos a la vez.
+        """
+        p, e = np.broadcast_arrays(
+            np.asarray(power_kw, dtype=np.float64), np.asarray(capacity_kwh, dtype=np.float64)
+        )
+        lo = np.maximum(np.full(p.shape, float(self._sorted[0])), self.peak_kw - p)
+        hi = np.full(p.shape, self.peak_kw)
+        # El limite de potencia fija la cota inferior; se busca el limite por energia
+        ok_lo = self.required_energy_kwh(lo, dod, eff_discharge) <= e
+        hi = np.where(ok_lo, lo, hi)
+        while np.any(hi - lo > tol_kw):
+            mid = 0.5 * (lo + hi)
+            ok = self.required_energy_kwh(mid, dod, eff_discharge) <= e
+            hi = np.where(ok, mid, hi)
+            lo = np.where(ok, lo, mid)
+        return hi
+
+    def sizing_table(
+        self,
+        thresholds_kw: ArrayLike,
+        dod: float = 1.0,
+        eff_discharge: float = 1.0,
+        power_kw: Optional[float] = None,
+        capacity_kwh: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """
+        Tabla por umbral: horas sobre umbral, exceso anual, potencia y energia
+        minimas; si se indica un BESS (power_kw, capacity_kwh), tambien la
+        energia recortada y el % de cobertura.
+        """
+        x = np.atleast_1d(np.asarray(thresholds_kw, dtype=np.float64))
+        daily = self.daily_excess_kwh(x)
+        table = pd.DataFrame({
+            'threshold_kw': x,
+            'hours_above': self.hours_above(x),
+            'days_above': (daily > 0).sum(axis=1),
+            'excess_energy_kwh': self.excess_energy_kwh(x),
+            'max_daily_excess_kwh': daily.max(axis=1),
+            'required_power_kw': self.required_power_kw(x),
+            'required_capacity_kwh': daily.max(axis=1) / (dod * eff_discharge),
+        })
+        if power_kw is not None and capacity_kwh is not None:
+            shaved = self.shaved_energy_kwh(x, power_kw, capacity_kwh, dod, eff_discharge)
+            table['shaved_energy_kwh'] = shaved
+            table['coverage_percent'] = np.where(
+                table['excess_energy_kwh'] > 0, 100.0 * shaved / np.maximum(table['excess_energy_kwh'], 1e-9), 100.0
+            )
+        return table
@@ -33,7 +33,7 @@ Version: 5.2 (2026-02-11)
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Mapping
 from datetime import datetime, timedelta
 from pathlib import Path
 from collections import deque
@@ -515,28 +515,48 @@ def create_iquitos_chargers() -> ChargerSet:
     Returns:
         ChargerSet inmutable con especificaciones
     """
-    specs = []
-
     # PLAYA MOTOS: 15 cargadores × 2 tomas = 30 tomas
     # Dimensionado por punta: 30 motos/hora ÷ 1.0 cargas/hora/toma = 30 tomas
-    for i in range(15):
-        specs.append(ChargerSpec(
-            charger_id=i,
-            max_power_kw=7.4,  # Modo 3 monofasico 32A
-            vehicle_type="moto",
-            sockets=2
-        ))
-
-    # Mototaxis: 4 cargadores × 2 tomas = 8 tomas (39 mototaxis/dia, 90 min/carga)
     # PLAYA MOTOTAXIS: 4 cargadores × 2 tomas = 8 tomas
     # Dimensionado por punta: 4.2 mototaxis/hora ÷ 0.67 cargas/hora/toma ≈ 7 tomas -> 4 cargadores
-    for i in range(15, 19):
-        specs.append(ChargerSpec(
-            charger_id=i,
-            max_power_kw=7.4,  # Modo 3 monofasico 32A
-            vehicle_type="mototaxi",
-            sockets=2
-        ))
+    return create_charger_set(n_moto_sockets=30, n_mototaxi_sockets=8)
+
+
+def create_charger_set(
+    n_moto_sockets: int,
+    n_mototaxi_sockets: int,
+    sockets_per_charger: int = 2,
+    max_power_kw: float = 7.4,
+    first_charger_id: int = 0,
+) -> ChargerSet:
+    """Crea un conjunto de cargadores para cualquier numero de tomas por tipo.
+
+    Los cargadores de motos van primero y luego los de mototaxis (mismo orden
+    que create_iquitos_chargers). Si las tomas de un tipo no son multiplo de
+    ``sockets_per_charger``, el ultimo cargador de ese tipo tiene menos tomas.
+
+    Args:
+        n_moto_sockets: Tomas para motos
+        n_mototaxi_sockets: Tomas para mototaxis
+        sockets_per_charger: Tomas por cargador (Modo 3: 2)
+        max_power_kw: Potencia por cargador (Modo 3 monofasico 32A: 7.4 kW)
+        first_charger_id: ID del primer cargador (sitios adicionales)
+
+    Returns:
+        ChargerSet inmutable
+    """
+    specs = []
+    charger_id = first_charger_id
+    for vehicle_type, n_sockets in (("moto", n_moto_sockets), ("mototaxi", n_mototaxi_sockets)):
+        full, rest = divmod(int(n_sockets), sockets_per_charger)
+        for sockets in [sockets_per_charger] * full + ([rest] if rest else []):
+            specs.append(ChargerSpec(
+                charger_id=charger_id,
+                max_power_kw=max_power_kw,
+                vehicle_type=vehicle_type,
+                sockets=sockets
+            ))
+            charger_id += 1
 
     return ChargerSet(chargers=tuple(specs))
 
@@ -658,36 +678,27 @@ class SocketSpec:
     power_kw: float
 
 
-def create_socket_specs() -> list[SocketSpec]:
-    """Crea especificaciones para cada una de las 38 tomas.
+def create_socket_specs(charger_set: ChargerSet | None = None) -> list[SocketSpec]:
+    """Crea especificaciones para cada toma de un conjunto de cargadores.
+    
+    Args:
+        charger_set: Cargadores (default: Iquitos, 15 motos + 4 mototaxis)
     
     Returns:
-        Lista de 38 SocketSpec (30 motos + 8 mototaxis)
+        Lista de SocketSpec (Iquitos: 38 = 30 motos + 8 mototaxis)
     """
+    charger_set = charger_set if charger_set is not None else create_iquitos_chargers()
     sockets = []
     socket_id = 0
     
-    # 30 tomas de motos (15 chargers × 2 tomas)
-    for charger_id in range(15):
-        for socket_num in range(2):
-            sockets.append(SocketSpec(
-                socket_id=socket_id,
-                charger_id=charger_id,
-                socket_number=socket_num,
-                vehicle_type="moto",
-                power_kw=7.4  # Modo 3 monofasico 32A
-            ))
-            socket_id += 1
-    
-    # 8 tomas de mototaxis (4 chargers × 2 tomas)
-    for charger_id in range(15, 19):
-        for socket_num in range(2):
+    for charger in charger_set:
+        for socket_num in range(charger.sockets):
             sockets.append(SocketSpec(
                 socket_id=socket_id,
-                charger_id=charger_id,
+                charger_id=charger.charger_id,
                 socket_number=socket_num,
-                vehicle_type="mototaxi",
-                power_kw=7.4  # Modo 3 monofasico 32A
+                vehicle_type=charger.vehicle_type,
+                power_kw=charger.max_power_kw  # Modo 3 monofasico 32A
             ))
             socket_id += 1
     
@@ -732,153 +743,271 @@ def get_operational_factor(hour_of_day: int) -> float:
         return 0.0
 
 
-def generate_socket_level_dataset_v3(
-    output_dir: str | Path = "data/oe2/chargers",
-    random_seed: int = 42
-) -> tuple[pd.DataFrame, pd.DataFrame]:
-    """Genera dataset estocastico realista v3.0 con simulacion por socket.
-    
-    Crea simuladores independientes por toma con:
-    - Llegadas estocasticas (Poisson) segun tipos de vehiculo
-    - SOC dinamico durante carga
-    - Colas FIFO independientes
-    - Factor operativo horario (9-22h para mall)
-    - Reproducibilidad con random_seed
-    
-    Retorna:
-    - DataFrame anual (8,760 × 643 columnas)
-    - DataFrame diario de ejemplo (24 × 643 columnas)
-    
+# ============================================================================
+# SIMULADOR VECTORIZADO DE TOMAS (arreglos NumPy en lugar de objetos)
+# ============================================================================
+
+N_SOCKETS_MOTO = 30
+N_SOCKETS_MOTOTAXI = 8
+MAX_CHARGE_HOURS = 9  # Vehicle.should_depart: hours_charged > 8
+
+
+def _socket_vehicle_types() -> list[VehicleType]:
+    """Tipo de vehiculo por toma (0-29 motos, 30-37 mototaxis)."""
+    return [MOTO_SPEC] * N_SOCKETS_MOTO + [MOTOTAXI_SPEC] * N_SOCKETS_MOTOTAXI
+
+
+def _draw_arrivals_exact(
+    rng: np.random.RandomState,
+    op_factor: np.ndarray,
+    vtypes: list[VehicleType],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Sorteos en el MISMO orden que SocketSimulator.hourly_step (hora -> toma).
+
+    Reproduce el flujo del RandomState de generate_socket_level_dataset_v3 v3.0:
+    por cada hora operativa y cada toma, una Poisson y luego pares
+    (SOC llegada, SOC objetivo) normales por vehiculo.
+    """
+    n_hours, n_sockets = len(op_factor), len(vtypes)
+    arrivals = np.zeros((n_hours, n_sockets), dtype=np.int64)
+    lam = [vt.lambda_arrivals for vt in vtypes]
+    arr_mean = [vt.soc_arrival_mean for vt in vtypes]
+    arr_std = [vt.soc_arrival_std for vt in vtypes]
+    tgt_mean = [vt.soc_target for vt in vtypes]
+    tgt_std = [vt.soc_target_std for vt in vtypes]
+    poisson = rng.poisson
+    standard_normal = rng.standard_normal
+    socs_arr: list[np.ndarray] = []
+    socs_tgt: list[np.ndarray] = []
+    hours_idx: list[int] = []
+    sockets_idx: list[int] = []
+
+    counts: list[int] = []
+    for h in np.flatnonzero(op_factor > 0).tolist():
+        f = float(op_factor[h])
+        for s, lam_s in enumerate(lam):
+            n = poisson(lam_s * f)
+            if n:
+                # Normales intercaladas (llegada, objetivo) por vehiculo: mismo flujo legacy_gauss
+                g = standard_normal(2 * n)
+                socs_arr.append(arr_mean[s] + arr_std[s] * g[0::2])
+                socs_tgt.append(tgt_mean[s] + tgt_std[s] * g[1::2])
+                hours_idx.append(h)
+                sockets_idx.append(s)
+                counts.append(n)
+
+    if not hours_idx:
+        empty = np.zeros(0)
+        return arrivals, np.zeros(0, dtype=np.int64), empty, empty
+    n_per_slot = np.asarray(counts, dtype=np.int64)
+    arrivals[hours_idx, sockets_idx] = n_per_slot
+    hours = np.repeat(np.asarray(hours_idx, dtype=np.int64), n_per_slot)
+    sockets = np.repeat(np.asarray(sockets_idx, dtype=np.int64), n_per_slot)
+    soc_arr = np.clip(np.concatenate(socs_arr), 0.0, 1.0)
+    soc_tgt = np.clip(np.concatenate(socs_tgt), 0.0, 1.0)
+    # Orden (toma, hora de llegada) = orden FIFO de cada cola
+    order = np.lexsort((hours, sockets))
+    return arrivals, order, soc_arr, soc_tgt
+
+
+def _draw_arrivals_bulk(
+    rng: np.random.RandomState,
+    op_factor: np.ndarray,
+    vtypes: list[VehicleType],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Sorteos en bloque: una matriz Poisson (horas x tomas) y un vector normal por SOC.
+
+    Estadisticamente equivalente a la version exacta, pero con otro flujo RNG.
+    Los vehiculos salen ya ordenados por (toma, hora de llegada).
+    """
+    lam = np.array([vt.lambda_arrivals for vt in vtypes])
+    arrivals = rng.poisson(op_factor[:, None] * lam[None, :]).astype(np.int64)
+    n_vehicles = int(arrivals.sum())
+    sockets = np.repeat(np.arange(len(vtypes)), arrivals.sum(axis=0))
+    g = rng.standard_normal((2, n_vehicles))
+    arr_mean = np.array([vt.soc_arrival_mean for vt in vtypes])[sockets]
+    arr_std = np.array([vt.soc_arrival_std for vt in vtypes])[sockets]
+    tgt_mean = np.array([vt.soc_target for vt in vtypes])[sockets]
+    tgt_std = np.array([vt.soc_target_std for vt in vtypes])[sockets]
+    soc_arr = np.clip(arr_mean + arr_std * g[0], 0.0, 1.0)
+    soc_tgt = np.clip(tgt_mean + tgt_std * g[1], 0.0, 1.0)
+    return arrivals, np.arange(n_vehicles), soc_arr, soc_tgt
+
+
+def _fifo_start(
+    arrival: np.ndarray, hold: np.ndarray, socket: np.ndarray, n_sockets: int
+) -> np.ndarray:
+    """Inicio de servicio de colas FIFO independientes por toma (sin bucle).
+
+    Con ``hold`` el tiempo que cada vehiculo ocupa la toma, el inicio es
+    s_i = max(a_i, s_{i-1} + hold_{i-1}); restando H_i (suma previa de hold
+    en la toma) queda s_i - H_i = cummax(a_j - H_j).
+
     Args:
-        output_dir: Directorio para guardar CSVs
-        random_seed: Semilla para reproducibilidad
-        
+        arrival: Llegadas enteras, ordenadas por (toma, llegada)
+        hold: Tiempo entero de ocupacion por vehiculo
+        socket: Toma de cada vehiculo (no decreciente)
+        n_sockets: Numero de tomas
+    """
+    h_cum = np.concatenate([[0], np.cumsum(hold)])
+    first = np.searchsorted(socket, np.arange(n_sockets))
+    h_excl = h_cum[:-1] - np.repeat(h_cum[first], np.bincount(socket, minlength=n_sockets))
+    # Desplazamiento por toma para un solo maximo acumulado plano
+    big = 4 * (int(arrival.max(initial=0)) + int(h_cum[-1]) + 1)
+    key = arrival - h_excl + socket * big
+    return np.maximum.accumulate(key) - socket * big + h_excl
+
+
+def simulate_sockets_vectorized(
+    n_hours: int = 8760,
+    random_seed: int = 42,
+    exact_rng: bool = True,
+    vehicle_types: list[VehicleType] | None = None,
+) -> dict[str, np.ndarray]:
+    """Simulacion estocastica de todas las tomas con arreglos (sin objetos Vehicle).
+
+    Mismo modelo que SocketSimulator: llegadas Poisson por toma, cola FIFO,
+    carga horaria a CHARGING_EFFICIENCY hasta el SOC objetivo (maximo 9 h).
+    La cola se resuelve con aritmetica de indices: con k_i horas de carga por
+    vehiculo, el inicio de servicio es s_i = max(a_i, s_{i-1} + k_{i-1}), que
+    se calcula como maximo acumulado por toma.
+
+    Args:
+        n_hours: Horas a simular desde el 1 de enero 00:00
+        random_seed: Semilla del RandomState
+        exact_rng: True reproduce el flujo RNG de generate_socket_level_dataset_v3
+            (mismo dataset v3); False sortea todo en bloque (mas rapido, otro flujo)
+        vehicle_types: Tipo de vehiculo por toma (default: 30 motos + 8 mototaxis)
+
     Returns:
-        Tupla (df_annual_8760h, df_daily_24h)
+        Matrices (n_hours, n_tomas): soc_current, soc_arrival, soc_target,
+        active, charging_power_kw, vehicle_count y energy_kwh (energia cargada)
     """
-    output_dir = Path(output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
+    vtypes = vehicle_types if vehicle_types is not None else _socket_vehicle_types()
+    n_sockets = len(vtypes)
     rng = np.random.RandomState(random_seed)
+    op_by_hour = np.array([get_operational_factor(h) for h in range(24)])
+    op_factor = op_by_hour[np.arange(n_hours) % 24]
+
+    draw = _draw_arrivals_exact if exact_rng else _draw_arrivals_bulk
+    arrivals, order, soc_arr, soc_tgt = draw(rng, op_factor, vtypes)
+    arr_hour = np.repeat(np.tile(np.arange(n_hours), n_sockets), arrivals.T.ravel())
+    socket = np.repeat(np.arange(n_sockets), arrivals.sum(axis=0))
+    soc_arr = soc_arr[order]
+    soc_tgt = soc_tgt[order]
+    n_vehicles = len(arr_hour)
+
+    # Carga hora a hora de TODOS los vehiculos a la vez (misma aritmetica que Vehicle)
+    capacity = np.array([vt.capacity_kwh for vt in vtypes])[socket]
+    effective_power_kw = np.array([vt.power_kw for vt in vtypes])[socket] * CHARGING_EFFICIENCY
+    energy_cap = effective_power_kw * 1.0  # 1 hora
+    soc_path = np.zeros((MAX_CHARGE_HOURS + 1, n_vehicles))
+    energy_path = np.zeros((MAX_CHARGE_HOURS, n_vehicles))
+    soc_path[0] = soc_arr
+    charging = np.ones(n_vehicles, dtype=bool)
+    charge_hours = np.zeros(n_vehicles, dtype=np.int64)
+    for j in range(MAX_CHARGE_HOURS):
+        cur = soc_path[j]
+        e = np.minimum(energy_cap, (soc_tgt - cur) * capacity)
+        e = np.where(charging, e, 0.0)
+        nxt = np.where(charging, cur + e / capacity, cur)
+        energy_path[j] = e
+        charge_hours += charging
+        charging &= nxt < soc_tgt
+        soc_path[j + 1] = nxt
+    k = charge_hours  # Horas de carga hasta salir (alcanza objetivo o 9 h)
+
+    # Inicio de servicio FIFO por toma
+    start = _fifo_start(arr_hour, k, socket, n_sockets)
+    k_cum = np.concatenate([[0], np.cumsum(k)])
+
+    # Ocupacion: el vehiculo ocupa la toma en horas start .. start + k - 1
+    # (la hora start solo se registra al entrar; carga en start+1 .. start+k)
+    veh = np.repeat(np.arange(n_vehicles), k)
+    offsets = np.arange(len(veh)) - k_cum[:-1][veh]
+    hour = start[veh] + offsets
+    keep = hour < n_hours
+    veh, hour, offsets = veh[keep], hour[keep], offsets[keep]
+    col = socket[veh]
+
+    shape = (n_hours, n_sockets)
+    out = {
+        'soc_current': np.zeros(shape),
+        'soc_arrival': np.zeros(shape),
+        'soc_target': np.zeros(shape),
+        'active': np.zeros(shape, dtype=np.int64),
+        'charging_power_kw': np.zeros(shape),
+        'vehicle_count': np.cumsum(arrivals, axis=0),
+        'energy_kwh': np.zeros(shape),
+    }
+    out['soc_current'][hour, col] = soc_path[offsets, veh]
+    out['soc_arrival'][hour, col] = soc_arr[veh]
+    out['soc_target'][hour, col] = soc_tgt[veh]
+    out['active'][hour, col] = 1
+    out['charging_power_kw'][hour, col] = effective_power_kw[veh]
+    # Energia cargada en la hora h por el vehiculo que estaba en la toma (carga t = h - start)
+    e_hour = start + 1 + np.arange(MAX_CHARGE_HOURS)[:, None]
+    valid = (np.arange(MAX_CHARGE_HOURS)[:, None] < k) & (e_hour < n_hours)
+    jj, vv = np.nonzero(valid)
+    out['energy_kwh'][e_hour[jj, vv], socket[vv]] = energy_path[jj, vv]
+    return out
+
+
+def _build_socket_frame(
+    sim: Mapping[str, np.ndarray],
+    socket_types: list[VehicleType],
+    index: pd.DatetimeIndex,
+) -> pd.DataFrame:
+    """Arma el DataFrame v3 (10 columnas por toma + agregados, tarifas y CO2).
+
+    Compartido por generate_socket_level_dataset_v3 y el formato compacto
+    (socket_dataset.SocketDataset.to_dataframe), que reconstruye el mismo CSV.
+
+    Args:
+        sim: Matrices (n_horas, n_tomas) soc_current, soc_arrival, soc_target,
+            active, charging_power_kw y vehicle_count
+        socket_types: Tipo de vehiculo por toma
+        index: Indice horario del dataset
+    """
+    n_hours = len(index)
     
-    # Crear timestamps
-    start_date = datetime(2024, 1, 1)
-    timestamps = [start_date + timedelta(hours=i) for i in range(8760)]
-    
-    # Crear 38 simuladores (30 motos + 8 mototaxis)
-    simulators: dict[int, SocketSimulator] = {}
-    socket_to_vehicle = {}  # socket_id -> vehicle_type
-    
-    for socket_id in range(30):
-        # Tomas 0-29: motos
-        socket_to_vehicle[socket_id] = MOTO_SPEC
-        simulators[socket_id] = SocketSimulator(socket_id, MOTO_SPEC, rng)
-    
-    for socket_id in range(30, 38):
-        # Tomas 30-37: mototaxis
-        socket_to_vehicle[socket_id] = MOTOTAXI_SPEC
-        simulators[socket_id] = SocketSimulator(socket_id, MOTOTAXI_SPEC, rng)
-    
-    # Inicializar estructura de datos (datetime sera el indice, sin hour ni day_of_year)
-    data_annual: dict[str, list] = {}
-    
-    # Agregar columnas para cada toma (38 total)
+    # Columnas por toma (38 total)
     # POTENCIA CARGADOR vs CAPACIDAD BATERIA:
     # - charger_power_kw: Potencia nominal del cargador (7.4 kW, constante)
     # - battery_kwh: Capacidad de bateria del vehiculo (4.6 kWh moto, 7.4 kWh mototaxi)
     # - charging_power_kw: Potencia instantanea de carga (0 si no hay vehiculo)
-    for socket_id in range(38):
-        # Tipo de vehiculo para esta toma
-        vtype = socket_to_vehicle[socket_id]
-        
-        # Columnas constantes (se llenan una vez)
-        data_annual[f'socket_{socket_id:03d}_charger_power_kw'] = [7.4] * 8760  # Potencia nominal cargador
-        data_annual[f'socket_{socket_id:03d}_battery_kwh'] = [vtype.capacity_kwh] * 8760  # Capacidad bateria
-        data_annual[f'socket_{socket_id:03d}_vehicle_type'] = [vtype.name] * 8760  # Tipo vehiculo
-        
-        # Columnas dinamicas (se llenan en simulacion)
-        data_annual[f'socket_{socket_id:03d}_soc_current'] = []
-        data_annual[f'socket_{socket_id:03d}_soc_arrival'] = []
-        data_annual[f'socket_{socket_id:03d}_soc_target'] = []
-        data_annual[f'socket_{socket_id:03d}_active'] = []
-        data_annual[f'socket_{socket_id:03d}_charging_power_kw'] = []  # Potencia instantanea de carga
-        data_annual[f'socket_{socket_id:03d}_vehicle_count'] = []
-    
-    # Columnas agregadas para cantidad de vehículos por tipo (agregadas por hora)
-    data_annual['cantidad_motos_activas'] = []        # Número de motos siendo cargadas esta hora
-    data_annual['cantidad_mototaxis_activas'] = []    # Número de taxis siendo cargados esta hora
-    data_annual['cantidad_total_vehiculos_activos'] = []  # Total de vehículos cargándose
-    
-    # Columnas nuevas v5.2: Cantidad de vehículos CARGANDO (transferencia activa de energía)
-    # Basadas en: socket_XXX_charging_power_kw > 0 (diferente a cantidad_activas)
-    data_annual['cantidad_motos_cargando_actualmente'] = []        # Motos transferiendo energía (socket 0-29)
-    data_annual['cantidad_mototaxis_cargando_actualmente'] = []    # Taxis transferiendo energía (socket 30-37)
-    data_annual['cantidad_total_cargando_actualmente'] = []        # Total vehículos cargando
-    
-    # Simular 8,760 horas
-    logger.info("Iniciando simulacion estocastica v3.0 (8,760 horas)...")
-    for hour_idx, timestamp in enumerate(timestamps):
-        if (hour_idx + 1) % 730 == 0:  # Log cada mes
-            logger.info(f"  Simulated {hour_idx + 1}/8760 hours...")
-        
-        hour_of_day = timestamp.hour
-        operational_factor = get_operational_factor(hour_of_day)
-        
-        # Contadores de vehículos activos por tipo esta hora
-        motos_activas_esta_hora = 0
-        taxis_activos_esta_hora = 0
-        
-        # Contadores de vehículos CARGANDO (transferencia activa de energía) esta hora
-        motos_cargando_esta_hora = 0
-        taxis_cargando_esta_hora = 0
-        
-        # Simular cada toma (38 total)
-        for socket_id in range(38):
-            simulator = simulators[socket_id]
-            simulator.hourly_step(hour_of_day, operational_factor)
-            
-            # Registrar estado actual
-            if simulator.current_vehicle is not None:
-                vehicle = simulator.current_vehicle
-                data_annual[f'socket_{socket_id:03d}_soc_arrival'].append(vehicle.soc_arrival)
-                data_annual[f'socket_{socket_id:03d}_soc_target'].append(vehicle.soc_target)
-                data_annual[f'socket_{socket_id:03d}_soc_current'].append(vehicle.soc_current)
-                data_annual[f'socket_{socket_id:03d}_active'].append(1)
-                # Potencia instantanea de carga (efectiva, con eficiencia)
-                effective_power = vehicle.power_kw * CHARGING_EFFICIENCY if vehicle.charging else 0.0
-                data_annual[f'socket_{socket_id:03d}_charging_power_kw'].append(effective_power)
-                data_annual[f'socket_{socket_id:03d}_vehicle_count'].append(simulator.vehicle_count)
-                
-                # Contar vehículos activos por tipo
-                if socket_id < 30:  # Sockets 0-29 son motos
-                    motos_activas_esta_hora += 1
-                    # Contar si está cargando (transferencia activa)
-                    if effective_power > 0:
-                        motos_cargando_esta_hora += 1
-                else:  # Sockets 30-37 son mototaxis
-                    taxis_activos_esta_hora += 1
-                    # Contar si está cargando (transferencia activa)
-                    if effective_power > 0:
-                        taxis_cargando_esta_hora += 1
-            else:
-                data_annual[f'socket_{socket_id:03d}_soc_arrival'].append(0.0)
-                data_annual[f'socket_{socket_id:03d}_soc_target'].append(0.0)
-                data_annual[f'socket_{socket_id:03d}_soc_current'].append(0.0)
-                data_annual[f'socket_{socket_id:03d}_active'].append(0)
-                data_annual[f'socket_{socket_id:03d}_charging_power_kw'].append(0.0)
-                data_annual[f'socket_{socket_id:03d}_vehicle_count'].append(simulator.vehicle_count)
-        
-        # Agregar contadores de vehículos activos
-        data_annual['cantidad_motos_activas'].append(motos_activas_esta_hora)
-        data_annual['cantidad_mototaxis_activas'].append(taxis_activos_esta_hora)
-        data_annual['cantidad_total_vehiculos_activos'].append(motos_activas_esta_hora + taxis_activos_esta_hora)
-        
-        # Agregar contadores de vehículos CARGANDO (v5.2)
-        data_annual['cantidad_motos_cargando_actualmente'].append(motos_cargando_esta_hora)
-        data_annual['cantidad_mototaxis_cargando_actualmente'].append(taxis_cargando_esta_hora)
-        data_annual['cantidad_total_cargando_actualmente'].append(motos_cargando_esta_hora + taxis_cargando_esta_hora)
+    data_annual: dict[str, Any] = {}
+    is_moto = np.array([vt.name == MOTO_SPEC.name for vt in socket_types])
+    charging_cols = [f'socket_{i:03d}_charging_power_kw' for i in range(len(socket_types))]
+    for socket_id, vtype in enumerate(socket_types):
+        prefix = f'socket_{socket_id:03d}'
+        data_annual[f'{prefix}_charger_power_kw'] = np.full(n_hours, 7.4)  # Potencia nominal cargador
+        data_annual[f'{prefix}_battery_kwh'] = np.full(n_hours, vtype.capacity_kwh)  # Capacidad bateria
+        data_annual[f'{prefix}_vehicle_type'] = np.full(n_hours, vtype.name, dtype=object)  # Tipo vehiculo
+        data_annual[f'{prefix}_soc_current'] = sim['soc_current'][:, socket_id]
+        data_annual[f'{prefix}_soc_arrival'] = sim['soc_arrival'][:, socket_id]
+        data_annual[f'{prefix}_soc_target'] = sim['soc_target'][:, socket_id]
+        data_annual[f'{prefix}_active'] = sim['active'][:, socket_id]
+        data_annual[f'{prefix}_charging_power_kw'] = sim['charging_power_kw'][:, socket_id]  # Potencia instantanea
+        data_annual[f'{prefix}_vehicle_count'] = sim['vehicle_count'][:, socket_id]
+    
+    # Cantidad de vehículos por tipo (agregadas por hora)
+    motos_activas = sim['active'][:, is_moto].sum(axis=1)
+    taxis_activos = sim['active'][:, ~is_moto].sum(axis=1)
+    data_annual['cantidad_motos_activas'] = motos_activas
+    data_annual['cantidad_mototaxis_activas'] = taxis_activos
+    data_annual['cantidad_total_vehiculos_activos'] = motos_activas + taxis_activos
+    
+    # Columnas v5.2: Cantidad de vehículos CARGANDO (charging_power_kw > 0, distinto a activas)
+    cargando = sim['charging_power_kw'] > 0
+    motos_cargando = cargando[:, is_moto].sum(axis=1)
+    taxis_cargando = cargando[:, ~is_moto].sum(axis=1)
+    data_annual['cantidad_motos_cargando_actualmente'] = motos_cargando
+    data_annual['cantidad_mototaxis_cargando_actualmente'] = taxis_cargando
+    data_annual['cantidad_total_cargando_actualmente'] = motos_cargando + taxis_cargando
     
     # Crear DataFrame anual con datetime como indice
-    df_annual = pd.DataFrame(data_annual, index=pd.DatetimeIndex(timestamps, name='datetime'))
+    df_annual = pd.DataFrame(data_annual, index=index)
     
     # ================================================================
     # AGREGAR COLUMNAS DE COSTOS OSINERGMIN Y REDUCCION CO2
@@ -899,7 +1028,6 @@ def generate_socket_level_dataset_v3(
     )
     
     # Calcular energia total cargada por hora (suma de todos los sockets)
-    charging_cols = [col for col in df_annual.columns if '_charging_power_kw' in col]
     df_annual["ev_energia_total_kwh"] = df_annual[charging_cols].sum(axis=1)
     
     # Costo de carga EV por hora (S/.) = energia × tarifa aplicable
@@ -923,8 +1051,8 @@ def generate_socket_level_dataset_v3(
     # ================================================================
     
     # Energia por tipo de vehiculo (motos: sockets 0-29, mototaxis: 30-37)
-    moto_cols = [col for col in df_annual.columns if '_charging_power_kw' in col and int(col.split('_')[1]) < 30]
-    taxi_cols = [col for col in df_annual.columns if '_charging_power_kw' in col and int(col.split('_')[1]) >= 30]
+    moto_cols = [col for col, m in zip(charging_cols, is_moto) if m]
+    taxi_cols = [col for col, m in zip(charging_cols, is_moto) if not m]
     
     df_annual["ev_energia_motos_kwh"] = df_annual[moto_cols].sum(axis=1)
     df_annual["ev_energia_mototaxis_kwh"] = df_annual[taxi_cols].sum(axis=1)
@@ -965,6 +1093,58 @@ def generate_socket_level_dataset_v3(
     # Columnas alias para compatibilidad con CityLearn
     df_annual["ev_demand_kwh"] = df_annual["ev_energia_total_kwh"]  # Alias para CityLearn
     
+    return df_annual
+
+
+def generate_socket_level_dataset_v3(
+    output_dir: str | Path = "data/oe2/chargers",
+    random_seed: int = 42,
+    exact_rng: bool = True,
+    save_csv: bool = True,
+    save_compact: bool = True,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Genera dataset estocastico realista v3.0 con simulacion por socket.
+    
+    Crea simuladores independientes por toma con:
+    - Llegadas estocasticas (Poisson) segun tipos de vehiculo
+    - SOC dinamico durante carga
+    - Colas FIFO independientes
+    - Factor operativo horario (9-22h para mall)
+    - Reproducibilidad con random_seed
+    
+    Retorna:
+    - DataFrame anual (8,760 × 643 columnas)
+    - DataFrame diario de ejemplo (24 × 643 columnas)
+    
+    La simulacion usa simulate_sockets_vectorized (matrices 8,760 x 38); con
+    exact_rng=True el dataset es identico al del simulador por objetos v3.0.
+    
+    Args:
+        output_dir: Directorio para guardar CSVs
+        random_seed: Semilla para reproducibilidad
+        exact_rng: Reproducir el flujo RNG v3.0 (False: sorteo en bloque, mas rapido)
+        save_csv: Guardar los CSVs (False para barridos en memoria)
+        save_compact: Guardar tambien el formato compacto (.npz + .json,
+            ver socket_dataset.py) junto al CSV anual
+        
+    Returns:
+        Tupla (df_annual_8760h, df_daily_24h)
+    """
+    output_dir = Path(output_dir)
+    if save_csv:
+        output_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Crear timestamps
+    start_date = datetime(2024, 1, 1)
+    timestamps = [start_date + timedelta(hours=i) for i in range(8760)]
+    
+    # Simular 8,760 horas x 38 tomas con arreglos (30 motos + 8 mototaxis)
+    logger.info("Iniciando simulacion estocastica v3.0 (8,760 horas)...")
+    sim = simulate_sockets_vectorized(
+        n_hours=len(timestamps), random_seed=random_seed, exact_rng=exact_rng
+    )
+    df_annual = _build_socket_frame(sim, _socket_vehicle_types(), pd.DatetimeIndex(timestamps, name='datetime'))
+    
     logger.info("[OK] Columnas OSINERGMIN y CO2 agregadas al dataset")
     
     # Guardar CSV anual (datetime como indice)
@@ -979,27 +1159,38 @@ def generate_socket_level_dataset_v3(
     #   - 1 alias CityLearn
     #
     #   Ver: DATASET_STRUCTURE_CHARGERS.md para detalles completos
-    output_path_annual = output_dir / 'chargers_ev_ano_2024_v3.csv'
-    df_annual.to_csv(output_path_annual, index=True)
-    logger.info(f"[OK] Annual dataset saved: {output_path_annual}")
-    logger.info(f"  Shape: {df_annual.shape} (8,760 rows × {len(df_annual.columns)} columns)")
-    logger.info(f"  ⚠️  Post-processing: Run clean_datasets.py to reduce to 240 columns")
-    
     # Crear DataFrame diario de ejemplo (dia 1) - mantener datetime como indice
     df_daily = df_annual.iloc[0:24, :].copy()
-    output_path_daily = output_dir / 'chargers_ev_dia_2024_v3.csv'
-    df_daily.to_csv(output_path_daily, index=True)
-    logger.info(f"[OK] Daily dataset saved: {output_path_daily}")
-    logger.info(f"  Shape: {df_daily.shape} (24 rows × {len(df_daily.columns)} columns)")
+    if save_csv:
+        output_path_annual = output_dir / 'chargers_ev_ano_2024_v3.csv'
+        df_annual.to_csv(output_path_annual, index=True)
+        logger.info(f"[OK] Annual dataset saved: {output_path_annual}")
+        logger.info(f"  Shape: {df_annual.shape} (8,760 rows × {len(df_annual.columns)} columns)")
+        logger.info(f"  ⚠️  Post-processing: Run clean_datasets.py to reduce to 240 columns")
+        
+        output_path_daily = output_dir / 'chargers_ev_dia_2024_v3.csv'
+        df_daily.to_csv(output_path_daily, index=True)
+        logger.info(f"[OK] Daily dataset saved: {output_path_daily}")
+        logger.info(f"  Shape: {df_daily.shape} (24 rows × {len(df_daily.columns)} columns)")
+        
+        if save_compact:
+            # Import diferido: socket_dataset importa este modulo
+            try:
+                from .socket_dataset import SocketDataset
+            except ImportError:  # Ejecucion directa de chargers.py
+                import sys
+                sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+                from src.dimensionamiento.oe2.disenocargadoresev.socket_dataset import SocketDataset
+            compact = SocketDataset.from_simulation(sim, start=timestamps[0], random_seed=random_seed)
+            compact_path = compact.save(output_path_annual.with_suffix('.npz'), source_csv=output_path_annual)
+            logger.info(f"[OK] Compact dataset saved: {compact_path}")
     
     # Calcular estadisticas basicas
     total_sockets = 38
-    energy_col_names = [col for col in df_annual.columns if '_charging_power_kw' in col]
-    total_energy_kwh = sum(df_annual[col].sum() for col in energy_col_names)
+    total_energy_kwh = float(df_annual["ev_energia_total_kwh"].sum())
     
     # Ocupancia promedio
-    active_col_names = [col for col in df_annual.columns if '_active' in col]
-    total_active_hours = sum((df_annual[col] == 1).sum() for col in active_col_names)
+    total_active_hours = int((sim['active'] == 1).sum())
     occupancy_rate = total_active_hours / (total_sockets * 8760)
     avg_sockets_active = total_active_hours / 8760
     
@@ -1069,19 +1260,27 @@ CARGAS_HORA_TAXI = 0.67        # 90 min = 0.67 cargas/hora/toma
 TOMAS_POR_CARGADOR = 2         # 2 tomas por cargador
 
 
-def calcular_dimensionamiento(pe: float, fc: float) -> dict[str, float]:
+def calcular_dimensionamiento(pe: Any, fc: Any) -> dict[str, Any]:
     """Calcula el dimensionamiento de cargadores para un escenario dado.
     
+    Acepta escalares o arreglos NumPy (se combinan por broadcasting): con
+    escalares devuelve valores escalares; con arreglos devuelve una columna
+    (arreglo) por metrica, con el redondeo hacia arriba vectorizado.
+    
     Args:
-        pe: Penetracion EV (0.0-1.0)
-        fc: Factor de carga diaria (0.0-1.0)
+        pe: Penetracion EV (0.0-1.0), escalar o arreglo
+        fc: Factor de carga diaria (0.0-1.0), escalar o arreglo
         
     Returns:
         Diccionario con metricas de dimensionamiento
     """
+    scalar = np.ndim(pe) == 0 and np.ndim(fc) == 0
+    pe_arr = np.asarray(pe, dtype=np.float64)
+    fc_arr = np.asarray(fc, dtype=np.float64)
+    
     # PASO 1: Vehiculos que cargan (pe×fc aplicado UNA VEZ)
-    motos_dia = BASE_MOTOS * pe * fc
-    taxis_dia = BASE_MOTOTAXIS * pe * fc
+    motos_dia = BASE_MOTOS * pe_arr * fc_arr
+    taxis_dia = BASE_MOTOTAXIS * pe_arr * fc_arr
     
     # PASO 2: Distribucion punta/fuera punta
     motos_punta = motos_dia * PUNTA_RATIO
@@ -1090,11 +1289,12 @@ def calcular_dimensionamiento(pe: float, fc: float) -> dict[str, float]:
     taxis_hora = taxis_punta / HORAS_PUNTA
     
     # PASO 3: Dimensionar cargadores (playas separadas)
-    tomas_motos = int(np.ceil(motos_hora / CARGAS_HORA_MOTO))
-    tomas_taxis = int(np.ceil(taxis_hora / CARGAS_HORA_TAXI))
+    tomas_motos = np.ceil(motos_hora / CARGAS_HORA_MOTO).astype(np.int64)
+    tomas_taxis = np.ceil(taxis_hora / CARGAS_HORA_TAXI).astype(np.int64)
     
-    cargadores_motos = int(np.ceil(tomas_motos / TOMAS_POR_CARGADOR))
-    cargadores_taxis = int(np.ceil(tomas_taxis / TOMAS_POR_CARGADOR))
+    # ceil(tomas / 2) en aritmetica entera
+    cargadores_motos = -(-tomas_motos // TOMAS_POR_CARGADOR)
+    cargadores_taxis = -(-tomas_taxis // TOMAS_POR_CARGADOR)
     
     # Tomas reales (cargadores × 2)
     tomas_motos_real = cargadores_motos * TOMAS_POR_CARGADOR
@@ -1109,9 +1309,9 @@ def calcular_dimensionamiento(pe: float, fc: float) -> dict[str, float]:
     energia_dia = motos_dia * BATTERY_MOTO + taxis_dia * BATTERY_MOTOTAXI
     potencia_pico = tomas_total * POWER_CHARGER
     
-    return {
-        'pe': pe,
-        'fc': fc,
+    result = {
+        'pe': pe if scalar else np.broadcast_to(pe_arr, motos_dia.shape),
+        'fc': fc if scalar else np.broadcast_to(fc_arr, motos_dia.shape),
         'cargadores': cargadores_total,
         'cargadores_motos': cargadores_motos,
         'cargadores_taxis': cargadores_taxis,
@@ -1125,6 +1325,9 @@ def calcular_dimensionamiento(pe: float, fc: float) -> dict[str, float]:
         'motos_dia': motos_dia,
         'taxis_dia': taxis_dia
     }
+    if scalar:
+        return {k: (v if k in ('pe', 'fc') else v.item()) for k, v in result.items()}
+    return result
 
 
 def generate_scenario_table() -> pd.DataFrame:
@@ -1146,19 +1349,17 @@ def generate_scenario_table() -> pd.DataFrame:
         ('MAXIMO', 0.40, 0.65),
     ]
     
-    rows = []
-    for nombre, pe, fc in escenarios:
-        result = calcular_dimensionamiento(pe, fc)
-        rows.append({
-            'Escenario': nombre,
-            'Penetracion (pe)': pe,
-            'Factor Carga (fc)': fc,
-            'Cargadores (2 tomas)': int(result['cargadores']),
-            'Total Tomas': int(result['tomas']),
-            'Energia Dia (kWh)': round(result['energia_dia'], 1)
-        })
+    nombres, pe, fc = zip(*escenarios)
+    result = calcular_dimensionamiento(np.array(pe), np.array(fc))
     
-    return pd.DataFrame(rows)
+    return pd.DataFrame({
+        'Escenario': list(nombres),
+        'Penetracion (pe)': list(pe),
+        'Factor Carga (fc)': list(fc),
+        'Cargadores (2 tomas)': result['cargadores'],
+        'Total Tomas': result['tomas'],
+        'Energia Dia (kWh)': np.round(result['energia_dia'], 1)
+    })
 
 
 def generate_parametric_table(n_scenarios: int = 101, random_seed: int = 42) -> pd.DataFrame:
@@ -1179,22 +1380,11 @@ def generate_parametric_table(n_scenarios: int = 101, random_seed: int = 42) ->
     pe_samples = np.random.uniform(0.20, 0.40, n_scenarios)
     fc_samples = np.random.uniform(0.45, 0.65, n_scenarios)
     
-    results = []
-    for pe, fc in zip(pe_samples, fc_samples):
-        result = calcular_dimensionamiento(pe, fc)
-        results.append([
-            result['cargadores'],
-            result['tomas'],
-            result['sesiones_pico'],
-            result['cargas_dia'],
-            result['energia_dia'],
-            result['potencia_pico']
-        ])
-    
-    df = pd.DataFrame(results, columns=[
+    result = calcular_dimensionamiento(pe_samples, fc_samples)
+    df = pd.DataFrame({col: result[col] for col in [
         'cargadores', 'tomas', 'sesiones_pico', 
         'cargas_dia', 'energia_dia', 'potencia_pico'
-    ])
+    ]})
     
     # Calcular estadisticas
     metrics = [
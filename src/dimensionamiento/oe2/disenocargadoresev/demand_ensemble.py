@@ -0,0 +1,258 @@
+"""Ensamble multi-semilla de demanda EV por toma (K realizaciones x 8,760 h x 38 tomas).
+
+Genera K anos de demanda con simulate_sockets_vectorized (una semilla por
+realizacion) en procesos paralelos. Cada proceso escribe su bloque
+directamente en un arreglo ``.npy`` mapeado en memoria, asi que no se
+devuelven matrices entre procesos. Junto al arreglo se guarda un indice JSON
+pequeno con semillas, parametros de simulacion y energia anual por
+realizacion.
+
+Los entornos de entrenamiento abren el ensamble con ``DemandEnsemble.open``
+(mmap de solo lectura) y muestrean una realizacion distinta por episodio sin
+leer CSVs ni volver a simular.
+
+Uso:
+    python -m src.dimensionamiento.oe2.disenocargadoresev.demand_ensemble --k 32 --workers 8
+
+    from src.dimensionamiento.oe2.disenocargadoresev.demand_ensemble import DemandEnsemble
+    ens = DemandEnsemble.open()
+    k, demand_kw = ens.sample(rng)      # demand_kw: (8760, 38) float32 (vista mmap)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+try:
+    from .chargers import (
+        CHARGING_EFFICIENCY, FACTOR_CO2_NETO_MOTO_KG_KWH, FACTOR_CO2_NETO_MOTOTAXI_KG_KWH, MOTO_SPEC,
+        _socket_vehicle_types, simulate_sockets_vectorized,
+    )
+except ImportError:  # Ejecucion directa: python .../disenocargadoresev/demand_ensemble.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+    from src.dimensionamiento.oe2.disenocargadoresev.chargers import (  # type: ignore[no-redef]
+        CHARGING_EFFICIENCY, FACTOR_CO2_NETO_MOTO_KG_KWH, FACTOR_CO2_NETO_MOTOTAXI_KG_KWH, MOTO_SPEC,
+        _socket_vehicle_types, simulate_sockets_vectorized,
+    )
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENSEMBLE_DIR = Path("data/oe2/chargers/ensemble")
+ARRAY_NAME = "demand_ensemble.npy"
+INDEX_NAME = "demand_ensemble.json"
+ENSEMBLE_FIELDS = ("charging_power_kw", "energy_kwh", "active", "soc_current")
+ENERGY_FIELDS = ("charging_power_kw", "energy_kwh")  # Pasos de 1 h: kW medios == kWh
+
+
+def direct_co2_kg(demand_kwh: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """CO2 directo evitado por hora (motos, mototaxis) a partir de la demanda por toma.
+
+    Mismo calculo que chargers_ev_ano_2024_v3.csv: energia por tipo de vehiculo
+    x factor neto (0.87 kg/kWh motos, 0.47 kg/kWh mototaxis).
+
+    Args:
+        demand_kwh: (n_hours, 38) energia cargada por toma y hora
+
+    Returns:
+        (co2_reduccion_motos_kg, co2_reduccion_mototaxis_kg), cada uno (n_hours,)
+    """
+    vtypes = _socket_vehicle_types()
+    if demand_kwh.shape[-1] != len(vtypes):
+        raise ValueError(f"Se esperaban {len(vtypes)} tomas, recibido {demand_kwh.shape[-1]}")
+    is_moto = np.array([vt.name == MOTO_SPEC.name for vt in vtypes])
+    motos = demand_kwh[:, is_moto].sum(axis=1, dtype=np.float64) * FACTOR_CO2_NETO_MOTO_KG_KWH
+    taxis = demand_kwh[:, ~is_moto].sum(axis=1, dtype=np.float64) * FACTOR_CO2_NETO_MOTOTAXI_KG_KWH
+    return motos, taxis
+
+
+def _simulate_into(
+    array_path: str, k: int, seed: int, n_hours: int, exact_rng: bool, field: str
+) -> tuple[int, int, float]:
+    """Worker: simula una semilla y escribe la realizacion k en el mmap compartido."""
+    sim = simulate_sockets_vectorized(n_hours=n_hours, random_seed=seed, exact_rng=exact_rng)
+    data = np.load(array_path, mmap_mode="r+")
+    data[k] = sim[field]
+    data.flush()
+    del data
+    return k, seed, float(sim["energy_kwh"].sum())
+
+
+def generate_demand_ensemble(
+    n_realizations: int = 32,
+    output_dir: str | Path = DEFAULT_ENSEMBLE_DIR,
+    base_seed: int = 42,
+    seeds: Sequence[int] | None = None,
+    n_hours: int = 8760,
+    exact_rng: bool = True,
+    field: str = "charging_power_kw",
+    max_workers: int | None = None,
+) -> Path:
+    """Genera el ensamble (K, n_hours, 38) float32 en disco.
+
+    Args:
+        n_realizations: K realizaciones (ignorado si se pasan ``seeds``)
+        output_dir: Directorio de salida (arreglo .npy + indice .json)
+        base_seed: Semillas base_seed, base_seed+1, ... (k=0 con base 42 y
+            exact_rng=True reproduce chargers_ev_ano_2024_v3.csv)
+        seeds: Semillas explicitas
+        n_hours: Horas por realizacion
+        exact_rng: Flujo RNG v3.0 (True) o sorteo en bloque (False, mas rapido)
+        field: Matriz de simulate_sockets_vectorized a guardar
+        max_workers: Procesos (default: min(K, CPUs)); 1 = proceso actual
+
+    Returns:
+        Ruta del indice JSON
+    """
+    if field not in ENSEMBLE_FIELDS:
+        raise ValueError(f"Campo no soportado: {field!r} (opciones: {', '.join(ENSEMBLE_FIELDS)})")
+    seed_list = [int(s) for s in seeds] if seeds is not None else [base_seed + k for k in range(n_realizations)]
+    if not seed_list:
+        raise ValueError("Se requiere al menos una realizacion")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    array_path = output_dir / ARRAY_NAME
+    index_path = output_dir / INDEX_NAME
+    vtypes = _socket_vehicle_types()
+    shape = (len(seed_list), n_hours, len(vtypes))
+
+    data = np.lib.format.open_memmap(array_path, mode="w+", dtype=np.float32, shape=shape)
+    del data  # Los workers escriben sobre el archivo ya dimensionado
+
+    workers = max_workers or min(len(seed_list), os.cpu_count() or 1)
+    args = [(str(array_path), k, seed, n_hours, exact_rng, field) for k, seed in enumerate(seed_list)]
+    t0 = time.perf_counter()
+    if workers <= 1:
+        results = [_simulate_into(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_into, *zip(*args)))
+    elapsed = time.perf_counter() - t0
+
+    energy = [0.0] * len(seed_list)
+    for k, _, e in results:
+        energy[k] = e
+    index: dict[str, Any] = {
+        "array": ARRAY_NAME,
+        "shape": list(shape),
+        "dtype": "float32",
+        "field": field,
+        "seeds": seed_list,
+        "n_hours": n_hours,
+        "exact_rng": exact_rng,
+        "charging_efficiency": CHARGING_EFFICIENCY,
+        "vehicle_types": [asdict(vt) for vt in dict.fromkeys(vtypes)],
+        "sockets_per_type": {vt.name: sum(v is vt for v in vtypes) for vt in dict.fromkeys(vtypes)},
+        "annual_energy_kwh": energy,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+
+    logger.info(
+        "[OK] Ensamble de demanda: %d realizaciones %s en %.1f s (%d procesos) -> %s",
+        len(seed_list), shape, elapsed, workers, array_path,
+    )
+    return index_path
+
+
+class DemandEnsemble:
+    """Ensamble de demanda mapeado en memoria (solo lectura).
+
+    Cada realizacion es una vista (n_hours, n_tomas) sobre el archivo; solo
+    se leen del disco las paginas que el entorno realmente usa.
+    """
+
+    def __init__(self, data: np.ndarray, index: dict[str, Any]):
+        if data.ndim != 3:
+            raise ValueError(f"Se esperaba un arreglo (K, horas, tomas), recibido {data.shape}")
+        self.data = data
+        self.index = index
+
+    @classmethod
+    def open(cls, directory: str | Path = DEFAULT_ENSEMBLE_DIR) -> "DemandEnsemble":
+        """Abre el ensamble desde su directorio (o la ruta del indice JSON)."""
+        directory = Path(directory)
+        index_path = directory if directory.suffix == ".json" else directory / INDEX_NAME
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        data = np.load(index_path.parent / index["array"], mmap_mode="r")
+        if list(data.shape) != list(index["shape"]):
+            raise ValueError(f"Indice {index['shape']} no coincide con el arreglo {list(data.shape)}")
+        return cls(data, index)
+
+    def __len__(self) -> int:
+        return int(self.data.shape[0])
+
+    def __getitem__(self, k: int) -> np.ndarray:
+        return self.data[k]
+
+    @property
+    def seeds(self) -> list[int]:
+        return list(self.index["seeds"])
+
+    @property
+    def n_hours(self) -> int:
+        return int(self.data.shape[1])
+
+    @property
+    def n_sockets(self) -> int:
+        return int(self.data.shape[2])
+
+    def sample(self, rng: np.random.Generator | np.random.RandomState | None = None) -> tuple[int, np.ndarray]:
+        """Elige una realizacion al azar: (indice k, demanda (n_hours, n_tomas))."""
+        rng = rng if rng is not None else np.random.default_rng()
+        if isinstance(rng, np.random.Generator):
+            k = int(rng.integers(len(self)))
+        else:
+            k = int(rng.randint(len(self)))
+        return k, self.data[k]
+
+    def direct_co2_kg(self, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """CO2 directo por hora (motos, mototaxis) de la realizacion k (ver ``direct_co2_kg``)."""
+        field = self.index.get("field", "charging_power_kw")
+        if field not in ENERGY_FIELDS:
+            raise ValueError(f"El ensamble guarda {field!r}, no energia: no se puede derivar el CO2 directo")
+        return direct_co2_kg(self.data[k])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ensamble multi-semilla de demanda EV por toma")
+    parser.add_argument("--k", type=int, default=32, help="Numero de realizaciones")
+    parser.add_argument("--base-seed", type=int, default=42, help="Semilla de la realizacion 0")
+    parser.add_argument("--out", default=str(DEFAULT_ENSEMBLE_DIR), help="Directorio de salida")
+    parser.add_argument("--field", default="charging_power_kw", choices=ENSEMBLE_FIELDS,
+                        help="Matriz por toma a guardar")
+    parser.add_argument("--bulk-rng", action="store_true",
+                        help="Sorteo en bloque (mas rapido, no reproduce el flujo RNG v3.0)")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos paralelos")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    index_path = generate_demand_ensemble(
+        n_realizations=args.k,
+        output_dir=args.out,
+        base_seed=args.base_seed,
+        exact_rng=not args.bulk_rng,
+        field=args.field,
+        max_workers=args.workers,
+    )
+    ens = DemandEnsemble.open(index_path.parent)
+    energy = np.array(ens.index["annual_energy_kwh"])
+    print(f"[OK] {len(ens)} realizaciones {tuple(ens.data.shape)} -> {index_path}")
+    print(f"  Energia anual: media {energy.mean():,.0f} kWh | min {energy.min():,.0f} | max {energy.max():,.0f}")
+
+
+if __name__ == "__main__":
+    main()
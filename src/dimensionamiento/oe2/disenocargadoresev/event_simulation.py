@@ -0,0 +1,338 @@
+"""Simulacion por eventos discretos de las 38 tomas con resolucion de minutos.
+
+``SocketSimulator.hourly_step`` y ``Vehicle.charge_for_hour`` trabajan en
+horas enteras: una moto que necesita 60 min y un mototaxi que necesita 96 min
+ocupan horas completas y la cola se resuelve al paso horario. Aqui cada
+vehiculo es una sesion con cuatro eventos en minutos:
+
+    LLEGADA -> INICIO (toma libre, FIFO) -> FIN DE CARGA -> SALIDA (+ permanencia)
+
+- Llegadas: mismo sorteo Poisson por (hora, toma) y SOC que la simulacion v3
+  (``exact_rng=True`` usa las mismas sesiones que chargers_ev_ano_2024_v3),
+  con minuto de llegada uniforme dentro de la hora
+- Duracion de carga: energia / (potencia x CHARGING_EFFICIENCY), en minutos
+  enteros (redondeo hacia arriba), tope MAX_CHARGE_HOURS
+- Costo O(eventos): el motor ``heap`` procesa una cola de prioridad de
+  eventos; el motor ``vectorized`` (default) resuelve las mismas colas FIFO
+  con _fifo_start y da sesiones identicas
+
+Las sesiones se agregan a cualquier resolucion (15 min para cruzar con el
+mall, 60 min para CityLearn) integrando la potencia sobre cada intervalo.
+
+Uso:
+    from src.dimensionamiento.oe2.disenocargadoresev.event_simulation import simulate_events
+    res = simulate_events(step_minutes=15)
+    res['power_kw']        # (35040, 38) potencia media por intervalo
+    res['sessions']        # arreglos por sesion (llegada, inicio, fin, salida, energia...)
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .chargers import (
+        CHARGING_EFFICIENCY, MAX_CHARGE_HOURS, VehicleType,
+        _draw_arrivals_bulk, _draw_arrivals_exact, _fifo_start, _socket_vehicle_types,
+        get_operational_factor,
+    )
+except ImportError:  # Ejecucion directa: python .../disenocargadoresev/event_simulation.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+    from src.dimensionamiento.oe2.disenocargadoresev.chargers import (  # type: ignore[no-redef]
+        CHARGING_EFFICIENCY, MAX_CHARGE_HOURS, VehicleType,
+        _draw_arrivals_bulk, _draw_arrivals_exact, _fifo_start, _socket_vehicle_types,
+        get_operational_factor,
+    )
+
+MINUTES_PER_HOUR = 60
+ENGINES = ('vectorized', 'heap')
+
+# Tipos de evento (el orden resuelve empates en el mismo minuto: primero se libera la toma)
+EV_DEPARTURE, EV_FINISH, EV_START, EV_ARRIVAL = 0, 1, 2, 3
+
+
+def draw_sessions(
+    n_hours: int = 8760,
+    random_seed: int = 42,
+    exact_rng: bool = True,
+    vehicle_types: list[VehicleType] | None = None,
+    max_charge_minutes: int = MAX_CHARGE_HOURS * MINUTES_PER_HOUR,
+) -> dict[str, np.ndarray]:
+    """Sortea las sesiones (llegada en minutos, SOC, energia y duracion de carga).
+
+    Returns:
+        Arreglos por sesion ordenados por (toma, llegada): socket, arrival_min,
+        soc_arrival, soc_target, energy_kwh, charge_min (duracion exacta, float)
+        y duration_min (minutos enteros que ocupa la carga)
+    """
+    vtypes = vehicle_types if vehicle_types is not None else _socket_vehicle_types()
+    n_sockets = len(vtypes)
+    rng = np.random.RandomState(random_seed)
+    op_by_hour = np.array([get_operational_factor(h) for h in range(24)])
+    op_factor = op_by_hour[np.arange(n_hours) % 24]
+
+    draw = _draw_arrivals_exact if exact_rng else _draw_arrivals_bulk
+    arrivals, order, soc_arr, soc_tgt = draw(rng, op_factor, vtypes)
+    arr_hour = np.repeat(np.tile(np.arange(n_hours), n_sockets), arrivals.T.ravel())
+    socket = np.repeat(np.arange(n_sockets), arrivals.sum(axis=0))
+    soc_arr = soc_arr[order]
+    soc_tgt = soc_tgt[order]
+
+    # Minuto de llegada dentro de la hora (despues de los sorteos v3: no altera las sesiones)
+    arrival_min = arr_hour * MINUTES_PER_HOUR + rng.randint(0, MINUTES_PER_HOUR, size=len(arr_hour))
+    fifo = np.lexsort((arrival_min, socket))
+    socket, arrival_min, soc_arr, soc_tgt = socket[fifo], arrival_min[fifo], soc_arr[fifo], soc_tgt[fifo]
+
+    capacity = np.array([vt.capacity_kwh for vt in vtypes])[socket]
+    power_kw = np.array([vt.power_kw for vt in vtypes])[socket]
+    return {
+        'socket': socket.astype(np.int64),
+        'arrival_min': arrival_min.astype(np.int64),
+        'soc_arrival': soc_arr,
+        'soc_target': soc_tgt,
+        **charge_durations(soc_arr, soc_tgt, capacity, power_kw, max_charge_minutes),
+    }
+
+
+def charge_durations(
+    soc_arrival: np.ndarray,
+    soc_target: np.ndarray,
+    capacity_kwh: np.ndarray,
+    power_kw: np.ndarray,
+    max_charge_minutes: int = MAX_CHARGE_HOURS * MINUTES_PER_HOUR,
+) -> dict[str, np.ndarray]:
+    """Potencia efectiva, energia y duracion de carga por sesion (minutos).
+
+    Returns:
+        power_kw (efectiva), energy_kwh, charge_min (exacta, float) y
+        duration_min (minutos enteros que ocupa la carga)
+    """
+    effective_power_kw = power_kw * CHARGING_EFFICIENCY
+    energy_needed = np.maximum(soc_target - soc_arrival, 0.0) * capacity_kwh
+    charge_min = np.minimum(energy_needed / effective_power_kw * MINUTES_PER_HOUR, max_charge_minutes)
+    return {
+        'power_kw': effective_power_kw,
+        'energy_kwh': effective_power_kw * charge_min / MINUTES_PER_HOUR,
+        'charge_min': charge_min,
+        'duration_min': np.ceil(charge_min - 1e-9).astype(np.int64),
+    }
+
+
+def _schedule_heap(
+    socket: np.ndarray, arrival: np.ndarray, duration: np.ndarray, dwell: int, n_sockets: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Motor de eventos con cola de prioridad (referencia, O(eventos x log eventos))."""
+    n = len(socket)
+    start = np.empty(n, dtype=np.int64)
+    finish = np.empty(n, dtype=np.int64)
+    depart = np.empty(n, dtype=np.int64)
+    socket_l, duration_l = socket.tolist(), duration.tolist()
+    events = [(t, EV_ARRIVAL, i) for i, t in enumerate(arrival.tolist())]
+    heapq.heapify(events)
+    busy = [False] * n_sockets
+    queues: list[deque[int]] = [deque() for _ in range(n_sockets)]
+    push, pop = heapq.heappush, heapq.heappop
+    while events:
+        t, kind, i = pop(events)
+        s = socket_l[i]
+        if kind == EV_ARRIVAL:
+            if busy[s]:
+                queues[s].append(i)
+            else:
+                busy[s] = True
+                push(events, (t, EV_START, i))
+        elif kind == EV_START:
+            start[i] = t
+            push(events, (t + duration_l[i], EV_FINISH, i))
+        elif kind == EV_FINISH:
+            finish[i] = t
+            push(events, (t + dwell, EV_DEPARTURE, i))
+        else:  # EV_DEPARTURE
+            depart[i] = t
+            if queues[s]:
+                push(events, (t, EV_START, queues[s].popleft()))
+            else:
+                busy[s] = False
+    return start, finish, depart
+
+
+def _schedule_vectorized(
+    socket: np.ndarray, arrival: np.ndarray, duration: np.ndarray, dwell: int, n_sockets: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Mismas colas FIFO resueltas con maximo acumulado por toma (O(eventos))."""
+    hold = duration + dwell
+    start = _fifo_start(arrival, hold, socket, n_sockets)
+    return start, start + duration, start + hold
+
+
+def schedule_sessions(
+    sessions: dict[str, np.ndarray],
+    n_sockets: int,
+    dwell_minutes: int = 0,
+    engine: str = 'vectorized',
+) -> dict[str, np.ndarray]:
+    """Asigna inicio, fin de carga y salida a cada sesion (cola FIFO por toma).
+
+    Args:
+        sessions: Salida de draw_sessions
+        n_sockets: Numero de tomas
+        dwell_minutes: Minutos que el vehiculo sigue enchufado tras completar la carga
+        engine: 'vectorized' (default) o 'heap' (cola de prioridad de eventos)
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor desconocido: {engine!r} (opciones: {', '.join(ENGINES)})")
+    schedule = _schedule_heap if engine == 'heap' else _schedule_vectorized
+    start, finish, depart = schedule(
+        sessions['socket'], sessions['arrival_min'], sessions['duration_min'], int(dwell_minutes), n_sockets
+    )
+    out = dict(sessions)
+    out['start_min'] = start
+    out['finish_min'] = finish
+    out['depart_min'] = depart
+    out['wait_min'] = start - sessions['arrival_min']
+    return out
+
+
+def _overlap_by_step(
+    socket: np.ndarray, t0: np.ndarray, t1: np.ndarray, step: int, n_steps: int, n_sockets: int,
+    weights: np.ndarray | None = None,
+) -> np.ndarray:
+    """Minutos de [t0, t1) que caen en cada intervalo de ``step`` minutos, por toma.
+
+    ``socket`` puede ser cualquier indice de grupo (sitio, alimentador); con
+    ``weights`` cada minuto se multiplica por el peso de su intervalo (p.ej. kW).
+    """
+    t1 = np.minimum(t1, n_steps * step)
+    keep = t1 > t0
+    socket, t0, t1 = socket[keep], t0[keep], t1[keep]
+    first = (t0 // step).astype(np.int64)
+    n_bins = (np.ceil(t1 / step).astype(np.int64) - first).clip(min=1)
+    rep = np.repeat(np.arange(len(t0)), n_bins)
+    b = first[rep] + np.arange(len(rep)) - np.repeat(np.cumsum(n_bins) - n_bins, n_bins)
+    minutes = np.minimum(t1[rep], (b + 1) * step) - np.maximum(t0[rep], b * step)
+    if weights is not None:
+        minutes = minutes * weights[keep][rep]
+    flat = np.bincount(b * n_sockets + socket[rep], weights=minutes, minlength=n_steps * n_sockets)
+    return flat.reshape(n_steps, n_sockets)
+
+
+def aggregate_sessions(
+    sessions: dict[str, np.ndarray],
+    n_hours: int,
+    n_sockets: int,
+    step_minutes: int = 60,
+) -> dict[str, np.ndarray]:
+    """Agrega sesiones programadas a matrices (n_pasos, n_tomas).
+
+    Returns:
+        energy_kwh (energia entregada en el paso), power_kw (potencia media),
+        occupancy (fraccion del paso con vehiculo enchufado), charging
+        (fraccion del paso cargando) y arrivals (llegadas en el paso)
+    """
+    if (n_hours * MINUTES_PER_HOUR) % step_minutes:
+        raise ValueError(f"step_minutes={step_minutes} no divide el horizonte de {n_hours} h")
+    n_steps = n_hours * MINUTES_PER_HOUR // step_minutes
+    socket = sessions['socket']
+    start = sessions['start_min'].astype(np.float64)
+    charging_min = _overlap_by_step(socket, start, start + sessions['charge_min'],
+                                    step_minutes, n_steps, n_sockets)
+    plugged_min = _overlap_by_step(socket, start, sessions['depart_min'].astype(np.float64),
+                                   step_minutes, n_steps, n_sockets)
+    # Potencia constante por toma durante la carga
+    power = np.zeros(n_sockets)
+    power[socket] = sessions['power_kw']
+    energy = charging_min * power / MINUTES_PER_HOUR
+    arr_step = sessions['arrival_min'] // step_minutes
+    in_range = arr_step < n_steps
+    arrivals = np.bincount(arr_step[in_range] * n_sockets + socket[in_range],
+                           minlength=n_steps * n_sockets).reshape(n_steps, n_sockets)
+    return {
+        'energy_kwh': energy,
+        'power_kw': energy * (MINUTES_PER_HOUR / step_minutes),
+        'occupancy': plugged_min / step_minutes,
+        'charging': charging_min / step_minutes,
+        'arrivals': arrivals,
+    }
+
+
+def simulate_events(
+    n_hours: int = 8760,
+    step_minutes: int = 15,
+    random_seed: int = 42,
+    exact_rng: bool = True,
+    dwell_minutes: int = 0,
+    engine: str = 'vectorized',
+    vehicle_types: list[VehicleType] | None = None,
+) -> dict[str, Any]:
+    """Simulacion completa: sorteo de sesiones, colas FIFO en minutos y agregacion.
+
+    Args:
+        n_hours: Horizonte desde el 1 de enero 00:00
+        step_minutes: Resolucion de salida (15 = mall, 60 = CityLearn)
+        random_seed: Semilla del RandomState
+        exact_rng: Mismas sesiones que la simulacion horaria v3 (False: sorteo en bloque)
+        dwell_minutes: Permanencia enchufado despues de completar la carga
+        engine: 'vectorized' o 'heap'
+        vehicle_types: Tipo por toma (default: 30 motos + 8 mototaxis)
+
+    Returns:
+        Matrices de aggregate_sessions + 'sessions' (arreglos por sesion) y 'index'
+    """
+    vtypes = vehicle_types if vehicle_types is not None else _socket_vehicle_types()
+    sessions = draw_sessions(n_hours, random_seed, exact_rng, vtypes)
+    sessions = schedule_sessions(sessions, len(vtypes), dwell_minutes, engine)
+    out: dict[str, Any] = aggregate_sessions(sessions, n_hours, len(vtypes), step_minutes)
+    out['sessions'] = sessions
+    out['index'] = pd.date_range('2024-01-01', periods=len(out['power_kw']),
+                                 freq=f'{step_minutes}min', name='datetime')
+    return out
+
+
+def to_frame(result: dict[str, Any]) -> pd.DataFrame:
+    """Potencia por toma (socket_XXX_charging_power_kw) + demanda EV total por paso."""
+    power = result['power_kw']
+    df = pd.DataFrame(power, index=result['index'],
+                      columns=[f'socket_{i:03d}_charging_power_kw' for i in range(power.shape[1])])
+    df['ev_energia_total_kwh'] = result['energy_kwh'].sum(axis=1)
+    return df
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulacion por eventos discretos de tomas EV (minutos)")
+    parser.add_argument("--step", type=int, default=15, help="Resolucion de salida en minutos")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla")
+    parser.add_argument("--dwell", type=int, default=0, help="Permanencia tras carga (min)")
+    parser.add_argument("--engine", default="vectorized", choices=ENGINES, help="Motor de eventos")
+    parser.add_argument("--out", default="", help="CSV de salida opcional")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    res = simulate_events(step_minutes=args.step, random_seed=args.seed,
+                          dwell_minutes=args.dwell, engine=args.engine)
+    elapsed = time.perf_counter() - t0
+    s = res['sessions']
+    print(f"[OK] {len(s['socket']):,} sesiones, {res['power_kw'].shape} pasos x tomas "
+          f"({args.step} min) en {elapsed:.2f} s [{args.engine}]")
+    print(f"  Energia anual:     {res['energy_kwh'].sum():,.0f} kWh")
+    print(f"  Carga media:       {s['charge_min'].mean():.1f} min | espera media {s['wait_min'].mean():.1f} min "
+          f"| espera max {s['wait_min'].max():,} min")
+    print(f"  Ocupacion media:   {100 * res['occupancy'].mean():.2f}%")
+    print(f"  Potencia pico:     {res['power_kw'].sum(axis=1).max():,.1f} kW")
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        to_frame(res).to_csv(out)
+        print(f"[OK] Guardado: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""Simulacion de carga EV para flotas multi-sitio (N sitios x M tomas).
+
+create_iquitos_chargers, create_socket_specs y la simulacion v3 asumen un
+solo sitio de 19 cargadores / 38 tomas. Este modulo describe cada sitio
+(mall, hub en via publica...) con su mezcla de tomas por tipo de vehiculo,
+escala de llegadas, perfil operativo y alimentador, y simula todos en
+paralelo:
+
+- Llegadas por (hora, tipo de vehiculo): Poisson con la tasa sumada de las
+  tomas del grupo, asignadas a una toma uniforme del grupo (equivalente a
+  una Poisson por toma con igual tasa). Costo O(horas x grupos + sesiones),
+  no O(tomas x horas)
+- Colas FIFO por toma con minutos enteros (_fifo_start, como event_simulation)
+- Almacenamiento disperso: solo sesiones (una fila por vehiculo)
+- Agregados por sitio y por alimentador integrando la potencia de las
+  sesiones; nunca se arma una columna densa por toma
+
+Uso:
+    from src.dimensionamiento.oe2.disenocargadoresev.fleet_simulation import SiteSpec, simulate_fleet
+    sites = [SiteSpec('mall_iquitos'), SiteSpec('hub_belen', 400, 120, arrival_scale=1.3, feeder='F2')]
+    fleet = simulate_fleet(sites, step_minutes=15, max_workers=4)
+    fleet.site_power_kw        # DataFrame (pasos x sitios)
+    fleet.feeder_power_kw      # DataFrame (pasos x alimentadores)
+    fleet.summary()            # energia, pico, espera, utilizacion por sitio
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .chargers import (
+        MAX_CHARGE_HOURS, MOTO_SPEC, MOTOTAXI_SPEC, N_SOCKETS_MOTO, N_SOCKETS_MOTOTAXI,
+        ChargerSet, VehicleType, create_charger_set, get_operational_factor,
+    )
+    from .event_simulation import MINUTES_PER_HOUR, _overlap_by_step, charge_durations, schedule_sessions
+except ImportError:  # Ejecucion directa: python .../disenocargadoresev/fleet_simulation.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+    from src.dimensionamiento.oe2.disenocargadoresev.chargers import (  # type: ignore[no-redef]
+        MAX_CHARGE_HOURS, MOTO_SPEC, MOTOTAXI_SPEC, N_SOCKETS_MOTO, N_SOCKETS_MOTOTAXI,
+        ChargerSet, VehicleType, create_charger_set, get_operational_factor,
+    )
+    from src.dimensionamiento.oe2.disenocargadoresev.event_simulation import (  # type: ignore[no-redef]
+        MINUTES_PER_HOUR, _overlap_by_step, charge_durations, schedule_sessions,
+    )
+
+# Columnas por sesion y su tipo (almacenamiento disperso compacto)
+SESSION_DTYPES: dict[str, Any] = {
+    'site': np.int32,
+    'socket': np.int32,
+    'arrival_min': np.int32,
+    'start_min': np.int32,
+    'finish_min': np.int32,
+    'depart_min': np.int32,
+    'wait_min': np.int32,
+    'soc_arrival': np.float32,
+    'soc_target': np.float32,
+    'energy_kwh': np.float32,
+}
+
+
+@dataclass(frozen=True)
+class SiteSpec:
+    """Sitio de carga: tomas por tipo de vehiculo, escala de llegadas y alimentador.
+
+    Attributes:
+        name: Identificador del sitio
+        n_moto_sockets: Tomas para motos
+        n_mototaxi_sockets: Tomas para mototaxis
+        arrival_scale: Multiplicador de lambda_arrivals por toma (1.0 = Iquitos)
+        feeder: Alimentador al que se conecta el sitio
+        moto: Tipo de vehiculo de las tomas de motos
+        mototaxi: Tipo de vehiculo de las tomas de mototaxis
+        operating_profile: 24 factores horarios (default: get_operational_factor del mall)
+        sockets_per_charger: Tomas por cargador
+        charger_power_kw: Potencia por cargador (kW)
+    """
+    name: str
+    n_moto_sockets: int = N_SOCKETS_MOTO
+    n_mototaxi_sockets: int = N_SOCKETS_MOTOTAXI
+    arrival_scale: float = 1.0
+    feeder: str = "F1"
+    moto: VehicleType = MOTO_SPEC
+    mototaxi: VehicleType = MOTOTAXI_SPEC
+    operating_profile: tuple[float, ...] | None = None
+    sockets_per_charger: int = 2
+    charger_power_kw: float = 7.4
+
+    def __post_init__(self):
+        if self.n_moto_sockets < 0 or self.n_mototaxi_sockets < 0:
+            raise ValueError(f"Sitio {self.name}: numero de tomas negativo")
+        if self.arrival_scale < 0:
+            raise ValueError(f"Sitio {self.name}: arrival_scale debe ser >= 0")
+        if self.operating_profile is not None and len(self.operating_profile) != 24:
+            raise ValueError(f"Sitio {self.name}: operating_profile requiere 24 valores")
+
+    @property
+    def total_sockets(self) -> int:
+        return self.n_moto_sockets + self.n_mototaxi_sockets
+
+    @property
+    def groups(self) -> list[tuple[VehicleType, int]]:
+        """Grupos (tipo de vehiculo, tomas) en orden de numeracion de tomas."""
+        return [(self.moto, self.n_moto_sockets), (self.mototaxi, self.n_mototaxi_sockets)]
+
+    def hourly_factor(self) -> np.ndarray:
+        """Factor operativo por hora del dia (24,)."""
+        if self.operating_profile is not None:
+            return np.asarray(self.operating_profile, dtype=np.float64)
+        return np.array([get_operational_factor(h) for h in range(24)])
+
+    def charger_set(self, first_charger_id: int = 0) -> ChargerSet:
+        """Cargadores del sitio (mismo formato que create_iquitos_chargers)."""
+        return create_charger_set(
+            self.n_moto_sockets, self.n_mototaxi_sockets,
+            sockets_per_charger=self.sockets_per_charger,
+            max_power_kw=self.charger_power_kw,
+            first_charger_id=first_charger_id,
+        )
+
+
+def simulate_site(
+    site: SiteSpec,
+    n_hours: int = 8760,
+    seed: int | np.random.SeedSequence = 42,
+    step_minutes: int = 60,
+    dwell_minutes: int = 0,
+    max_charge_minutes: int = MAX_CHARGE_HOURS * MINUTES_PER_HOUR,
+) -> dict[str, Any]:
+    """Simula un sitio: sesiones dispersas + series agregadas del sitio.
+
+    Returns:
+        sessions (arreglos por sesion), energy_kwh / occupied_sockets por paso
+        (n_pasos,) y metricas escalares del sitio
+    """
+    rng = np.random.default_rng(seed)
+    op_factor = site.hourly_factor()[np.arange(n_hours) % 24]
+    parts: list[dict[str, np.ndarray]] = []
+    offset = 0
+    for vtype, n_sockets in site.groups:
+        if n_sockets == 0:
+            continue
+        # Poisson del grupo (suma de tasas por toma) y toma uniforme dentro del grupo
+        counts = rng.poisson(vtype.lambda_arrivals * site.arrival_scale * n_sockets * op_factor)
+        n = int(counts.sum())
+        hour = np.repeat(np.arange(n_hours), counts)
+        parts.append({
+            'socket': offset + rng.integers(0, n_sockets, size=n),
+            'arrival_min': hour * MINUTES_PER_HOUR + rng.integers(0, MINUTES_PER_HOUR, size=n),
+            'soc_arrival': np.clip(rng.normal(vtype.soc_arrival_mean, vtype.soc_arrival_std, n), 0.0, 1.0),
+            'soc_target': np.clip(rng.normal(vtype.soc_target, vtype.soc_target_std, n), 0.0, 1.0),
+            'capacity_kwh': np.full(n, vtype.capacity_kwh),
+            'power_kw': np.full(n, vtype.power_kw),
+        })
+        offset += n_sockets
+
+    raw = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]} if parts else {
+        k: np.zeros(0) for k in ('socket', 'arrival_min', 'soc_arrival', 'soc_target', 'capacity_kwh', 'power_kw')
+    }
+    fifo = np.lexsort((raw['arrival_min'], raw['socket']))
+    raw = {k: v[fifo] for k, v in raw.items()}
+    sessions = {
+        'socket': raw['socket'].astype(np.int64),
+        'arrival_min': raw['arrival_min'].astype(np.int64),
+        'soc_arrival': raw['soc_arrival'],
+        'soc_target': raw['soc_target'],
+        **charge_durations(raw['soc_arrival'], raw['soc_target'], raw['capacity_kwh'],
+                           raw['power_kw'], max_charge_minutes),
+    }
+    sessions = schedule_sessions(sessions, max(site.total_sockets, 1), dwell_minutes)
+
+    # Agregados del sitio (un solo grupo): energia y tomas ocupadas por paso
+    n_steps = n_hours * MINUTES_PER_HOUR // step_minutes
+    group = np.zeros(len(sessions['socket']), dtype=np.int64)
+    start = sessions['start_min'].astype(np.float64)
+    energy = _overlap_by_step(group, start, start + sessions['charge_min'], step_minutes, n_steps, 1,
+                              weights=sessions['power_kw'] / MINUTES_PER_HOUR)[:, 0]
+    plugged = _overlap_by_step(group, start, sessions['depart_min'].astype(np.float64),
+                               step_minutes, n_steps, 1)[:, 0]
+    horizon_min = n_hours * MINUTES_PER_HOUR
+    charged_min = np.minimum(start + sessions['charge_min'], horizon_min) - np.minimum(start, horizon_min)
+    return {
+        'sessions': {k: np.asarray(sessions[k]).astype(dt) for k, dt in SESSION_DTYPES.items() if k != 'site'},
+        'energy_kwh': energy,
+        'occupied_sockets': plugged / step_minutes,
+        'n_sessions': len(group),
+        'mean_wait_min': float(sessions['wait_min'].mean()) if len(group) else 0.0,
+        'p95_wait_min': float(np.percentile(sessions['wait_min'], 95)) if len(group) else 0.0,
+        'utilization': float(charged_min.sum() / max(site.total_sockets * horizon_min, 1)),
+    }
+
+
+def _simulate_site_worker(args: tuple) -> dict[str, Any]:
+    return simulate_site(*args)
+
+
+@dataclass
+class FleetResult:
+    """Resultado multi-sitio: series por sitio/alimentador y sesiones dispersas."""
+
+    sites: list[SiteSpec]
+    index: pd.DatetimeIndex
+    step_minutes: int
+    site_energy_kwh: pd.DataFrame
+    site_occupied_sockets: pd.DataFrame
+    site_metrics: list[dict[str, Any]]
+    sessions: pd.DataFrame | None = None
+    elapsed_s: float = 0.0
+
+    @property
+    def site_power_kw(self) -> pd.DataFrame:
+        """Potencia media por paso y sitio (kW)."""
+        return self.site_energy_kwh * (MINUTES_PER_HOUR / self.step_minutes)
+
+    @property
+    def feeder_energy_kwh(self) -> pd.DataFrame:
+        feeders = [s.feeder for s in self.sites]
+        return self.site_energy_kwh.T.groupby(feeders, sort=False).sum().T
+
+    @property
+    def feeder_power_kw(self) -> pd.DataFrame:
+        """Potencia media por paso y alimentador (kW)."""
+        return self.feeder_energy_kwh * (MINUTES_PER_HOUR / self.step_minutes)
+
+    def summary(self) -> pd.DataFrame:
+        """Tabla por sitio: tomas, cargadores, sesiones, energia, pico, espera y utilizacion."""
+        power = self.site_power_kw
+        rows = []
+        for site, m in zip(self.sites, self.site_metrics):
+            rows.append({
+                'sitio': site.name,
+                'alimentador': site.feeder,
+                'tomas': site.total_sockets,
+                'cargadores': site.charger_set().count,
+                'potencia_instalada_kw': site.total_sockets * site.charger_power_kw,
+                'sesiones': m['n_sessions'],
+                'energia_kwh': float(self.site_energy_kwh[site.name].sum()),
+                'pico_kw': float(power[site.name].max()),
+                'espera_media_min': m['mean_wait_min'],
+                'espera_p95_min': m['p95_wait_min'],
+                'utilizacion_pct': 100.0 * m['utilization'],
+            })
+        return pd.DataFrame(rows)
+
+
+def simulate_fleet(
+    sites: Sequence[SiteSpec],
+    n_hours: int = 8760,
+    step_minutes: int = 60,
+    base_seed: int = 42,
+    dwell_minutes: int = 0,
+    max_workers: int | None = None,
+    keep_sessions: bool = True,
+) -> FleetResult:
+    """Simula N sitios en paralelo y agrega por sitio y alimentador.
+
+    Args:
+        sites: Sitios (nombres unicos)
+        n_hours: Horizonte desde el 1 de enero 00:00
+        step_minutes: Resolucion de las series agregadas
+        base_seed: Semilla raiz; cada sitio recibe una subsemilla independiente
+            (resultados identicos con cualquier numero de procesos)
+        dwell_minutes: Permanencia enchufado tras completar la carga
+        max_workers: Procesos (default: min(sitios, CPUs)); 1 = proceso actual
+        keep_sessions: Conservar la tabla dispersa de sesiones
+
+    Returns:
+        FleetResult
+    """
+    sites = list(sites)
+    names = [s.name for s in sites]
+    if len(set(names)) != len(names):
+        raise ValueError("Los nombres de sitio deben ser unicos")
+    if (n_hours * MINUTES_PER_HOUR) % step_minutes:
+        raise ValueError(f"step_minutes={step_minutes} no divide el horizonte de {n_hours} h")
+
+    seeds = np.random.SeedSequence(base_seed).spawn(len(sites))
+    args = [(site, n_hours, seed, step_minutes, dwell_minutes) for site, seed in zip(sites, seeds)]
+    workers = max_workers or min(len(sites), os.cpu_count() or 1)
+    t0 = time.perf_counter()
+    if workers <= 1 or len(sites) <= 1:
+        results = [_simulate_site_worker(a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_site_worker, args))
+    elapsed = time.perf_counter() - t0
+
+    index = pd.date_range('2024-01-01', periods=n_hours * MINUTES_PER_HOUR // step_minutes,
+                          freq=f'{step_minutes}min', name='datetime')
+    energy = pd.DataFrame(np.column_stack([r['energy_kwh'] for r in results]), index=index, columns=names)
+    occupied = pd.DataFrame(np.column_stack([r['occupied_sockets'] for r in results]), index=index, columns=names)
+    sessions = None
+    if keep_sessions:
+        frames = []
+        for k, r in enumerate(results):
+            cols = dict(r['sessions'])
+            cols['site'] = np.full(len(cols['socket']), k, dtype=np.int32)
+            frames.append(pd.DataFrame({c: cols[c] for c in SESSION_DTYPES}))
+        sessions = pd.concat(frames, ignore_index=True)
+    metrics = [{k: v for k, v in r.items() if k not in ('sessions', 'energy_kwh', 'occupied_sockets')}
+               for r in results]
+    return FleetResult(
+        sites=sites,
+        index=index,
+        step_minutes=step_minutes,
+        site_energy_kwh=energy,
+        site_occupied_sockets=occupied,
+        site_metrics=metrics,
+        sessions=sessions,
+        elapsed_s=elapsed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulacion de carga EV multi-sitio")
+    parser.add_argument("--sites", type=int, default=8, help="Sitios sinteticos (ademas de Iquitos)")
+    parser.add_argument("--sockets", type=int, default=400, help="Tomas por sitio sintetico")
+    parser.add_argument("--feeders", type=int, default=3, help="Alimentadores")
+    parser.add_argument("--step", type=int, default=15, help="Resolucion en minutos")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos paralelos")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla raiz")
+    parser.add_argument("--out", default="", help="Directorio opcional (resumen + series por sitio/alimentador)")
+    args = parser.parse_args()
+
+    sites = [SiteSpec('mall_iquitos')]
+    for k in range(args.sites):
+        n_taxi = args.sockets // 5
+        sites.append(SiteSpec(
+            f'hub_{k + 1:02d}', n_moto_sockets=args.sockets - n_taxi, n_mototaxi_sockets=n_taxi,
+            arrival_scale=0.8 + 0.1 * (k % 5), feeder=f'F{k % args.feeders + 1}',
+        ))
+    fleet = simulate_fleet(sites, step_minutes=args.step, base_seed=args.seed, max_workers=args.workers)
+    total_sockets = sum(s.total_sockets for s in sites)
+
+    print("\n" + "=" * 100)
+    print(f"FLOTA MULTI-SITIO: {len(sites)} sitios, {total_sockets:,} tomas, "
+          f"{len(fleet.sessions):,} sesiones ({args.step} min) en {fleet.elapsed_s:.2f} s")
+    print("=" * 100)
+    print(fleet.summary().to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
+    feeder_power = fleet.feeder_power_kw
+    print("\n  Pico por alimentador: " + " | ".join(f"{c}: {feeder_power[c].max():,.0f} kW" for c in feeder_power))
+    print(f"  Sesiones en memoria: {fleet.sessions.memory_usage(index=False).sum() / 1e6:,.1f} MB")
+
+    if args.out:
+        out = Path(args.out)
+        out.mkdir(parents=True, exist_ok=True)
+        fleet.summary().to_csv(out / "fleet_summary.csv", index=False)
+        fleet.site_power_kw.to_csv(out / "fleet_site_power_kw.csv")
+        fleet.feeder_power_kw.to_csv(out / "fleet_feeder_power_kw.csv")
+        print(f"\n[OK] Guardado en: {out}")
+
+
+if __name__ == "__main__":
+    main()
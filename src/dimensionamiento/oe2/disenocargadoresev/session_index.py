@@ -0,0 +1,309 @@
+"""Tabla de sesiones de carga extraida una sola vez del dataset por toma, con indices.
+
+Los scripts de analisis reconstruyen sesiones recorriendo las 8,760 filas de
+cada toma (transiciones de ``active`` / ``soc_arrival``). Aqui la extraccion
+es vectorizada y se guarda junto al dataset (``<nombre>.sessions.npz``):
+
+- Una fila por sesion: toma, hora de inicio/fin, kWh, SOC entrada/salida/objetivo, tipo
+- Indices precalculados: por toma (CSR), por dia (CSR) y por hora del dia
+  (mascara de 24 bits de horas ocupadas + CSR por hora)
+
+Una sesion es un tramo de horas ``active`` consecutivas de la misma toma; un
+vehiculo nuevo que entra justo al salir el anterior se detecta porque cambian
+``soc_arrival``/``soc_target`` o baja ``soc_current``.
+
+Uso:
+    from src.dimensionamiento.oe2.disenocargadoresev.session_index import load_sessions
+    st = load_sessions('data/oe2/chargers/chargers_ev_ano_2024_v3.csv')
+    st.overlapping(18, 21, vehicle_type='MOTO')      # indices de sesiones 18-21h
+    st.count_by_type(18, 21)                          # {'MOTO': ..., 'MOTOTAXI': ...}
+    st.to_frame()
+
+    python -m src.dimensionamiento.oe2.disenocargadoresev.session_index data/oe2/chargers/chargers_ev_ano_2024_v3.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .chargers import MOTO_SPEC, MOTOTAXI_SPEC
+    from .socket_dataset import SocketDataset, load_socket_dataset
+except ImportError:  # Ejecucion directa: python .../disenocargadoresev/session_index.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+    from src.dimensionamiento.oe2.disenocargadoresev.chargers import (  # type: ignore[no-redef]
+        MOTO_SPEC, MOTOTAXI_SPEC,
+    )
+    from src.dimensionamiento.oe2.disenocargadoresev.socket_dataset import (  # type: ignore[no-redef]
+        SocketDataset, load_socket_dataset,
+    )
+
+SESSIONS_FORMAT_VERSION = 1
+HOURS_PER_DAY = 24
+
+# Columnas por sesion (orden cronologico por hora de inicio, luego toma)
+SESSION_COLUMNS = ('socket', 'start_hour', 'end_hour', 'energy_kwh', 'soc_in', 'soc_out', 'soc_target', 'type_code')
+TYPE_NAMES = (MOTO_SPEC.name, MOTOTAXI_SPEC.name)  # type_code 0 / 1
+
+
+def sessions_path(dataset_path: str | Path) -> Path:
+    """Ruta del cache de sesiones junto al dataset (mismo nombre, sufijo .sessions.npz)."""
+    dataset_path = Path(dataset_path)
+    return dataset_path.with_name(dataset_path.stem + '.sessions.npz')
+
+
+def _source_signature(dataset_path: Path) -> np.ndarray:
+    """(tamano, mtime_ns) del archivo fuente mas reciente: invalida el cache si cambia el dataset."""
+    candidates = [p for p in (dataset_path, dataset_path.with_suffix('.npz'), dataset_path.with_suffix('.csv'))
+                  if p.exists()]
+    newest = max(candidates, key=lambda p: p.stat().st_mtime_ns)
+    return np.array([newest.stat().st_size, newest.stat().st_mtime_ns], dtype=np.int64)
+
+
+def _hours_mask(h0: int, h1: int) -> int:
+    """Mascara de 24 bits de las horas del dia [h0, h1) (h1 <= h0 cruza medianoche)."""
+    hours = np.arange(h0, h1 if h1 > h0 else h1 + HOURS_PER_DAY) % HOURS_PER_DAY
+    return int(np.bitwise_or.reduce(np.left_shift(1, hours), initial=0))
+
+
+def extract_sessions(ds: SocketDataset) -> dict[str, np.ndarray]:
+    """Extrae las sesiones de todas las tomas en bloque (columnas SESSION_COLUMNS).
+
+    ``energy_kwh`` suma ``charging_power_kw`` de las horas de la sesion (misma
+    base que ``ev_demand_kwh``); ``soc_out`` es el SOC tras la ultima hora de
+    carga: min(objetivo, soc_current + potencia efectiva / bateria).
+    """
+    active = ds['active'].T.astype(bool)  # (n_tomas, n_horas): recorrido por toma
+    soc_cur = ds['soc_current'].T.astype(np.float64)
+    soc_arr = ds['soc_arrival'].T.astype(np.float64)
+    soc_tgt = ds['soc_target'].T.astype(np.float64)
+    power = ds['charging_power_kw'].T.astype(np.float64)
+
+    # Inicio: toma activa que estaba libre o recibe otro vehiculo
+    new_vehicle = np.zeros_like(active)
+    new_vehicle[:, 1:] = ((soc_arr[:, 1:] != soc_arr[:, :-1]) | (soc_tgt[:, 1:] != soc_tgt[:, :-1])
+                          | (soc_cur[:, 1:] < soc_cur[:, :-1]))
+    prev_active = np.zeros_like(active)
+    prev_active[:, 1:] = active[:, :-1]
+    is_start = active & (~prev_active | new_vehicle)
+    # Fin: ultima hora activa antes de quedar libre o de otro inicio
+    next_start = np.zeros_like(active)
+    next_start[:, :-1] = is_start[:, 1:] | ~active[:, 1:]
+    next_start[:, -1] = True
+    is_end = active & next_start
+
+    n_hours = active.shape[1]
+    starts = np.flatnonzero(is_start)
+    ends = np.flatnonzero(is_end)
+    socket = starts // n_hours
+    flat_power = (power * active).ravel()
+    energy = np.add.reduceat(flat_power, starts) if len(starts) else np.zeros(0)
+    # reduceat suma hasta el siguiente inicio; las horas libres intermedias tienen potencia 0
+
+    battery = ds.socket_constant('battery_kwh')[socket]
+    eff_power = ds.socket_constant('effective_power_kw')[socket]
+    target = soc_tgt.ravel()[starts]
+    soc_out = np.minimum(target, soc_cur.ravel()[ends] + eff_power / battery)
+    return {
+        'socket': socket.astype(np.int32),
+        'start_hour': (starts % n_hours).astype(np.int32),
+        'end_hour': (ends % n_hours + 1).astype(np.int32),  # exclusivo
+        'energy_kwh': energy,
+        'soc_in': soc_arr.ravel()[starts],
+        'soc_out': soc_out,
+        'soc_target': target,
+        'type_code': (~ds.is_moto[socket]).astype(np.uint8),  # 0 = moto, 1 = mototaxi
+    }
+
+
+@dataclass(frozen=True)
+class SessionTable:
+    """Sesiones de carga (orden cronologico) con indices por toma, dia y hora del dia."""
+
+    columns: dict[str, np.ndarray]
+    type_names: tuple[str, ...]
+    n_hours: int
+    n_sockets: int
+    socket_order: np.ndarray  # sesiones ordenadas por (toma, inicio)
+    socket_ptr: np.ndarray    # (n_sockets + 1,) rangos en socket_order
+    day_ptr: np.ndarray       # (n_dias + 1,) rangos de sesiones por dia de inicio
+    hod_mask: np.ndarray      # (n_sesiones,) bits de horas del dia ocupadas
+    hod_sessions: np.ndarray  # sesiones por hora del dia (CSR)
+    hod_ptr: np.ndarray       # (25,)
+
+    @classmethod
+    def build(cls, ds: SocketDataset) -> "SessionTable":
+        raw = extract_sessions(ds)
+        order = np.lexsort((raw['socket'], raw['start_hour']))
+        columns = {c: np.ascontiguousarray(raw[c][order]) for c in SESSION_COLUMNS}
+        return cls._with_indexes(columns, TYPE_NAMES, ds.n_hours, ds.n_sockets)
+
+    @classmethod
+    def _with_indexes(cls, columns: dict[str, np.ndarray], type_names: tuple[str, ...],
+                      n_hours: int, n_sockets: int) -> "SessionTable":
+        socket, start, end = columns['socket'], columns['start_hour'], columns['end_hour']
+        socket_order = np.lexsort((start, socket))
+        socket_ptr = np.searchsorted(socket[socket_order], np.arange(n_sockets + 1))
+        n_days = -(-n_hours // HOURS_PER_DAY)
+        day_ptr = np.searchsorted(start // HOURS_PER_DAY, np.arange(n_days + 1))
+
+        # Horas del dia ocupadas por cada sesion (bits 0-23; sesiones de 24 h o mas: todas)
+        duration = end - start
+        hod_mask = np.zeros(len(start), dtype=np.uint32)
+        for k in range(min(int(duration.max(initial=0)), HOURS_PER_DAY)):
+            covered = duration > k
+            hod_mask[covered] |= np.left_shift(np.uint32(1), ((start[covered] + k) % HOURS_PER_DAY).astype(np.uint32))
+        bits = (hod_mask[:, None] >> np.arange(HOURS_PER_DAY, dtype=np.uint32)) & 1
+        sess_idx, hod = np.nonzero(bits)
+        by_hod = np.argsort(hod, kind='stable')
+        hod_sessions = sess_idx[by_hod].astype(np.int64)
+        hod_ptr = np.searchsorted(hod[by_hod], np.arange(HOURS_PER_DAY + 1))
+        return cls(columns=columns, type_names=type_names, n_hours=n_hours, n_sockets=n_sockets,
+                   socket_order=socket_order, socket_ptr=socket_ptr, day_ptr=day_ptr,
+                   hod_mask=hod_mask, hod_sessions=hod_sessions, hod_ptr=hod_ptr)
+
+    # ------------------------------------------------------------------
+    # Disco
+    # ------------------------------------------------------------------
+    def save(self, path: str | Path, source_signature: np.ndarray | None = None) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            format_version=np.int64(SESSIONS_FORMAT_VERSION),
+            n_hours=np.int64(self.n_hours),
+            n_sockets=np.int64(self.n_sockets),
+            type_names=np.array(self.type_names),
+            source_signature=(source_signature if source_signature is not None else np.zeros(2, dtype=np.int64)),
+            **self.columns,
+        )
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> "SessionTable":
+        with np.load(path) as npz:
+            if int(npz['format_version']) > SESSIONS_FORMAT_VERSION:
+                raise ValueError(f"Cache de sesiones v{int(npz['format_version'])} no soportado")
+            columns = {c: npz[c] for c in SESSION_COLUMNS}
+            return cls._with_indexes(columns, tuple(npz['type_names'].tolist()),
+                                     int(npz['n_hours']), int(npz['n_sockets']))
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.columns['socket'])
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def type_code(self, vehicle_type: str | None) -> int | None:
+        return None if vehicle_type is None else self.type_names.index(vehicle_type.upper())
+
+    def for_socket(self, socket: int) -> np.ndarray:
+        """Indices de las sesiones de una toma (orden cronologico)."""
+        return self.socket_order[self.socket_ptr[socket]:self.socket_ptr[socket + 1]]
+
+    def for_days(self, day0: int, day1: int | None = None) -> slice:
+        """Sesiones que inician en los dias [day0, day1) (contiguas: orden cronologico)."""
+        day1 = day0 + 1 if day1 is None else day1
+        n_days = len(self.day_ptr) - 1
+        return slice(int(self.day_ptr[min(day0, n_days)]), int(self.day_ptr[min(day1, n_days)]))
+
+    def at_hour_of_day(self, hour: int) -> np.ndarray:
+        """Indices de las sesiones que ocupan la toma en esa hora del dia (algun dia)."""
+        return self.hod_sessions[self.hod_ptr[hour]:self.hod_ptr[hour + 1]]
+
+    def overlapping_mask(self, h0: int, h1: int, vehicle_type: str | None = None,
+                         days: tuple[int, int] | None = None) -> np.ndarray:
+        """Mascara de sesiones que ocupan alguna hora del dia en [h0, h1) (h1 <= h0 cruza medianoche)."""
+        mask = (self.hod_mask & np.uint32(_hours_mask(h0, h1))) != 0
+        code = self.type_code(vehicle_type)
+        if code is not None:
+            mask &= self.columns['type_code'] == code
+        if days is not None:
+            sel = np.zeros(len(self), dtype=bool)
+            sel[self.for_days(*days)] = True
+            mask &= sel
+        return mask
+
+    def overlapping(self, h0: int, h1: int, vehicle_type: str | None = None,
+                    days: tuple[int, int] | None = None) -> np.ndarray:
+        """Indices de sesiones que ocupan alguna hora del dia en [h0, h1)."""
+        return np.flatnonzero(self.overlapping_mask(h0, h1, vehicle_type, days))
+
+    def count_by_type(self, h0: int = 0, h1: int = HOURS_PER_DAY) -> dict[str, int]:
+        """Sesiones por tipo que ocupan la franja [h0, h1)."""
+        mask = self.overlapping_mask(h0, h1)
+        counts = np.bincount(self.columns['type_code'][mask], minlength=len(self.type_names))
+        return {name: int(c) for name, c in zip(self.type_names, counts)}
+
+    def daily_counts(self) -> np.ndarray:
+        """(n_dias, n_tipos) sesiones iniciadas por dia y tipo."""
+        day = self.columns['start_hour'] // HOURS_PER_DAY
+        n_days = len(self.day_ptr) - 1
+        flat = day.astype(np.int64) * len(self.type_names) + self.columns['type_code']
+        return np.bincount(flat, minlength=n_days * len(self.type_names)).reshape(n_days, -1)
+
+    def to_frame(self, rows: Any = None) -> pd.DataFrame:
+        """Sesiones (todas o ``rows``: indices/mascara/slice) como DataFrame."""
+        sel = slice(None) if rows is None else rows
+        df = pd.DataFrame({c: self.columns[c][sel] for c in SESSION_COLUMNS if c != 'type_code'})
+        df['vehicle_type'] = np.array(self.type_names)[self.columns['type_code'][sel]]
+        df['duration_hours'] = df['end_hour'] - df['start_hour']
+        df['day'] = df['start_hour'] // HOURS_PER_DAY
+        df['hour_of_day'] = df['start_hour'] % HOURS_PER_DAY
+        return df
+
+
+def load_sessions(dataset_path: str | Path, rebuild: bool = False) -> SessionTable:
+    """Tabla de sesiones del dataset, desde el cache ``.sessions.npz`` si esta vigente.
+
+    El cache se regenera si no existe, si ``rebuild`` o si cambio el archivo
+    fuente (tamano / fecha de modificacion del CSV o .npz del dataset).
+    """
+    dataset_path = Path(dataset_path)
+    cache = sessions_path(dataset_path)
+    signature = _source_signature(dataset_path)
+    if cache.exists() and not rebuild:
+        with np.load(cache) as npz:
+            fresh = np.array_equal(npz['source_signature'], signature)
+        if fresh:
+            return SessionTable.load(cache)
+    table = SessionTable.build(load_socket_dataset(dataset_path))
+    table.save(cache, source_signature=signature)
+    return table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Extrae e indexa las sesiones de carga del dataset por toma")
+    parser.add_argument("path", help="Dataset v3 (CSV o .npz compacto)")
+    parser.add_argument("--from-hour", type=int, default=18, help="Inicio de la franja de consulta")
+    parser.add_argument("--to-hour", type=int, default=21, help="Fin (exclusivo) de la franja de consulta")
+    parser.add_argument("--rebuild", action="store_true", help="Ignorar el cache existente")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    table = load_sessions(args.path, rebuild=args.rebuild)
+    t_load = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    counts = table.count_by_type(args.from_hour, args.to_hour)
+    t_query = time.perf_counter() - t0
+
+    df = table.to_frame()
+    print(f"[OK] {len(table):,} sesiones ({sessions_path(args.path).name}) en {t_load * 1000:.0f} ms")
+    print(f"  Energia total: {df['energy_kwh'].sum():,.0f} kWh | sesiones/dia: {len(table) / (len(table.day_ptr) - 1):.1f}")
+    print(df.groupby('vehicle_type')[['energy_kwh', 'duration_hours', 'soc_in', 'soc_out']].mean().round(3).to_string())
+    print(f"  Sesiones {args.from_hour:02d}-{args.to_hour:02d}h por tipo: {counts} ({t_query * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Motor parametrico (pe, fc) de dimensionamiento de cargadores: grilla densa y Monte Carlo.
+
+Sobre ``calcular_dimensionamiento`` vectorizado (chargers.py) evalua millones
+de escenarios en una sola llamada y entrega:
+- Tablas de cuantiles por metrica (cargadores, tomas, energia, potencia pico...)
+- Una superficie 2-D precalculada (pe x fc) para consultas rapidas y graficas
+
+Uso:
+    from src.dimensionamiento.oe2.disenocargadoresev.sizing_scenarios import (
+        monte_carlo_scenarios, quantile_table, SizingSurface,
+    )
+    res = monte_carlo_scenarios(1_000_000)
+    quantile_table(res)
+    surf = SizingSurface.build(n_pe=401, n_fc=401)
+    surf.lookup(0.30, 0.55, 'cargadores')     # -> 19
+    surf.to_frame('energia_dia')              # pivot pe x fc
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .chargers import calcular_dimensionamiento
+except ImportError:  # Ejecucion directa: python .../disenocargadoresev/sizing_scenarios.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+    from src.dimensionamiento.oe2.disenocargadoresev.chargers import (  # type: ignore[no-redef]
+        calcular_dimensionamiento,
+    )
+
+# Rangos del analisis parametrico (generate_parametric_table)
+PE_RANGE = (0.20, 0.40)
+FC_RANGE = (0.45, 0.65)
+
+SIZING_METRICS = {
+    'cargadores': 'Cargadores (2 tomas) [unid]',
+    'tomas': 'Tomas totales [tomas]',
+    'sesiones_pico': 'Sesiones pico 5h [sesiones]',
+    'cargas_dia': 'Cargas dia total [cargas]',
+    'energia_dia': 'Energia dia [kWh]',
+    'potencia_pico': 'Potencia pico agregada [kW]',
+}
+# Metricas enteras (escalonadas): la superficie se consulta por nodo, no se interpola
+STEP_METRICS = ('cargadores', 'cargadores_motos', 'cargadores_taxis', 'tomas', 'tomas_motos',
+                'tomas_taxis', 'potencia_pico')
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.50, 0.75, 0.95)
+
+
+def monte_carlo_scenarios(
+    n_scenarios: int = 1_000_000,
+    pe_range: tuple[float, float] = PE_RANGE,
+    fc_range: tuple[float, float] = FC_RANGE,
+    random_seed: int = 42,
+) -> dict[str, np.ndarray]:
+    """Muestrea (pe, fc) uniformes y dimensiona todos los escenarios en bloque.
+
+    Returns:
+        Columnas de calcular_dimensionamiento (arreglos de n_scenarios)
+    """
+    rng = np.random.default_rng(random_seed)
+    pe = rng.uniform(pe_range[0], pe_range[1], n_scenarios)
+    fc = rng.uniform(fc_range[0], fc_range[1], n_scenarios)
+    return calcular_dimensionamiento(pe, fc)
+
+
+def grid_scenarios(
+    n_pe: int = 201,
+    n_fc: int = 201,
+    pe_range: tuple[float, float] = PE_RANGE,
+    fc_range: tuple[float, float] = FC_RANGE,
+) -> dict[str, np.ndarray]:
+    """Grilla densa pe x fc; cada columna tiene forma (n_pe, n_fc)."""
+    pe = np.linspace(pe_range[0], pe_range[1], n_pe)
+    fc = np.linspace(fc_range[0], fc_range[1], n_fc)
+    return calcular_dimensionamiento(pe[:, None], fc[None, :])
+
+
+def quantile_table(
+    results: dict[str, np.ndarray],
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    metrics: dict[str, str] | None = None,
+) -> pd.DataFrame:
+    """Tabla de estadisticas por metrica: minimo, cuantiles, maximo, promedio, desviacion."""
+    metrics = metrics or SIZING_METRICS
+    q = np.asarray(quantiles, dtype=np.float64)
+    rows = []
+    for col, name in metrics.items():
+        values = np.asarray(results[col], dtype=np.float64).ravel()
+        row: dict[str, Any] = {'Metrica': name, 'Minimo': float(values.min())}
+        for qi, v in zip(q, np.quantile(values, q)):
+            row[f'P{qi * 100:g}'] = float(v)
+        row['Maximo'] = float(values.max())
+        row['Promedio'] = float(values.mean())
+        row['Desv_Std'] = float(values.std(ddof=1)) if len(values) > 1 else 0.0
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def share_table(results: dict[str, np.ndarray], metric: str = 'cargadores') -> pd.DataFrame:
+    """Frecuencia de cada valor de una metrica entera (p.ej. % de escenarios con 19 cargadores)."""
+    values, counts = np.unique(np.asarray(results[metric]).ravel(), return_counts=True)
+    share = counts / counts.sum()
+    return pd.DataFrame({
+        metric: values,
+        'escenarios': counts,
+        'porcentaje': 100.0 * share,
+        'acumulado_pct': 100.0 * np.cumsum(share),
+    })
+
+
+@dataclass(frozen=True)
+class SizingSurface:
+    """Superficie 2-D precalculada de dimensionamiento sobre una grilla regular pe x fc."""
+
+    pe: np.ndarray
+    fc: np.ndarray
+    values: dict[str, np.ndarray]
+
+    @classmethod
+    def build(
+        cls,
+        n_pe: int = 201,
+        n_fc: int = 201,
+        pe_range: tuple[float, float] = PE_RANGE,
+        fc_range: tuple[float, float] = FC_RANGE,
+    ) -> "SizingSurface":
+        grid = grid_scenarios(n_pe, n_fc, pe_range, fc_range)
+        pe = np.linspace(pe_range[0], pe_range[1], n_pe)
+        fc = np.linspace(fc_range[0], fc_range[1], n_fc)
+        values = {k: np.ascontiguousarray(v) for k, v in grid.items() if k not in ('pe', 'fc')}
+        return cls(pe=pe, fc=fc, values=values)
+
+    def _position(self, axis: np.ndarray, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Indice de celda y fraccion dentro de la celda (recortado al rango de la grilla)."""
+        step = (axis[-1] - axis[0]) / max(len(axis) - 1, 1)
+        pos = np.clip((np.asarray(x, dtype=np.float64) - axis[0]) / step, 0.0, len(axis) - 1)
+        i0 = np.minimum(np.floor(pos).astype(np.int64), max(len(axis) - 2, 0))
+        return i0, pos - i0
+
+    def lookup(self, pe: Any, fc: Any, metric: str = 'cargadores') -> Any:
+        """
+        Consulta la superficie en (pe, fc) (escalares o arreglos).
+
+        Metricas continuas: interpolacion bilineal. Metricas enteras
+        (cargadores, tomas, potencia): nodo mas cercano de la grilla.
+        """
+        grid = self.values[metric]
+        i, ti = self._position(self.pe, pe)
+        j, tj = self._position(self.fc, fc)
+        if metric in STEP_METRICS:
+            out = grid[i + (ti >= 0.5), j + (tj >= 0.5)]
+        else:
+            out = ((1 - ti) * (1 - tj) * grid[i, j] + ti * (1 - tj) * grid[i + 1, j]
+                   + (1 - ti) * tj * grid[i, j + 1] + ti * tj * grid[i + 1, j + 1])
+        return out.item() if np.ndim(out) == 0 else out
+
+    def to_frame(self, metric: str = 'cargadores') -> pd.DataFrame:
+        """Superficie como DataFrame (filas pe, columnas fc)."""
+        return pd.DataFrame(
+            self.values[metric],
+            index=pd.Index(np.round(self.pe, 6), name='pe'),
+            columns=pd.Index(np.round(self.fc, 6), name='fc'),
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Motor parametrico (pe, fc) de dimensionamiento de cargadores")
+    parser.add_argument("--n", type=int, default=1_000_000, help="Escenarios Monte Carlo")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla")
+    parser.add_argument("--grid", type=int, default=201, help="Nodos por eje de la superficie pe x fc")
+    parser.add_argument("--out", default="", help="Directorio opcional para CSVs (cuantiles + superficie)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    res = monte_carlo_scenarios(args.n, random_seed=args.seed)
+    t_mc = time.perf_counter() - t0
+    table = quantile_table(res)
+
+    print("\n" + "=" * 95)
+    print(f"MONTE CARLO DIMENSIONAMIENTO - {args.n:,} escenarios (pe {PE_RANGE}, fc {FC_RANGE})")
+    print("=" * 95)
+    print(table.to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
+    print(f"\n  Distribucion de cargadores:")
+    print(share_table(res).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    print(f"\n  Tiempo: {t_mc:.2f} s")
+
+    t0 = time.perf_counter()
+    surface = SizingSurface.build(args.grid, args.grid)
+    print(f"  Superficie {args.grid}x{args.grid}: {time.perf_counter() - t0:.3f} s | "
+          f"recomendado (0.30, 0.55) -> {surface.lookup(0.30, 0.55, 'cargadores')} cargadores, "
+          f"{surface.lookup(0.30, 0.55, 'energia_dia'):,.1f} kWh/dia")
+
+    if args.out:
+        out = Path(args.out)
+        out.mkdir(parents=True, exist_ok=True)
+        table.to_csv(out / "sizing_quantiles.csv", index=False)
+        for metric in ('cargadores', 'tomas', 'energia_dia', 'potencia_pico'):
+            surface.to_frame(metric).to_csv(out / f"sizing_surface_{metric}.csv")
+        print(f"\n[OK] Guardado en: {out}")
+
+
+if __name__ == "__main__":
+    main()
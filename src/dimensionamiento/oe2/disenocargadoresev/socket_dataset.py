@@ -0,0 +1,332 @@
+"""Formato compacto del dataset anual por toma (sin columnas constantes repetidas).
+
+El CSV v3 (chargers_ev_ano_2024_v3.csv) guarda 8,760 copias de las
+constantes de cada toma (charger_power_kw, battery_kwh, vehicle_type) y los
+lectores buscan entre cientos de columnas por texto
+(``'_charging_power_kw' in col``). Este formato separa:
+
+- ``<nombre>.json``: metadatos (constantes por toma, inicio/frecuencia,
+  tipos de dato, semilla y energia anual)
+- ``<nombre>.npz``: matrices dinamicas (n_horas, n_tomas) con tipo ajustado
+  (SOC float32, active uint8, vehicle_count uint16)
+
+``charging_power_kw`` no se almacena si es exactamente ``active x potencia
+efectiva`` de la toma (caso de la simulacion v3); se reconstruye al cargar.
+Las columnas agregadas (cantidades, tarifas, CO2) se derivan con
+``to_dataframe`` usando el mismo constructor que el generador v3, asi que
+``to_csv`` exporta el CSV compatible.
+
+Uso:
+    from src.dimensionamiento.oe2.disenocargadoresev.socket_dataset import SocketDataset
+    ds = SocketDataset.load('data/oe2/chargers/chargers_ev_ano_2024_v3.npz')
+    ds.charging_power_kw            # (8760, 38) sin DataFrame ni busqueda de columnas
+    ds.ev_demand_kwh()              # (8760,)
+    ds.to_csv('chargers_ev_ano_2024_v3.csv')
+
+    python -m src.dimensionamiento.oe2.disenocargadoresev.socket_dataset data/oe2/chargers/chargers_ev_ano_2024_v3.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Mapping
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .chargers import (
+        CHARGING_EFFICIENCY, MOTO_SPEC, MOTOTAXI_SPEC, VehicleType,
+        _build_socket_frame, _socket_vehicle_types,
+    )
+except ImportError:  # Ejecucion directa: python .../disenocargadoresev/socket_dataset.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+    from src.dimensionamiento.oe2.disenocargadoresev.chargers import (  # type: ignore[no-redef]
+        CHARGING_EFFICIENCY, MOTO_SPEC, MOTOTAXI_SPEC, VehicleType,
+        _build_socket_frame, _socket_vehicle_types,
+    )
+
+FORMAT_VERSION = 1
+CHARGER_POWER_KW = 7.4  # Potencia nominal por toma (columna charger_power_kw del CSV v3)
+
+# Matrices dinamicas por toma y su tipo de almacenamiento
+FIELD_DTYPES: dict[str, Any] = {
+    'soc_current': np.float32,
+    'soc_arrival': np.float32,
+    'soc_target': np.float32,
+    'active': np.uint8,
+    'charging_power_kw': np.float32,
+    'vehicle_count': np.uint16,
+}
+# Tipo en memoria al reconstruir el DataFrame (igual al de la simulacion)
+FRAME_DTYPES: dict[str, Any] = {
+    'soc_current': np.float64,
+    'soc_arrival': np.float64,
+    'soc_target': np.float64,
+    'active': np.int64,
+    'charging_power_kw': np.float64,
+    'vehicle_count': np.int64,
+}
+_SPECS_BY_NAME = {MOTO_SPEC.name: MOTO_SPEC, MOTOTAXI_SPEC.name: MOTOTAXI_SPEC}
+
+
+def _storage_dtype(field: str, values: np.ndarray) -> np.dtype:
+    """Tipo de almacenamiento; los contadores suben a uint32 si no caben en uint16."""
+    dtype = np.dtype(FIELD_DTYPES[field])
+    if dtype.kind == 'u' and values.size and values.max() > np.iinfo(dtype).max:
+        return np.dtype(np.uint32)
+    return dtype
+
+
+class SocketDataset:
+    """Dataset por toma en matrices (n_horas, n_tomas) + constantes por toma."""
+
+    def __init__(self, fields: Mapping[str, np.ndarray], meta: dict[str, Any]):
+        missing = [f for f in FIELD_DTYPES if f not in fields]
+        if missing:
+            raise ValueError(f"Faltan matrices por toma: {', '.join(missing)}")
+        shapes = {np.shape(fields[f]) for f in FIELD_DTYPES}
+        if len(shapes) != 1 or len(next(iter(shapes))) != 2:
+            raise ValueError(f"Las matrices deben ser (n_horas, n_tomas) de igual forma: {shapes}")
+        self.fields = {f: np.asarray(fields[f]) for f in FIELD_DTYPES}
+        self.meta = meta
+
+    # ------------------------------------------------------------------
+    # Construccion
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_simulation(
+        cls,
+        sim: Mapping[str, np.ndarray],
+        vehicle_types: list[VehicleType] | None = None,
+        start: Any = "2024-01-01 00:00:00",
+        random_seed: int | None = None,
+    ) -> "SocketDataset":
+        """Desde la salida de simulate_sockets_vectorized (sin copiar matrices)."""
+        vtypes = vehicle_types if vehicle_types is not None else _socket_vehicle_types()
+        meta = cls._build_meta(vtypes, len(sim['active']), start)
+        meta['random_seed'] = random_seed
+        return cls({f: sim[f] for f in FIELD_DTYPES}, meta)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SocketDataset":
+        """Desde un DataFrame v3 (columnas socket_XXX_<campo>), p.ej. el CSV anual."""
+        if 'datetime' in df.columns:
+            df = df.set_index('datetime')
+        n_sockets = 0
+        while f'socket_{n_sockets:03d}_active' in df.columns:
+            n_sockets += 1
+        if n_sockets == 0:
+            raise ValueError("El DataFrame no tiene columnas socket_XXX_active (formato v3)")
+        prefixes = [f'socket_{i:03d}' for i in range(n_sockets)]
+        names = df[[f'{p}_vehicle_type' for p in prefixes]].iloc[0].tolist()
+        vtypes = [_SPECS_BY_NAME[n] for n in names]
+        fields = {
+            f: df[[f'{p}_{f}' for p in prefixes]].to_numpy(dtype=FRAME_DTYPES[f])
+            for f in FIELD_DTYPES
+        }
+        start = pd.Timestamp(df.index[0]) if len(df) else "2024-01-01 00:00:00"
+        meta = cls._build_meta(vtypes, len(df), start)
+        meta['random_seed'] = None
+        return cls(fields, meta)
+
+    @classmethod
+    def read_csv(cls, path: str | Path) -> "SocketDataset":
+        """Lee el CSV v3 una sola vez y lo convierte."""
+        return cls.from_frame(pd.read_csv(path, index_col=0, parse_dates=True))
+
+    @staticmethod
+    def _build_meta(vtypes: list[VehicleType], n_hours: int, start: Any) -> dict[str, Any]:
+        return {
+            'format_version': FORMAT_VERSION,
+            'start': str(pd.Timestamp(start)),
+            'freq': 'h',
+            'n_hours': int(n_hours),
+            'n_sockets': len(vtypes),
+            'charging_efficiency': CHARGING_EFFICIENCY,
+            'sockets': [
+                {
+                    'socket_id': i,
+                    'vehicle_type': vt.name,
+                    'charger_power_kw': CHARGER_POWER_KW,
+                    'battery_kwh': vt.capacity_kwh,
+                    'effective_power_kw': vt.power_kw * CHARGING_EFFICIENCY,
+                }
+                for i, vt in enumerate(vtypes)
+            ],
+        }
+
+    # ------------------------------------------------------------------
+    # Disco
+    # ------------------------------------------------------------------
+    def save(self, path: str | Path, compress: bool = True, source_csv: str | Path | None = None) -> Path:
+        """Guarda ``<path>.npz`` (matrices) y ``<path>.json`` (metadatos); retorna el .npz.
+
+        Con ``compress`` (default) el .npz usa zip deflate: las matrices son
+        mayormente ceros (~1.7 MB frente a ~19 MB del CSV) y cargan en ~30 ms.
+        ``source_csv`` registra tamano y mtime del CSV de origen para detectar
+        (``compact_is_current``) si el CSV se regenero despues.
+        """
+        path = Path(path).with_suffix('.npz')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays: dict[str, np.ndarray] = {}
+        dtypes: dict[str, str] = {}
+        derived = bool(np.array_equal(self.fields['charging_power_kw'], self._power_from_active()))
+        for f in FIELD_DTYPES:
+            if f == 'charging_power_kw' and derived:
+                continue
+            dtype = _storage_dtype(f, self.fields[f])
+            arrays[f] = np.ascontiguousarray(self.fields[f], dtype=dtype)
+            dtypes[f] = dtype.name
+        (np.savez_compressed if compress else np.savez)(path, **arrays)
+
+        meta = dict(self.meta)
+        meta['dtypes'] = dtypes
+        meta['charging_power_from_active'] = derived
+        meta['annual_energy_kwh'] = float(self.fields['charging_power_kw'].sum())
+        meta['created'] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        meta.pop('source_csv', None)
+        if source_csv is not None:
+            stat = Path(source_csv).stat()
+            meta['source_csv'] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        with open(path.with_suffix('.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> "SocketDataset":
+        """Carga el formato compacto (ruta .npz, .json o .csv con el mismo nombre)."""
+        path = Path(path)
+        with open(path.with_suffix('.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format_version', 0) > FORMAT_VERSION:
+            raise ValueError(f"Formato compacto v{meta['format_version']} no soportado (max v{FORMAT_VERSION})")
+        with np.load(path.with_suffix('.npz')) as npz:
+            fields = {f: npz[f] for f in npz.files}
+        if meta.get('charging_power_from_active'):
+            # float64 exacto: active x potencia efectiva, igual que la simulacion
+            fields['charging_power_kw'] = (
+                fields['active'] * np.array([s['effective_power_kw'] for s in meta['sockets']])
+            )
+        return cls(fields, meta)
+
+    # ------------------------------------------------------------------
+    # Acceso directo (sin DataFrame)
+    # ------------------------------------------------------------------
+    @property
+    def n_hours(self) -> int:
+        return int(self.fields['active'].shape[0])
+
+    @property
+    def n_sockets(self) -> int:
+        return int(self.fields['active'].shape[1])
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return pd.date_range(self.meta['start'], periods=self.n_hours, freq=self.meta.get('freq', 'h'),
+                             name='datetime')
+
+    @property
+    def vehicle_types(self) -> list[VehicleType]:
+        return [_SPECS_BY_NAME[s['vehicle_type']] for s in self.meta['sockets']]
+
+    @property
+    def is_moto(self) -> np.ndarray:
+        """Mascara (n_tomas,) de tomas de moto."""
+        return np.array([s['vehicle_type'] == MOTO_SPEC.name for s in self.meta['sockets']])
+
+    def socket_constant(self, key: str) -> np.ndarray:
+        """Constante por toma del sidecar (charger_power_kw, battery_kwh, effective_power_kw)."""
+        return np.array([s[key] for s in self.meta['sockets']])
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.fields[field]
+
+    @property
+    def charging_power_kw(self) -> np.ndarray:
+        return self.fields['charging_power_kw']
+
+    def ev_demand_kwh(self, mask: np.ndarray | None = None) -> np.ndarray:
+        """Demanda EV horaria (suma de charging_power_kw de las tomas seleccionadas)."""
+        power = self.fields['charging_power_kw']
+        return (power if mask is None else power[:, mask]).sum(axis=1, dtype=np.float64)
+
+    def _power_from_active(self) -> np.ndarray:
+        return self.fields['active'] * self.socket_constant('effective_power_kw')
+
+    # ------------------------------------------------------------------
+    # Compatibilidad CSV v3
+    # ------------------------------------------------------------------
+    def to_dataframe(self) -> pd.DataFrame:
+        """DataFrame v3 completo (10 columnas por toma + agregados, tarifas y CO2)."""
+        sim = {f: self.fields[f].astype(FRAME_DTYPES[f], copy=False) for f in FIELD_DTYPES}
+        return _build_socket_frame(sim, self.vehicle_types, self.index)
+
+    def to_csv(self, path: str | Path) -> Path:
+        """Exporta el CSV v3 compatible (datetime como indice)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.to_dataframe().to_csv(path, index=True)
+        return path
+
+
+def compact_is_current(csv_path: str | Path) -> bool:
+    """True si existe el formato compacto junto al CSV y no es anterior a el.
+
+    Con ``source_csv`` en el .json se compara tamano y mtime registrados; en
+    archivos sin ese dato, el compacto debe ser al menos tan reciente como el CSV.
+    """
+    csv_path = Path(csv_path)
+    npz_path, json_path = csv_path.with_suffix('.npz'), csv_path.with_suffix('.json')
+    if not (npz_path.exists() and json_path.exists()):
+        return False
+    if not csv_path.exists() or csv_path == npz_path:
+        return True
+    stat = csv_path.stat()
+    with open(json_path, 'r', encoding='utf-8') as f:
+        source = json.load(f).get('source_csv')
+    if source is not None:
+        return source.get('size') == stat.st_size and source.get('mtime_ns') == stat.st_mtime_ns
+    return min(npz_path.stat().st_mtime_ns, json_path.stat().st_mtime_ns) >= stat.st_mtime_ns
+
+
+def load_socket_dataset(path: str | Path) -> SocketDataset:
+    """Carga por toma preferiendo el formato compacto junto al archivo si no es anterior al CSV."""
+    path = Path(path)
+    if compact_is_current(path):
+        return SocketDataset.load(path)
+    return SocketDataset.read_csv(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convierte el dataset por toma v3 entre CSV y formato compacto")
+    parser.add_argument("path", help="CSV v3 (convierte a .npz/.json) o .npz (exporta CSV)")
+    parser.add_argument("--out", default="", help="Ruta de salida (default: mismo nombre, otra extension)")
+    args = parser.parse_args()
+
+    src = Path(args.path)
+    t0 = time.perf_counter()
+    if src.suffix == '.csv':
+        ds = SocketDataset.read_csv(src)
+        t_read = time.perf_counter() - t0
+        out = ds.save(args.out or src, source_csv=src)
+        t0 = time.perf_counter()
+        SocketDataset.load(out)
+        t_load = time.perf_counter() - t0
+        size_csv = src.stat().st_size
+        size_compact = out.stat().st_size + out.with_suffix('.json').stat().st_size
+        print(f"[OK] {src.name} -> {out.name} (+ {out.with_suffix('.json').name})")
+        print(f"  Tamano:  {size_csv / 1e6:,.1f} MB -> {size_compact / 1e6:,.2f} MB ({size_csv / size_compact:,.0f}x)")
+        print(f"  Lectura: CSV {t_read:.2f} s | compacto {t_load * 1000:.1f} ms")
+    else:
+        ds = SocketDataset.load(src)
+        out = ds.to_csv(args.out or src.with_suffix('.csv'))
+        print(f"[OK] {src.name} -> {out} ({time.perf_counter() - t0:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
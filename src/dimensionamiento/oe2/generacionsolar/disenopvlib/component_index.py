@@ -0,0 +1,365 @@
+"""Indice tipado de componentes Sandia (modulos) y CEC (inversores).
+
+Las bases de ``pvlib.pvsystem.retrieve_sam`` son DataFrames de tipo object
+(un componente por columna); recorrerlas con ``.get()`` por parametro cuesta
+cientos de ms por ranking. Aqui se extraen una sola vez los parametros que usa
+la seleccion de componentes a arreglos NumPy float64 (mas arreglo de nombres)
+y se guardan en ``component_index.npz``. Ranking, filtros por area/objetivo AC
+y busquedas por nombre son operaciones vectorizadas sobre esos arreglos.
+
+Los parametros completos de cada componente (para el ModelChain/SAPM) se
+siguen tomando de las bases de pvlib por nombre.
+
+Uso:
+    from src.dimensionamiento.oe2.generacionsolar.disenopvlib.component_index import load_component_index
+    idx = load_component_index()
+    idx.modules.rank(area_util=14445.9, top_n=5)
+    idx.inverters.rank(target_ac_kw=3200, top_n=5)
+
+    python -m src.dimensionamiento.oe2.generacionsolar.disenopvlib.component_index --rebuild
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+COMPONENT_INDEX_VERSION = 1
+DEFAULT_COMPONENT_INDEX_PATH = Path("data/oe2/Generacionsolar/component_index.npz")
+
+# Parametros extraidos (fila de la base SAM -> arreglo)
+MODULE_FIELDS = ("Vmpo", "Impo", "Voco", "Bvoco", "Area", "A_c", "A_ref")
+INVERTER_FIELDS = ("Paco", "Pdco", "Vdco", "Vdcmax", "Mppt_low")
+
+# Llaves de area en orden de prioridad (como _get_module_area)
+AREA_KEYS = ("Area", "A_c", "A_ref")
+
+
+def _numeric_rows(db: pd.DataFrame, fields: tuple[str, ...]) -> dict[str, np.ndarray]:
+    """Filas de la base SAM como float64 (NaN si falta la fila o no es numerica)."""
+    out: dict[str, np.ndarray] = {}
+    for name in fields:
+        if name in db.index:
+            out[name] = pd.to_numeric(db.loc[name], errors="coerce").to_numpy(dtype=np.float64)
+        else:
+            out[name] = np.full(len(db.columns), np.nan)
+    return out
+
+
+def _names_signature(names: np.ndarray) -> str:
+    return hashlib.sha1("\n".join(names.tolist()).encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class ModuleIndex:
+    """Parametros de modulos Sandia como arreglos alineados con `names`."""
+
+    names: np.ndarray
+    vmpo: np.ndarray
+    impo: np.ndarray
+    voco: np.ndarray
+    bvoco: np.ndarray
+    area_m2: np.ndarray
+    _positions: dict[str, int] = field(default_factory=dict, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._positions.update({str(n): i for i, n in enumerate(self.names)})
+
+    @classmethod
+    def from_db(cls, modules_db: pd.DataFrame) -> "ModuleIndex":
+        rows = _numeric_rows(modules_db, MODULE_FIELDS)
+        # Primera llave de area positiva (Area, A_c, A_ref); 0 si ninguna
+        area = np.zeros(len(modules_db.columns))
+        for key in reversed(AREA_KEYS):
+            vals = rows[key]
+            area = np.where(vals > 0, vals, area)
+        return cls(
+            names=np.asarray(modules_db.columns, dtype=str),
+            vmpo=rows["Vmpo"],
+            impo=rows["Impo"],
+            voco=rows["Voco"],
+            bvoco=rows["Bvoco"],
+            area_m2=area,
+        )
+
+    @property
+    def pmp_w(self) -> np.ndarray:
+        return self.vmpo * self.impo
+
+    @property
+    def valid(self) -> np.ndarray:
+        """Modulos con Vmpo, Impo y area positivos."""
+        return (self.vmpo > 0) & (self.impo > 0) & (self.area_m2 > 0)
+
+    @property
+    def density_w_m2(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.valid, self.pmp_w / np.where(self.area_m2 > 0, self.area_m2, 1.0), 0.0)
+
+    def position(self, name: str) -> Optional[int]:
+        return self._positions.get(name)
+
+    def max_modules(self, area_util: float) -> np.ndarray:
+        """Modulos que caben en el area utilizable (0 si area invalida)."""
+        if area_util <= 0:
+            return np.zeros(len(self.names), dtype=np.int64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            n = np.floor(area_util / np.where(self.area_m2 > 0, self.area_m2, np.inf))
+        return n.astype(np.int64)
+
+    def rank(self, area_util: float, top_n: int = 5, min_dc_kw: float = 0.0) -> pd.DataFrame:
+        """Top-N por densidad de potencia (W/m2), desempate por Pmp.
+
+        Args:
+            area_util: Area utilizable [m2] (n_max y dc_kw_max por modulo)
+            top_n: Numero de candidatos
+            min_dc_kw: Descarta modulos cuyo techo lleno no alcanza esta potencia DC
+        """
+        valid = self.valid
+        pmp = self.pmp_w
+        n_max = self.max_modules(area_util)
+        dc_kw_max = np.where(n_max > 0, n_max * pmp / 1000, 0.0)
+        if min_dc_kw > 0:
+            valid = valid & (dc_kw_max >= min_dc_kw)
+        sel = np.flatnonzero(valid)
+        if sel.size == 0:
+            return pd.DataFrame()
+        density = self.density_w_m2[sel]
+        order = sel[np.lexsort((-pmp[sel], -density))][:top_n]
+        return pd.DataFrame(
+            {
+                "name": self.names[order].astype(object),
+                "pmp_w": pmp[order],
+                "area_m2": self.area_m2[order],
+                "density_w_m2": self.density_w_m2[order],
+                "n_max": n_max[order],
+                "dc_kw_max": dc_kw_max[order],
+            }
+        )
+
+    def best_by_density(self) -> Optional[int]:
+        """Posicion del modulo de mayor densidad (primero en caso de empate)."""
+        density = self.density_w_m2
+        if not (density > 0).any():
+            return None
+        return int(np.argmax(density))
+
+
+@dataclass(frozen=True)
+class InverterIndex:
+    """Parametros de inversores CEC como arreglos alineados con `names`."""
+
+    names: np.ndarray
+    paco_w: np.ndarray
+    pdco_w: np.ndarray
+    vdco: np.ndarray
+    vdcmax: np.ndarray
+    mppt_low: np.ndarray
+    _positions: dict[str, int] = field(default_factory=dict, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._positions.update({str(n): i for i, n in enumerate(self.names)})
+
+    @classmethod
+    def from_db(cls, inverters_db: pd.DataFrame) -> "InverterIndex":
+        rows = _numeric_rows(inverters_db, INVERTER_FIELDS)
+        return cls(
+            names=np.asarray(inverters_db.columns, dtype=str),
+            paco_w=rows["Paco"],
+            pdco_w=rows["Pdco"],
+            vdco=rows["Vdco"],
+            vdcmax=rows["Vdcmax"],
+            mppt_low=rows["Mppt_low"],
+        )
+
+    @property
+    def efficiency(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.pdco_w > 0, self.paco_w / np.where(self.pdco_w > 0, self.pdco_w, 1.0), 0.0)
+
+    def position(self, name: str) -> Optional[int]:
+        return self._positions.get(name)
+
+    def units_for(self, target_ac_kw: float) -> np.ndarray:
+        """Inversores necesarios para el objetivo AC (1 si no hay objetivo)."""
+        paco_kw = np.where(self.paco_w > 0, self.paco_w / 1000, np.nan)
+        if target_ac_kw <= 0:
+            return np.ones(len(self.names), dtype=np.int64)
+        n = np.ceil(target_ac_kw / paco_kw)
+        return np.where(np.isfinite(n), n, 0).astype(np.int64)
+
+    def rank(self, target_ac_kw: float, top_n: int = 5, max_units: Optional[int] = None) -> pd.DataFrame:
+        """Top-N por eficiencia penalizada por sobredimensionamiento y numero de unidades.
+
+        Args:
+            target_ac_kw: Potencia AC objetivo [kW]
+            top_n: Numero de candidatos
+            max_units: Descarta inversores que requieren mas unidades que esto
+        """
+        valid = self.paco_w > 0
+        n_inv = self.units_for(target_ac_kw)
+        if max_units is not None:
+            valid = valid & (n_inv <= max_units)
+        sel = np.flatnonzero(valid)
+        if sel.size == 0:
+            return pd.DataFrame()
+        paco_kw = self.paco_w[sel] / 1000
+        efficiency = self.efficiency[sel]
+        n = n_inv[sel]
+        if target_ac_kw > 0:
+            oversize = (n * paco_kw - target_ac_kw) / target_ac_kw
+        else:
+            oversize = np.zeros(sel.size)
+        penalty = 0.02 * np.maximum(n - 1, 0)
+        score = np.where(efficiency > 0, efficiency / (1.0 + oversize + penalty), 0.0)
+        order = np.lexsort((-paco_kw, -efficiency, -score))[:top_n]
+        pdco = self.pdco_w[sel][order]
+        return pd.DataFrame(
+            {
+                "name": self.names[sel][order].astype(object),
+                "paco_kw": paco_kw[order],
+                "pdco_kw": np.where(pdco > 0, pdco / 1000, 0.0),
+                "efficiency": efficiency[order],
+                "n_inverters": n[order],
+                "oversize_ratio": oversize[order],
+                "score": score[order],
+            }
+        )
+
+    def best_by_paco(self) -> Optional[int]:
+        """Posicion del inversor de mayor Paco (primero en caso de empate)."""
+        paco = np.where(self.paco_w > 0, self.paco_w, 0.0)
+        if not (paco > 0).any():
+            return None
+        return int(np.argmax(paco))
+
+
+@dataclass(frozen=True)
+class ComponentIndex:
+    """Indice de modulos e inversores con firma de las bases de origen."""
+
+    modules: ModuleIndex
+    inverters: InverterIndex
+    signature: str
+
+    @classmethod
+    def from_databases(cls, modules_db: pd.DataFrame, inverters_db: pd.DataFrame) -> "ComponentIndex":
+        modules = ModuleIndex.from_db(modules_db)
+        inverters = InverterIndex.from_db(inverters_db)
+        return cls(modules, inverters, _databases_signature(modules.names, inverters.names))
+
+    def save(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        m, inv = self.modules, self.inverters
+        np.savez(
+            path,
+            format_version=np.int64(COMPONENT_INDEX_VERSION),
+            signature=np.array(self.signature),
+            meta=np.array(json.dumps({"pvlib": _pvlib_version(), "created": time.strftime("%Y-%m-%dT%H:%M:%S")})),
+            module_names=m.names, vmpo=m.vmpo, impo=m.impo, voco=m.voco, bvoco=m.bvoco, area_m2=m.area_m2,
+            inverter_names=inv.names, paco_w=inv.paco_w, pdco_w=inv.pdco_w, vdco=inv.vdco,
+            vdcmax=inv.vdcmax, mppt_low=inv.mppt_low,
+        )
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> "ComponentIndex":
+        with np.load(path) as npz:
+            if int(npz["format_version"]) > COMPONENT_INDEX_VERSION:
+                raise ValueError(f"Indice de componentes v{int(npz['format_version'])} no soportado")
+            modules = ModuleIndex(
+                names=npz["module_names"], vmpo=npz["vmpo"], impo=npz["impo"],
+                voco=npz["voco"], bvoco=npz["bvoco"], area_m2=npz["area_m2"],
+            )
+            inverters = InverterIndex(
+                names=npz["inverter_names"], paco_w=npz["paco_w"], pdco_w=npz["pdco_w"],
+                vdco=npz["vdco"], vdcmax=npz["vdcmax"], mppt_low=npz["mppt_low"],
+            )
+            signature = str(npz["signature"])
+        return cls(modules, inverters, signature)
+
+
+def _pvlib_version() -> str:
+    try:
+        import pvlib  # type: ignore[import-not-found]
+    except ImportError:  # pragma: no cover
+        return ""
+    return str(pvlib.__version__)
+
+
+def _databases_signature(module_names: np.ndarray, inverter_names: np.ndarray) -> str:
+    """Firma: version de pvlib + nombres de ambas bases."""
+    return f"{_pvlib_version()}:{_names_signature(module_names)}:{_names_signature(inverter_names)}"
+
+
+def load_component_index(
+    path: str | Path | None = None,
+    rebuild: bool = False,
+    modules_db: Optional[pd.DataFrame] = None,
+    inverters_db: Optional[pd.DataFrame] = None,
+) -> ComponentIndex:
+    """Indice de componentes desde el cache en disco, reconstruido si no esta vigente.
+
+    Si se pasan las bases, el cache se valida contra sus nombres; si no, solo
+    contra la version de pvlib (y las bases se leen con retrieve_sam al
+    reconstruir).
+    """
+    path = Path(path or DEFAULT_COMPONENT_INDEX_PATH)
+    have_dbs = modules_db is not None and inverters_db is not None
+    if path.exists() and not rebuild:
+        cached = ComponentIndex.load(path)
+        if have_dbs:
+            expected = _databases_signature(
+                np.asarray(modules_db.columns, dtype=str),  # type: ignore[union-attr]
+                np.asarray(inverters_db.columns, dtype=str),  # type: ignore[union-attr]
+            )
+            if cached.signature == expected:
+                return cached
+        elif cached.signature.split(":", 1)[0] == _pvlib_version():
+            return cached
+
+    if not have_dbs:
+        import pvlib  # type: ignore[import-not-found]
+
+        modules_db = pvlib.pvsystem.retrieve_sam("SandiaMod")  # type: ignore[attr-defined]
+        inverters_db = pvlib.pvsystem.retrieve_sam("CECInverter")  # type: ignore[attr-defined]
+    index = ComponentIndex.from_databases(modules_db, inverters_db)  # type: ignore[arg-type]
+    try:
+        index.save(path)
+    except OSError:
+        pass  # Directorio de solo lectura: se usa el indice en memoria
+    return index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Construye el indice de componentes Sandia/CEC")
+    parser.add_argument("--path", default=str(DEFAULT_COMPONENT_INDEX_PATH), help="Archivo .npz del indice")
+    parser.add_argument("--rebuild", action="store_true", help="Reconstruir aunque el cache este vigente")
+    parser.add_argument("--area", type=float, default=14445.9, help="Area utilizable [m2] para el ranking")
+    parser.add_argument("--target-ac", type=float, default=3200.0, help="Objetivo AC [kW] para el ranking")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    index = load_component_index(args.path, rebuild=args.rebuild)
+    t1 = time.perf_counter()
+    modules = index.modules.rank(args.area, args.top)
+    inverters = index.inverters.rank(args.target_ac, args.top)
+    t2 = time.perf_counter()
+    print(f"[OK] Indice: {len(index.modules.names)} modulos, {len(index.inverters.names)} inversores "
+          f"(carga {1000 * (t1 - t0):.1f} ms, ranking {1000 * (t2 - t1):.1f} ms)")
+    print(modules.to_string(index=False))
+    print(inverters.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
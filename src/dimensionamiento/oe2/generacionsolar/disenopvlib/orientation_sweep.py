@@ -0,0 +1,239 @@
+"""Barrido vectorizado de orientaciones (tilt x azimut) del arreglo FV.
+
+``run_pv_simulation`` evalua una sola orientacion (la de PVSystemConfig). Para
+techos de otros sitios se necesita el rendimiento en una malla de
+orientaciones; aqui se evalua la malla completa en una pasada:
+
+- Posicion solar, masa de aire, irradiancia extraterrestre y mascara
+  nocturna se calculan una vez (compartidas por todas las orientaciones).
+- AOI y transposicion Perez se difunden como arreglos 2-D
+  (orientaciones x pasos de tiempo).
+- Temperatura de celda SAPM, IAM 'physical', SAPM DC e inversor Sandia
+  corren sobre el bloque apilado.
+
+Mismas opciones de modelo que el ModelChain de solar_pvlib (perez, physical,
+no_loss, sapm, sandia, albedo 0.25); en cada orientacion el resultado
+coincide con run_pv_simulation. Las orientaciones se procesan por bloques de
+``chunk_size`` para acotar memoria.
+
+Uso:
+    sweep = sweep_orientations(tmy, config, module_params, inverter_params,
+                               modules_per_string=16, strings_parallel=12_000,
+                               total_modules=192_000, num_inverters=2,
+                               tilts=range(0, 41, 5), azimuths=range(0, 360, 30))
+    sweep.best("energy_per_m2")   # {'tilt': ..., 'azimuth': ..., 'value': ...}
+    sweep.to_frame()
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import warnings
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .solar_pvlib import (
+        PVSystemConfig, _TEMP_MODEL_PARAMS, _candidate_power_arrays, _ensure_pvlib_available,
+        _get_module_area, _night_masked_weather,
+    )
+except ImportError:  # Ejecucion directa: python .../disenopvlib/orientation_sweep.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[5]))
+    from src.dimensionamiento.oe2.generacionsolar.disenopvlib.solar_pvlib import (  # type: ignore[no-redef]
+        PVSystemConfig, _TEMP_MODEL_PARAMS, _candidate_power_arrays, _ensure_pvlib_available,
+        _get_module_area, _night_masked_weather,
+    )
+
+SWEEP_METRICS = ("energy_per_m2", "performance_ratio", "annual_kwh", "specific_yield")
+ALBEDO = 0.25  # Albedo por defecto de pvlib.pvsystem.Array
+
+
+@dataclass(frozen=True)
+class OrientationSweep:
+    """Superficie de rendimiento sobre la malla tilt x azimut (ejes 0 y 1)."""
+
+    tilts: np.ndarray
+    azimuths: np.ndarray
+    annual_kwh: np.ndarray          # AC con perdidas del sistema
+    annual_dc_kwh: np.ndarray
+    monthly_kwh: np.ndarray         # (n_tilt, n_azimut, 12)
+    poa_annual_kwh_m2: np.ndarray
+    energy_per_m2: np.ndarray
+    specific_yield: np.ndarray      # kWh/kWp
+    performance_ratio: np.ndarray   # specific_yield / GHI anual (como en la seleccion de candidatos)
+    ghi_annual_kwh_m2: float
+    system_dc_kw: float
+    area_modules_m2: float
+
+    def best(self, metric: str = "energy_per_m2") -> dict[str, Any]:
+        """Orientacion que maximiza la metrica (primera en caso de empate)."""
+        if metric not in SWEEP_METRICS:
+            raise ValueError(f"Metrica no soportada: {metric!r} (opciones: {', '.join(SWEEP_METRICS)})")
+        values = getattr(self, metric)
+        i, j = np.unravel_index(int(np.argmax(values)), values.shape)
+        return {
+            "metric": metric,
+            "tilt": float(self.tilts[i]),
+            "azimuth": float(self.azimuths[j]),
+            "value": float(values[i, j]),
+            "annual_kwh": float(self.annual_kwh[i, j]),
+            "poa_annual_kwh_m2": float(self.poa_annual_kwh_m2[i, j]),
+        }
+
+    def best_by_metric(self) -> dict[str, dict[str, Any]]:
+        return {metric: self.best(metric) for metric in SWEEP_METRICS}
+
+    def to_frame(self) -> pd.DataFrame:
+        """Una fila por orientacion con metricas anuales y energia mensual."""
+        tilt, azimuth = np.meshgrid(self.tilts, self.azimuths, indexing="ij")
+        df = pd.DataFrame(
+            {
+                "tilt": tilt.ravel(),
+                "azimuth": azimuth.ravel(),
+                "annual_kwh": self.annual_kwh.ravel(),
+                "annual_dc_kwh": self.annual_dc_kwh.ravel(),
+                "poa_annual_kwh_m2": self.poa_annual_kwh_m2.ravel(),
+                "energy_per_m2": self.energy_per_m2.ravel(),
+                "specific_yield": self.specific_yield.ravel(),
+                "performance_ratio": self.performance_ratio.ravel(),
+            }
+        )
+        monthly = self.monthly_kwh.reshape(-1, 12)
+        for m in range(12):
+            df[f"kwh_m{m + 1:02d}"] = monthly[:, m]
+        return df
+
+
+def sweep_orientations(
+    tmy_data: pd.DataFrame,
+    config: PVSystemConfig,
+    module_params: pd.Series,
+    inverter_params: pd.Series,
+    modules_per_string: int,
+    strings_parallel: int,
+    total_modules: int,
+    num_inverters: int,
+    tilts: Iterable[float],
+    azimuths: Iterable[float],
+    chunk_size: int = 64,
+    log: bool = True,
+) -> OrientationSweep:
+    """Evalua la malla tilt x azimut en una pasada vectorizada.
+
+    Args:
+        tmy_data: TMY con indice local (como en build_pv_timeseries_sandia)
+        config: Ubicacion y perdidas del sistema (tilt/azimut se ignoran)
+        module_params, inverter_params: Parametros Sandia/CEC
+        modules_per_string, strings_parallel, total_modules, num_inverters: Layout fijo
+        tilts, azimuths: Ejes de la malla [grados]
+        chunk_size: Orientaciones por bloque vectorizado
+    """
+    _ensure_pvlib_available()
+    import pvlib  # type: ignore[import-not-found]
+    from pvlib import irradiance  # type: ignore[import-not-found]
+    from pvlib.location import Location  # type: ignore[import-not-found]
+
+    tilt_axis = np.asarray(list(tilts), dtype=float)
+    az_axis = np.asarray(list(azimuths), dtype=float)
+    if tilt_axis.size == 0 or az_axis.size == 0:
+        raise ValueError("Se requiere al menos un tilt y un azimut")
+    grid_tilt, grid_az = (g.ravel() for g in np.meshgrid(tilt_axis, az_axis, indexing="ij"))
+
+    t0 = time.perf_counter()
+    location = Location(
+        latitude=config.latitude,
+        longitude=config.longitude,
+        tz=config.timezone,
+        altitude=config.altitude,
+        name="Iquitos, Peru",
+    )
+    weather = _night_masked_weather(tmy_data, location, log=False)
+    times = weather.index
+
+    # Etapa compartida (igual que ModelChain.prepare_inputs)
+    solar_pos = location.get_solarposition(times, method="nrel_numpy", temperature=weather["temp_air"])
+    airmass = location.get_airmass(solar_position=solar_pos, model="kastenyoung1989")["airmass_relative"]
+    dni_extra = irradiance.get_extra_radiation(times)
+    zenith = solar_pos["apparent_zenith"].to_numpy()
+    sun_azimuth = solar_pos["azimuth"].to_numpy()
+    ghi = weather["ghi"].to_numpy(dtype=float)
+    dni = weather["dni"].to_numpy(dtype=float)
+    dhi = weather["dhi"].to_numpy(dtype=float)
+    temp_air = weather["temp_air"].to_numpy(dtype=float)
+    wind_speed = weather["wind_speed"].to_numpy(dtype=float)
+    temp_params: dict[str, Any] = _TEMP_MODEL_PARAMS.get("sapm", {}).get("open_rack_glass_glass", {})
+
+    dt = (times[1] - times[0]).total_seconds() / 3600 if len(times) > 1 else 1.0
+    month_onehot = (pd.DatetimeIndex(times).month.to_numpy()[:, None] == np.arange(1, 13)).astype(float)
+    losses_factor = config.total_losses_factor
+
+    n = grid_tilt.size
+    annual = np.empty(n)
+    annual_dc = np.empty(n)
+    poa_annual = np.empty(n)
+    monthly = np.empty((n, 12))
+    for start in range(0, n, max(1, chunk_size)):
+        sl = slice(start, start + max(1, chunk_size))
+        surf_tilt = grid_tilt[sl, None]
+        surf_az = grid_az[sl, None]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            aoi = irradiance.aoi(surf_tilt, surf_az, zenith, sun_azimuth)
+            total = irradiance.get_total_irradiance(
+                surf_tilt, surf_az, zenith, sun_azimuth, dni, ghi, dhi,
+                dni_extra=dni_extra.to_numpy(), airmass=airmass.to_numpy(),
+                albedo=ALBEDO, model="perez",
+            )
+            cell_temp = pvlib.temperature.sapm_cell(total["poa_global"], temp_air, wind_speed, **temp_params)
+            aoi_modifier = pvlib.iam.physical(aoi)
+        p_mp, ac = _candidate_power_arrays(
+            aoi, aoi_modifier, total["poa_direct"], total["poa_diffuse"], cell_temp,
+            module_params, inverter_params, modules_per_string, strings_parallel,
+        )
+
+        # Misma limpieza, escalado por inversores y perdidas que run_pv_simulation
+        dc_power = np.where(np.isnan(p_mp), 0.0, p_mp)
+        ac_power = np.where(np.isnan(ac), 0.0, ac)
+        if num_inverters > 1:
+            dc_power = dc_power * float(num_inverters)
+            ac_power = ac_power * float(num_inverters)
+        dc_power = np.maximum(dc_power, 0.0)
+        ac_energy = np.maximum(ac_power, 0.0) * losses_factor * dt / 1000
+        annual[sl] = ac_energy.sum(axis=1)
+        annual_dc[sl] = (dc_power * dt / 1000).sum(axis=1)
+        poa_annual[sl] = np.asarray(total["poa_global"]).sum(axis=1) * dt / 1000
+        monthly[sl] = ac_energy @ month_onehot
+
+    pmp_w = float(module_params.get("Vmpo", 0)) * float(module_params.get("Impo", 0))
+    system_dc_kw = total_modules * pmp_w / 1000
+    area_modules = total_modules * _get_module_area(module_params)
+    ghi_annual = float(ghi.sum() * dt / 1000)
+    specific_yield = annual / system_dc_kw if system_dc_kw > 0 else np.zeros(n)
+    shape = (tilt_axis.size, az_axis.size)
+    sweep = OrientationSweep(
+        tilts=tilt_axis,
+        azimuths=az_axis,
+        annual_kwh=annual.reshape(shape),
+        annual_dc_kwh=annual_dc.reshape(shape),
+        monthly_kwh=monthly.reshape(*shape, 12),
+        poa_annual_kwh_m2=poa_annual.reshape(shape),
+        energy_per_m2=(annual / area_modules if area_modules > 0 else np.zeros(n)).reshape(shape),
+        specific_yield=specific_yield.reshape(shape),
+        performance_ratio=(specific_yield / ghi_annual if ghi_annual > 0 else np.zeros(n)).reshape(shape),
+        ghi_annual_kwh_m2=ghi_annual,
+        system_dc_kw=system_dc_kw,
+        area_modules_m2=area_modules,
+    )
+    if log:
+        best = sweep.best("energy_per_m2")
+        print(
+            f"[OK] Barrido de orientaciones: {n} (tilt x azimut = {shape[0]} x {shape[1]}) "
+            f"en {time.perf_counter() - t0:.2f} s | mejor tilt={best['tilt']:.0f}°, "
+            f"azimut={best['azimuth']:.0f}° ({best['annual_kwh']:,.0f} kWh/ano)"
+        )
+    return sweep
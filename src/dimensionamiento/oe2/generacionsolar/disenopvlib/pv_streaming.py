@@ -0,0 +1,362 @@
+"""Simulacion FV por bloques de tiempo (sub-horaria y multi-anual) con memoria acotada.
+
+``build_pv_timeseries_sandia`` interpola el ano completo a 15 min (o menos)
+con ``_interpolate_to_interval`` y guarda todos los resultados en un
+DataFrame; para varios anos o analisis de recorte a 1 minuto eso no cabe en
+memoria. Aqui el clima horario se procesa en bloques de ``chunk_hours``:
+
+1. Interpolar el bloque (con la hora frontera del siguiente, asi el
+   resultado es el mismo que interpolar todo el horizonte).
+2. Simular el bloque (misma cadena que run_pv_simulation, sin cache).
+3. Agregar: PVStreamAccumulator lleva los totales de calculate_statistics,
+   la energia diaria y el agregado horario; el bloque sub-horario puede ir a
+   un escritor (``chunk_sink``) y el horario a otro (``hourly_sink``).
+
+La memoria pico depende de ``chunk_hours`` y de la resolucion, no del
+horizonte (salvo el agregado horario si ``keep_hourly=True``).
+
+Uso:
+    out = simulate_pv_streaming(tmy, config, module_params, inverter_params,
+                                modules_per_string=16, strings_parallel=12_000,
+                                total_modules=192_000, num_inverters=2,
+                                minutes=1, chunk_hours=24 * 7,
+                                chunk_sink=CsvChunkWriter("pv_1min.csv"))
+    out["statistics"]   # mismas llaves que calculate_statistics()
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .solar_pvlib import (
+        FACTOR_CO2_KG_KWH, OSINERGMIN_TARIFF, PVSystemConfig, _log_statistics, compute_irradiance_stage,
+        simulate_candidate_power,
+    )
+    from src.utils.energy_accounting import account_flows
+except ImportError:  # Ejecucion directa: python .../disenopvlib/pv_streaming.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[5]))
+    from src.dimensionamiento.oe2.generacionsolar.disenopvlib.solar_pvlib import (  # type: ignore[no-redef]
+        FACTOR_CO2_KG_KWH, OSINERGMIN_TARIFF, PVSystemConfig, _log_statistics, compute_irradiance_stage,
+        simulate_candidate_power,
+    )
+    from src.utils.energy_accounting import account_flows  # type: ignore[no-redef]
+
+IRRADIANCE_COLUMNS = ("ghi", "dni", "dhi")
+
+# Agregado horario: columna de resultados -> funcion de agregacion de pandas (misma columna en la salida)
+HOURLY_AGGREGATES = {
+    "ac_energy_kwh": "sum",
+    "dc_energy_kwh": "sum",
+    "ac_power_kw": "mean",
+    "ghi_wm2": "mean",
+    "temp_air_c": "mean",
+    "ahorro_solar_soles": "sum",
+    "reduccion_indirecta_co2_kg": "sum",
+}
+
+
+def iter_weather_chunks(tmy_data: pd.DataFrame, minutes: int = 60, chunk_hours: int = 720) -> Iterator[pd.DataFrame]:
+    """Bloques de clima interpolados a `minutes`, equivalentes a _interpolate_to_interval por tramos.
+
+    Cada bloque cubre `chunk_hours` filas horarias; se interpola incluyendo la
+    primera hora del bloque siguiente y se descarta ese punto frontera.
+    """
+    if chunk_hours <= 0:
+        raise ValueError("chunk_hours debe ser positivo")
+    n = len(tmy_data)
+    for start in range(0, n, chunk_hours):
+        stop = min(start + chunk_hours, n)
+        if minutes >= 60:
+            yield tmy_data.iloc[start:stop]
+            continue
+        block = tmy_data.iloc[start:min(stop + 1, n)]
+        new_index = pd.date_range(start=block.index[0], end=block.index[-1], freq=f"{minutes}min")
+        interp = block.reindex(new_index).interpolate(method="linear")  # type: ignore[attr-defined]
+        for col in IRRADIANCE_COLUMNS:
+            if col in interp.columns:
+                interp[col] = interp[col].clip(lower=0)  # type: ignore[attr-defined]
+        if stop < n:
+            interp = interp.loc[interp.index < tmy_data.index[stop]]
+        yield interp
+
+
+def simulate_chunk(
+    weather: pd.DataFrame,
+    config: PVSystemConfig,
+    module_params: pd.Series,
+    inverter_params: pd.Series,
+    modules_per_string: int,
+    strings_parallel: int,
+    num_inverters: int,
+    dt_hours: float,
+) -> pd.DataFrame:
+    """Resultados de un bloque con las mismas columnas que run_pv_simulation."""
+    stage = compute_irradiance_stage(weather, config, module_params, inverter_params, log=False, use_cache=False)
+    p_mp, ac = simulate_candidate_power(stage, module_params, inverter_params, modules_per_string, strings_parallel)
+
+    # Misma limpieza, escalado y perdidas que run_pv_simulation
+    dc_power = np.where(np.isnan(p_mp), 0.0, p_mp)
+    ac_power = np.where(np.isnan(ac), 0.0, ac)
+    if num_inverters > 1:
+        dc_power = dc_power * float(num_inverters)
+        ac_power = ac_power * float(num_inverters)
+    dc_power = np.maximum(dc_power, 0.0)
+    ac_power_final = np.maximum(ac_power, 0.0) * config.total_losses_factor
+
+    masked = stage.weather
+    results = pd.DataFrame(
+        {
+            "ghi_wm2": masked["ghi"].to_numpy(dtype=float),
+            "dni_wm2": masked["dni"].to_numpy(dtype=float),
+            "dhi_wm2": masked["dhi"].to_numpy(dtype=float),
+            "temp_air_c": masked["temp_air"].to_numpy(dtype=float),
+            "wind_speed_ms": masked["wind_speed"].to_numpy(dtype=float),
+            "dc_power_kw": dc_power / 1000,
+            "ac_power_kw": ac_power_final / 1000,
+            "dc_energy_kwh": dc_power * dt_hours / 1000,
+            "ac_energy_kwh": ac_power_final * dt_hours / 1000,
+        },
+        index=masked.index,
+    )
+    results.index.name = "datetime"
+
+    acc = account_flows(
+        {"ac_energy_kwh": results["ac_energy_kwh"].to_numpy()},
+        OSINERGMIN_TARIFF,
+        hour_of_day=pd.DatetimeIndex(results.index).hour.to_numpy(),
+    )
+    results["is_hora_punta"] = acc.is_hp.astype(int)
+    results["tarifa_aplicada_soles"] = acc.tariff_soles_kwh
+    results["ahorro_solar_soles"] = acc.cost("ac_energy_kwh")
+    results["reduccion_indirecta_co2_kg"] = acc.co2("ac_energy_kwh")
+    return results
+
+
+class PVStreamAccumulator:
+    """Acumula por bloques las metricas de calculate_statistics y los agregados horario/diario."""
+
+    def __init__(
+        self,
+        dt_hours: float,
+        system_dc_kw: float,
+        system_ac_kw: float,
+        keep_hourly: bool = True,
+        hourly_sink: Optional[Callable[[pd.DataFrame], None]] = None,
+    ):
+        self.dt_hours = dt_hours
+        self.system_dc_kw = system_dc_kw
+        self.system_ac_kw = system_ac_kw
+        self.keep_hourly = keep_hourly
+        self.hourly_sink = hourly_sink
+
+        self.n_points = 0
+        self.n_chunks = 0
+        self.annual_ac_kwh = 0.0
+        self.annual_dc_kwh = 0.0
+        self.ghi_sum = 0.0
+        self.ac_power_sum = 0.0
+        self.points_with_production = 0
+        self.max_power_kw = -np.inf
+        self.max_power_timestamp: Optional[pd.Timestamp] = None
+        self.max_interval_energy = 0.0
+        self.ahorro = {0: 0.0, 1: 0.0}
+        self.energia = {0: 0.0, 1: 0.0}
+        self.co2_kg = 0.0
+        self.daily_kwh: dict[pd.Timestamp, float] = {}
+        self._hourly: list[pd.DataFrame] = []
+
+    def add(self, results: pd.DataFrame) -> None:
+        """Agrega un bloque de resultados (columnas de run_pv_simulation)."""
+        if results.empty:
+            return
+        self.n_chunks += 1
+        self.n_points += len(results)
+        ac_kw = results["ac_power_kw"].to_numpy()
+        ac_kwh = results["ac_energy_kwh"].to_numpy()
+        self.annual_ac_kwh += float(ac_kwh.sum())
+        self.annual_dc_kwh += float(results["dc_energy_kwh"].to_numpy().sum())
+        self.ghi_sum += float(results["ghi_wm2"].to_numpy().sum())
+        self.ac_power_sum += float(ac_kw.sum())
+        self.points_with_production += int((ac_kw > 0).sum())
+
+        k = int(np.argmax(ac_kw))
+        if ac_kw[k] > self.max_power_kw:
+            self.max_power_kw = float(ac_kw[k])
+            self.max_power_timestamp = results.index[k]
+            self.max_interval_energy = float(ac_kwh[k])
+
+        is_hp = results["is_hora_punta"].to_numpy() == 1
+        ahorro = results["ahorro_solar_soles"].to_numpy()
+        self.ahorro[1] += float(ahorro[is_hp].sum())
+        self.ahorro[0] += float(ahorro[~is_hp].sum())
+        self.energia[1] += float(ac_kwh[is_hp].sum())
+        self.energia[0] += float(ac_kwh[~is_hp].sum())
+        self.co2_kg += float(results["reduccion_indirecta_co2_kg"].to_numpy().sum())
+
+        daily = results["ac_energy_kwh"].resample("D").sum()  # type: ignore[attr-defined]
+        for day, kwh in daily.items():
+            self.daily_kwh[day] = self.daily_kwh.get(day, 0.0) + float(kwh)
+
+        if self.keep_hourly or self.hourly_sink is not None:
+            hourly = results[list(HOURLY_AGGREGATES)].resample("h").agg(HOURLY_AGGREGATES)  # type: ignore[attr-defined]
+            hourly["ac_power_max_kw"] = results["ac_power_kw"].resample("h").max()  # type: ignore[attr-defined]
+            if self.hourly_sink is not None:
+                self.hourly_sink(hourly)
+            if self.keep_hourly:
+                self._hourly.append(hourly)
+
+    @property
+    def hourly(self) -> Optional[pd.DataFrame]:
+        # Los bloques empiezan en horas enteras: ninguna hora queda partida
+        return pd.concat(self._hourly) if self._hourly else None
+
+    @property
+    def daily(self) -> pd.Series:
+        days = sorted(self.daily_kwh)
+        return pd.Series([self.daily_kwh[d] for d in days], index=pd.DatetimeIndex(days), name="ac_energy_kwh")
+
+    @property
+    def monthly(self) -> pd.Series:
+        monthly = self.daily.resample("ME").sum()  # type: ignore[attr-defined]
+        monthly.name = "kWh"
+        return monthly
+
+    def statistics(self, log: bool = True) -> dict[str, Any]:
+        """Mismas llaves y definiciones que calculate_statistics()."""
+        dt = self.dt_hours
+        annual_ac_kwh = self.annual_ac_kwh
+        ghi_annual = self.ghi_sum * dt / 1000
+        specific_yield = annual_ac_kwh / self.system_dc_kw if self.system_dc_kw > 0 else 0
+        hours_year = self.n_points * dt
+        capacity_factor = annual_ac_kwh / (self.system_ac_kw * hours_year) if self.system_ac_kw > 0 else 0
+        equivalent_hours = annual_ac_kwh / self.system_ac_kw if self.system_ac_kw > 0 else 0
+        performance_ratio = specific_yield / ghi_annual if ghi_annual > 0 else 0
+        hours_with_production = self.points_with_production * dt
+
+        daily = self.daily
+        max_daily_energy = float(daily.max()) if not daily.empty else 0.0
+        max_daily_date = str(pd.Timestamp(daily.idxmax()).date()) if not daily.empty else ""
+        ahorro_total = self.ahorro[0] + self.ahorro[1]
+
+        stats: dict[str, Any] = {
+            "annual_ac_kwh": annual_ac_kwh,
+            "annual_dc_kwh": self.annual_dc_kwh,
+            "specific_yield": specific_yield,
+            "capacity_factor": capacity_factor,
+            "performance_ratio": performance_ratio,
+            "equivalent_hours": equivalent_hours,
+            "max_power_kw": self.max_power_kw if self.n_points else 0.0,
+            "mean_power_kw": self.ac_power_sum / self.n_points if self.n_points else 0.0,
+            "max_daily_energy_kwh": max_daily_energy,
+            "max_daily_energy_date": max_daily_date,
+            "max_power_timestamp": str(self.max_power_timestamp),
+            "hours_with_production": int(hours_with_production),
+            # Metricas economicas y CO2
+            "ahorro_total_soles": ahorro_total,
+            "ahorro_hp_soles": self.ahorro[1],
+            "ahorro_hfp_soles": self.ahorro[0],
+            "energia_hp_kwh": self.energia[1],
+            "energia_hfp_kwh": self.energia[0],
+            # CO2 reduccion indirecta (generacion solar desplaza diesel)
+            "co2_reduccion_kg": self.co2_kg,
+            "co2_reduccion_ton": self.co2_kg / 1000,
+            "factor_co2_kg_kwh": FACTOR_CO2_KG_KWH,
+        }
+        if log:
+            print("\n" + "=" * 60)
+            print("  ESTADISTICAS DEL SISTEMA (TMY PVGIS, POR BLOQUES)")
+            print("=" * 60)
+            _log_statistics(stats, self.max_interval_energy, hours_with_production)
+        return stats
+
+
+class CsvChunkWriter:
+    """Escritor incremental a CSV (encabezado solo en el primer bloque)."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._started = False
+
+    def __call__(self, frame: pd.DataFrame) -> None:
+        frame.to_csv(self.path, mode="a" if self._started else "w", header=not self._started)
+        self._started = True
+
+
+def simulate_pv_streaming(
+    tmy_data: pd.DataFrame,
+    config: PVSystemConfig,
+    module_params: pd.Series,
+    inverter_params: pd.Series,
+    modules_per_string: int,
+    strings_parallel: int,
+    total_modules: int,
+    num_inverters: int,
+    minutes: int = 15,
+    chunk_hours: int = 720,
+    system_ac_kw: Optional[float] = None,
+    chunk_sink: Optional[Callable[[pd.DataFrame], None]] = None,
+    hourly_sink: Optional[Callable[[pd.DataFrame], None]] = None,
+    keep_hourly: bool = True,
+    log: bool = True,
+) -> dict[str, Any]:
+    """Simula el horizonte del clima horario `tmy_data` por bloques con memoria acotada.
+
+    Args:
+        tmy_data: Clima horario (uno o varios anos) con indice local
+        config: Ubicacion, orientacion y perdidas
+        module_params, inverter_params, modules_per_string, strings_parallel,
+            total_modules, num_inverters: Layout (como run_pv_simulation)
+        minutes: Resolucion de simulacion (60 = horaria)
+        chunk_hours: Horas de clima por bloque (multiplo de 24 recomendado)
+        system_ac_kw: Potencia AC para factor de planta (default: Paco x inversores)
+        chunk_sink: Recibe cada bloque de resultados sub-horarios
+        hourly_sink: Recibe el agregado horario de cada bloque
+        keep_hourly: Conservar el agregado horario completo en memoria
+
+    Returns:
+        dict con statistics, hourly (o None), daily_kwh, monthly_kwh, n_points,
+        n_chunks, max_chunk_points, elapsed_s
+    """
+    dt_hours = min(minutes, 60) / 60
+    pmp = float(module_params.get("Vmpo", 17)) * float(module_params.get("Impo", 1.19))
+    system_dc_kw = total_modules * pmp / 1000
+    if system_ac_kw is None:
+        system_ac_kw = float(inverter_params.get("Paco", 0)) * num_inverters / 1000
+
+    acc = PVStreamAccumulator(dt_hours, system_dc_kw, system_ac_kw, keep_hourly=keep_hourly, hourly_sink=hourly_sink)
+    max_chunk_points = 0
+    t0 = time.perf_counter()
+    for weather in iter_weather_chunks(tmy_data, minutes=minutes, chunk_hours=chunk_hours):
+        results = simulate_chunk(
+            weather, config, module_params, inverter_params,
+            modules_per_string, strings_parallel, num_inverters, dt_hours,
+        )
+        max_chunk_points = max(max_chunk_points, len(results))
+        acc.add(results)
+        if chunk_sink is not None:
+            chunk_sink(results)
+    elapsed = time.perf_counter() - t0
+
+    if log:
+        print(
+            f"[OK] Simulacion por bloques: {acc.n_points:,} puntos a {minutes} min en {acc.n_chunks} bloques "
+            f"(max {max_chunk_points:,} puntos/bloque) en {elapsed:.1f} s"
+        )
+    return {
+        "statistics": acc.statistics(log=log),
+        "hourly": acc.hourly,
+        "daily_kwh": acc.daily,
+        "monthly_kwh": acc.monthly,
+        "n_points": acc.n_points,
+        "n_chunks": acc.n_chunks,
+        "max_chunk_points": max_chunk_points,
+        "elapsed_s": elapsed,
+    }
@@ -0,0 +1,429 @@
+"""Sustituto rapido (regresion calibrada) del ModelChain Sandia + Perez.
+
+``run_pv_simulation`` resuelve posicion solar, transposicion Perez, IAM,
+temperatura SAPM, modelo SAPM y el inversor Sandia; es la referencia pero
+requiere pvlib y varios milisegundos por ano. Para barridos, estudios
+Monte-Carlo de clima y los entornos de entrenamiento se ajusta aqui, una vez
+por sitio y sistema, una regresion lineal de la potencia AC sobre
+caracteristicas fisicas de GHI/DNI/DHI/temperatura/viento y posicion solar:
+
+- Posicion solar (formulas NOAA) y AOI del plano se calculan con NumPy puro.
+- Caracteristicas: haz directo en el plano, difusa isotropica y
+  circunsolar, reflejada por el suelo, terminos de IAM y de temperatura de
+  celda (POA x T_aire, POA^2, POA^2 x viento).
+- La salida se recorta a [0, limite AC del inversor x perdidas]; el ajuste
+  usa solo las horas diurnas sin recorte.
+
+El error se documenta con validacion cruzada por dias intercalados y se
+guarda junto a los coeficientes (JSON). La prediccion no usa pvlib.
+
+Uso:
+    surrogate = fit_pv_surrogate(tmy, config, module_params, inverter_params,
+                                 modules_per_string=16, strings_parallel=12_000,
+                                 total_modules=192_000, num_inverters=2)
+    surrogate.save()                       # data/oe2/Generacionsolar/pv_surrogate.json
+    ac_kw = PVSurrogate.load().predict(weather)   # columnas ghi, dni, dhi, temp_air, wind_speed
+
+    python -m src.dimensionamiento.oe2.generacionsolar.disenopvlib.pv_surrogate fit
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .solar_pvlib import PVSystemConfig, run_pv_simulation
+except ImportError:  # Ejecucion directa: python .../disenopvlib/pv_surrogate.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[5]))
+    from src.dimensionamiento.oe2.generacionsolar.disenopvlib.solar_pvlib import (  # type: ignore[no-redef]
+        PVSystemConfig, run_pv_simulation,
+    )
+
+PV_SURROGATE_FORMAT_VERSION = 1
+DEFAULT_SURROGATE_PATH = Path("data/oe2/Generacionsolar/pv_surrogate.json")
+WEATHER_COLUMNS = ("ghi", "dni", "dhi", "temp_air", "wind_speed")
+FEATURE_NAMES = (
+    "beam_poa",           # DNI x cos(AOI)
+    "beam_poa_iam",       # DNI x cos(AOI)^2 (perdida angular)
+    "sky_isotropic",      # DHI x (1 + cos(tilt)) / 2
+    "sky_circumsolar",    # DHI x cos(AOI) / cos(zenith)
+    "ground",             # GHI x albedo x (1 - cos(tilt)) / 2
+    "poa_temp_air",       # POA x T_aire
+    "poa_squared",        # POA^2 / 1000
+    "poa_squared_wind",   # POA^2 x viento / 1000
+)
+ALBEDO = 0.25
+_MIN_COS_ZENITH = 0.087  # ~85°, como el limite de la componente circunsolar de Perez
+
+
+def solar_position(times: pd.DatetimeIndex, latitude: float, longitude: float) -> tuple[np.ndarray, np.ndarray]:
+    """Cenit y azimut solar [grados] con las formulas NOAA (sin pvlib).
+
+    Error tipico < 0.1° frente a NREL SPA; no incluye refraccion.
+    """
+    index = pd.DatetimeIndex(times)
+    utc = index.tz_convert("UTC") if index.tz is not None else index
+    ns = utc.as_unit("ns").asi8.astype(np.float64)
+    jc = (ns / 86_400e9 + 2440587.5 - 2451545.0) / 36525.0
+
+    mean_long = np.radians((280.46646 + jc * (36000.76983 + jc * 0.0003032)) % 360)
+    mean_anom = np.radians(357.52911 + jc * (35999.05029 - 0.0001537 * jc))
+    ecc = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+    center = (
+        np.sin(mean_anom) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+        + np.sin(2 * mean_anom) * (0.019993 - 0.000101 * jc)
+        + np.sin(3 * mean_anom) * 0.000289
+    )
+    omega = np.radians(125.04 - 1934.136 * jc)
+    app_long = np.radians(np.degrees(mean_long) + center - 0.00569 - 0.00478 * np.sin(omega))
+    mean_obliq = 23 + (26 + (21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))) / 60) / 60
+    obliq = np.radians(mean_obliq + 0.00256 * np.cos(omega))
+    decl = np.arcsin(np.sin(obliq) * np.sin(app_long))
+
+    y = np.tan(obliq / 2) ** 2
+    eot_min = 4 * np.degrees(
+        y * np.sin(2 * mean_long)
+        - 2 * ecc * np.sin(mean_anom)
+        + 4 * ecc * y * np.sin(mean_anom) * np.cos(2 * mean_long)
+        - 0.5 * y * y * np.sin(4 * mean_long)
+        - 1.25 * ecc * ecc * np.sin(2 * mean_anom)
+    )
+    minutes_utc = (ns / 60e9) % 1440
+    solar_time = (minutes_utc + eot_min + 4 * longitude) % 1440
+    hour_angle = np.radians(solar_time / 4 - 180)
+
+    lat = np.radians(latitude)
+    cos_zen = np.sin(lat) * np.sin(decl) + np.cos(lat) * np.cos(decl) * np.cos(hour_angle)
+    zenith = np.degrees(np.arccos(np.clip(cos_zen, -1.0, 1.0)))
+    azimuth = (np.degrees(np.arctan2(
+        np.sin(hour_angle), np.cos(hour_angle) * np.sin(lat) - np.tan(decl) * np.cos(lat)
+    )) + 180) % 360
+    return zenith, azimuth
+
+
+def surrogate_features(
+    times: pd.DatetimeIndex,
+    ghi: Any,
+    dni: Any,
+    dhi: Any,
+    temp_air: Any,
+    wind_speed: Any,
+    latitude: float,
+    longitude: float,
+    surface_tilt: float,
+    surface_azimuth: float,
+    albedo: float = ALBEDO,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Matriz (..., pasos, FEATURE_NAMES) y mascara diurna (cenit < 90°).
+
+    La meteorologia puede ser (pasos,) o (K, pasos), p. ej. los anos de
+    synthetic_weather: la posicion solar se calcula una vez para los K anos.
+    """
+    zenith, sun_azimuth = solar_position(times, latitude, longitude)
+    day = zenith < 90
+    zen = np.radians(zenith)
+    tilt = np.radians(surface_tilt)
+    cos_zen = np.cos(zen)
+    cos_aoi = np.clip(
+        cos_zen * np.cos(tilt) + np.sin(zen) * np.sin(tilt) * np.cos(np.radians(sun_azimuth - surface_azimuth)),
+        0.0, 1.0,
+    )
+    ghi = np.where(day, np.asarray(ghi, dtype=np.float64), 0.0)
+    dni = np.where(day, np.asarray(dni, dtype=np.float64), 0.0)
+    dhi = np.where(day, np.asarray(dhi, dtype=np.float64), 0.0)
+    temp_air = np.asarray(temp_air, dtype=np.float64)
+    wind_speed = np.asarray(wind_speed, dtype=np.float64)
+
+    beam = dni * cos_aoi
+    sky = dhi * (1 + np.cos(tilt)) / 2
+    ground = ghi * albedo * (1 - np.cos(tilt)) / 2
+    poa = beam + sky + ground
+    features = np.stack([
+        beam,
+        beam * cos_aoi,
+        sky,
+        dhi * cos_aoi / np.maximum(cos_zen, _MIN_COS_ZENITH),
+        ground,
+        poa * temp_air,
+        poa * poa / 1000,
+        poa * poa * wind_speed / 1000,
+    ], axis=-1)
+    return features, day
+
+
+@dataclass(frozen=True)
+class PVSurrogate:
+    """Coeficientes del sustituto para un sitio, orientacion y sistema."""
+
+    latitude: float
+    longitude: float
+    surface_tilt: float
+    surface_azimuth: float
+    coefficients: tuple[float, ...]
+    ac_cap_kw: float                  # Limite AC de los inversores x perdidas
+    albedo: float = ALBEDO
+    feature_names: tuple[str, ...] = FEATURE_NAMES
+    system: dict[str, Any] = field(default_factory=dict)
+    validation: dict[str, float] = field(default_factory=dict)
+
+    def predict_arrays(
+        self,
+        times: pd.DatetimeIndex,
+        ghi: Any,
+        dni: Any,
+        dhi: Any,
+        temp_air: Any,
+        wind_speed: Any,
+    ) -> np.ndarray:
+        """Potencia AC [kW] con perdidas (como ``ac_power_kw`` de run_pv_simulation).
+
+        Acepta meteorologia (pasos,) o (K, pasos); devuelve la misma forma.
+        """
+        features, day = surrogate_features(
+            times, ghi, dni, dhi, temp_air, wind_speed,
+            self.latitude, self.longitude, self.surface_tilt, self.surface_azimuth, self.albedo,
+        )
+        ac = features @ np.asarray(self.coefficients)
+        return np.where(day, np.clip(ac, 0.0, self.ac_cap_kw), 0.0)
+
+    def predict(self, weather: pd.DataFrame) -> np.ndarray:
+        """Potencia AC [kW] para un DataFrame con DatetimeIndex y WEATHER_COLUMNS."""
+        missing = [c for c in WEATHER_COLUMNS if c not in weather.columns]
+        if missing:
+            raise ValueError(f"Faltan columnas meteorologicas: {missing}")
+        return self.predict_arrays(
+            pd.DatetimeIndex(weather.index), *(weather[c].to_numpy(dtype=np.float64) for c in WEATHER_COLUMNS)
+        )
+
+    def save(self, path: str | Path = DEFAULT_SURROGATE_PATH) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"format_version": PV_SURROGATE_FORMAT_VERSION, **asdict(self)}
+        path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path = DEFAULT_SURROGATE_PATH) -> "PVSurrogate":
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        version = int(payload.pop("format_version", 0))
+        if version > PV_SURROGATE_FORMAT_VERSION:
+            raise ValueError(f"Sustituto PV v{version} no soportado: {path}")
+        payload["coefficients"] = tuple(payload["coefficients"])
+        payload["feature_names"] = tuple(payload["feature_names"])
+        if payload["feature_names"] != FEATURE_NAMES:
+            raise ValueError(f"Caracteristicas del sustituto incompatibles: {payload['feature_names']}")
+        return cls(**payload)
+
+
+def _fit_coefficients(features: np.ndarray, target: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Minimos cuadrados sin intercepto (columnas escaladas para estabilidad)."""
+    x = features[mask]
+    scale = np.abs(x).max(axis=0)
+    scale[scale == 0] = 1.0
+    coef, *_ = np.linalg.lstsq(x / scale, target[mask], rcond=None)
+    return coef / scale
+
+
+def _error_metrics(pred: np.ndarray, target: np.ndarray, day_of_sample: np.ndarray, dt_hours: float) -> dict[str, float]:
+    err = pred - target
+    abs_err = np.abs(err)
+    daytime = target > 0
+    mean_day = float(target[daytime].mean()) if daytime.any() else 1.0
+    energy, energy_pred = float(target.sum()), float(pred.sum())
+    daily = np.bincount(day_of_sample, weights=target)
+    daily_pred = np.bincount(day_of_sample, weights=pred)
+    valid = daily > 0
+    return {
+        "rmse_kw": float(np.sqrt(np.mean(err ** 2))),
+        "nrmse_daytime": float(np.sqrt(np.mean(err[daytime] ** 2)) / mean_day) if daytime.any() else 0.0,
+        "mae_kw": float(abs_err.mean()),
+        "p95_abs_error_kw": float(np.percentile(abs_err, 95)),
+        "p99_abs_error_kw": float(np.percentile(abs_err, 99)),
+        "max_abs_error_kw": float(abs_err.max()),
+        "energy_error_pct": (energy_pred - energy) / energy * 100 if energy > 0 else 0.0,
+        "daily_energy_max_error_pct": float(
+            np.max(np.abs(daily_pred[valid] / daily[valid] - 1)) * 100 if valid.any() else 0.0
+        ),
+        "energy_kwh": energy * dt_hours,
+    }
+
+
+def fit_pv_surrogate(
+    tmy_data: pd.DataFrame | Sequence[pd.DataFrame],
+    config: PVSystemConfig,
+    module_params: pd.Series,
+    inverter_params: pd.Series,
+    modules_per_string: int,
+    strings_parallel: int,
+    total_modules: int,
+    num_inverters: int,
+    n_folds: int = 4,
+    clip_margin: float = 0.98,
+    log: bool = True,
+) -> PVSurrogate:
+    """Ajusta el sustituto con salidas del ModelChain (run_pv_simulation).
+
+    Args:
+        tmy_data: Uno o varios anos meteorologicos de entrenamiento (indice local)
+        config, module_params, inverter_params, ...: Sistema de referencia
+        n_folds: Pliegues de validacion cruzada (dias intercalados)
+        clip_margin: Horas con AC >= margen x limite se excluyen del ajuste (recorte)
+
+    Returns:
+        PVSurrogate con ``validation``: errores fuera de muestra (RMSE, p95/p99,
+        error de energia anual y diaria) que acotan el error de prediccion
+    """
+    frames = [tmy_data] if isinstance(tmy_data, pd.DataFrame) else list(tmy_data)
+    if not frames:
+        raise ValueError("Se requiere al menos un ano meteorologico")
+
+    t0 = time.perf_counter()
+    feature_blocks, target_blocks, day_blocks, day_masks = [], [], [], []
+    dt_hours = 1.0
+    day_offset = 0
+    for frame in frames:
+        results, metadata = run_pv_simulation(
+            frame, config, module_params, inverter_params,
+            modules_per_string, strings_parallel, total_modules, num_inverters, log=False,
+        )
+        dt_hours = float(metadata["dt_hours"])
+        features, day = surrogate_features(
+            pd.DatetimeIndex(frame.index), *(frame[c].to_numpy(dtype=np.float64) for c in WEATHER_COLUMNS),
+            config.latitude, config.longitude, config.tilt, config.azimuth,
+        )
+        feature_blocks.append(features)
+        target_blocks.append(results["ac_power_kw"].to_numpy(dtype=np.float64))
+        day_masks.append(day)
+        steps_per_day = int(round(24 / dt_hours))
+        day_blocks.append(day_offset + np.arange(len(frame)) // steps_per_day)
+        day_offset += int(np.ceil(len(frame) / steps_per_day))
+    features = np.vstack(feature_blocks)
+    target = np.concatenate(target_blocks)
+    day = np.concatenate(day_masks)
+    day_of_sample = np.concatenate(day_blocks)
+
+    ac_cap_kw = float(inverter_params["Paco"]) * num_inverters * config.total_losses_factor / 1000
+    fit_mask = day & (target > 0) & (target < clip_margin * ac_cap_kw)
+
+    def _predict(coef: np.ndarray) -> np.ndarray:
+        return np.where(day, np.clip(features @ coef, 0.0, ac_cap_kw), 0.0)
+
+    # Validacion cruzada: cada pliegue deja fuera un dia de cada n_folds
+    pred_cv = np.zeros_like(target)
+    for fold in range(max(2, n_folds)):
+        held_out = day_of_sample % max(2, n_folds) == fold
+        coef = _fit_coefficients(features, target, fit_mask & ~held_out)
+        pred_cv[held_out] = _predict(coef)[held_out]
+    validation = _error_metrics(pred_cv, target, day_of_sample, dt_hours)
+    coef = _fit_coefficients(features, target, fit_mask)
+    validation.update({f"in_sample_{k}": v for k, v in _error_metrics(_predict(coef), target, day_of_sample, dt_hours).items()
+                       if k in ("rmse_kw", "energy_error_pct")})
+    validation["n_samples"] = float(len(target))
+    validation["n_folds"] = float(max(2, n_folds))
+
+    surrogate = PVSurrogate(
+        latitude=config.latitude,
+        longitude=config.longitude,
+        surface_tilt=config.tilt,
+        surface_azimuth=config.azimuth,
+        coefficients=tuple(float(c) for c in coef),
+        ac_cap_kw=ac_cap_kw,
+        system={
+            "module": str(module_params.name),
+            "inverter": str(inverter_params.name),
+            "modules_per_string": int(modules_per_string),
+            "strings_parallel": int(strings_parallel),
+            "total_modules": int(total_modules),
+            "num_inverters": int(num_inverters),
+            "losses_factor": float(config.total_losses_factor),
+            "n_training_years": len(frames),
+        },
+        validation=validation,
+    )
+    if log:
+        print(
+            f"[OK] Sustituto PV ajustado en {time.perf_counter() - t0:.2f} s "
+            f"({len(target):,} pasos, {len(frames)} ano(s)) | validacion {max(2, n_folds)} pliegues: "
+            f"RMSE {validation['rmse_kw']:.1f} kW (nRMSE diurno {validation['nrmse_daytime']:.2%}), "
+            f"p99 |error| {validation['p99_abs_error_kw']:.1f} kW, "
+            f"energia anual {validation['energy_error_pct']:+.2f}%"
+        )
+    return surrogate
+
+
+def evaluate_surrogate(
+    surrogate: PVSurrogate,
+    tmy_data: pd.DataFrame,
+    config: PVSystemConfig,
+    module_params: pd.Series,
+    inverter_params: pd.Series,
+    modules_per_string: int,
+    strings_parallel: int,
+    total_modules: int,
+    num_inverters: int,
+) -> dict[str, float]:
+    """Errores del sustituto frente al ModelChain en otro ano meteorologico."""
+    results, metadata = run_pv_simulation(
+        tmy_data, config, module_params, inverter_params,
+        modules_per_string, strings_parallel, total_modules, num_inverters, log=False,
+    )
+    dt_hours = float(metadata["dt_hours"])
+    t0 = time.perf_counter()
+    pred = surrogate.predict(tmy_data)
+    elapsed = time.perf_counter() - t0
+    target = results["ac_power_kw"].to_numpy(dtype=np.float64)
+    day_of_sample = np.arange(len(target)) // int(round(24 / dt_hours))
+    metrics = _error_metrics(pred, target, day_of_sample, dt_hours)
+    metrics["predict_s"] = elapsed
+    return metrics
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    try:
+        from .solar_pvlib import _get_cec_inverters, _get_pvgis_tmy, _get_sandia_modules, _localize_tmy
+    except ImportError:
+        from src.dimensionamiento.oe2.generacionsolar.disenopvlib.solar_pvlib import (  # type: ignore[no-redef]
+            _get_cec_inverters, _get_pvgis_tmy, _get_sandia_modules, _localize_tmy,
+        )
+
+    parser = argparse.ArgumentParser(description="Sustituto rapido del ModelChain PV")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fit = sub.add_parser("fit", help="Ajusta y guarda los coeficientes con el TMY del sitio")
+    fit.add_argument("--out", default=str(DEFAULT_SURROGATE_PATH), help="Archivo JSON de salida")
+    fit.add_argument("--modules-per-string", type=int, default=16)
+    fit.add_argument("--strings-parallel", type=int, default=12_000)
+    fit.add_argument("--num-inverters", type=int, default=2)
+    fit.add_argument("--year", type=int, default=2024, help="Ano del indice horario local")
+    fit.add_argument("--tmy-offline", action="store_true", help="Usar solo el cache TMY local")
+    show = sub.add_parser("show", help="Muestra los coeficientes y el error documentado")
+    show.add_argument("path", nargs="?", default=str(DEFAULT_SURROGATE_PATH))
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    if args.command == "show":
+        surrogate = PVSurrogate.load(args.path)
+        print(json.dumps({"system": surrogate.system, "validation": surrogate.validation}, indent=2))
+        return
+
+    config = PVSystemConfig()
+    tmy = _localize_tmy(_get_pvgis_tmy(config.latitude, config.longitude, offline=args.tmy_offline),
+                        config.timezone, args.year)
+    module = _get_sandia_modules()[config.module_name]
+    inverter = _get_cec_inverters()[config.inverter_name]
+    surrogate = fit_pv_surrogate(
+        tmy, config, module, inverter, args.modules_per_string, args.strings_parallel,
+        args.modules_per_string * args.strings_parallel, args.num_inverters,
+    )
+    print(f"[OK] Coeficientes guardados: {surrogate.save(args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -32,11 +32,17 @@ Referencias:
 
 from __future__ import annotations
 
+import functools
+import itertools
 import json
+import os
+import time
 import warnings
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from multiprocessing import shared_memory
 from pathlib import Path
-from typing import Any, Optional, Tuple
+from typing import Any, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd  # type: ignore[import]
@@ -61,6 +67,29 @@ except ImportError:  # pragma: no cover
 
 # pvlib y sus dependencias se importan al inicio (puede faltar en entornos de test).
 
+try:
+    from src.utils.energy_accounting import TariffSchedule, account_flows
+    from src.dimensionamiento.oe2.generacionsolar.disenopvlib.tmy_cache import (
+        TMYKey, get_cached_tmy, seed_tmy_cache,
+    )
+    from src.dimensionamiento.oe2.generacionsolar.disenopvlib.component_index import (
+        InverterIndex, ModuleIndex, load_component_index,
+    )
+    from src.dimensionamiento.oe2.generacionsolar.disenopvlib.synthetic_weather import generate_weather_years
+except ImportError:  # Ejecucion directa: raiz del proyecto fuera de sys.path
+    import sys
+    sys.path.insert(0, str(Path(__file__).resolve().parents[5]))
+    from src.utils.energy_accounting import TariffSchedule, account_flows  # type: ignore[no-redef]
+    from src.dimensionamiento.oe2.generacionsolar.disenopvlib.tmy_cache import (  # type: ignore[no-redef]
+        TMYKey, get_cached_tmy, seed_tmy_cache,
+    )
+    from src.dimensionamiento.oe2.generacionsolar.disenopvlib.component_index import (  # type: ignore[no-redef]
+        InverterIndex, ModuleIndex, load_component_index,
+    )
+    from src.dimensionamiento.oe2.generacionsolar.disenopvlib.synthetic_weather import (  # type: ignore[no-redef]
+        generate_weather_years,
+    )
+
 
 # ============================================================================
 # PARAMETROS DE DISENO IQUITOS (CONSTANTES DEL PROYECTO)
@@ -117,6 +146,15 @@ HORA_FIN_HP = 23  # Exclusivo (hasta las 22:59)
 
 FACTOR_CO2_KG_KWH = 0.4521  # kg CO2 / kWh (sistema termico diesel/residual)
 
+# Horario tarifario para la contabilidad vectorizada (src/utils/energy_accounting.py)
+OSINERGMIN_TARIFF = TariffSchedule(
+    hp_soles_kwh=TARIFA_ENERGIA_HP_SOLES,
+    hfp_soles_kwh=TARIFA_ENERGIA_HFP_SOLES,
+    hp_start_hour=HORA_INICIO_HP,
+    hp_end_hour=HORA_FIN_HP,
+    co2_kg_kwh=FACTOR_CO2_KG_KWH,
+)
+
 
 @dataclass(frozen=True)
 class SolarSizingOutput:
@@ -261,18 +299,35 @@ def _get_float_from_kwargs(name: str, default: float | str | int, kwargs: dict[s
         return float(default)
 
 
-def _get_pvgis_tmy(lat: float, lon: float, startyear: int = 2005, endyear: int = 2020) -> pd.DataFrame:
+def _get_pvgis_tmy(
+    lat: float,
+    lon: float,
+    startyear: int = 2005,
+    endyear: int = 2020,
+    usehorizon: bool = True,
+    offline: bool = False,
+    cache_dir: Optional[str | Path] = None,
+    refresh: bool = False,
+    seed_file: Optional[str | Path] = None,
+) -> pd.DataFrame:
     """
     Descarga datos TMY (Typical Meteorological Year) de PVGIS para la ubicacion.
 
     PVGIS proporciona datos de irradiancia y temperatura basados en satelite.
+    El TMY parseado se guarda en el cache local (tmy_cache.py) y las siguientes
+    ejecuciones no usan la red. Con `offline=True` una entrada faltante lanza
+    TMYUnavailableError en vez de generar datos sinteticos; `seed_file`
+    precarga el cache desde un archivo PVGIS/CSV local.
     """
-    print("Descargando datos TMY de PVGIS para Iquitos...")
-    _ensure_pvlib_available()
+    key = TMYKey(lat, lon, startyear, endyear, usehorizon)
+    if seed_file is not None:
+        print(f"Precargando cache TMY desde {seed_file}...")
+        seed_tmy_cache(seed_file, key, cache_dir)
 
-    exception_tuple: tuple[type[Exception], ...] = (requests.RequestException, ValueError)
+    def _download() -> Tuple[pd.DataFrame, dict[str, Any]]:
+        print("Descargando datos TMY de PVGIS para Iquitos...")
+        _ensure_pvlib_available()
 
-    try:
         # Intentar descargar de PVGIS con diferentes versiones de la API
         result = pvlib.iotools.get_pvgis_tmy(  # type: ignore[union-attr,attr-defined]
             latitude=lat,
@@ -280,13 +335,16 @@ def _get_pvgis_tmy(lat: float, lon: float, startyear: int = 2005, endyear: int =
             startyear=startyear,
             endyear=endyear,
             outputformat="json",
-            usehorizon=True,
+            usehorizon=usehorizon,
             map_variables=True,
         )
 
         # La funcion puede devolver 2 o 4 valores dependiendo de la version
+        source_meta: dict[str, Any] = {}
         if isinstance(result, tuple):  # type: ignore[unreachable]
             tmy_data = result[0] if len(result) > 0 else pd.DataFrame()  # type: ignore[index]
+            if len(result) > 1:
+                source_meta["pvgis"] = result[-1]
         else:
             tmy_data = result
 
@@ -309,67 +367,49 @@ def _get_pvgis_tmy(lat: float, lon: float, startyear: int = 2005, endyear: int =
             tmy_data = pd.DataFrame(tmy_data)
         tmy_data = tmy_data.rename(columns=column_map)
 
-        return tmy_data
+        return tmy_data, source_meta
 
+    exception_tuple: tuple[type[Exception], ...] = (requests.RequestException, ValueError)
+
+    try:
+        tmy_data, meta = get_cached_tmy(key, _download, cache_dir=cache_dir, offline=offline, refresh=refresh)
     except exception_tuple as e:
         print(f"  WARN Error descargando PVGIS: {e}")
         print("  Generando datos sinteticos basados en climatologia de Iquitos...")
         return _generate_synthetic_tmy(lat, lon)
 
+    if meta.get("cache_hit"):
+        print(f"TMY desde cache local ({meta.get('source')}): {meta.get('cache_path')}")
+        print(f"Nº de horas del TMY: {len(tmy_data)}")
+    return tmy_data
+
 
 def _generate_synthetic_tmy(lat: float, lon: float) -> pd.DataFrame:
     """
     Genera datos TMY sinteticos basados en climatologia de Iquitos.
     Usado como fallback si PVGIS no esta disponible.
+
+    Es el ano de la semilla 42 de ``generate_weather_years`` (sin reseed global
+    de ``np.random``); para Monte-Carlo generar K anos directamente alli.
     """
     _ensure_pvlib_available()
+    return generate_weather_years([42], lat, lon, year=2024, timezone="America/Lima", altitude=104).frame(0)
 
-    # Crear indice temporal para un ano (horario)
-    year = 2024
-    tz = "America/Lima"
-    times = pd.date_range(start=f"{year}-01-01 00:00:00", end=f"{year}-12-31 23:00:00", freq="h", tz=tz)
-
-    location = pvlib.location.Location(lat, lon, tz=tz, altitude=104)  # type: ignore[attr-defined]
-
-    # Clear-sky como base
-    clearsky = location.get_clearsky(times, model="ineichen")  # type: ignore[attr-defined]
 
-    time_hour = times.hour  # pylint: disable=no-member
-    time_month = times.month  # pylint: disable=no-member
-    time_minute = times.minute  # pylint: disable=no-member
+def _localize_tmy(tmy_data: pd.DataFrame, timezone: str, year: int, utc_offset_hours: int = 5) -> pd.DataFrame:
+    """Reindexa un TMY de PVGIS (UTC) a horas locales del ano indicado.
 
-    cloud_base = np.where((time_month >= 12) | (time_month <= 5), 0.55, 0.70)
-
-    # Variacion diaria
-    cloud_daily = np.where((time_hour >= 13) & (time_hour <= 18), -0.15, 0.0)
-
-    np.random.seed(42)
-    cloud_factor = np.clip(cloud_base + cloud_daily + np.random.normal(0, 0.08, len(times)), 0.3, 0.95)
-
-    # Temperatura Iquitos
-    t_mean = 26.5
-    t_daily_amp = 5.0
-    hour_float = time_hour + time_minute / 60
-    temp_air = t_mean + t_daily_amp * np.sin(
-        (hour_float - 6) / 24 * 2 * np.pi
-    ) + np.random.normal(0, 1.0, len(times))
-
-    # Viento
-    wind_speed = 2.0 + 1.0 * np.sin((hour_float - 8) / 24 * 2 * np.pi)
-    wind_speed = np.clip(wind_speed + np.abs(np.random.normal(0, 0.5, len(times))), 0.5, 6.0)
-
-    tmy_data = pd.DataFrame(
-        {
-            "ghi": (clearsky["ghi"] * cloud_factor).values,  # type: ignore[attr-defined]
-            "dni": (clearsky["dni"] * cloud_factor * 0.9).values,  # type: ignore[attr-defined]
-            "dhi": (clearsky["dhi"] * (1 + (1 - cloud_factor) * 0.3)).values,  # type: ignore[attr-defined]
-            "temp_air": temp_air,
-            "wind_speed": wind_speed,
-        },
-        index=times,
+    PVGIS hora 0 UTC = 19:00 del dia anterior en Lima (UTC-5): los datos se
+    rotan ``utc_offset_hours`` y se asigna un indice local sin saltos de DST.
+    """
+    local_times = pd.date_range(
+        start=f"{year}-01-01 00:00:00",
+        periods=len(tmy_data),
+        freq="h",
+        tz=timezone,
     )
-
-    return tmy_data
+    tmy_rotated = np.roll(tmy_data.values, -utc_offset_hours, axis=0)
+    return pd.DataFrame(tmy_rotated, index=local_times, columns=tmy_data.columns)
 
 
 def _interpolate_to_interval(tmy_data: pd.DataFrame, minutes: int = 15) -> pd.DataFrame:
@@ -396,15 +436,17 @@ def _interpolate_to_interval(tmy_data: pd.DataFrame, minutes: int = 15) -> pd.Da
     return tmy_interp
 
 
+@functools.lru_cache(maxsize=1)
 def _get_sandia_modules() -> pd.DataFrame:
-    """Obtiene la base de datos de modulos Sandia."""
+    """Obtiene la base de datos de modulos Sandia (leida una vez por proceso)."""
     _ensure_pvlib_available()
     assert pvlib is not None
     return pvlib.pvsystem.retrieve_sam("SandiaMod")  # type: ignore[attr-defined]
 
 
+@functools.lru_cache(maxsize=1)
 def _get_cec_inverters() -> pd.DataFrame:
-    """Obtiene la base de datos de inversores CEC."""
+    """Obtiene la base de datos de inversores CEC (leida una vez por proceso)."""
     _ensure_pvlib_available()
     assert pvlib is not None
     return pvlib.pvsystem.retrieve_sam("CECInverter")  # type: ignore[attr-defined]
@@ -428,76 +470,24 @@ def _rank_modules_by_density(
     modules_db: pd.DataFrame,
     area_util: float,
     top_n: int = 5,
+    index: Optional[ModuleIndex] = None,
 ) -> pd.DataFrame:
-    """Ordena modulos por densidad de potencia (W/m2)."""
-    rows: list[dict[str, float | str | int]] = []
-    for name in modules_db.columns:
-        params = modules_db[name]
-        vmp = float(params.get("Vmpo", 0))
-        imp = float(params.get("Impo", 0))
-        if vmp <= 0 or imp <= 0:
-            continue
-        pmp_w = vmp * imp
-        area_m2 = _get_module_area(params)
-        if area_m2 <= 0:
-            continue
-        density = pmp_w / area_m2
-        n_max = int(area_util / area_m2) if area_util > 0 else 0
-        dc_kw_max = n_max * pmp_w / 1000 if n_max > 0 else 0
-        rows.append(
-            {
-                "name": name,
-                "pmp_w": pmp_w,
-                "area_m2": area_m2,
-                "density_w_m2": density,
-                "n_max": n_max,
-                "dc_kw_max": dc_kw_max,
-            }
-        )
-    df = pd.DataFrame(rows)
-    if df.empty:
-        return df
-    df = df.sort_values(by=["density_w_m2", "pmp_w"], ascending=False)  # type: ignore[attr-defined]
-    return df.head(top_n).reset_index(drop=True)
+    """Ordena modulos por densidad de potencia (W/m2), vectorizado sobre ModuleIndex."""
+    if index is None:
+        index = ModuleIndex.from_db(modules_db)
+    return index.rank(area_util, top_n=top_n)
 
 
 def _rank_inverters_by_score(
     inverters_db: pd.DataFrame,
     target_ac_kw: float,
     top_n: int = 5,
+    index: Optional[InverterIndex] = None,
 ) -> pd.DataFrame:
-    """Ordena inversores por eficiencia y ajuste al target AC."""
-    rows: list[dict[str, float | str | int]] = []
-    for name in inverters_db.columns:
-        params = inverters_db[name]
-        paco_w = float(params.get("Paco", 0))
-        if paco_w <= 0:
-            continue
-        paco_kw = paco_w / 1000
-        pdco_w = float(params.get("Pdco", 0))
-        efficiency = paco_w / pdco_w if pdco_w > 0 else 0.0
-        n_inv = int(np.ceil(target_ac_kw / paco_kw)) if target_ac_kw > 0 else 1
-        oversize = 0.0
-        if target_ac_kw > 0:
-            oversize = (n_inv * paco_kw - target_ac_kw) / target_ac_kw
-        penalty = 0.02 * max(n_inv - 1, 0)
-        score = efficiency / (1.0 + oversize + penalty) if efficiency > 0 else 0.0
-        rows.append(
-            {
-                "name": name,
-                "paco_kw": paco_kw,
-                "pdco_kw": pdco_w / 1000 if pdco_w > 0 else 0.0,
-                "efficiency": efficiency,
-                "n_inverters": n_inv,
-                "oversize_ratio": oversize,
-                "score": score,
-            }
-        )
-    df = pd.DataFrame(rows)
-    if df.empty:
-        return df
-    df = df.sort_values(by=["score", "efficiency", "paco_kw"], ascending=False)  # type: ignore[attr-defined]
-    return df.head(top_n).reset_index(drop=True)
+    """Ordena inversores por eficiencia y ajuste al target AC, vectorizado sobre InverterIndex."""
+    if index is None:
+        index = InverterIndex.from_db(inverters_db)
+    return index.rank(target_ac_kw, top_n=top_n)
 
 
 def _log_candidates(section_title: str, df: pd.DataFrame, top_n: int) -> None:
@@ -538,8 +528,7 @@ def _metric_score(
     return energy_per_m2
 
 
-def _evaluate_candidate_combinations(
-    tmy_data: pd.DataFrame,
+def _candidate_layouts(
     config: PVSystemConfig,
     modules_db: pd.DataFrame,
     inverters_db: pd.DataFrame,
@@ -547,14 +536,9 @@ def _evaluate_candidate_combinations(
     inverter_candidates: pd.DataFrame,
     target_dc_kw: float,
     target_ac_kw: float,
-    selection_metric: str,
-) -> Tuple[list[dict[str, Any]], Optional[dict[str, Any]]]:
-    """Evalua combinaciones modulo/inversor y retorna ranking y mejor candidato."""
-    if module_candidates.empty or inverter_candidates.empty:
-        return [], None
-
-    rows: list[dict[str, Any]] = []
-    metric_norm = selection_metric.lower()
+) -> list[dict[str, Any]]:
+    """Enumera combinaciones modulo/inversor validas con su configuracion de strings."""
+    layouts: list[dict[str, Any]] = []
     for _, mod_row in module_candidates.iterrows():
         module_name = str(mod_row.get("name", ""))
         if module_name not in modules_db.columns:
@@ -585,45 +569,61 @@ def _evaluate_candidate_combinations(
             if total_modules <= 0:
                 continue
 
-            system_dc_kw = total_modules * pmp_w / 1000
-            area_modules = total_modules * area_m2
-
-            results, sim_metadata = run_pv_simulation(
-                tmy_data=tmy_data,
-                config=config,
-                module_params=module_params,
-                inverter_params=inverter_params,
-                modules_per_string=modules_per_string,
-                strings_parallel=strings_parallel,
-                total_modules=total_modules,
-                num_inverters=num_inverters,
-                log=False,
-            )
-
-            annual_ac_kwh = float(results["ac_energy_kwh"].sum())
-            specific_yield = annual_ac_kwh / system_dc_kw if system_dc_kw > 0 else 0.0
-            ghi_annual = float(sim_metadata.get("ghi_annual_kwh_m2", 0.0))
-            performance_ratio = specific_yield / ghi_annual if ghi_annual > 0 else 0.0
-            energy_per_m2 = annual_ac_kwh / area_modules if area_modules > 0 else 0.0
-            score = _metric_score(metric_norm, annual_ac_kwh, energy_per_m2, performance_ratio)
-
-            rows.append(
+            layouts.append(
                 {
                     "module_name": module_name,
                     "inverter_name": inverter_name,
-                    "annual_kwh": annual_ac_kwh,
-                    "energy_per_m2": energy_per_m2,
-                    "performance_ratio": performance_ratio,
-                    "score": score,
-                    "system_dc_kw": system_dc_kw,
-                    "area_modules_m2": area_modules,
+                    "system_dc_kw": total_modules * pmp_w / 1000,
+                    "area_modules_m2": total_modules * area_m2,
                     "modules_per_string": modules_per_string,
                     "strings_parallel": strings_parallel,
                     "total_modules": total_modules,
                     "num_inverters": num_inverters,
                 }
             )
+    return layouts
+
 
+def _candidate_annual_ac_kwh(ac_w: np.ndarray, num_inverters: int, losses_factor: float, dt: float) -> float:
+    """Energia AC anual [kWh] con la misma limpieza y perdidas que run_pv_simulation."""
+    ac_power = np.where(np.isnan(ac_w), 0.0, ac_w)
+    if num_inverters > 1:
+        ac_power = ac_power * float(num_inverters)
+    ac_power = np.maximum(ac_power, 0.0)
+    ac_energy = ac_power * losses_factor * dt / 1000
+    return float(ac_energy.sum())
+
+
+def _candidate_row(
+    layout: dict[str, Any],
+    annual_ac_kwh: float,
+    ghi_annual: float,
+    metric_norm: str,
+) -> dict[str, Any]:
+    """Fila de metricas escalares de un candidato."""
+    system_dc_kw = float(layout["system_dc_kw"])
+    area_modules = float(layout["area_modules_m2"])
+    specific_yield = annual_ac_kwh / system_dc_kw if system_dc_kw > 0 else 0.0
+    performance_ratio = specific_yield / ghi_annual if ghi_annual > 0 else 0.0
+    energy_per_m2 = annual_ac_kwh / area_modules if area_modules > 0 else 0.0
+    return {
+        "module_name": layout["module_name"],
+        "inverter_name": layout["inverter_name"],
+        "annual_kwh": annual_ac_kwh,
+        "energy_per_m2": energy_per_m2,
+        "performance_ratio": performance_ratio,
+        "score": _metric_score(metric_norm, annual_ac_kwh, energy_per_m2, performance_ratio),
+        "system_dc_kw": system_dc_kw,
+        "area_modules_m2": area_modules,
+        "modules_per_string": layout["modules_per_string"],
+        "strings_parallel": layout["strings_parallel"],
+        "total_modules": layout["total_modules"],
+        "num_inverters": layout["num_inverters"],
+    }
+
+
+def _rank_candidate_rows(rows: list[dict[str, Any]]) -> Tuple[list[dict[str, Any]], Optional[dict[str, Any]]]:
+    """Ordena filas de candidatos por score y energia anual."""
     if not rows:
         return [], None
 
@@ -633,7 +633,59 @@ def _evaluate_candidate_combinations(
     return records, best_row
 
 
-def _select_module(modules_db: pd.DataFrame, module_name: str, area_util: float) -> Tuple[str, pd.Series, int]:
+def _evaluate_candidate_combinations(
+    tmy_data: pd.DataFrame,
+    config: PVSystemConfig,
+    modules_db: pd.DataFrame,
+    inverters_db: pd.DataFrame,
+    module_candidates: pd.DataFrame,
+    inverter_candidates: pd.DataFrame,
+    target_dc_kw: float,
+    target_ac_kw: float,
+    selection_metric: str,
+) -> Tuple[list[dict[str, Any]], Optional[dict[str, Any]]]:
+    """
+    Evalua combinaciones modulo/inversor y retorna ranking y mejor candidato.
+
+    La etapa meteorologica se calcula una sola vez (primer candidato valido)
+    y cada combinacion solo evalua el modelo SAPM y el inversor Sandia.
+    """
+    if module_candidates.empty or inverter_candidates.empty:
+        return [], None
+
+    layouts = _candidate_layouts(
+        config, modules_db, inverters_db, module_candidates, inverter_candidates, target_dc_kw, target_ac_kw
+    )
+    if not layouts:
+        return [], None
+
+    first = layouts[0]
+    stage = compute_irradiance_stage(
+        tmy_data, config, modules_db[first["module_name"]], inverters_db[first["inverter_name"]], log=False
+    )
+    metric_norm = selection_metric.lower()
+    losses_factor = config.total_losses_factor
+    rows: list[dict[str, Any]] = []
+    for layout in layouts:
+        _, ac = simulate_candidate_power(
+            stage,
+            modules_db[layout["module_name"]],
+            inverters_db[layout["inverter_name"]],
+            layout["modules_per_string"],
+            layout["strings_parallel"],
+        )
+        annual_ac_kwh = _candidate_annual_ac_kwh(ac, layout["num_inverters"], losses_factor, stage.dt_hours)
+        rows.append(_candidate_row(layout, annual_ac_kwh, float(stage.ghi_annual_kwh_m2), metric_norm))
+
+    return _rank_candidate_rows(rows)
+
+
+def _select_module(
+    modules_db: pd.DataFrame,
+    module_name: str,
+    area_util: float,
+    index: Optional[ModuleIndex] = None,
+) -> Tuple[str, pd.Series, int]:
     """
     Selecciona modulo y calcula numero maximo en el area disponible.
     """
@@ -657,29 +709,26 @@ def _select_module(modules_db: pd.DataFrame, module_name: str, area_util: float)
     # Buscar alternativa por maxima densidad
     print(f"  WARN Modulo '{module_name}' no encontrado, buscando alternativa...")
 
-    best_mod = None
-    best_density = 0
-    for col in modules_db.columns:
-        params = modules_db[col]
-        pmp = params.get("Vmpo", 0) * params.get("Impo", 0)
-        area = _get_module_area(params)
-        if pmp > 0 and area > 0:
-            density = pmp / area
-            if density > best_density:
-                best_density = density
-                best_mod = col
-
-    if best_mod:
+    if index is None:
+        index = ModuleIndex.from_db(modules_db)
+    best = index.best_by_density()
+    if best is not None:
+        best_mod = str(index.names[best])
         params = modules_db[best_mod]
-        area = _get_module_area(params) or 1.0
+        area = float(index.area_m2[best]) or 1.0
         n_max = int(area_util / area)
-        print(f"  OK Modulo alternativo: {best_mod} ({best_density:.1f} W/m²)")
+        print(f"  OK Modulo alternativo: {best_mod} ({index.density_w_m2[best]:.1f} W/m²)")
         return best_mod, params, n_max
 
     return modules_db.columns[0], modules_db.iloc[:, 0], 1000
 
 
-def _select_inverter(inverters_db: pd.DataFrame, inverter_name: str, target_ac_kw: float) -> Tuple[str, pd.Series, int]:
+def _select_inverter(
+    inverters_db: pd.DataFrame,
+    inverter_name: str,
+    target_ac_kw: float,
+    index: Optional[InverterIndex] = None,
+) -> Tuple[str, pd.Series, int]:
     """
     Selecciona inversor y calcula numero de unidades necesarias.
     """
@@ -700,18 +749,13 @@ def _select_inverter(inverters_db: pd.DataFrame, inverter_name: str, target_ac_k
     print(f"  WARN Inversor '{inverter_name}' no encontrado, buscando alternativa...")
 
     # Buscar por maxima potencia
-    best_inv = None
-    best_paco = 0
-    for col in inverters_db.columns:
-        params = inverters_db[col]
-        paco = params.get("Paco", 0)
-        if paco > best_paco:
-            best_paco = paco
-            best_inv = col
-
-    if best_inv:
+    if index is None:
+        index = InverterIndex.from_db(inverters_db)
+    best = index.best_by_paco()
+    if best is not None:
+        best_inv = str(index.names[best])
         params = inverters_db[best_inv]
-        paco_kw = best_paco / 1000
+        paco_kw = float(index.paco_w[best]) / 1000
         n_inv = max(1, int(np.ceil(target_ac_kw / paco_kw)))
         print(f"  OK Inversor alternativo: {best_inv} ({paco_kw:.1f} kW)")
         return best_inv, params, n_inv
@@ -811,25 +855,98 @@ def _to_series_like(
     return series.fillna(0.0).astype(float)  # type: ignore[attr-defined]
 
 
-def run_pv_simulation(
+# Columnas meteorologicas que consume el ModelChain
+_WEATHER_COLUMNS = ["ghi", "dni", "dhi", "temp_air", "wind_speed"]
+
+# Parametros del modelo IAM 'physical' que un modulo puede sobrescribir
+_PHYSICAL_IAM_PARAMS = ("n", "K", "L", "n_ar")
+
+# Cache de etapas de irradiancia por (TMY, ubicacion, tilt, azimut)
+_IRRADIANCE_CACHE: dict[tuple[Any, ...], "IrradianceStage"] = {}
+_IRRADIANCE_CACHE_MAX = 8
+
+
+@dataclass(frozen=True)
+class IrradianceStage:
+    """
+    Etapa meteorologica del ModelChain, independiente de modulo e inversor.
+
+    Contiene la irradiancia POA (Perez), el modificador AOI 'physical' por
+    defecto y la temperatura de celda SAPM (open_rack_glass_glass). Se calcula
+    una vez por (TMY, tilt, azimut) y se reutiliza para cada candidato.
+    """
+
+    weather: pd.DataFrame
+    aoi: np.ndarray
+    aoi_modifier: np.ndarray
+    poa_direct: np.ndarray
+    poa_diffuse: np.ndarray
+    poa_global: np.ndarray
+    cell_temperature: np.ndarray
+    dt_hours: float
+    ghi_annual_kwh_m2: float
+
+
+def _irradiance_cache_key(tmy_data: pd.DataFrame, config: PVSystemConfig) -> tuple[Any, ...]:
+    """Clave de cache: hash del TMY + ubicacion + orientacion (como la recibe PVSystem)."""
+    tmy_hash = int(pd.util.hash_pandas_object(tmy_data[_WEATHER_COLUMNS], index=True).sum())
+    return (
+        tmy_hash,
+        len(tmy_data),
+        float(config.latitude),
+        float(config.longitude),
+        float(config.altitude),
+        str(config.timezone),
+        int(config.tilt),
+        int(config.azimuth),
+    )
+
+
+def clear_irradiance_cache() -> None:
+    """Vacia la cache de etapas de irradiancia."""
+    _IRRADIANCE_CACHE.clear()
+
+
+def _night_masked_weather(tmy_data: pd.DataFrame, location: Any, log: bool = True) -> pd.DataFrame:
+    """Columnas meteorologicas del ModelChain con GHI/DNI/DHI = 0 de noche."""
+    weather = tmy_data[_WEATHER_COLUMNS].copy()
+
+    # Calcular posicion solar
+    if log:
+        print("Calculando posicion solar...")
+    solar_pos = location.get_solarposition(weather.index)  # type: ignore[attr-defined]
+
+    # Aplicar irradiancia cero durante la noche
+    night_mask = solar_pos["apparent_zenith"] >= 90
+    weather.loc[night_mask, ["ghi", "dni", "dhi"]] = 0
+    if log:
+        print("Aplicada irradiancia cero durante la noche.")
+    return weather
+
+
+def compute_irradiance_stage(
     tmy_data: pd.DataFrame,
     config: PVSystemConfig,
     module_params: pd.Series,
     inverter_params: pd.Series,
-    modules_per_string: int,
-    strings_parallel: int,
-    total_modules: int,
-    num_inverters: int,
     log: bool = True,
-) -> Tuple[pd.DataFrame, dict[str, Any]]:
+    use_cache: bool = True,
+) -> IrradianceStage:
     """
-    Ejecuta simulacion PV usando ModelChain de pvlib.
+    Calcula (o recupera de cache) la etapa meteorologica del ModelChain.
+
+    Ejecuta un ModelChain completo con el modulo/inversor de referencia y
+    conserva solo las salidas que no dependen del equipo: posicion solar,
+    componentes POA, modificador AOI y temperatura de celda.
     """
     _ensure_pvlib_available()
     assert Location is not None and PVSystem is not None and ModelChain is not None
 
-    if log:
-        print("\nEjecutando simulacion del modelo PV (ModelChain)...")
+    key = _irradiance_cache_key(tmy_data, config) if use_cache else None
+    if key is not None and key in _IRRADIANCE_CACHE:
+        if log:
+            print("Etapa de irradiancia recuperada de cache (tilt/azimut/TMY).")
+        return _IRRADIANCE_CACHE[key]
 
     # Ubicacion
     location = Location(
@@ -843,15 +960,13 @@ def run_pv_simulation(
     # Parametros de temperatura SAPM
     temp_params: dict[str, Any] = _TEMP_MODEL_PARAMS.get("sapm", {}).get("open_rack_glass_glass", {})
 
-    # Sistema PV
+    # Sistema PV de referencia (la etapa no depende del modulo ni del inversor)
     system = PVSystem(
         surface_tilt=int(config.tilt),  # type: ignore[arg-type]
         surface_azimuth=int(config.azimuth),  # type: ignore[arg-type]
         module_parameters=module_params,
         inverter_parameters=inverter_params,
         temperature_model_parameters=temp_params,
-        modules_per_string=modules_per_string,
-        strings_per_inverter=strings_parallel,
     )
 
     # ModelChain
@@ -867,29 +982,331 @@ def run_pv_simulation(
         ac_model="sandia",
     )
 
-    # Preparar datos meteorologicos
-    weather = tmy_data[["ghi", "dni", "dhi", "temp_air", "wind_speed"]].copy()
-
-    # Calcular posicion solar
-    if log:
-        print("Calculando posicion solar...")
-    solar_pos = location.get_solarposition(weather.index)  # type: ignore[attr-defined]
-
-    # Aplicar irradiancia cero durante la noche
-    night_mask = solar_pos["apparent_zenith"] >= 90
-    weather.loc[night_mask, ["ghi", "dni", "dhi"]] = 0
-    if log:
-        print("Aplicada irradiancia cero durante la noche.")
+    # Preparar datos meteorologicos (irradiancia cero durante la noche)
+    weather = _night_masked_weather(tmy_data, location, log=log)
 
     # Ejecutar modelo
     with warnings.catch_warnings():
         warnings.simplefilter("ignore")
         mc.run_model(weather)  # type: ignore[attr-defined]
 
+    total_irrad = mc.results.total_irrad
+
+    # Determinar duracion del intervalo en horas
+    if len(weather.index) > 1:
+        dt = (weather.index[1] - weather.index[0]).total_seconds() / 3600
+    else:
+        dt = 1.0
+
+    # Si el modulo de referencia definia parametros IAM propios, guardar el
+    # modificador por defecto para que la etapa sea valida para cualquier modulo
+    aoi = np.asarray(mc.results.aoi, dtype=float)
+    if any(k in module_params.index for k in _PHYSICAL_IAM_PARAMS):
+        aoi_modifier = np.asarray(pvlib.iam.physical(aoi), dtype=float)  # type: ignore[union-attr]
+    else:
+        aoi_modifier = np.asarray(mc.results.aoi_modifier, dtype=float)
+
+    stage = IrradianceStage(
+        weather=weather,
+        aoi=aoi,
+        aoi_modifier=aoi_modifier,
+        poa_direct=np.asarray(total_irrad["poa_direct"], dtype=float),
+        poa_diffuse=np.asarray(total_irrad["poa_diffuse"], dtype=float),
+        poa_global=np.asarray(total_irrad["poa_global"], dtype=float),
+        cell_temperature=np.asarray(mc.results.cell_temperature, dtype=float),
+        dt_hours=dt,
+        ghi_annual_kwh_m2=weather["ghi"].sum() * dt / 1000,  # kWh/m²
+    )
+
+    if key is not None:
+        if len(_IRRADIANCE_CACHE) >= _IRRADIANCE_CACHE_MAX:
+            _IRRADIANCE_CACHE.pop(next(iter(_IRRADIANCE_CACHE)))
+        _IRRADIANCE_CACHE[key] = stage
+    return stage
+
+
+def _candidate_power_arrays(
+    aoi: np.ndarray,
+    aoi_modifier: np.ndarray,
+    poa_direct: np.ndarray,
+    poa_diffuse: np.ndarray,
+    cell_temperature: np.ndarray,
+    module_params: pd.Series,
+    inverter_params: pd.Series,
+    modules_per_string: int,
+    strings_parallel: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Nucleo DC/AC sobre arreglos de irradiancia (ver simulate_candidate_power)."""
+    assert pvlib is not None
+
+    # Modificador AOI: solo se recalcula si el modulo define parametros IAM
+    iam_kwargs = {k: module_params[k] for k in _PHYSICAL_IAM_PARAMS if k in module_params.index}
+    if iam_kwargs:
+        aoi_modifier = pvlib.iam.physical(aoi, **iam_kwargs)
+
+    # Irradiancia efectiva (modificador espectral = 1 con spectral_model='no_loss')
+    fd = module_params.get("FD", 1.0)
+    effective_irradiance = poa_direct * aoi_modifier + fd * poa_diffuse
+
+    with np.errstate(all="ignore"):
+        dc = pvlib.pvsystem.sapm(effective_irradiance, cell_temperature, module_params)
+        # Mismo escalado que PVSystem.scale_voltage_current_power
+        v_mp = np.asarray(dc["v_mp"], dtype=float) * modules_per_string
+        p_mp = np.asarray(dc["p_mp"], dtype=float) * modules_per_string * strings_parallel
+        ac = pvlib.inverter.sandia(v_mp, p_mp, inverter_params)
+    return p_mp, np.asarray(ac, dtype=float)
+
+
+def simulate_candidate_power(
+    stage: IrradianceStage,
+    module_params: pd.Series,
+    inverter_params: pd.Series,
+    modules_per_string: int,
+    strings_parallel: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Etapa DC/AC por candidato sobre una etapa de irradiancia cacheada.
+
+    Reproduce los pasos del ModelChain (physical + no_loss + sapm + sandia):
+    irradiancia efectiva, SAPM escalado por el arreglo e inversor Sandia.
+    Retorna (p_mp DC [W], P AC [W]) por inversor, sin limpiar NaN.
+    """
+    _ensure_pvlib_available()
+    return _candidate_power_arrays(
+        stage.aoi,
+        stage.aoi_modifier,
+        stage.poa_direct,
+        stage.poa_diffuse,
+        stage.cell_temperature,
+        module_params,
+        inverter_params,
+        modules_per_string,
+        strings_parallel,
+    )
+
+
+# ============================================================================
+# BUSQUEDA PARALELA DE CANDIDATOS (ProcessPool + memoria compartida)
+# ============================================================================
+# Arreglos de la etapa de irradiancia que se comparten con los procesos
+_STAGE_ARRAY_FIELDS = ("aoi", "aoi_modifier", "poa_direct", "poa_diffuse", "cell_temperature")
+
+# Estado por proceso: bloque compartido (n_orientaciones, campos, T) + parametros
+_SEARCH_STATE: dict[str, Any] = {}
+
+
+def expand_config_variants(
+    config: PVSystemConfig,
+    tilts: Optional[Sequence[float]] = None,
+    azimuths: Optional[Sequence[float]] = None,
+    factores_diseno: Optional[Sequence[float]] = None,
+) -> list[PVSystemConfig]:
+    """Producto cartesiano de variantes tilt x azimut x factor de diseno sobre `config`."""
+    variants: list[PVSystemConfig] = []
+    for tilt, azimuth, factor in itertools.product(
+        tilts if tilts else [config.tilt],
+        azimuths if azimuths else [config.azimuth],
+        factores_diseno if factores_diseno else [config.factor_diseno],
+    ):
+        variants.append(replace(config, tilt=float(tilt), azimuth=float(azimuth), factor_diseno=float(factor)))
+    return variants
+
+
+def _init_search_worker(
+    shm_name: Optional[str],
+    shape: Tuple[int, ...],
+    stages: Optional[np.ndarray],
+    modules: dict[str, pd.Series],
+    inverters: dict[str, pd.Series],
+    stage_scalars: list[Tuple[float, float]],
+    variant_losses: list[float],
+    variant_stage: list[int],
+    metric_norm: str,
+) -> None:
+    """Inicializa un proceso: se adjunta al bloque de irradiancia en memoria compartida."""
+    if shm_name is not None:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _SEARCH_STATE["shm"] = shm  # Mantener la referencia mientras viva el proceso
+        stages = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _SEARCH_STATE.update(
+        stages=stages,
+        modules=modules,
+        inverters=inverters,
+        stage_scalars=stage_scalars,
+        variant_losses=variant_losses,
+        variant_stage=variant_stage,
+        metric_norm=metric_norm,
+    )
+
+
+def _evaluate_layout_chunk(tasks: list[Tuple[int, dict[str, Any]]]) -> list[dict[str, Any]]:
+    """Worker: evalua un bloque de (variante, layout) y devuelve solo filas escalares."""
+    state = _SEARCH_STATE
+    rows: list[dict[str, Any]] = []
+    for variant, layout in tasks:
+        k = state["variant_stage"][variant]
+        arrays = state["stages"][k]
+        dt, ghi_annual = state["stage_scalars"][k]
+        _, ac = _candidate_power_arrays(
+            *arrays,
+            state["modules"][layout["module_name"]],
+            state["inverters"][layout["inverter_name"]],
+            layout["modules_per_string"],
+            layout["strings_parallel"],
+        )
+        annual_ac_kwh = _candidate_annual_ac_kwh(ac, layout["num_inverters"], state["variant_losses"][variant], dt)
+        row = _candidate_row(layout, annual_ac_kwh, ghi_annual, state["metric_norm"])
+        row["config_index"] = variant
+        rows.append(row)
+    return rows
+
+
+def parallel_candidate_search(
+    tmy_data: pd.DataFrame,
+    config: PVSystemConfig,
+    modules_db: pd.DataFrame,
+    inverters_db: pd.DataFrame,
+    module_candidates: pd.DataFrame,
+    inverter_candidates: pd.DataFrame,
+    target_dc_kw: float,
+    target_ac_kw: float,
+    selection_metric: str,
+    config_variants: Optional[Sequence[PVSystemConfig]] = None,
+    max_workers: Optional[int] = None,
+    chunk_size: int = 32,
+) -> Tuple[list[dict[str, Any]], Optional[dict[str, Any]]]:
+    """
+    Busqueda de candidatos modulo/inversor (y variantes de configuracion) en paralelo.
+
+    El proceso principal calcula una etapa de irradiancia por orientacion
+    (tilt/azimut enteros) y la copia a un bloque de memoria compartida; los
+    procesos se adjuntan a ese bloque y devuelven solo filas de metricas
+    escalares (sin DataFrames de 8,760 filas). Las filas incluyen
+    `config_index`, `tilt`, `azimuth` y `factor_diseno` de la variante.
+
+    Args:
+        config_variants: Variantes de PVSystemConfig (default: solo `config`),
+            p.ej. de expand_config_variants()
+        max_workers: Procesos (default: CPUs); 1 = proceso actual
+        chunk_size: Combinaciones por tarea enviada a cada proceso
+    """
+    _ensure_pvlib_available()
+    if module_candidates.empty or inverter_candidates.empty:
+        return [], None
+    variants = list(config_variants) if config_variants else [config]
+
+    # Layouts por variante (el area utilizable cambia la configuracion de strings)
+    tasks: list[Tuple[int, dict[str, Any]]] = []
+    for v, variant in enumerate(variants):
+        for layout in _candidate_layouts(
+            variant, modules_db, inverters_db, module_candidates, inverter_candidates, target_dc_kw, target_ac_kw
+        ):
+            tasks.append((v, layout))
+    if not tasks:
+        return [], None
+
+    # Una etapa de irradiancia por orientacion distinta
+    ref_module = modules_db[tasks[0][1]["module_name"]]
+    ref_inverter = inverters_db[tasks[0][1]["inverter_name"]]
+    stage_keys: dict[tuple[Any, ...], int] = {}
+    stage_list: list[IrradianceStage] = []
+    variant_stage: list[int] = []
+    for variant in variants:
+        key = _irradiance_cache_key(tmy_data, variant)
+        if key not in stage_keys:
+            stage_keys[key] = len(stage_list)
+            stage_list.append(compute_irradiance_stage(tmy_data, variant, ref_module, ref_inverter, log=False))
+        variant_stage.append(stage_keys[key])
+
+    n_steps = len(stage_list[0].aoi)
+    shape = (len(stage_list), len(_STAGE_ARRAY_FIELDS), n_steps)
+    names = {layout["module_name"] for _, layout in tasks}
+    inv_names = {layout["inverter_name"] for _, layout in tasks}
+    init_args: list[Any] = [
+        {name: modules_db[name] for name in names},
+        {name: inverters_db[name] for name in inv_names},
+        [(float(st.dt_hours), float(st.ghi_annual_kwh_m2)) for st in stage_list],
+        [float(variant.total_losses_factor) for variant in variants],
+        variant_stage,
+        selection_metric.lower(),
+    ]
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), max(1, chunk_size))]
+    workers = max_workers or min(len(chunks), os.cpu_count() or 1)
+
+    t0 = time.perf_counter()
+    if workers <= 1:
+        stages = np.stack([[getattr(st, f) for f in _STAGE_ARRAY_FIELDS] for st in stage_list])
+        _init_search_worker(None, shape, stages, *init_args)
+        try:
+            results = [_evaluate_layout_chunk(chunk) for chunk in chunks]
+        finally:
+            _SEARCH_STATE.clear()
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+        try:
+            block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+            for k, st in enumerate(stage_list):
+                for j, field in enumerate(_STAGE_ARRAY_FIELDS):
+                    block[k, j] = getattr(st, field)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_search_worker,
+                initargs=(shm.name, shape, None, *init_args),
+            ) as pool:
+                results = list(pool.map(_evaluate_layout_chunk, chunks))
+            del block
+        finally:
+            shm.close()
+            shm.unlink()
+    elapsed = time.perf_counter() - t0
+
+    rows: list[dict[str, Any]] = []
+    for chunk_rows in results:
+        for row in chunk_rows:
+            variant = variants[int(row["config_index"])]
+            row["tilt"] = variant.tilt
+            row["azimuth"] = variant.azimuth
+            row["factor_diseno"] = variant.factor_diseno
+            rows.append(row)
+    print(
+        f"  Busqueda paralela: {len(tasks):,} combinaciones ({len(variants)} configuraciones, "
+        f"{len(stage_list)} orientaciones) en {elapsed:.1f} s con {workers} procesos"
+    )
+    return _rank_candidate_rows(rows)
+
+
+def run_pv_simulation(
+    tmy_data: pd.DataFrame,
+    config: PVSystemConfig,
+    module_params: pd.Series,
+    inverter_params: pd.Series,
+    modules_per_string: int,
+    strings_parallel: int,
+    total_modules: int,
+    num_inverters: int,
+    log: bool = True,
+    stage: Optional[IrradianceStage] = None,
+) -> Tuple[pd.DataFrame, dict[str, Any]]:
+    """
+    Ejecuta simulacion PV equivalente al ModelChain de pvlib.
+
+    La etapa meteorologica (posicion solar, POA, temperatura de celda) se
+    calcula una vez por (TMY, tilt, azimut) y se reutiliza; por candidato solo
+    se evaluan el modelo SAPM y el inversor Sandia.
+    """
+    if log:
+        print("\nEjecutando simulacion del modelo PV (ModelChain)...")
+
+    if stage is None:
+        stage = compute_irradiance_stage(tmy_data, config, module_params, inverter_params, log=log)
+    weather = stage.weather
+
     # Extraer resultados
-    # mc.results.dc puede ser DataFrame o Series dependiendo del modelo
-    dc_power = _to_series_like(mc.results.dc, weather.index, fallback_column="p_mp")
-    ac_power = _to_series_like(mc.results.ac, weather.index)
+    p_mp, ac = simulate_candidate_power(
+        stage, module_params, inverter_params, modules_per_string, strings_parallel
+    )
+    dc_power = _to_series_like(p_mp, weather.index)
+    ac_power = _to_series_like(ac, weather.index)
 
     # Escalar por numero de inversores si > 1
     if num_inverters > 1:
@@ -905,11 +1322,8 @@ def run_pv_simulation(
     ac_power_final = ac_power * losses_factor
 
     # Calcular energia por intervalo
-    # Determinar duracion del intervalo en horas
-    if len(weather.index) > 1:
-        dt = (weather.index[1] - weather.index[0]).total_seconds() / 3600
-    else:
-        dt = 1.0
+    # Duracion del intervalo en horas
+    dt = stage.dt_hours
 
     # ================================================================
     # FORMULA CORRECTA DE ENERGIA (BASADA EN PAPERS Y REFERENCIAS)
@@ -967,32 +1381,18 @@ def run_pv_simulation(
     # ================================================================
     # AGREGAR COLUMNAS DE COSTOS Y CO2 (OSINERGMIN)
     # ================================================================
-    # Extraer hora del indice para determinar tarifa aplicable
-    results_hour = pd.to_datetime(results.index).hour
-
-    # Determinar si es hora punta (18:00 - 22:59)
-    results["is_hora_punta"] = np.where(
-        (results_hour >= HORA_INICIO_HP) & (results_hour < HORA_FIN_HP), 1, 0
-    )
-
-    # Tarifa aplicada segun hora (S/./kWh)
-    results["tarifa_aplicada_soles"] = np.where(
-        results["is_hora_punta"] == 1,
-        TARIFA_ENERGIA_HP_SOLES,
-        TARIFA_ENERGIA_HFP_SOLES
+    # Hora punta (18:00 - 22:59) segun la hora del indice; el solar desplaza
+    # compra de energia de la red (ahorro = energia × tarifa) y generacion
+    # termica diesel del sistema aislado (reduccion indirecta de CO2)
+    acc = account_flows(
+        {"ac_energy_kwh": results["ac_energy_kwh"].to_numpy()},
+        OSINERGMIN_TARIFF,
+        hour_of_day=pd.to_datetime(results.index).hour.to_numpy(),
     )
-
-    # Ahorro por generacion solar (S/.) = energia × tarifa aplicable
-    # El solar desplaza compra de energia de la red
-    results["ahorro_solar_soles"] = results["ac_energy_kwh"] * results["tarifa_aplicada_soles"]
-
-    # ================================================================
-    # REDUCCION INDIRECTA DE CO2
-    # ================================================================
-    # La energia solar desplaza generacion termica (diesel) del sistema aislado
-    
-    # Reduccion indirecta de CO2 (kg) = energia solar × factor CO2
-    results["reduccion_indirecta_co2_kg"] = results["ac_energy_kwh"] * FACTOR_CO2_KG_KWH
+    results["is_hora_punta"] = acc.is_hp.astype(int)
+    results["tarifa_aplicada_soles"] = acc.tariff_soles_kwh
+    results["ahorro_solar_soles"] = acc.cost("ac_energy_kwh")
+    results["reduccion_indirecta_co2_kg"] = acc.co2("ac_energy_kwh")
 
     if log:
         # Resumen de costos y CO2
@@ -1008,8 +1408,8 @@ def run_pv_simulation(
         print(f"  Reduccion indirecta CO2 total: {co2_total:,.1f} kg ({co2_total/1000:,.2f} ton)")
         print(f"  [Sistema aislado Iquitos - Factor: {FACTOR_CO2_KG_KWH} kg CO2/kWh]")
 
-    # Calcular GHI anual
-    ghi_annual = weather["ghi"].sum() * dt / 1000  # kWh/m²
+    # GHI anual
+    ghi_annual = stage.ghi_annual_kwh_m2
 
     metadata: dict[str, Any] = {
         "dt_hours": dt,
@@ -1093,6 +1493,53 @@ def calculate_statistics(
     if "reduccion_indirecta_co2_kg" in results.columns:
         co2_reduccion_kg = float(results["reduccion_indirecta_co2_kg"].sum())
 
+    stats: dict[str, Any] = {
+        "annual_ac_kwh": annual_ac_kwh,
+        "annual_dc_kwh": annual_dc_kwh,
+        "specific_yield": specific_yield,
+        "capacity_factor": capacity_factor,
+        "performance_ratio": performance_ratio,
+        "equivalent_hours": equivalent_hours,
+        "max_power_kw": max_power_kw,
+        "mean_power_kw": mean_power_kw,
+        "max_daily_energy_kwh": max_daily_energy,
+        "max_daily_energy_date": max_daily_energy_date,
+        "max_power_timestamp": max_power_timestamp,
+        "hours_with_production": int(hours_with_production),
+        # Metricas economicas y CO2
+        "ahorro_total_soles": ahorro_total_soles,
+        "ahorro_hp_soles": ahorro_hp_soles,
+        "ahorro_hfp_soles": ahorro_hfp_soles,
+        "energia_hp_kwh": energia_hp_kwh,
+        "energia_hfp_kwh": energia_hfp_kwh,
+        # CO2 reduccion indirecta (generacion solar desplaza diesel)
+        "co2_reduccion_kg": co2_reduccion_kg,
+        "co2_reduccion_ton": co2_reduccion_kg / 1000,
+        "factor_co2_kg_kwh": FACTOR_CO2_KG_KWH,
+    }
+    _log_statistics(stats, max_interval_energy, hours_with_production)
+    return stats
+
+
+def _log_statistics(stats: dict[str, Any], max_interval_energy: float, hours_with_production: float) -> None:
+    """Imprime el resumen de calculate_statistics (tambien usado por la simulacion por bloques)."""
+    annual_ac_kwh = stats["annual_ac_kwh"]
+    specific_yield = stats["specific_yield"]
+    capacity_factor = stats["capacity_factor"]
+    performance_ratio = stats["performance_ratio"]
+    max_power_kw = stats["max_power_kw"]
+    mean_power_kw = stats["mean_power_kw"]
+    equivalent_hours = stats["equivalent_hours"]
+    max_daily_energy = stats["max_daily_energy_kwh"]
+    max_daily_energy_date = stats["max_daily_energy_date"]
+    max_power_timestamp = stats["max_power_timestamp"]
+    ahorro_total_soles = stats["ahorro_total_soles"]
+    ahorro_hp_soles = stats["ahorro_hp_soles"]
+    ahorro_hfp_soles = stats["ahorro_hfp_soles"]
+    energia_hp_kwh = stats["energia_hp_kwh"]
+    energia_hfp_kwh = stats["energia_hfp_kwh"]
+    co2_reduccion_kg = stats["co2_reduccion_kg"]
+
     print("\n=== Dia de maxima generacion y maximo intervalo ===")
     print(f"Dia de maxima energia:          {max_daily_energy_date}    E = {max_daily_energy:.1f} kWh")
     print(f"Instante de maxima potencia:    {max_power_timestamp}    P = {max_power_kw:.1f} kW")
@@ -1119,31 +1566,6 @@ def calculate_statistics(
         print(f"CO2 reducido total (indirecto): {co2_reduccion_kg:,.1f} kg ({co2_reduccion_kg/1000:,.2f} ton)")
         print(f"Factor CO2 diesel:              {FACTOR_CO2_KG_KWH} kg/kWh")
 
-    return {
-        "annual_ac_kwh": annual_ac_kwh,
-        "annual_dc_kwh": annual_dc_kwh,
-        "specific_yield": specific_yield,
-        "capacity_factor": capacity_factor,
-        "performance_ratio": performance_ratio,
-        "equivalent_hours": equivalent_hours,
-        "max_power_kw": max_power_kw,
-        "mean_power_kw": mean_power_kw,
-        "max_daily_energy_kwh": max_daily_energy,
-        "max_daily_energy_date": max_daily_energy_date,
-        "max_power_timestamp": max_power_timestamp,
-        "hours_with_production": int(hours_with_production),
-        # Metricas economicas y CO2
-        "ahorro_total_soles": ahorro_total_soles,
-        "ahorro_hp_soles": ahorro_hp_soles,
-        "ahorro_hfp_soles": ahorro_hfp_soles,
-        "energia_hp_kwh": energia_hp_kwh,
-        "energia_hfp_kwh": energia_hfp_kwh,
-        # CO2 reduccion indirecta (generacion solar desplaza diesel)
-        "co2_reduccion_kg": co2_reduccion_kg,
-        "co2_reduccion_ton": co2_reduccion_kg / 1000,
-        "factor_co2_kg_kwh": FACTOR_CO2_KG_KWH,
-    }
-
 
 def calculate_monthly_energy(results: pd.DataFrame) -> "pd.Series":
     """
@@ -1241,6 +1663,12 @@ def build_pv_timeseries_sandia(
     """
     Construye serie temporal de generacion FV usando modelo Sandia completo
     con datos TMY de PVGIS.
+
+    selection_mode: "manual", "auto"/"auto_top5"/"top5" (serie) o
+    "parallel"/"auto_parallel" (procesos; kwargs opcionales max_workers,
+    tilts, azimuths, factores_diseno para variantes de configuracion).
+    TMY: kwargs tmy_offline, tmy_cache_dir, tmy_refresh, tmy_file (ver _get_pvgis_tmy).
+    component_index_path: cache del indice de componentes (component_index.py).
     """
     print("\n" + "=" * 60)
     print("  SIMULACION FOTOVOLTAICA - MODELO SANDIA + PVGIS TMY")
@@ -1260,7 +1688,14 @@ def build_pv_timeseries_sandia(
     print(f"   Area utilizada: {config.area_utilizada_m2:,.0f} m²")
 
     # 1. Descargar datos TMY de PVGIS
-    tmy_data = _get_pvgis_tmy(config.latitude, config.longitude)
+    tmy_data = _get_pvgis_tmy(
+        config.latitude,
+        config.longitude,
+        offline=bool(kwargs.get("tmy_offline", False)),
+        cache_dir=kwargs.get("tmy_cache_dir"),
+        refresh=bool(kwargs.get("tmy_refresh", False)),
+        seed_file=kwargs.get("tmy_file"),
+    )
 
     # PVGIS devuelve datos en UTC. Para Iquitos (UTC-5), debemos ajustar el indice
     # La estrategia correcta es:
@@ -1268,25 +1703,7 @@ def build_pv_timeseries_sandia(
     # 2. Localizar a la zona horaria deseada
     # Esto evita problemas con cambios de horario de verano (DST)
 
-    # Crear indice en hora local de Iquitos
-    local_times = pd.date_range(
-        start=f"{year}-01-01 00:00:00",
-        periods=len(tmy_data),
-        freq="h",
-        tz=config.timezone,
-    )
-
-    # Reordenar los datos TMY para que coincidan con la hora local
-    # PVGIS hora 0 UTC = hora 19:00 del dia anterior en Lima (UTC-5)
-    # Por lo tanto, la hora 5 UTC = hora 0:00 Lima
-    utc_offset_hours = 5  # Lima es UTC-5
-
-    # Rotar los datos para alinear con hora local
-    tmy_values = tmy_data.values
-    tmy_columns = tmy_data.columns
-    tmy_rotated = np.roll(tmy_values, -utc_offset_hours, axis=0)
-
-    tmy_data = pd.DataFrame(tmy_rotated, index=local_times, columns=tmy_columns)
+    tmy_data = _localize_tmy(tmy_data, config.timezone, year)
 
     print(f"Datos ajustados a zona horaria local: {config.timezone} (UTC-5)")
     print(f"Indice horario: {tmy_data.index[0]} -> {tmy_data.index[-1]}")
@@ -1302,6 +1719,9 @@ def build_pv_timeseries_sandia(
     print("\nCargando bases de datos...")
     modules_db = _get_sandia_modules()
     inverters_db = _get_cec_inverters()
+    component_index = load_component_index(
+        kwargs.get("component_index_path"), modules_db=modules_db, inverters_db=inverters_db
+    )
     print(f"   Modulos Sandia: {len(modules_db.columns)} disponibles")
     print(f"   Inversores CEC: {len(inverters_db.columns)} disponibles")
 
@@ -1313,13 +1733,45 @@ def build_pv_timeseries_sandia(
     selection_results: list[dict[str, Any]] = []
     selection_best: Optional[dict[str, Any]] = None
     if candidate_count > 0:
-        module_candidates = _rank_modules_by_density(modules_db, config.area_utilizada_m2, top_n=candidate_count)
-        inverter_candidates = _rank_inverters_by_score(inverters_db, target_ac_kw, top_n=candidate_count)
+        module_candidates = _rank_modules_by_density(
+            modules_db, config.area_utilizada_m2, top_n=candidate_count, index=component_index.modules
+        )
+        inverter_candidates = _rank_inverters_by_score(
+            inverters_db, target_ac_kw, top_n=candidate_count, index=component_index.inverters
+        )
         _log_candidates("Modulos PV", module_candidates, candidate_count)
         _log_candidates("Inversores", inverter_candidates, candidate_count)
 
-    if selection_mode_norm in ("auto_top5", "auto", "top5"):
-        if not module_candidates.empty and not inverter_candidates.empty:
+    parallel_mode = selection_mode_norm in ("parallel", "auto_parallel")
+    if selection_mode_norm in ("auto_top5", "auto", "top5") or parallel_mode:
+        if not module_candidates.empty and not inverter_candidates.empty and parallel_mode:
+            # Variantes opcionales de orientacion/area: tilts, azimuths, factores_diseno
+            config_variants = expand_config_variants(
+                config,
+                tilts=kwargs.get("tilts"),
+                azimuths=kwargs.get("azimuths"),
+                factores_diseno=kwargs.get("factores_diseno"),
+            )
+            selection_results, selection_best = parallel_candidate_search(
+                tmy_data=tmy_data,
+                config=config,
+                modules_db=modules_db,
+                inverters_db=inverters_db,
+                module_candidates=module_candidates,
+                inverter_candidates=inverter_candidates,
+                target_dc_kw=target_dc_kw,
+                target_ac_kw=target_ac_kw,
+                selection_metric=selection_metric,
+                config_variants=config_variants,
+                max_workers=kwargs.get("max_workers"),
+            )
+            if selection_best and len(config_variants) > 1:
+                config = config_variants[int(selection_best["config_index"])]
+                print(
+                    f"  Configuracion seleccionada: tilt={config.tilt}°, azimut={config.azimuth}°, "
+                    f"factor_diseno={config.factor_diseno}"
+                )
+        elif not module_candidates.empty and not inverter_candidates.empty:
             selection_results, selection_best = _evaluate_candidate_combinations(
                 tmy_data=tmy_data,
                 config=config,
@@ -1355,8 +1807,12 @@ def build_pv_timeseries_sandia(
         module_name = config.module_name
         inverter_name = config.inverter_name
 
-    module_name, module_params, n_modules_max = _select_module(modules_db, str(module_name), config.area_utilizada_m2)
-    inverter_name, inverter_params, num_inverters = _select_inverter(inverters_db, str(inverter_name), target_ac_kw)
+    module_name, module_params, n_modules_max = _select_module(
+        modules_db, str(module_name), config.area_utilizada_m2, index=component_index.modules
+    )
+    inverter_name, inverter_params, num_inverters = _select_inverter(
+        inverters_db, str(inverter_name), target_ac_kw, index=component_index.inverters
+    )
 
     # 5. Calcular configuracion de strings
     modules_per_string, strings_parallel, total_modules = _calculate_string_config(
@@ -1438,6 +1894,14 @@ def build_pv_timeseries_sandia(
     return results, metadata
 
 
+# kwargs de run_solar_sizing que se reenvian a build_pv_timeseries_sandia
+_SIZING_PASSTHROUGH_KWARGS = (
+    "max_workers", "tilts", "azimuths", "factores_diseno",
+    "tmy_offline", "tmy_cache_dir", "tmy_refresh", "tmy_file",
+    "component_index_path",
+)
+
+
 def run_solar_sizing(
     out_dir: Path,
     year: int,
@@ -1484,6 +1948,7 @@ def run_solar_sizing(
         selection_mode=selection_mode,
         candidate_count=candidate_count,
         selection_metric=selection_metric,
+        **{k: kwargs[k] for k in _SIZING_PASSTHROUGH_KWARGS if k in kwargs},
     )
 
     # Guardar serie temporal principal (formato CityLearn v2)
@@ -2027,29 +2492,27 @@ def generate_solar_dataset_citylearn_complete(
         if old_col in df.columns and new_col not in df.columns:
             df[new_col] = df[old_col]
     
-    # Asegurar columnas de tarifa si no existen (run_solar_sizing ya debe crearlas)
+    # Asegurar columnas de tarifa y CO2 si no existen (run_solar_sizing ya debe crearlas)
+    acc = account_flows(
+        {'energia_kwh': df['energia_kwh'].to_numpy()},
+        OSINERGMIN_TARIFF,
+        hour_of_day=pd.to_datetime(df.index).hour.to_numpy(),
+    )
     if 'is_hora_punta' not in df.columns:
-        df['is_hora_punta'] = np.where(
-            (pd.to_datetime(df.index).hour >= 18) & 
-            (pd.to_datetime(df.index).hour < 23), 1, 0
-        )
+        df['is_hora_punta'] = acc.is_hp.astype(int)
     
     if 'hora_tipo' not in df.columns:
         df['hora_tipo'] = np.where(df['is_hora_punta'] == 1, 'HP', 'HFP')
     
     if 'tarifa_aplicada_soles' not in df.columns:
-        df['tarifa_aplicada_soles'] = np.where(
-            df['is_hora_punta'] == 1,
-            TARIFA_ENERGIA_HP_SOLES,
-            TARIFA_ENERGIA_HFP_SOLES
-        )
+        df['tarifa_aplicada_soles'] = acc.tariff_soles_kwh
     
     if 'ahorro_solar_soles' not in df.columns:
         df['ahorro_solar_soles'] = df['energia_kwh'] * df['tarifa_aplicada_soles']
     
     # Asegurar CO2 metrics si no existen
     if 'reduccion_indirecta_co2_kg' not in df.columns:
-        df['reduccion_indirecta_co2_kg'] = df['energia_kwh'] * FACTOR_CO2_KG_KWH
+        df['reduccion_indirecta_co2_kg'] = acc.co2('energia_kwh')
     
     # Seleccionar solo las 10 columnas requeridas (EXCLUSIVELY GENERACION SOLAR)
     required_columns = [
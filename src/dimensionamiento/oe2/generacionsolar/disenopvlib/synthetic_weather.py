@@ -0,0 +1,282 @@
+"""Generador vectorizado de anos meteorologicos sinteticos (K semillas por llamada).
+
+``_generate_synthetic_tmy`` construye un solo ano: clear-sky Ineichen con
+pvlib, ``np.random.seed(42)`` global y ruido de nubosidad, temperatura y
+viento. Para evaluar PV -> BESS -> RL por Monte-Carlo se necesitan cientos de
+anos de clima; aqui se generan todos en una llamada:
+
+- El clear-sky se calcula una vez por sitio y ano (cache en memoria) y se
+  difunde sobre las K semillas; no hay llamadas repetidas a pvlib.
+- Cada semilla usa su propio ``RandomState`` (sin reseed global): el ano k
+  depende solo de ``seeds[k]``, no del tamano del lote, y la semilla 42 sin
+  AR(1) reproduce exactamente ``_generate_synthetic_tmy``.
+- Opcionalmente se suma una anomalia diaria de nubosidad AR(1)
+  (``ar_phi`` = persistencia dia a dia, ``daily_cloud_std`` = desviacion
+  estacionaria), que agrupa dias nublados en rachas como en la climatologia
+  real; sin ella los dias son independientes.
+
+El resultado es un arreglo (K, horas, WEATHER_VARS) con las mismas columnas
+que el TMY (ghi, dni, dhi, temp_air, wind_speed). Un ano bisiesto como 2024
+tiene 8784 horas.
+
+Uso:
+    config = SyntheticWeatherConfig(ar_phi=0.7, daily_cloud_std=0.1)
+    years = generate_weather_years(range(200), -3.75, -73.25, config)
+    years.data.shape                          # (200, 8784, 5)
+    years.frame(0)                            # DataFrame como _generate_synthetic_tmy
+    ac_kw = PVSurrogate.load().predict_arrays(years.times, *years.arrays())   # (200, 8784)
+
+    python -m src.dimensionamiento.oe2.generacionsolar.disenopvlib.synthetic_weather --years 200 --ar-phi 0.7 --daily-std 0.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pvlib  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover
+    pvlib = None
+
+WEATHER_VARS = ("ghi", "dni", "dhi", "temp_air", "wind_speed")
+DEFAULT_WEATHER_YEARS_PATH = Path("data/oe2/Generacionsolar/synthetic_weather_years.npz")
+IQUITOS_LATITUDE = -3.75
+IQUITOS_LONGITUDE = -73.25
+IQUITOS_ALTITUDE_M = 104.0
+
+
+@dataclass(frozen=True)
+class SyntheticWeatherConfig:
+    """Climatologia de Iquitos (valores de ``_generate_synthetic_tmy``) y anomalia AR(1)."""
+
+    cloud_base_wet: float = 0.55       # Factor de claridad dic-may (temporada lluviosa)
+    cloud_base_dry: float = 0.70       # Factor de claridad jun-nov
+    afternoon_drop: float = 0.15       # Convectividad de 13:00 a 18:00
+    cloud_noise_std: float = 0.08      # Ruido horario del factor de claridad
+    cloud_min: float = 0.3
+    cloud_max: float = 0.95
+    t_mean: float = 26.5               # [°C]
+    t_daily_amp: float = 5.0           # [°C]
+    temp_noise_std: float = 1.0        # [°C]
+    wind_mean: float = 2.0             # [m/s]
+    wind_amp: float = 1.0              # [m/s]
+    wind_noise_std: float = 0.5        # [m/s]
+    wind_min: float = 0.5
+    wind_max: float = 6.0
+    ar_phi: float = 0.0                # Persistencia dia a dia de la anomalia de nubosidad
+    daily_cloud_std: float = 0.0       # Desviacion estacionaria de la anomalia diaria (0 = sin AR(1))
+
+    @property
+    def uses_daily_anomaly(self) -> bool:
+        return self.daily_cloud_std > 0
+
+
+@dataclass(frozen=True)
+class ClearSkyBase:
+    """Clear-sky Ineichen de un sitio y ano, compartido por todas las semillas."""
+
+    times: pd.DatetimeIndex
+    ghi: np.ndarray
+    dni: np.ndarray
+    dhi: np.ndarray
+
+
+@functools.lru_cache(maxsize=8)
+def clear_sky_base(
+    latitude: float,
+    longitude: float,
+    year: int = 2024,
+    timezone: str = "America/Lima",
+    altitude: float = IQUITOS_ALTITUDE_M,
+) -> ClearSkyBase:
+    """Calcula (una vez por argumentos) el clear-sky horario del ano con pvlib."""
+    if pvlib is None:
+        raise ImportError("pvlib es necesario para calcular el clear-sky del generador sintetico.")
+    times = pd.date_range(start=f"{year}-01-01 00:00:00", end=f"{year}-12-31 23:00:00", freq="h", tz=timezone)
+    location = pvlib.location.Location(latitude, longitude, tz=timezone, altitude=altitude)
+    clearsky = location.get_clearsky(times, model="ineichen")
+    arrays = {c: clearsky[c].to_numpy(dtype=np.float64) for c in ("ghi", "dni", "dhi")}
+    for x in arrays.values():
+        x.flags.writeable = False  # Compartidos entre llamadas via lru_cache
+    return ClearSkyBase(times=times, **arrays)
+
+
+@dataclass(frozen=True)
+class SyntheticWeatherYears:
+    """K anos sinteticos sobre un mismo indice horario."""
+
+    data: np.ndarray                   # (K, horas, len(WEATHER_VARS))
+    times: pd.DatetimeIndex
+    seeds: np.ndarray                  # (K,)
+    config: SyntheticWeatherConfig
+
+    @property
+    def n_years(self) -> int:
+        return int(self.data.shape[0])
+
+    @property
+    def n_hours(self) -> int:
+        return int(self.data.shape[1])
+
+    def variable(self, name: str) -> np.ndarray:
+        """Vista (K, horas) de una variable."""
+        if name not in WEATHER_VARS:
+            raise ValueError(f"Variable no soportada: {name!r} (opciones: {', '.join(WEATHER_VARS)})")
+        return self.data[:, :, WEATHER_VARS.index(name)]
+
+    def arrays(self) -> tuple[np.ndarray, ...]:
+        """(ghi, dni, dhi, temp_air, wind_speed), cada uno (K, horas)."""
+        return tuple(self.variable(name) for name in WEATHER_VARS)
+
+    def frame(self, k: int) -> pd.DataFrame:
+        """Ano k como DataFrame (mismo formato que ``_generate_synthetic_tmy``)."""
+        return pd.DataFrame(self.data[k], index=self.times, columns=list(WEATHER_VARS))
+
+    def frames(self) -> Iterator[pd.DataFrame]:
+        for k in range(self.n_years):
+            yield self.frame(k)
+
+    def save(self, path: str | Path = DEFAULT_WEATHER_YEARS_PATH) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            data=self.data,
+            times_ns=self.times.as_unit("ns").asi8,
+            timezone=np.array(str(self.times.tz)),
+            seeds=self.seeds,
+            variables=np.array(WEATHER_VARS),
+            config=np.array(json.dumps(asdict(self.config))),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path = DEFAULT_WEATHER_YEARS_PATH) -> "SyntheticWeatherYears":
+        with np.load(Path(path)) as npz:
+            if tuple(npz["variables"].tolist()) != WEATHER_VARS:
+                raise ValueError(f"Variables incompatibles en {path}: {npz['variables'].tolist()}")
+            times = pd.DatetimeIndex(npz["times_ns"].astype("datetime64[ns]")).tz_localize("UTC")
+            return cls(
+                data=npz["data"],
+                times=times.tz_convert(str(npz["timezone"])),
+                seeds=npz["seeds"],
+                config=SyntheticWeatherConfig(**json.loads(str(npz["config"]))),
+            )
+
+
+def _daily_anomaly(innovations: np.ndarray, phi: float, std: float) -> np.ndarray:
+    """Anomalia AR(1) estacionaria (K, dias) a partir de innovaciones N(0, 1)."""
+    anomaly = np.empty_like(innovations)
+    anomaly[:, 0] = std * innovations[:, 0]
+    scale = std * np.sqrt(1.0 - phi * phi)
+    for d in range(1, innovations.shape[1]):
+        anomaly[:, d] = phi * anomaly[:, d - 1] + scale * innovations[:, d]
+    return anomaly
+
+
+def generate_weather_years(
+    seeds: Iterable[int] | int,
+    latitude: float = IQUITOS_LATITUDE,
+    longitude: float = IQUITOS_LONGITUDE,
+    config: Optional[SyntheticWeatherConfig] = None,
+    year: int = 2024,
+    timezone: str = "America/Lima",
+    altitude: float = IQUITOS_ALTITUDE_M,
+    dtype: Any = np.float64,
+) -> SyntheticWeatherYears:
+    """Genera un ano sintetico por semilla en una sola pasada vectorizada.
+
+    Args:
+        seeds: Semillas (una por ano) o un entero K (semillas 0..K-1)
+        latitude, longitude, year, timezone, altitude: Sitio e indice horario local
+        config: Climatologia y anomalia AR(1) (por defecto, la de _generate_synthetic_tmy)
+        dtype: Tipo del arreglo de salida (float32 reduce la memoria a la mitad)
+    """
+    cfg = config or SyntheticWeatherConfig()
+    if not -1.0 < cfg.ar_phi < 1.0:
+        raise ValueError(f"ar_phi debe estar en (-1, 1): {cfg.ar_phi}")
+    if cfg.daily_cloud_std < 0:
+        raise ValueError(f"daily_cloud_std debe ser >= 0: {cfg.daily_cloud_std}")
+    seed_arr = np.arange(seeds, dtype=np.int64) if isinstance(seeds, (int, np.integer)) else np.asarray(list(seeds), dtype=np.int64)
+    if seed_arr.size == 0:
+        raise ValueError("Se requiere al menos una semilla")
+
+    base = clear_sky_base(float(latitude), float(longitude), int(year), timezone, float(altitude))
+    times = base.times
+    n_hours = len(times)
+    hour = times.hour.to_numpy()
+    month = times.month.to_numpy()
+    hour_float = hour + times.minute.to_numpy() / 60
+    day_of_row = times.dayofyear.to_numpy() - 1
+
+    # Perfiles deterministas (horas,), comunes a todas las semillas
+    cloud_profile = np.where((month >= 12) | (month <= 5), cfg.cloud_base_wet, cfg.cloud_base_dry) + np.where(
+        (hour >= 13) & (hour <= 18), -cfg.afternoon_drop, 0.0
+    )
+    temp_profile = cfg.t_mean + cfg.t_daily_amp * np.sin((hour_float - 6) / 24 * 2 * np.pi)
+    wind_profile = cfg.wind_mean + cfg.wind_amp * np.sin((hour_float - 8) / 24 * 2 * np.pi)
+
+    # Ruido: mismo orden de extraccion que _generate_synthetic_tmy (nubes, temperatura, viento)
+    k_years = seed_arr.size
+    noise = np.empty((k_years, 3, n_hours))
+    n_days = int(day_of_row.max()) + 1
+    innovations = np.empty((k_years, n_days)) if cfg.uses_daily_anomaly else None
+    for k, seed in enumerate(seed_arr):
+        rs = np.random.RandomState(int(seed))
+        noise[k] = rs.standard_normal((3, n_hours))
+        if innovations is not None:
+            innovations[k] = rs.standard_normal(n_days)
+
+    cloud = cloud_profile + cfg.cloud_noise_std * noise[:, 0]
+    if innovations is not None:
+        cloud += _daily_anomaly(innovations, cfg.ar_phi, cfg.daily_cloud_std)[:, day_of_row]
+    cloud = np.clip(cloud, cfg.cloud_min, cfg.cloud_max)
+
+    data = np.empty((k_years, n_hours, len(WEATHER_VARS)), dtype=dtype)
+    data[:, :, 0] = base.ghi * cloud
+    data[:, :, 1] = base.dni * cloud * 0.9
+    data[:, :, 2] = base.dhi * (1 + (1 - cloud) * 0.3)
+    data[:, :, 3] = temp_profile + cfg.temp_noise_std * noise[:, 1]
+    data[:, :, 4] = np.clip(wind_profile + np.abs(cfg.wind_noise_std * noise[:, 2]), cfg.wind_min, cfg.wind_max)
+    return SyntheticWeatherYears(data=data, times=times, seeds=seed_arr, config=cfg)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Genera K anos meteorologicos sinteticos (Iquitos)")
+    parser.add_argument("--years", type=int, default=100, help="Numero de anos (K)")
+    parser.add_argument("--seed-start", type=int, default=0, help="Primera semilla (seeds = start..start+K-1)")
+    parser.add_argument("--ar-phi", type=float, default=0.0, help="Persistencia AR(1) diaria de la nubosidad")
+    parser.add_argument("--daily-std", type=float, default=0.0,
+                        help="Desviacion de la anomalia diaria de nubosidad (0 = sin anomalia)")
+    parser.add_argument("--year", type=int, default=2024, help="Ano del indice horario local")
+    parser.add_argument("--float32", action="store_true", help="Guardar en float32")
+    parser.add_argument("--out", default=str(DEFAULT_WEATHER_YEARS_PATH), help="Archivo .npz de salida")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    config = SyntheticWeatherConfig(ar_phi=args.ar_phi, daily_cloud_std=args.daily_std)
+    t0 = time.perf_counter()
+    years = generate_weather_years(
+        range(args.seed_start, args.seed_start + args.years),
+        config=config, year=args.year, dtype=np.float32 if args.float32 else np.float64,
+    )
+    elapsed = time.perf_counter() - t0
+    ghi_annual = years.variable("ghi").sum(axis=1) / 1000
+    print(
+        f"[OK] {years.n_years} anos x {years.n_hours} h en {elapsed:.2f} s | "
+        f"GHI anual {ghi_annual.mean():,.0f} kWh/m² (p5 {np.percentile(ghi_annual, 5):,.0f}, "
+        f"p95 {np.percentile(ghi_annual, 95):,.0f})"
+    )
+    print(f"[OK] Guardado: {years.save(args.out)}")
+
+
+if __name__ == "__main__":
+    main()
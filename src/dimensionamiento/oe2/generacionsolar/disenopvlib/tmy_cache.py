@@ -0,0 +1,244 @@
+"""Cache local en disco de anos meteorologicos tipicos (TMY) de PVGIS.
+
+Cada TMY descargado se guarda ya parseado en un ``.npz`` compacto (matriz
+float64 horas x variables, indice en ns UTC, zona horaria) con los metadatos
+de origen en JSON. La clave es (lat, lon, startyear, endyear, usehorizon) mas
+el formato de columnas (``pvlib`` = nombres mapeados por pvlib, ``pvgis_csv``
+= columnas crudas del CSV de PVGIS).
+
+- Un acierto de cache se sirve sin red.
+- ``offline=True`` nunca usa la red: si no hay entrada lanza
+  TMYUnavailableError en lugar de caer a datos sinteticos.
+- ``seed_tmy_cache`` precarga una entrada desde un archivo PVGIS (csv/json/epw)
+  o un CSV con indice de fecha, para nodos sin red.
+
+Uso:
+    from src.dimensionamiento.oe2.generacionsolar.disenopvlib.tmy_cache import TMYKey, get_cached_tmy
+    key = TMYKey(-3.75, -73.25, 2005, 2020, True)
+    tmy, meta = get_cached_tmy(key, fetch=descargar, offline=True)
+
+    python -m src.dimensionamiento.oe2.generacionsolar.disenopvlib.tmy_cache list
+    python -m src.dimensionamiento.oe2.generacionsolar.disenopvlib.tmy_cache seed tmy_iquitos.csv --lat -3.75 --lon -73.25
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+TMY_CACHE_FORMAT_VERSION = 1
+DEFAULT_TMY_CACHE_DIR = Path("data/oe2/Generacionsolar/tmy_cache")
+TMY_FORMATS = ("pvlib", "pvgis_csv")
+
+
+class TMYUnavailableError(RuntimeError):
+    """No hay TMY en cache y el modo offline impide descargarlo."""
+
+
+@dataclass(frozen=True)
+class TMYKey:
+    """Clave de cache de un TMY de PVGIS."""
+
+    latitude: float
+    longitude: float
+    startyear: int = 2005
+    endyear: int = 2020
+    usehorizon: bool = True
+    fmt: str = "pvlib"
+
+    def __post_init__(self) -> None:
+        if self.fmt not in TMY_FORMATS:
+            raise ValueError(f"Formato TMY no soportado: {self.fmt!r} (opciones: {', '.join(TMY_FORMATS)})")
+
+    @property
+    def stem(self) -> str:
+        return (
+            f"tmy_{self.fmt}_lat{self.latitude:+.4f}_lon{self.longitude:+.4f}"
+            f"_{self.startyear}-{self.endyear}_h{int(self.usehorizon)}"
+        )
+
+
+def tmy_cache_path(key: TMYKey, cache_dir: str | Path | None = None) -> Path:
+    """Ruta del archivo de cache para la clave."""
+    return Path(cache_dir or DEFAULT_TMY_CACHE_DIR) / f"{key.stem}.npz"
+
+
+def _json_safe(value: Any) -> Any:
+    """Convierte metadatos de PVGIS (dicts/listas anidados) a JSON serializable."""
+    return json.loads(json.dumps(value, default=str))
+
+
+def save_tmy(
+    data: pd.DataFrame,
+    key: TMYKey,
+    cache_dir: str | Path | None = None,
+    source: str = "pvgis",
+    metadata: Optional[dict[str, Any]] = None,
+) -> Path:
+    """Guarda un TMY parseado (columnas numericas, DatetimeIndex) en el cache."""
+    if not isinstance(data.index, pd.DatetimeIndex):
+        raise ValueError("El TMY debe tener un DatetimeIndex")
+    path = tmy_cache_path(key, cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    index = data.index
+    tz = str(index.tz) if index.tz is not None else ""
+    index_ns = (index.tz_convert("UTC") if index.tz is not None else index).as_unit("ns").asi8
+    meta = {
+        "key": asdict(key),
+        "source": source,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "n_rows": int(len(data)),
+        "index_name": index.name,
+        "metadata": _json_safe(metadata or {}),
+    }
+    tmp = path.with_name(path.stem + ".tmp.npz")
+    np.savez(
+        tmp,
+        format_version=np.int64(TMY_CACHE_FORMAT_VERSION),
+        values=data.to_numpy(dtype=np.float64),
+        columns=np.array([str(c) for c in data.columns]),
+        index_ns=index_ns.astype(np.int64),
+        tz=np.array(tz),
+        meta=np.array(json.dumps(meta)),
+    )
+    tmp.replace(path)
+    return path
+
+
+def load_tmy(key: TMYKey, cache_dir: str | Path | None = None) -> Optional[Tuple[pd.DataFrame, dict[str, Any]]]:
+    """Lee un TMY del cache; None si no hay entrada."""
+    path = tmy_cache_path(key, cache_dir)
+    if not path.exists():
+        return None
+    with np.load(path) as npz:
+        if int(npz["format_version"]) > TMY_CACHE_FORMAT_VERSION:
+            raise ValueError(f"Cache TMY v{int(npz['format_version'])} no soportado: {path}")
+        values = npz["values"]
+        columns = [str(c) for c in npz["columns"]]
+        index_ns = npz["index_ns"]
+        tz = str(npz["tz"])
+        meta: dict[str, Any] = json.loads(str(npz["meta"]))
+    if tz:
+        index = pd.DatetimeIndex(pd.to_datetime(index_ns, utc=True)).tz_convert(tz)
+    else:
+        index = pd.DatetimeIndex(pd.to_datetime(index_ns))
+    index.name = meta.get("index_name")
+    meta["cache_path"] = str(path)
+    return pd.DataFrame(values, index=index, columns=columns), meta
+
+
+def get_cached_tmy(
+    key: TMYKey,
+    fetch: Callable[[], Tuple[pd.DataFrame, dict[str, Any]]],
+    cache_dir: str | Path | None = None,
+    offline: bool = False,
+    refresh: bool = False,
+) -> Tuple[pd.DataFrame, dict[str, Any]]:
+    """TMY desde el cache o, si falta, desde `fetch()` (que se guarda en el cache).
+
+    Args:
+        key: Clave (ubicacion, periodo, horizonte, formato)
+        fetch: Descarga -> (datos, metadatos de origen); sus excepciones se propagan
+        cache_dir: Directorio de cache (default: DEFAULT_TMY_CACHE_DIR)
+        offline: No usar la red; TMYUnavailableError si no hay entrada
+        refresh: Ignorar la entrada existente y volver a descargar
+
+    Returns:
+        (datos, metadatos) con ``metadata['cache_hit']``
+    """
+    if not refresh:
+        hit = load_tmy(key, cache_dir)
+        if hit is not None:
+            data, meta = hit
+            meta["cache_hit"] = True
+            return data, meta
+    if offline:
+        raise TMYUnavailableError(
+            f"TMY no disponible en cache (modo offline): {tmy_cache_path(key, cache_dir)}. "
+            "Precargar con seed_tmy_cache() o el comando 'seed'."
+        )
+    fetched, source_meta = fetch()
+    save_tmy(fetched, key, cache_dir, source="pvgis", metadata=source_meta)
+    # Releer del cache: una descarga y un acierto posterior devuelven lo mismo
+    data, meta = load_tmy(key, cache_dir)  # type: ignore[misc]
+    meta["cache_hit"] = False
+    return data, meta
+
+
+def seed_tmy_cache(
+    path: str | Path,
+    key: TMYKey,
+    cache_dir: str | Path | None = None,
+) -> Path:
+    """Precarga el cache desde un archivo local.
+
+    Acepta archivos TMY de PVGIS (csv/json/epw, leidos con
+    ``pvlib.iotools.read_pvgis_tmy``; el formato ``pvgis_csv`` conserva las
+    columnas crudas) o un CSV con la fecha en la primera columna.
+    """
+    path = Path(path)
+    metadata: dict[str, Any] = {"seed_file": str(path.resolve())}
+    data: Optional[pd.DataFrame] = None
+    try:
+        import pvlib  # type: ignore[import-not-found]
+
+        result = pvlib.iotools.read_pvgis_tmy(str(path), map_variables=key.fmt == "pvlib")  # type: ignore[attr-defined]
+        data = result[0] if isinstance(result, tuple) else result
+        if isinstance(result, tuple) and len(result) > 1:
+            metadata["pvgis"] = result[-1]
+    except ImportError:
+        pass
+    except Exception:  # Formato no PVGIS (el parser falla de varias formas): leer como CSV
+        data = None
+    if data is None:
+        data = pd.read_csv(path, index_col=0, parse_dates=True)
+        if not isinstance(data.index, pd.DatetimeIndex):
+            raise ValueError(f"No se pudo leer el indice de fechas de {path}")
+    return save_tmy(data, key, cache_dir, source="seed", metadata=metadata)
+
+
+def list_tmy_cache(cache_dir: str | Path | None = None) -> pd.DataFrame:
+    """Resumen de las entradas del cache (clave, origen, filas, fecha)."""
+    rows: list[dict[str, Any]] = []
+    for path in sorted(Path(cache_dir or DEFAULT_TMY_CACHE_DIR).glob("tmy_*.npz")):
+        with np.load(path) as npz:
+            meta = json.loads(str(npz["meta"]))
+        rows.append({**meta["key"], "source": meta["source"], "n_rows": meta["n_rows"],
+                     "created": meta["created"], "file": path.name})
+    return pd.DataFrame(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cache local de TMY de PVGIS")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_TMY_CACHE_DIR), help="Directorio de cache")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Lista las entradas del cache")
+    seed = sub.add_parser("seed", help="Precarga una entrada desde un archivo local")
+    seed.add_argument("path", help="Archivo TMY (PVGIS csv/json/epw o CSV con fecha)")
+    seed.add_argument("--lat", type=float, required=True)
+    seed.add_argument("--lon", type=float, required=True)
+    seed.add_argument("--startyear", type=int, default=2005)
+    seed.add_argument("--endyear", type=int, default=2020)
+    seed.add_argument("--no-horizon", action="store_true", help="TMY calculado sin horizonte")
+    seed.add_argument("--fmt", choices=TMY_FORMATS, default="pvlib", help="Formato de columnas")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        entries = list_tmy_cache(args.cache_dir)
+        print(entries.to_string(index=False) if not entries.empty else "Cache TMY vacio")
+        return
+    key = TMYKey(args.lat, args.lon, args.startyear, args.endyear, not args.no_horizon, args.fmt)
+    out = seed_tmy_cache(args.path, key, args.cache_dir)
+    print(f"[OK] TMY precargado: {out}")
+
+
+if __name__ == "__main__":
+    main()
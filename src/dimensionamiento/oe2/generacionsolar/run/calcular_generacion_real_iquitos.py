@@ -15,12 +15,22 @@ from __future__ import annotations
 import warnings
 import sys
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
 import pandas as pd
 import numpy as np
 import requests
 
+try:
+    from src.dimensionamiento.oe2.generacionsolar.disenopvlib.tmy_cache import (
+        TMYKey, TMYUnavailableError, get_cached_tmy,
+    )
+except ImportError:  # Ejecucion directa: raiz del proyecto fuera de sys.path
+    sys.path.insert(0, str(Path(__file__).resolve().parents[5]))
+    from src.dimensionamiento.oe2.generacionsolar.disenopvlib.tmy_cache import (  # type: ignore[no-redef]
+        TMYKey, TMYUnavailableError, get_cached_tmy,
+    )
+
 # Suprimir warnings
 warnings.filterwarnings("ignore")
 
@@ -41,7 +51,10 @@ def download_pvgis_tmy(
     longitude: float,
     startyear: int = 2005,
     endyear: int = 2020,
-    verbose: bool = True
+    verbose: bool = True,
+    offline: bool = False,
+    cache_dir: Optional[str | Path] = None,
+    refresh: bool = False,
 ) -> Optional[pd.DataFrame]:
     """
     Descarga datos TMY (Typical Meteorological Year) de PVGIS.
@@ -53,6 +66,10 @@ def download_pvgis_tmy(
     - DHI (W/m²)
     - T2m (°C) - temperatura a 2m
     - WS10m (m/s) - velocidad viento a 10m
+
+    El resultado parseado se guarda en el cache local de TMY (formato
+    'pvgis_csv'); los aciertos no usan la red. Con `offline=True` una entrada
+    faltante lanza TMYUnavailableError.
     """
 
     url = "https://re.jrc.ec.europa.eu/api/v5_2/tmy"
@@ -65,11 +82,11 @@ def download_pvgis_tmy(
         "outputformat": "csv",
     }
 
-    if verbose:
-        print(f"\n📡 Descargando datos TMY de PVGIS para Iquitos ({latitude}, {longitude})...")
-        print(f"   Periodo: {startyear}-{endyear}")
+    def _download() -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        if verbose:
+            print(f"\n📡 Descargando datos TMY de PVGIS para Iquitos ({latitude}, {longitude})...")
+            print(f"   Periodo: {startyear}-{endyear}")
 
-    try:
         response = requests.get(url, params=params, timeout=30)
         response.raise_for_status()
 
@@ -94,24 +111,21 @@ def download_pvgis_tmy(
         df.columns = [c.strip() for c in df.columns]
 
         # Convertir fecha/hora a datetime
-        if 'time' in df.columns:
-            df['time'] = pd.to_datetime(df['time'], format='%Y%m%d:%H%M')
-        else:
+        if 'time' not in df.columns:
             # Algunas versiones usan formato diferente
-            print("WARN: No 'time' column found, intentando autodetectar...")
-            return None
+            raise ValueError("No 'time' column found en respuesta PVGIS")
+        df['time'] = pd.to_datetime(df['time'], format='%Y%m%d:%H%M')
 
         # Localizar a timezone de Iquitos
         df['time'] = df['time'].dt.tz_localize('UTC').dt.tz_convert(IQUITOS_TZ)
         df.set_index('time', inplace=True)
+        return df, {"url": url, "params": params, "header": lines[:data_start]}
 
-        if verbose:
-            print(f"   [OK] Descargados {len(df)} registros")
-            print(f"   Periodo: {df.index[0]} a {df.index[-1]}")
-            print(f"   Columnas: {list(df.columns)}")
-
-        return df
-
+    key = TMYKey(latitude, longitude, startyear, endyear, usehorizon=True, fmt="pvgis_csv")
+    try:
+        df, meta = get_cached_tmy(key, _download, cache_dir=cache_dir, offline=offline, refresh=refresh)
+    except TMYUnavailableError:
+        raise
     except requests.RequestException as e:
         print(f"   [X] Error descargando PVGIS: {e}")
         return None
@@ -119,6 +133,16 @@ def download_pvgis_tmy(
         print(f"   [X] Error procesando datos PVGIS: {e}")
         return None
 
+    if verbose:
+        if meta.get("cache_hit"):
+            print(f"   [OK] TMY desde cache local: {meta.get('cache_path')}")
+        else:
+            print(f"   [OK] Descargados {len(df)} registros")
+        print(f"   Periodo: {df.index[0]} a {df.index[-1]}")
+        print(f"   Columnas: {list(df.columns)}")
+
+    return df
+
 
 def get_sandia_module_spec() -> dict[str, float]:
     """
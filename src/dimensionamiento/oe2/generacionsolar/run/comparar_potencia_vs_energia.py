@@ -5,13 +5,19 @@ Sistema solar de Iquitos - 4,050 kWp
 Formula correcta: E [kWh] = P [kW] × Δt [h]
 """
 
-import pandas as pd
+import sys
 import numpy as np
 from pathlib import Path
 
-# Cargar datos
+try:
+    from .solar_aggregates import load_solar_csv
+except ImportError:  # Ejecucion directa: python .../run/comparar_potencia_vs_energia.py
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from solar_aggregates import load_solar_csv  # type: ignore[no-redef]
+
+# Cargar datos (lectura y agregados compartidos con main.py/utils.py)
 data_path = Path("data/oe2/Generacionsolar/pv_generation_timeseries.csv")
-df = pd.read_csv(data_path, index_col='datetime', parse_dates=True)
+df, agg = load_solar_csv(data_path)
 df = df.reset_index()  # Convert index back to column for compatibility
 
 print("=" * 80)
@@ -23,14 +29,14 @@ print("\n[GRAPH] COMPARACION DE UNIDADES Y VALORES")
 print("-" * 80)
 
 # Maximo y promedio de potencia
-max_power = df['ac_power_kw'].max()
-mean_power = df['ac_power_kw'].mean()
-min_power = df['ac_power_kw'].min()
+max_power = agg.stats['power']['max']
+mean_power = agg.stats['power']['promedio']
+min_power = agg.stats['power']['min']
 
 # Maximo y promedio de energia
-max_energy = df['ac_energy_kwh'].max()
-mean_energy = df['ac_energy_kwh'].mean()
-min_energy = df['ac_energy_kwh'].min()
+max_energy = agg.stats['energy']['max']
+mean_energy = agg.stats['energy']['promedio']
+min_energy = agg.stats['energy']['min']
 
 print(f"\n🔴 POTENCIA (kW) - Instantanea [W/1000]:")
 print(f"   Maxima:  {max_power:,.1f} kW")
@@ -56,11 +62,8 @@ print(f"   Datetime: {max_row['datetime']}")
 print(f"   Potencia AC: {max_row['ac_power_kw']:.1f} kW")
 print(f"   Energia AC: {max_row['ac_energy_kwh']:.6f} kWh")
 
-# Calcular el intervalo de tiempo
-if len(df) > 1:
-    dt_hours = (df['datetime'].iloc[1] - df['datetime'].iloc[0]).total_seconds() / 3600
-else:
-    dt_hours = 1.0
+# Intervalo de tiempo
+dt_hours = agg.dt_hours
 
 print(f"\n[TIME]️ Intervalo temporal (Δt): {dt_hours:.4f} horas")
 
@@ -78,7 +81,7 @@ print(f"   Error = {error_pct:.10f} %")
 print(f"   [OK] VERIFICACION: {'CORRECTA' if error_pct < 0.01 else 'DIFERENCIA DETECTADA'}")
 
 # Resumen de energia total
-total_energy_kwh = df['ac_energy_kwh'].sum()
+total_energy_kwh = agg.annual['energy_kwh']
 print(f"\n[CHART] RESUMEN ANUAL:")
 print(f"   Energia total anual: {total_energy_kwh:,.0f} kWh")
 print(f"   Energia total anual: {total_energy_kwh/1e6:.2f} GWh")
@@ -118,7 +121,7 @@ print(f"""
 print("\n" + "=" * 80)
 print("  TABLA RESUMEN ENERGIA MENSUAL")
 print("=" * 80)
-monthly = df.groupby(df['datetime'].dt.strftime('%Y-%m'))['ac_energy_kwh'].sum()
+monthly = agg.calendar_monthly_series('energy_kwh')
 for month, energy in monthly.items():
-    print(f"  {month}:  {energy:>12,.0f} kWh  ({energy/1e3:>8,.1f} MWh)")
+    print(f"  {month.strftime('%Y-%m')}:  {energy:>12,.0f} kWh  ({energy/1e3:>8,.1f} MWh)")
 print(f"  {'TOTAL':>7}:  {total_energy_kwh:>12,.0f} kWh  ({total_energy_kwh/1e6:>8,.2f} GWh)")
@@ -23,6 +23,12 @@ from datetime import datetime
 import pandas as pd
 import numpy as np
 
+try:
+    from .solar_aggregates import SolarAggregates, get_aggregates
+except ImportError:  # Ejecucion directa: python .../run/main.py
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from solar_aggregates import SolarAggregates, get_aggregates  # type: ignore[no-redef]
+
 # Intentar importar matplotlib para graficas
 try:
     import matplotlib.pyplot as plt
@@ -44,6 +50,7 @@ class SolarGenerationAnalyzer:
         """
         self.csv_path = csv_path
         self.df: Optional[pd.DataFrame] = None
+        self.aggregates: Optional[SolarAggregates] = None
         self.daily_energy: Optional[pd.Series] = None
         self.monthly_energy: Optional[pd.Series] = None
         self.annual_energy: float = 0.0
@@ -75,90 +82,94 @@ class SolarGenerationAnalyzer:
             else:
                 raise ValueError("El CSV debe contener 'ac_power_kw' o 'ac_energy_kwh'")
 
-        """Obtener resumen anual completo."""
-        if self.df is None:
+        # Una sola pasada: tablas diaria/mensual/horaria que leen resumenes y graficas
+        self.aggregates = get_aggregates(self.df)
+        self.daily_energy = self.aggregates.daily_series("energy_kwh")
+        self.monthly_energy = self.aggregates.calendar_monthly_series("energy_kwh")
+        self.annual_energy = self.aggregates.annual["energy_kwh"]
+        print(f"[OK] {len(self.df)} registros, {len(self.daily_energy)} dias")
+
+    def _require_aggregates(self) -> SolarAggregates:
+        if self.df is None or self.aggregates is None:
             raise ValueError("No hay datos cargados")
+        return self.aggregates
+
+    # =========================================================================
+    # RESUMENES
+    # =========================================================================
+
+    def get_annual_summary(self) -> Dict[str, float]:
+        """Obtener resumen anual completo."""
+        agg = self._require_aggregates()
+        power, temp, ghi = agg.stats["power"], agg.stats["temp"], agg.stats["ghi"]
 
         return {
             "energia_anual_kwh": self.annual_energy,
             "energia_anual_mwh": self.annual_energy / 1000.0,
             "energia_anual_gwh": self.annual_energy / 1e6,
-            "potencia_promedio_kw": self.df['ac_power_kw'].mean(),
-            "potencia_maxima_kw": self.df['ac_power_kw'].max(),
-            "potencia_minima_kw": self.df['ac_power_kw'].min(),
-            "temperatura_promedio_c": self.df['temp_air_c'].mean(),
-            "temperatura_maxima_c": self.df['temp_air_c'].max(),
-            "temperatura_minima_c": self.df['temp_air_c'].min(),
-            "irradiancia_promedio_wm2": self.df['ghi_wm2'].mean(),
-            "irradiancia_maxima_wm2": self.df['ghi_wm2'].max(),
+            "potencia_promedio_kw": power["promedio"],
+            "potencia_maxima_kw": power["max"],
+            "potencia_minima_kw": power["min"],
+            "temperatura_promedio_c": temp["promedio"],
+            "temperatura_maxima_c": temp["max"],
+            "temperatura_minima_c": temp["min"],
+            "irradiancia_promedio_wm2": ghi["promedio"],
+            "irradiancia_maxima_wm2": ghi["max"],
         }
 
     def get_monthly_summary(self) -> pd.DataFrame:
         """Obtener resumen mensual."""
-        if self.df is None:
-            raise ValueError("No hay datos cargados")
+        monthly = self._require_aggregates().monthly
 
         months = []
         month_names = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
                       "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
 
-        for month_num in range(1, 13):
-            month_mask = self.df.index.month == month_num
-            month_data = self.df[month_mask]
-
-            if len(month_data) > 0:
-                months.append({
-                    'Mes': month_names[month_num - 1],
-                    'Num': month_num,
-                    'Energia_kWh': month_data['ac_energy_kwh'].sum(),
-                    'Potencia_Promedio_kW': month_data['ac_power_kw'].mean(),
-                    'Potencia_Maxima_kW': month_data['ac_power_kw'].max(),
-                    'Temperatura_Promedio_C': month_data['temp_air_c'].mean(),
-                    'Irradiancia_Promedio_Wm2': month_data['ghi_wm2'].mean(),
-                    'Dias': (month_data.index.max() - month_data.index.min()).days + 1,
-                })
+        for i in np.flatnonzero(monthly["n_rows"] > 0):
+            months.append({
+                'Mes': month_names[i],
+                'Num': int(i) + 1,
+                'Energia_kWh': monthly['energy_kwh'][i],
+                'Potencia_Promedio_kW': monthly['power_mean_kw'][i],
+                'Potencia_Maxima_kW': monthly['power_max_kw'][i],
+                'Temperatura_Promedio_C': monthly['temp_mean_c'][i],
+                'Irradiancia_Promedio_Wm2': monthly['ghi_mean_wm2'][i],
+                'Dias': int(monthly['span_days'][i]),
+            })
 
         return pd.DataFrame(months)
 
     def get_daily_summary(self) -> pd.DataFrame:
         """Obtener resumen diario."""
-        if self.df is None:
-            raise ValueError("No hay datos cargados")
-
-        daily_stats = self.df.groupby(self.df.index.date).agg({
-            'ac_energy_kwh': 'sum',
-            'ac_power_kw': ['mean', 'max'],
-            'temp_air_c': ['mean', 'max', 'min'],
-            'ghi_wm2': ['mean', 'max'],
+        agg = self._require_aggregates()
+        daily = agg.daily
+
+        return pd.DataFrame({
+            'Fecha': agg.dates.date,
+            'Energia_kWh': daily['energy_kwh'],
+            'Potencia_Promedio_kW': daily['power_mean_kw'],
+            'Potencia_Maxima_kW': daily['power_max_kw'],
+            'Temp_Promedio_C': daily['temp_mean_c'],
+            'Temp_Maxima_C': daily['temp_max_c'],
+            'Temp_Minima_C': daily['temp_min_c'],
+            'Irradiancia_Promedio_Wm2': daily['ghi_mean_wm2'],
+            'Irradiancia_Maxima_Wm2': daily['ghi_max_wm2'],
         }).round(2)
 
-        daily_stats.columns = ['Energia_kWh', 'Potencia_Promedio_kW', 'Potencia_Maxima_kW',
-                               'Temp_Promedio_C', 'Temp_Maxima_C', 'Temp_Minima_C',
-                               'Irradiancia_Promedio_Wm2', 'Irradiancia_Maxima_Wm2']
-
-        return daily_stats.reset_index().rename(columns={'timestamp': 'Fecha'})
-
     # =========================================================================
     # DIAS REPRESENTATIVOS
     # =========================================================================
 
     def find_representative_days(self) -> dict[str, dict[str, Any]]:
         """Encontrar dias representativos: despejado, nublado, templado."""
-        if self.daily_energy is None:
+        if self.aggregates is None:
             raise ValueError("No hay datos de energia diaria calculados")
 
-        # Dia mas despejado: maxima energia
-        idx_max = self.daily_energy.idxmax()
-        max_energy = self.daily_energy.max()
-
-        # Dia mas nublado: minima energia
-        idx_min = self.daily_energy.idxmin()
-        min_energy = self.daily_energy.min()
-
-        # Dia templado: energia mas cercana a la mediana
-        median_energy = self.daily_energy.median()
-        idx_median = (self.daily_energy - median_energy).abs().idxmin()
-        median_value = self.daily_energy[idx_median]
+        # Despejado: maxima energia; nublado: minima; templado: mas cercana a la mediana
+        days = self.aggregates.representative_days()
+        idx_max, max_energy = days['despejado']
+        idx_min, min_energy = days['nublado']
+        idx_median, median_value = days['templado']
 
         return {
             'despejado': {
@@ -180,10 +191,9 @@ class SolarGenerationAnalyzer:
 
     def get_day_profile(self, date: pd.Timestamp) -> pd.DataFrame:
         """Obtener perfil horario de un dia especifico."""
-        if self.df is None:
-            raise ValueError("No hay datos cargados")
+        agg = self._require_aggregates()
 
-        day_data = self.df[self.df.index.date == date.date()]
+        day_data = agg.day_frame(self.df, date)
 
         if len(day_data) == 0:
             return pd.DataFrame()
@@ -196,54 +206,15 @@ class SolarGenerationAnalyzer:
 
     def get_temperature_analysis(self) -> dict[str, float]:
         """Analisis detallado de temperatura."""
-        if self.df is None:
-            raise ValueError("No hay datos cargados")
-
-        temps = self.df['temp_air_c']
-
-        return {
-            'promedio': float(temps.mean()),
-            'mediana': float(temps.median()),
-            'max': float(temps.max()),
-            'min': float(temps.min()),
-            'std': float(temps.std()),
-            'q25': float(temps.quantile(0.25)),
-            'q75': float(temps.quantile(0.75)),
-        }
+        return dict(self._require_aggregates().stats['temp'])
 
     def get_irradiance_analysis(self) -> dict[str, float]:
         """Analisis detallado de irradiancia."""
-        if self.df is None:
-            raise ValueError("No hay datos cargados")
-
-        ghi = self.df['ghi_wm2']
-
-        return {
-            'promedio': float(ghi.mean()),
-            'mediana': float(ghi.median()),
-            'max': float(ghi.max()),
-            'min': float(ghi.min()),
-            'std': float(ghi.std()),
-            'q25': float(ghi.quantile(0.25)),
-            'q75': float(ghi.quantile(0.75)),
-        }
+        return dict(self._require_aggregates().stats['ghi'])
 
     def get_power_analysis(self) -> dict[str, float]:
         """Analisis detallado de potencia."""
-        if self.df is None:
-            raise ValueError("No hay datos cargados")
-
-        power = self.df['ac_power_kw']
-
-        return {
-            'promedio': float(power.mean()),
-            'mediana': float(power.median()),
-            'max': float(power.max()),
-            'min': float(power.min()),
-            'std': float(power.std()),
-            'q25': float(power.quantile(0.25)),
-            'q75': float(power.quantile(0.75)),
-        }
+        return dict(self._require_aggregates().stats['power'])
 
     # =========================================================================
     # GRAFICAS
@@ -293,8 +264,7 @@ class SolarGenerationAnalyzer:
         fig, ax = plt.subplots(figsize=(12, 6))
 
         months = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
-        energies = [self.monthly_energy.iloc[i] if i < len(self.monthly_energy) else 0
-                   for i in range(12)]
+        energies = np.nan_to_num(self.aggregates.monthly['energy_kwh']).tolist()
 
         bars = ax.bar(months, energies, color='forestgreen', edgecolor='darkgreen', alpha=0.8)
 
@@ -325,8 +295,9 @@ class SolarGenerationAnalyzer:
         ax.fill_between(self.daily_energy.index, self.daily_energy.values,
                        alpha=0.3, color='skyblue')
 
-        ax.axhline(y=self.daily_energy.mean(), color='red', linestyle='--',
-                  linewidth=2, label=f'Promedio: {self.daily_energy.mean():.0f} kWh')
+        mean_daily = float(self.daily_energy.mean())
+        ax.axhline(y=mean_daily, color='red', linestyle='--',
+                  linewidth=2, label=f'Promedio: {mean_daily:.0f} kWh')
 
         ax.set_xlabel('Fecha', fontsize=11, fontweight='bold')
         ax.set_ylabel('Energia (kWh)', fontsize=11, fontweight='bold')
@@ -341,10 +312,10 @@ class SolarGenerationAnalyzer:
 
     def _plot_hourly_profile(self, output_dir: Path) -> None:
         """Grafica de perfil horario promedio."""
-        if self.df is None:
+        if self.aggregates is None:
             return
 
-        hourly_avg = self.df['ac_power_kw'].groupby(self.df.index.hour).mean()
+        hourly_avg = self.aggregates.hourly_series('power_mean_kw')
 
         fig, ax = plt.subplots(figsize=(12, 6))
 
@@ -364,15 +335,13 @@ class SolarGenerationAnalyzer:
 
     def _plot_monthly_temperature(self, output_dir: Path) -> None:
         """Grafica de temperatura mensual."""
-        if self.df is None:
+        if self.aggregates is None:
             return
 
-        monthly_temp = self.df['temp_air_c'].resample('ME').mean()
-
         fig, ax = plt.subplots(figsize=(12, 6))
 
         months = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
-        temps = [monthly_temp.iloc[i] if i < len(monthly_temp) else 0 for i in range(12)]
+        temps = np.nan_to_num(self.aggregates.monthly['temp_mean_c']).tolist()
 
         ax.plot(months, temps, marker='o', linewidth=2.5, markersize=8, color='red')
         ax.fill_between(range(len(months)), temps, alpha=0.3, color='red')
@@ -390,15 +359,13 @@ class SolarGenerationAnalyzer:
 
     def _plot_monthly_irradiance(self, output_dir: Path) -> None:
         """Grafica de irradiancia mensual."""
-        if self.df is None:
+        if self.aggregates is None:
             return
 
-        monthly_irr = self.df['ghi_wm2'].resample('ME').mean()
-
         fig, ax = plt.subplots(figsize=(12, 6))
 
         months = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
-        irrs = [monthly_irr.iloc[i] if i < len(monthly_irr) else 0 for i in range(12)]
+        irrs = np.nan_to_num(self.aggregates.monthly['ghi_mean_wm2']).tolist()
 
         bars = ax.bar(months, irrs, color='gold', edgecolor='orange', alpha=0.8)
 
@@ -419,18 +386,19 @@ class SolarGenerationAnalyzer:
 
     def _plot_power_distribution(self, output_dir: Path) -> None:
         """Grafica de distribucion de potencia."""
-        if self.df is None:
+        if self.df is None or self.aggregates is None:
             return
 
         fig, ax = plt.subplots(figsize=(12, 6))
 
         power = self.df['ac_power_kw'].values
+        stats = self.aggregates.stats['power']
         ax.hist(power, bins=50, color='steelblue', edgecolor='navy', alpha=0.8)
 
-        ax.axvline(power.mean(), color='red', linestyle='--', linewidth=2,
-                  label=f'Promedio: {power.mean():.1f} kW')
-        ax.axvline(np.median(power), color='green', linestyle='--', linewidth=2,
-                  label=f'Mediana: {np.median(power):.1f} kW')
+        ax.axvline(stats['promedio'], color='red', linestyle='--', linewidth=2,
+                  label=f"Promedio: {stats['promedio']:.1f} kW")
+        ax.axvline(stats['mediana'], color='green', linestyle='--', linewidth=2,
+                  label=f"Mediana: {stats['mediana']:.1f} kW")
 
         ax.set_xlabel('Potencia (kW)', fontsize=11, fontweight='bold')
         ax.set_ylabel('Frecuencia (horas)', fontsize=11, fontweight='bold')
@@ -445,7 +413,7 @@ class SolarGenerationAnalyzer:
 
     def _plot_monthly_timeseries(self, output_dir: Path) -> None:
         """Grafica de series temporales por mes."""
-        if self.df is None:
+        if self.df is None or self.aggregates is None:
             return
 
         fig, axes = plt.subplots(3, 4, figsize=(16, 10))
@@ -457,8 +425,7 @@ class SolarGenerationAnalyzer:
             col = (month_num - 1) % 4
             ax = axes[row, col]
 
-            month_mask = self.df.index.month == month_num
-            month_data = self.df[month_mask]
+            month_data = self.df[self.aggregates.month_mask(month_num)]
 
             if len(month_data) > 0:
                 ax.plot(month_data.index, month_data['ac_power_kw'].values,
@@ -480,19 +447,20 @@ class SolarGenerationAnalyzer:
 
     def _plot_temp_power_correlation(self, output_dir: Path) -> None:
         """Grafica de correlacion temperatura vs potencia."""
-        if self.df is None:
+        if self.df is None or self.aggregates is None:
             return
 
         fig, ax = plt.subplots(figsize=(10, 7))
 
         scatter = ax.scatter(self.df['temp_air_c'], self.df['ac_power_kw'],
-                           c=self.df.index.month, cmap='viridis', alpha=0.5, s=10)
+                           c=self.aggregates.row_month, cmap='viridis', alpha=0.5, s=10)
 
         # Linea de tendencia
         z = np.polyfit(self.df['temp_air_c'].dropna(),
                       self.df['ac_power_kw'][self.df['temp_air_c'].notna()], 2)
         p = np.poly1d(z)
-        temp_range = np.linspace(self.df['temp_air_c'].min(), self.df['temp_air_c'].max(), 100)
+        temp_stats = self.aggregates.stats['temp']
+        temp_range = np.linspace(temp_stats['min'], temp_stats['max'], 100)
         ax.plot(temp_range, p(temp_range), "r--", linewidth=2, alpha=0.8, label='Tendencia')
 
         ax.set_xlabel('Temperatura (°C)', fontsize=11, fontweight='bold')
@@ -0,0 +1,330 @@
+"""
+Agregados cacheados de una serie de generacion solar (una sola pasada).
+
+Los resumenes de main.py (SolarGenerationAnalyzer), las consultas de
+utils.py y los scripts de verificacion agrupaban o filtraban el DataFrame
+completo en cada llamada (resample diario/mensual, groupby por hora, mascaras
+por fecha). Aqui se calculan una vez, con NumPy, sobre las filas ordenadas:
+
+- Tabla diaria: energia, potencia media/maxima, temperatura e irradiancia
+- Tabla por mes calendario y por mes del ano (1..12)
+- Perfil por hora del dia (potencia y energia medias)
+- Estadisticos de cada columna (media, mediana, cuartiles, desviacion)
+- Limites de filas por dia y mes de cada fila (perfiles y mascaras sin escanear)
+
+``get_aggregates(df)`` reutiliza los agregados mientras el DataFrame no
+cambie; ``load_solar_csv(path)`` cachea ademas la lectura del CSV por
+(ruta, mtime, tamano) para que varios scripts del mismo proceso compartan
+DataFrame y agregados.
+
+Uso:
+    df, agg = load_solar_csv("data/oe2/Generacionsolar/pv_generation_timeseries.csv")
+    agg.daily_series("energy_kwh")      # pd.Series por dia
+    agg.hourly["power_mean_kw"]         # (24,)
+    agg.day_frame(df, fecha)            # filas de un dia sin mascara booleana
+"""
+
+from __future__ import annotations
+
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_COLUMNS: Dict[str, str] = {
+    "energy": "ac_energy_kwh",
+    "power": "ac_power_kw",
+    "temp": "temp_air_c",
+    "ghi": "ghi_wm2",
+}
+STAT_NAMES = ("promedio", "mediana", "max", "min", "std", "q25", "q75")
+
+# Por id(df): DataFrame no es hashable; la entrada se borra al liberarse el DataFrame
+_AGGREGATE_CACHE: Dict[int, Tuple[Any, "SolarAggregates"]] = {}
+_CSV_CACHE: Dict[Tuple[str, str], Tuple[Tuple[float, int], pd.DataFrame]] = {}
+
+
+def _column_stats(values: np.ndarray) -> Dict[str, float]:
+    """Mismos estadisticos que pandas (std con ddof=1, cuartiles lineales), sin NaN."""
+    x = values[~np.isnan(values)]
+    if x.size == 0:
+        return {name: float("nan") for name in STAT_NAMES}
+    q25, median, q75 = np.percentile(x, [25, 50, 75])
+    return {
+        "promedio": float(x.mean()),
+        "mediana": float(median),
+        "max": float(x.max()),
+        "min": float(x.min()),
+        "std": float(x.std(ddof=1)) if x.size > 1 else float("nan"),
+        "q25": float(q25),
+        "q75": float(q75),
+    }
+
+
+def _group_tables(
+    values: Mapping[str, np.ndarray],
+    starts: np.ndarray,
+    counts: np.ndarray,
+    reduce_max: bool = True,
+) -> Dict[str, np.ndarray]:
+    """Suma/media/max/min por grupo de filas contiguas (reduceat), ignorando NaN como pandas."""
+    tables: Dict[str, np.ndarray] = {}
+    for key, x in values.items():
+        valid = ~np.isnan(x)
+        if len(x):
+            sums = np.add.reduceat(np.where(valid, x, 0.0), starts)
+            n_valid = np.add.reduceat(valid.astype(np.int64), starts)
+        else:
+            sums = n_valid = np.zeros(0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / n_valid
+        if key == "energy":
+            tables["energy_kwh"] = sums
+            continue
+        name = {"power": "power_mean_kw", "temp": "temp_mean_c", "ghi": "ghi_mean_wm2"}[key]
+        tables[name] = means
+        if reduce_max:
+            x_max = np.where(n_valid > 0, np.maximum.reduceat(np.where(valid, x, -np.inf), starts), np.nan)
+            tables[name.replace("_mean_", "_max_")] = x_max
+            if key == "temp":
+                x_min = np.minimum.reduceat(np.where(valid, x, np.inf), starts)
+                tables["temp_min_c"] = np.where(n_valid > 0, x_min, np.nan)
+    tables["n_rows"] = counts
+    return tables
+
+
+@dataclass(frozen=True)
+class SolarAggregates:
+    """Tablas diaria, mensual y horaria de una serie de generacion solar."""
+
+    columns: Dict[str, str]
+    order: Optional[np.ndarray]             # Permutacion que ordena las filas (None si ya ordenadas)
+    dates: pd.DatetimeIndex                 # Un elemento por dia (medianoche, misma zona horaria)
+    day_bounds: np.ndarray                  # (n_dias + 1,) limites de filas ordenadas por dia
+    row_month: np.ndarray                   # (n_filas,) mes 1..12 de cada fila (orden original)
+    daily: Dict[str, np.ndarray]
+    calendar_months: pd.DatetimeIndex       # Fin de cada mes calendario (como resample('ME'))
+    calendar_monthly: Dict[str, np.ndarray]
+    monthly: Dict[str, np.ndarray]          # Por mes del ano (indice 0 = enero)
+    hourly: Dict[str, np.ndarray]           # Por hora del dia (24,)
+    stats: Dict[str, Dict[str, float]]      # Por columna logica ('energy', 'power', ...)
+    annual: Dict[str, float] = field(default_factory=dict)
+    dt_hours: float = 1.0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: Optional[Mapping[str, str]] = None) -> "SolarAggregates":
+        """Calcula todos los agregados en una pasada sobre un DataFrame con DatetimeIndex."""
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise ValueError("El DataFrame debe tener un DatetimeIndex")
+        mapping = {k: v for k, v in (columns or DEFAULT_COLUMNS).items() if v in df.columns}
+        if "energy" not in mapping and "power" not in mapping:
+            raise ValueError(f"Se requiere '{DEFAULT_COLUMNS['energy']}' o '{DEFAULT_COLUMNS['power']}'")
+
+        index = df.index
+        order: Optional[np.ndarray] = None
+        if not index.is_monotonic_increasing:
+            order = np.argsort(index.asi8, kind="stable")
+            index = index[order]
+        raw = {k: df[c].to_numpy(dtype=np.float64) for k, c in mapping.items()}
+        values = {k: (x[order] if order is not None else x) for k, x in raw.items()}
+        n = len(index)
+
+        # Dias: limites de filas contiguas con la misma fecha local
+        day_keys = index.normalize()
+        change = np.flatnonzero(day_keys.asi8[1:] != day_keys.asi8[:-1]) + 1 if n else np.zeros(0, dtype=np.int64)
+        day_starts = np.concatenate([[0], change]).astype(np.int64) if n else np.zeros(0, dtype=np.int64)
+        day_bounds = np.append(day_starts, n)
+        day_counts = np.diff(day_bounds)
+        dates = day_keys[day_starts]
+        daily = _group_tables(values, day_starts, day_counts)
+
+        # Meses calendario a partir de la tabla diaria
+        ym = dates.year.to_numpy() * 12 + dates.month.to_numpy() - 1
+        month_change = np.flatnonzero(ym[1:] != ym[:-1]) + 1
+        month_day_starts = np.concatenate([[0], month_change]).astype(np.int64) if len(ym) else np.zeros(0, dtype=np.int64)
+        month_row_starts = day_bounds[month_day_starts]
+        month_counts = np.diff(np.append(month_row_starts, n))
+        calendar_monthly = _group_tables(values, month_row_starts, month_counts, reduce_max=False)
+        calendar_months = (dates[month_day_starts] + pd.offsets.MonthEnd(0)).normalize()
+
+        # Mes del ano (1..12) y hora del dia: bincount sobre todas las filas
+        row_month = df.index.month.to_numpy()
+        month = row_month[order] if order is not None else row_month
+        hour = index.hour.to_numpy()
+        month_n = np.bincount(month, minlength=13)[1:]
+        hour_n = np.bincount(hour, minlength=24)
+        monthly: Dict[str, np.ndarray] = {"n_rows": month_n}
+        hourly: Dict[str, np.ndarray] = {"n_rows": hour_n}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for key, x in values.items():
+                # NaN: fuera de sumas y conteos (como resample/groupby de pandas)
+                valid = ~np.isnan(x)
+                x0 = np.where(valid, x, 0.0)
+                m_sum = np.bincount(month, weights=x0, minlength=13)[1:]
+                m_valid = np.bincount(month, weights=valid, minlength=13)[1:]
+                h_mean = np.bincount(hour, weights=x0, minlength=24) / np.bincount(hour, weights=valid, minlength=24)
+                if key == "energy":
+                    monthly["energy_kwh"] = m_sum
+                    hourly["energy_mean_kwh"] = h_mean
+                    continue
+                name = {"power": "power_mean_kw", "temp": "temp_mean_c", "ghi": "ghi_mean_wm2"}[key]
+                monthly[name] = m_sum / m_valid
+                hourly[name] = h_mean
+                if key == "power":
+                    p_max = np.full(12, -np.inf)
+                    np.maximum.at(p_max, month[valid] - 1, x[valid])
+                    monthly["power_max_kw"] = np.where(m_valid > 0, p_max, np.nan)
+
+        # Dias entre la primera y la ultima fecha de cada mes del ano (como main.py)
+        day_month = dates.month.to_numpy() - 1
+        day_ord = (dates.tz_localize(None) if dates.tz is not None else dates).as_unit("s").asi8 // 86_400
+        first = np.full(12, np.iinfo(np.int64).max)
+        last = np.full(12, np.iinfo(np.int64).min)
+        np.minimum.at(first, day_month, day_ord)
+        np.maximum.at(last, day_month, day_ord)
+        monthly["span_days"] = np.where(month_n > 0, last - first + 1, 0)
+
+        stats = {key: _column_stats(x) for key, x in values.items()}
+        energy = values.get("energy")
+        annual = {
+            "energy_kwh": float(np.nansum(energy)) if energy is not None else float("nan"),
+            "n_rows": float(n),
+            "n_days": float(len(dates)),
+        }
+        return cls(
+            columns=mapping,
+            order=order,
+            dates=dates,
+            day_bounds=day_bounds,
+            row_month=row_month,
+            daily=daily,
+            calendar_months=calendar_months,
+            calendar_monthly=calendar_monthly,
+            monthly=monthly,
+            hourly=hourly,
+            stats=stats,
+            annual=annual,
+            dt_hours=float((index[1] - index[0]).total_seconds() / 3600) if n > 1 else 1.0,
+        )
+
+    # ------------------------------------------------------------------
+    # Vistas pandas (tablas pequenas, no recorren el DataFrame)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _gap_fill(name: str) -> float:
+        # Como resample: sumas de periodos sin filas valen 0, medias/maximos NaN
+        return 0.0 if name in ("energy_kwh", "n_rows") else float("nan")
+
+    def daily_series(self, name: str = "energy_kwh") -> pd.Series:
+        """Tabla diaria como Series indexada por fecha (equivale a resample('D')).
+
+        Los dias sin filas (huecos de la serie) aparecen con 0 kWh de energia
+        y NaN en medias/maximos, igual que ``resample('D')``.
+        """
+        series = pd.Series(self.daily[name], index=self.dates)
+        if len(self.dates) == 0:
+            return series
+        full = pd.date_range(self.dates[0], self.dates[-1], freq="D")
+        if len(full) == len(self.dates):
+            return series
+        return series.reindex(full, fill_value=self._gap_fill(name))
+
+    def calendar_monthly_series(self, name: str = "energy_kwh") -> pd.Series:
+        """Tabla por mes calendario indexada por fin de mes (equivale a resample('ME')).
+
+        Los meses sin filas aparecen con 0 kWh (NaN en medias), como ``resample('ME')``.
+        """
+        series = pd.Series(self.calendar_monthly[name], index=self.calendar_months)
+        if len(self.calendar_months) == 0:
+            return series
+        full = pd.date_range(self.calendar_months[0], self.calendar_months[-1], freq="ME")
+        if len(full) == len(self.calendar_months):
+            return series
+        return series.reindex(full, fill_value=self._gap_fill(name))
+
+    def hourly_series(self, name: str = "power_mean_kw") -> pd.Series:
+        """Perfil por hora del dia (solo horas presentes), como groupby(index.hour)."""
+        present = self.hourly["n_rows"] > 0
+        return pd.Series(self.hourly[name][present], index=pd.Index(np.flatnonzero(present)))
+
+    def representative_days(self) -> Dict[str, Tuple[pd.Timestamp, float]]:
+        """Dias de maxima, minima y mediana energia: {'despejado': (fecha, kWh), ...}.
+
+        Usa ``daily_series``: un dia sin filas cuenta como 0 kWh (como resample('D')).
+        """
+        daily = self.daily_series("energy_kwh")
+        energy = daily.to_numpy()
+        dates = daily.index
+        i_max = int(np.argmax(energy))
+        i_min = int(np.argmin(energy))
+        i_med = int(np.argmin(np.abs(energy - np.median(energy))))
+        return {
+            "despejado": (dates[i_max], float(energy[i_max])),
+            "nublado": (dates[i_min], float(energy[i_min])),
+            "templado": (dates[i_med], float(energy[i_med])),
+        }
+
+    def day_rows(self, date: Any) -> np.ndarray:
+        """Posiciones (en el orden original del DataFrame) de las filas de una fecha."""
+        day = pd.Timestamp(date).date()
+        pos = int(np.searchsorted(self.dates.date, day))
+        if pos >= len(self.dates) or self.dates[pos].date() != day:
+            return np.zeros(0, dtype=np.int64)
+        rows = np.arange(self.day_bounds[pos], self.day_bounds[pos + 1])
+        return self.order[rows] if self.order is not None else rows
+
+    def day_frame(self, df: pd.DataFrame, date: Any) -> pd.DataFrame:
+        """Filas de una fecha (equivale a df[df.index.date == fecha])."""
+        return df.iloc[self.day_rows(date)]
+
+    def month_mask(self, month: int) -> np.ndarray:
+        """Mascara de filas del mes del ano (equivale a df.index.month == mes)."""
+        return self.row_month == month
+
+
+def _fingerprint(df: pd.DataFrame, columns: Mapping[str, str]) -> Tuple[Any, ...]:
+    """Huella barata para invalidar el cache si el DataFrame cambia."""
+    used = [c for c in columns.values() if c in df.columns]
+    sums = tuple(float(np.nansum(df[c].to_numpy(dtype=np.float64))) for c in used)
+    index = df.index
+    bounds = (index[0], index[-1]) if len(index) else ()
+    return (len(df), tuple(used), bounds, sums)
+
+
+def get_aggregates(df: pd.DataFrame, columns: Optional[Mapping[str, str]] = None) -> SolarAggregates:
+    """Agregados del DataFrame, reutilizados mientras sus columnas no cambien."""
+    mapping = dict(columns or DEFAULT_COLUMNS)
+    key = (tuple(sorted(mapping.items())), _fingerprint(df, mapping))
+    hit = _AGGREGATE_CACHE.get(id(df))
+    if hit is not None and hit[0] == key:
+        return hit[1]
+    aggregates = SolarAggregates.from_frame(df, mapping)
+    if id(df) not in _AGGREGATE_CACHE:
+        weakref.finalize(df, _AGGREGATE_CACHE.pop, id(df), None)
+    _AGGREGATE_CACHE[id(df)] = (key, aggregates)
+    return aggregates
+
+
+def load_solar_csv(
+    csv_path: str | Path,
+    index_col: str = "datetime",
+    columns: Optional[Mapping[str, str]] = None,
+) -> Tuple[pd.DataFrame, SolarAggregates]:
+    """Lee el CSV de generacion (cacheado por ruta, mtime y tamano) y sus agregados."""
+    path = Path(csv_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Archivo no encontrado: {csv_path}")
+    stat = path.stat()
+    key = (str(path.resolve()), index_col)
+    signature = (stat.st_mtime, stat.st_size)
+    cached = _CSV_CACHE.get(key)
+    if cached is not None and cached[0] == signature:
+        df = cached[1]
+    else:
+        df = pd.read_csv(path, index_col=index_col, parse_dates=True)
+        _CSV_CACHE[key] = (signature, df)
+    return df, get_aggregates(df, columns)
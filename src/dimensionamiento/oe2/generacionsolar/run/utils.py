@@ -6,15 +6,25 @@ Proporciona funciones helper para:
 - Consultas rapidas
 - Exportar resultados
 - Generar reportes
+
+Las consultas leen los agregados cacheados de solar_aggregates (una pasada
+por DataFrame) en lugar de re-agrupar la serie en cada llamada.
 """
 
 from __future__ import annotations
 
+import sys
 from pathlib import Path
 from typing import Optional, Dict, Any
 import pandas as pd
 import json
 
+try:
+    from .solar_aggregates import get_aggregates, load_solar_csv
+except ImportError:  # Ejecucion directa: python .../run/utils.py
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from solar_aggregates import get_aggregates, load_solar_csv  # type: ignore[no-redef]
+
 
 def cargar_generacion_solar(csv_path: Optional[str] = None) -> pd.DataFrame:
     """Cargar datos de generacion solar desde CSV.
@@ -23,80 +33,72 @@ def cargar_generacion_solar(csv_path: Optional[str] = None) -> pd.DataFrame:
         csv_path: Ruta al archivo CSV (default: data/oe2/Generacionsolar/...)
     
     Returns:
-        DataFrame con los datos
+        DataFrame con los datos (compartido por el cache de lectura: copiar antes de modificar)
     """
     if csv_path is None:
         csv_path = "data/oe2/Generacionsolar/pv_generation_timeseries.csv"
     
-    path = Path(csv_path)
-    if not path.exists():
-        raise FileNotFoundError(f"Archivo no encontrado: {csv_path}")
-    
-    df = pd.read_csv(csv_path, index_col='datetime', parse_dates=True)
+    df, _ = load_solar_csv(csv_path)
     
     return df
 
 
 def energia_total_anual(df: pd.DataFrame) -> float:
     """Obtener energia total anual en kWh."""
-    return df['ac_energy_kwh'].sum()
+    return get_aggregates(df).annual['energy_kwh']
 
 
 def energia_por_mes(df: pd.DataFrame) -> pd.Series:
     """Obtener energia mensual."""
-    return df['ac_energy_kwh'].resample('ME').sum()
+    return get_aggregates(df).calendar_monthly_series('energy_kwh')
 
 
 def energia_por_dia(df: pd.DataFrame) -> pd.Series:
     """Obtener energia diaria."""
-    return df['ac_energy_kwh'].resample('D').sum()
+    return get_aggregates(df).daily_series('energy_kwh')
 
 
 def potencia_promedio(df: pd.DataFrame) -> float:
     """Obtener potencia promedio en kW."""
-    return df['ac_power_kw'].mean()
+    return get_aggregates(df).stats['power']['promedio']
 
 
 def potencia_maxima(df: pd.DataFrame) -> float:
     """Obtener potencia maxima en kW."""
-    return df['ac_power_kw'].max()
+    return get_aggregates(df).stats['power']['max']
 
 
 def temperatura_promedio(df: pd.DataFrame) -> float:
     """Obtener temperatura promedio en °C."""
-    return df['temp_air_c'].mean()
+    return get_aggregates(df).stats['temp']['promedio']
 
 
 def irradiancia_promedio(df: pd.DataFrame) -> float:
     """Obtener irradiancia promedio en W/m²."""
-    return df['ghi_wm2'].mean()
+    return get_aggregates(df).stats['ghi']['promedio']
 
 
 def dia_mas_despejado(df: pd.DataFrame) -> tuple:
     """Encontrar el dia con mas generacion."""
-    daily = df['ac_energy_kwh'].resample('D').sum()
-    idx = daily.idxmax()
-    return idx.date(), daily.max()
+    idx, energia = get_aggregates(df).representative_days()['despejado']
+    return idx.date(), energia
 
 
 def dia_mas_nublado(df: pd.DataFrame) -> tuple:
     """Encontrar el dia con menos generacion."""
-    daily = df['ac_energy_kwh'].resample('D').sum()
-    idx = daily.idxmin()
-    return idx.date(), daily.min()
+    idx, energia = get_aggregates(df).representative_days()['nublado']
+    return idx.date(), energia
 
 
 def dia_templado(df: pd.DataFrame) -> tuple:
     """Encontrar el dia con energia mediana."""
-    daily = df['ac_energy_kwh'].resample('D').sum()
-    median = daily.median()
-    idx = (daily - median).abs().idxmin()
-    return idx.date(), daily[idx]
+    idx, energia = get_aggregates(df).representative_days()['templado']
+    return idx.date(), energia
 
 
 def perfil_horario(df: pd.DataFrame, fecha: pd.Timestamp) -> pd.DataFrame:
     """Obtener perfil horario para una fecha especifica."""
-    day_data = df[df.index.date == fecha.date()]
+    day_data = get_aggregates(df).day_frame(df, fecha)
     return day_data[['ac_energy_kwh', 'ac_power_kw', 'temp_air_c', 'ghi_wm2']]
 
 
@@ -105,17 +107,18 @@ def exportar_resumen_json(df: pd.DataFrame, output_path: Optional[str] = None) -
     if output_path is None:
         output_path = "data/oe2/Generacionsolar/resumen_generacion.json"
     
-    daily = df['ac_energy_kwh'].resample('D').sum()
-    monthly = df['ac_energy_kwh'].resample('ME').sum()
+    agg = get_aggregates(df)
+    daily = agg.daily_series('energy_kwh')
+    monthly = agg.calendar_monthly_series('energy_kwh')
     
     resumen = {
         'anual': {
-            'energia_kwh': float(df['ac_energy_kwh'].sum()),
-            'energia_mwh': float(df['ac_energy_kwh'].sum() / 1000),
-            'potencia_promedio_kw': float(df['ac_power_kw'].mean()),
-            'potencia_maxima_kw': float(df['ac_power_kw'].max()),
-            'temperatura_promedio_c': float(df['temp_air_c'].mean()),
-            'irradiancia_promedio_wm2': float(df['ghi_wm2'].mean()),
+            'energia_kwh': float(agg.annual['energy_kwh']),
+            'energia_mwh': float(agg.annual['energy_kwh'] / 1000),
+            'potencia_promedio_kw': float(agg.stats['power']['promedio']),
+            'potencia_maxima_kw': float(agg.stats['power']['max']),
+            'temperatura_promedio_c': float(agg.stats['temp']['promedio']),
+            'irradiancia_promedio_wm2': float(agg.stats['ghi']['promedio']),
         },
         'diario': {
             'promedio_kwh': float(daily.mean()),
@@ -123,7 +126,7 @@ def exportar_resumen_json(df: pd.DataFrame, output_path: Optional[str] = None) -
             'minimo_kwh': float(daily.min()),
         },
         'mensual': {
-            mes: float(valor) for mes, valor in monthly.items()
+            mes.strftime('%Y-%m'): float(valor) for mes, valor in monthly.items()
         },
     }
     
@@ -6,10 +6,17 @@ Verificar que:
 3. Horario local correcto (Iquitos PET = UTC-5)
 """
 
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+try:
+    from .solar_aggregates import get_aggregates, load_solar_csv
+except ImportError:  # Ejecucion directa: python .../run/verificar_energia_vs_potencia_real.py
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from solar_aggregates import get_aggregates, load_solar_csv  # type: ignore[no-redef]
+
 # Cargar datos simulados
 pv_file = Path('data/oe2/Generacionsolar/pv_generation_timeseries.csv')
 
@@ -17,8 +24,10 @@ if not pv_file.exists():
     print(f"ERROR: Archivo no encontrado: {pv_file}")
     exit(1)
 
-df = pd.read_csv(pv_file, index_col='datetime', parse_dates=True)
-df.index = pd.to_datetime(df.index, utc=True).tz_convert('America/Lima')
+df, _ = load_solar_csv(pv_file)
+# set_axis devuelve un DataFrame nuevo: no altera el compartido por el cache de lectura
+df = df.set_axis(pd.to_datetime(df.index, utc=True).tz_convert('America/Lima'))
+agg = get_aggregates(df)
 
 print("\n" + "="*80)
 print("[OK] VERIFICACION DE GENERACION SOLAR REAL - IQUITOS")
@@ -71,20 +80,19 @@ print(f"\n" + "="*80)
 print("[OK] VERIFICACION 2: GENERACION SOLAR SOLO DURANTE EL DIA")
 print("="*80)
 
-# Extraer hora local
-df['hora'] = df.index.hour
-
-# Agrupar por hora
-hourly_avg = df.groupby('hora')[['ac_power_kw', 'ac_energy_kwh']].mean()
+# Medias por hora local (tabla horaria de los agregados)
+hourly_power = agg.hourly['power_mean_kw']
+hourly_energy = agg.hourly['energy_mean_kwh']
+hours_present = agg.hourly['n_rows'] > 0
 
 print(f"\n🌅 Potencia AC media por hora del dia (Iquitos - Horario Local PET):")
 print(f"\n  Hora Local | Potencia media (kW) | Energia media (kWh)")
 print(f"  " + "-"*60)
 
 for hora in range(24):
-    if hora in hourly_avg.index:
-        power = hourly_avg.loc[hora, 'ac_power_kw']
-        energy = hourly_avg.loc[hora, 'ac_energy_kwh']
+    if hours_present[hora]:
+        power = hourly_power[hora]
+        energy = hourly_energy[hora]
 
         if power > 50:  # Solo mostrar horas con produccion significativa
             print(f"  {hora:02d}:00     | {power:19,.1f} | {energy:19,.4f}", end="")
@@ -146,15 +154,15 @@ print(f"\n" + "="*80)
 print("[OK] CONCLUSIONES")
 print("="*80)
 
-annual_energy = df['ac_energy_kwh'].sum()
-annual_power_max = df['ac_power_kw'].sum()
-avg_power = df['ac_power_kw'].mean()
+annual_energy = agg.annual['energy_kwh']
+max_power_kw = agg.stats['power']['max']
+avg_power = agg.stats['power']['promedio']
 
 print(f"\n[CHART] Generacion anual:")
 print(f"  - Energia total: {annual_energy:,.0f} kWh ({annual_energy/1e6:.2f} GWh)")
-print(f"  - Potencia maxima: {df['ac_power_kw'].max():,.1f} kW")
+print(f"  - Potencia maxima: {max_power_kw:,.1f} kW")
 print(f"  - Potencia media: {avg_power:,.1f} kW")
-print(f"  - Horas equivalentes: {annual_energy / df['ac_power_kw'].max():,.0f} h/ano")
+print(f"  - Horas equivalentes: {annual_energy / max_power_kw:,.0f} h/ano")
 
 print(f"\n[OK] DATOS VALIDADOS:")
 print(f"  [OK] Energia ≠ Potencia (E en kWh, P en kW)")
@@ -134,11 +134,12 @@ print()
 # Verificar energia por hora del dia
 print("[CHART] ENERGIA PROMEDIO POR HORA DEL DIA (todos los dias 2024):")
 print()
-hourly_avg = df.groupby('hora')['potencia_kw'].mean().sort_values(ascending=False)
+hourly_mean = df.groupby('hora')['potencia_kw'].mean()  # Una pasada; el bucle solo indexa
+hourly_avg = hourly_mean.sort_values(ascending=False)
 print("Hora Local | Potencia promedio (kW)")
 print("-" * 40)
 for hour in range(24):
-    avg_power = df[df['hora'] == hour]['potencia_kw'].mean()
+    avg_power = hourly_mean.get(hour, np.nan)
     print(f"{hour:02d}:00     | {avg_power:15,.1f} kW", end="")
     if hour in [11, 12, 13]:
         print(" <- PICO", end="")
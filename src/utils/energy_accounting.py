@@ -0,0 +1,194 @@
+"""
+Contabilidad vectorizada de tarifas OSINERGMIN (HP/HFP) y CO2 para flujos energeticos.
+
+Un solo punto para asignar tarifa por hora, costo de red y emisiones/evitaciones
+de CO2 (factor 0.4521 kg/kWh, sistema termico aislado de Iquitos). Recibe
+arreglos completos de flujos (pv_to_ev, bess_to_mall, grid_to_ev, ...) y
+devuelve los arreglos de costo/CO2 y sus totales en una sola llamada; las
+mascaras HP por hora del ano se cachean por (longitud, resolucion, horario).
+
+Uso:
+    from src.utils.energy_accounting import account_flows
+    acc = account_flows({'grid_to_ev': g_ev, 'grid_to_mall': g_mall, 'bess_to_mall': b_mall})
+    acc.cost('grid_to_ev', 'grid_to_mall')     # S/. por hora
+    acc.total_co2('bess_to_mall')              # kg CO2 en el periodo
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+# Tarifas OSINERGMIN MT3 - Electro Oriente S.A. (Iquitos)
+TARIFA_ENERGIA_HP_SOLES = 0.45     # Hora Punta: S/.0.45/kWh
+TARIFA_ENERGIA_HFP_SOLES = 0.28    # Hora Fuera de Punta: S/.0.28/kWh
+HORA_INICIO_HP = 18
+HORA_FIN_HP = 23  # Exclusivo (hasta las 22:59)
+FACTOR_CO2_KG_KWH = 0.4521  # kg CO2 / kWh (sistema termico aislado)
+
+
+@dataclass(frozen=True)
+class TariffSchedule:
+    """Tarifa de energia por bloque horario y factor de emision de la red."""
+
+    hp_soles_kwh: float = TARIFA_ENERGIA_HP_SOLES
+    hfp_soles_kwh: float = TARIFA_ENERGIA_HFP_SOLES
+    hp_start_hour: int = HORA_INICIO_HP
+    hp_end_hour: int = HORA_FIN_HP  # Exclusivo
+    co2_kg_kwh: float = FACTOR_CO2_KG_KWH
+
+
+DEFAULT_TARIFF = TariffSchedule()
+
+
+@lru_cache(maxsize=64)
+def _cached_hp_mask(n_steps: int, steps_per_hour: int, start_hour: int, hp_start: int, hp_end: int) -> np.ndarray:
+    hour_of_day = (start_hour + np.arange(n_steps) // steps_per_hour) % 24
+    mask = (hour_of_day >= hp_start) & (hour_of_day < hp_end)
+    mask.setflags(write=False)
+    return mask
+
+
+def hp_mask(
+    n_steps: int,
+    schedule: TariffSchedule = DEFAULT_TARIFF,
+    steps_per_hour: int = 1,
+    start_hour: int = 0,
+    hour_of_day: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Mascara booleana de Hora Punta.
+
+    Sin ``hour_of_day`` se asume una serie regular que empieza a ``start_hour``
+    (por defecto 1 de enero 00:00) y la mascara se cachea (solo lectura).
+    """
+    if hour_of_day is not None:
+        h = np.asarray(hour_of_day)
+        return (h >= schedule.hp_start_hour) & (h < schedule.hp_end_hour)
+    return _cached_hp_mask(n_steps, steps_per_hour, start_hour, schedule.hp_start_hour, schedule.hp_end_hour)
+
+
+@lru_cache(maxsize=64)
+def _cached_tariff(n_steps: int, steps_per_hour: int, start_hour: int, schedule: TariffSchedule) -> np.ndarray:
+    mask = hp_mask(n_steps, schedule, steps_per_hour, start_hour)
+    tariff = np.where(mask, schedule.hp_soles_kwh, schedule.hfp_soles_kwh)
+    tariff.setflags(write=False)
+    return tariff
+
+
+def tariff_array(
+    n_steps: int,
+    schedule: TariffSchedule = DEFAULT_TARIFF,
+    steps_per_hour: int = 1,
+    start_hour: int = 0,
+    hour_of_day: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Tarifa S/./kWh por paso (cacheada si la serie es regular)."""
+    if hour_of_day is not None:
+        mask = hp_mask(n_steps, schedule, hour_of_day=hour_of_day)
+        return np.where(mask, schedule.hp_soles_kwh, schedule.hfp_soles_kwh)
+    return _cached_tariff(n_steps, steps_per_hour, start_hour, schedule)
+
+
+@dataclass
+class FlowAccounting:
+    """Costo (S/.) y CO2 (kg) por flujo y por paso, calculados con la tarifa del paso."""
+
+    is_hp: np.ndarray
+    tariff_soles_kwh: np.ndarray
+    co2_kg_kwh: float
+    flows: Dict[str, np.ndarray] = field(default_factory=dict)
+    cost_soles: Dict[str, np.ndarray] = field(default_factory=dict)
+    co2_kg: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def energy(self, *names: str) -> np.ndarray:
+        """Suma por paso de los flujos indicados (kWh)."""
+        return self._sum(self.flows, names)
+
+    def cost(self, *names: str) -> np.ndarray:
+        """Suma por paso del costo de los flujos indicados (S/.)."""
+        return self._sum(self.cost_soles, names)
+
+    def co2(self, *names: str) -> np.ndarray:
+        """Suma por paso del CO2 de los flujos indicados (kg)."""
+        return self._sum(self.co2_kg, names)
+
+    def total_energy(self, *names: str) -> float:
+        return float(self.energy(*names).sum())
+
+    def total_cost(self, *names: str) -> float:
+        return float(self.cost(*names).sum())
+
+    def total_co2(self, *names: str) -> float:
+        return float(self.co2(*names).sum())
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """Totales del periodo por flujo: energia, costo, CO2 y energia/costo en HP."""
+        return {
+            name: {
+                'energy_kwh': float(values.sum()),
+                'energy_hp_kwh': float(values[self.is_hp].sum()),
+                'cost_soles': float(self.cost_soles[name].sum()),
+                'cost_hp_soles': float(self.cost_soles[name][self.is_hp].sum()),
+                'co2_kg': float(self.co2_kg[name].sum()),
+            }
+            for name, values in self.flows.items()
+        }
+
+    def _sum(self, table: Dict[str, np.ndarray], names: tuple) -> np.ndarray:
+        keys = names or tuple(table)
+        if not keys:
+            return np.zeros_like(self.tariff_soles_kwh)
+        out = np.array(table[keys[0]], dtype=np.float64)
+        for key in keys[1:]:
+            out += table[key]
+        return out
+
+
+def account_flows(
+    flows: Mapping[str, Any],
+    schedule: TariffSchedule = DEFAULT_TARIFF,
+    steps_per_hour: int = 1,
+    start_hour: int = 0,
+    hour_of_day: Optional[np.ndarray] = None,
+    min_flow_kwh: float = 0.0,
+) -> FlowAccounting:
+    """
+    Calcula costo y CO2 de todos los flujos en una sola operacion matricial.
+
+    Args:
+        flows: {nombre: arreglo kWh por paso}; todos de igual longitud
+        schedule: Tarifas HP/HFP y factor CO2
+        steps_per_hour: Pasos por hora (1 = horario, 4 = 15 min)
+        start_hour: Hora del dia del primer paso (serie regular)
+        hour_of_day: Hora del dia por paso (si la serie no es regular)
+        min_flow_kwh: Flujos <= este valor no se contabilizan (ruido numerico)
+
+    Returns:
+        FlowAccounting con arreglos por flujo y helpers de suma/totales
+    """
+    names = list(flows)
+    if not names:
+        raise ValueError("Se requiere al menos un flujo")
+    matrix = np.vstack([np.asarray(flows[n], dtype=np.float64).ravel() for n in names])
+    n_steps = matrix.shape[1]
+    if min_flow_kwh > 0:
+        matrix = np.where(matrix > min_flow_kwh, matrix, 0.0)
+
+    is_hp = hp_mask(n_steps, schedule, steps_per_hour, start_hour, hour_of_day)
+    tariff = tariff_array(n_steps, schedule, steps_per_hour, start_hour, hour_of_day)
+    if len(tariff) != n_steps:
+        raise ValueError(f"hour_of_day ({len(tariff)}) no coincide con los flujos ({n_steps})")
+    cost = matrix * tariff
+    co2 = matrix * schedule.co2_kg_kwh
+
+    return FlowAccounting(
+        is_hp=is_hp,
+        tariff_soles_kwh=tariff,
+        co2_kg_kwh=schedule.co2_kg_kwh,
+        flows=dict(zip(names, matrix)),
+        cost_soles=dict(zip(names, cost)),
+        co2_kg=dict(zip(names, co2)),
+    )
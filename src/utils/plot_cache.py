@@ -0,0 +1,231 @@
+"""
+Pipeline de graficas con cache y renderizado perezoso.
+
+Cada figura se describe como una ``PlotTask`` (funcion de dibujo + datos de
+entrada). Antes de dibujar se calcula una huella SHA-256 de los arrays,
+DataFrames y parametros de la tarea (mas el codigo fuente de la funcion);
+si coincide con la registrada en el manifiesto ``.plot_cache.json`` del
+directorio de salida y el PNG existe, la figura se omite. Las figuras
+pendientes se dibujan en un pool de procesos con backend ``Agg``.
+
+Seleccion de graficas (``parse_plot_selection``):
+    True / None / "all"      -> todas
+    False / "none"           -> ninguna (equivale a --no-plots)
+    "only:soc,co2"           -> solo las indicadas (nombre corto o nombre del PNG)
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+MANIFEST_NAME = ".plot_cache.json"
+
+PlotSelection = Union[None, bool, str, Iterable[str]]
+
+
+@dataclass(frozen=True)
+class PlotTask:
+    """Figura a generar: ``func(out_dir, *args)`` debe guardar ``out_dir / filename``.
+
+    ``func`` debe ser una funcion de nivel de modulo (serializable con pickle)
+    para poder ejecutarse en otro proceso.
+    """
+
+    name: str
+    filename: str
+    func: Callable[..., Any]
+    args: Tuple[Any, ...] = ()
+
+
+def parse_plot_selection(spec: PlotSelection) -> Optional[FrozenSet[str]]:
+    """
+    Normaliza la seleccion de graficas.
+
+    Returns:
+        None para todas las graficas, o el conjunto de nombres seleccionados
+        (vacio = ninguna).
+    """
+    if spec is None or spec is True:
+        return None
+    if spec is False:
+        return frozenset()
+    if isinstance(spec, str):
+        value = spec.strip()
+        if value.lower() in ("", "all", "todas"):
+            return None
+        if value.lower() in ("none", "no", "ninguna"):
+            return frozenset()
+        if value.lower().startswith("only:"):
+            value = value[5:]
+        return frozenset(n.strip() for n in value.split(",") if n.strip())
+    return frozenset(str(n) for n in spec)
+
+
+def add_plot_arguments(parser: argparse.ArgumentParser) -> None:
+    """Agrega ``--no-plots`` y ``--plots=only:x,y`` a un parser de CLI."""
+    parser.add_argument("--no-plots", action="store_true",
+                        help="No generar graficas")
+    parser.add_argument("--plots", default="all",
+                        help="Graficas a generar: all | none | only:nombre1,nombre2")
+
+
+def plot_spec_from_args(args: argparse.Namespace) -> PlotSelection:
+    """Traduce los argumentos de ``add_plot_arguments`` a una seleccion."""
+    return False if args.no_plots else args.plots
+
+
+def _update_hash(h: "hashlib._Hash", obj: Any) -> None:
+    """Alimenta el hash con una representacion estable de ``obj``."""
+    if isinstance(obj, np.ndarray):
+        arr = np.ascontiguousarray(obj)
+        h.update(f"nd|{arr.dtype.str}|{arr.shape}|".encode())
+        if arr.dtype.kind == "O":
+            h.update(repr(arr.tolist()).encode())
+        else:
+            h.update(arr.tobytes())
+    elif isinstance(obj, pd.DataFrame):
+        h.update(f"df|{list(map(str, obj.columns))}|{obj.shape}|".encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(f"sr|{obj.name}|{len(obj)}|".encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        h.update(f"dc|{type(obj).__name__}|".encode())
+        _update_hash(h, dataclasses.asdict(obj))
+    elif isinstance(obj, dict):
+        h.update(b"dict|")
+        for key in sorted(obj, key=str):
+            h.update(f"{key}=".encode())
+            _update_hash(h, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"seq|{len(obj)}|".encode())
+        for item in obj:
+            _update_hash(h, item)
+    elif inspect.isfunction(obj) or inspect.ismethod(obj):
+        # El codigo de dibujo forma parte de la huella: editar la funcion invalida el cache
+        h.update(f"fn|{obj.__module__}.{obj.__qualname__}|".encode())
+        try:
+            h.update(inspect.getsource(obj).encode())
+        except (OSError, TypeError):
+            pass
+    else:
+        h.update(f"{type(obj).__name__}|{obj!r}|".encode())
+
+
+def plot_fingerprint(task: PlotTask) -> str:
+    """Huella SHA-256 de una figura (datos + parametros + codigo de dibujo)."""
+    h = hashlib.sha256()
+    h.update(f"{task.filename}|".encode())
+    _update_hash(h, task.func)
+    _update_hash(h, task.args)
+    return h.hexdigest()
+
+
+def _load_manifest(out_dir: Path) -> Dict[str, str]:
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(out_dir: Path, manifest: Dict[str, str]) -> None:
+    with open(out_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def _init_agg_backend() -> None:
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+
+def _run_task(out_dir: Path, task: PlotTask) -> None:
+    task.func(out_dir, *task.args)
+
+
+def _is_selected(task: PlotTask, selection: Optional[FrozenSet[str]]) -> bool:
+    if selection is None:
+        return True
+    return task.name in selection or Path(task.filename).stem in selection or task.filename in selection
+
+
+def render_plot_tasks(
+    tasks: Sequence[PlotTask],
+    out_dir: Path,
+    plots: PlotSelection = True,
+    max_workers: Optional[int] = None,
+    force: bool = False,
+) -> Dict[str, str]:
+    """
+    Genera las figuras seleccionadas que no estan al dia en ``out_dir``.
+
+    Args:
+        tasks: Figuras candidatas
+        out_dir: Directorio de salida (contiene el manifiesto de huellas)
+        plots: Seleccion (ver ``parse_plot_selection``)
+        max_workers: Procesos del pool (default: min(pendientes, CPUs));
+            1 dibuja en el proceso actual
+        force: Ignorar el cache y redibujar todo lo seleccionado
+
+    Returns:
+        Estado por archivo: "cached", "rendered", "skipped" o "error: ..."
+    """
+    selection = parse_plot_selection(plots)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest(out_dir)
+
+    status: Dict[str, str] = {}
+    pending: List[Tuple[PlotTask, str]] = []
+    for task in tasks:
+        if not _is_selected(task, selection):
+            status[task.filename] = "skipped"
+            continue
+        fingerprint = plot_fingerprint(task)
+        if not force and manifest.get(task.filename) == fingerprint and (out_dir / task.filename).exists():
+            status[task.filename] = "cached"
+            print(f"  [=] Grafica sin cambios (cache): {task.filename}")
+            continue
+        pending.append((task, fingerprint))
+
+    if pending:
+        workers = max_workers or min(len(pending), os.cpu_count() or 1)
+        if workers <= 1 or len(pending) == 1:
+            outcomes = []
+            for task, _ in pending:
+                try:
+                    _run_task(out_dir, task)
+                    outcomes.append(None)
+                except Exception as e:
+                    outcomes.append(e)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_agg_backend) as pool:
+                futures = [pool.submit(_run_task, out_dir, task) for task, _ in pending]
+                outcomes = [f.exception() for f in futures]
+
+        for (task, fingerprint), error in zip(pending, outcomes):
+            if error is None:
+                manifest[task.filename] = fingerprint
+                status[task.filename] = "rendered"
+            else:
+                manifest.pop(task.filename, None)
+                status[task.filename] = f"error: {error}"
+                print(f"  [X] Error en grafica {task.filename}: {error}")
+        _save_manifest(out_dir, manifest)
+
+    return status